@@ -6,12 +6,16 @@ from aci.cli.commands import (
     create_project,
     create_random_api_key,
     delete_app,
+    export_catalog,
     fuzzy_test_function_execution,
     get_app,
+    import_catalog,
     rename_app,
+    sync_catalog,
     update_agent,
     upsert_app,
     upsert_functions,
+    worker,
 )
 from aci.common.logging_setup import setup_logging
 
@@ -31,9 +35,13 @@ cli.add_command(get_app.get_app)
 cli.add_command(rename_app.rename_app)
 cli.add_command(delete_app.delete_app)
 cli.add_command(upsert_functions.upsert_functions)
+cli.add_command(sync_catalog.sync_catalog)
+cli.add_command(export_catalog.export_catalog)
+cli.add_command(import_catalog.import_catalog)
 cli.add_command(create_random_api_key.create_random_api_key)
 cli.add_command(fuzzy_test_function_execution.fuzzy_test_function_execution)
 cli.add_command(billing.populate_subscription_plans)
+cli.add_command(worker.worker)
 
 if __name__ == "__main__":
     cli()
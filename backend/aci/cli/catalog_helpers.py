@@ -0,0 +1,63 @@
+"""
+Helpers shared by the commands that upsert apps and functions into the catalog
+(upsert-app, upsert-functions and sync-catalog).
+"""
+
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
+
+from aci.common.db import crud
+from aci.common.db.sql_models import App, Function
+from aci.common.schemas.app import AppEmbeddingFields, AppUpsert
+from aci.common.schemas.function import FunctionEmbeddingFields, FunctionUpsert
+
+
+def render_template_to_string(template_path: Path, secrets: dict[str, str]) -> str:
+    """
+    Render a Jinja2 template with the provided secrets and return as string.
+    """
+    env = Environment(
+        loader=FileSystemLoader(template_path.parent),
+        undefined=StrictUndefined,  # Raise error if any placeholders are missing
+        autoescape=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+
+    template: Template = env.get_template(template_path.name)
+    rendered_content: str = template.render(secrets)
+    return rendered_content
+
+
+def need_app_embedding_regeneration(existing_app: App, new_app: AppUpsert) -> bool:
+    """
+    Compares the stored embedding hash, falls back to comparing the fields for apps upserted before
+    embedding hashes were introduced.
+    """
+    if existing_app.embedding_hash is not None:
+        return bool(existing_app.embedding_hash != crud.apps.compute_app_embedding_hash(new_app))
+
+    old_app = AppUpsert.model_validate(existing_app, from_attributes=True)
+    fields = set(AppEmbeddingFields.model_fields.keys())
+    return bool(old_app.model_dump(include=fields) != new_app.model_dump(include=fields))
+
+
+def need_function_embedding_regeneration(
+    existing_function: Function, new_func: FunctionUpsert
+) -> bool:
+    """
+    Determines if the function embedding should be regenerated based on changes in the
+    fields used for embedding (name, description, parameters).
+    Compares the stored embedding hash, falls back to comparing the fields for functions upserted
+    before embedding hashes were introduced.
+    """
+    if existing_function.embedding_hash is not None:
+        return bool(
+            existing_function.embedding_hash
+            != crud.functions.compute_function_embedding_hash(new_func)
+        )
+
+    old_func = FunctionUpsert.model_validate(existing_function, from_attributes=True)
+    fields = set(FunctionEmbeddingFields.model_fields.keys())
+    return bool(old_func.model_dump(include=fields) != new_func.model_dump(include=fields))
@@ -0,0 +1,126 @@
+"""
+Versioned catalog snapshot file, used by the export-catalog and import-catalog commands.
+
+A snapshot is a zip archive containing:
+- manifest.json: format version, embedding dimension and number of apps/functions
+- apps.json / functions.json: one json object per row (deflate compressed)
+- apps.embeddings.f32 / functions.embeddings.f32: the embeddings of the rows in the same order, as
+  contiguous little-endian float32 values (num_rows * embedding_dimension)
+"""
+
+import json
+import sys
+import zipfile
+from array import array
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+import click
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+MANIFEST_FILE_NAME = "manifest.json"
+APPS_FILE_NAME = "apps.json"
+APPS_EMBEDDINGS_FILE_NAME = "apps.embeddings.f32"
+FUNCTIONS_FILE_NAME = "functions.json"
+FUNCTIONS_EMBEDDINGS_FILE_NAME = "functions.embeddings.f32"
+
+
+@dataclass
+class CatalogSnapshot:
+    embedding_dimension: int
+    apps: list[dict] = field(default_factory=list)
+    apps_embeddings: list[list[float]] = field(default_factory=list)
+    # each function row has an "app_name" key instead of the app id
+    functions: list[dict] = field(default_factory=list)
+    functions_embeddings: list[list[float]] = field(default_factory=list)
+
+
+def write_snapshot(snapshot_file: Path, snapshot: CatalogSnapshot) -> None:
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "embedding_dimension": snapshot.embedding_dimension,
+        "num_apps": len(snapshot.apps),
+        "num_functions": len(snapshot.functions),
+        "exported_at": datetime.now(UTC).isoformat(),
+    }
+    with zipfile.ZipFile(snapshot_file, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(MANIFEST_FILE_NAME, json.dumps(manifest, indent=2))
+        zf.writestr(APPS_FILE_NAME, json.dumps(snapshot.apps))
+        zf.writestr(FUNCTIONS_FILE_NAME, json.dumps(snapshot.functions))
+        # float32 doesn't compress well, store as is
+        zf.writestr(
+            APPS_EMBEDDINGS_FILE_NAME,
+            _embeddings_to_bytes(snapshot.apps_embeddings, snapshot.embedding_dimension),
+            compress_type=zipfile.ZIP_STORED,
+        )
+        zf.writestr(
+            FUNCTIONS_EMBEDDINGS_FILE_NAME,
+            _embeddings_to_bytes(snapshot.functions_embeddings, snapshot.embedding_dimension),
+            compress_type=zipfile.ZIP_STORED,
+        )
+
+
+def read_snapshot(snapshot_file: Path) -> CatalogSnapshot:
+    with zipfile.ZipFile(snapshot_file, "r") as zf:
+        manifest = json.loads(zf.read(MANIFEST_FILE_NAME))
+        if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise click.ClickException(
+                f"unsupported snapshot format version={manifest.get('format_version')}, "
+                f"expected version={SNAPSHOT_FORMAT_VERSION}"
+            )
+        embedding_dimension = int(manifest["embedding_dimension"])
+
+        snapshot = CatalogSnapshot(
+            embedding_dimension=embedding_dimension,
+            apps=json.loads(zf.read(APPS_FILE_NAME)),
+            apps_embeddings=_embeddings_from_bytes(
+                zf.read(APPS_EMBEDDINGS_FILE_NAME), embedding_dimension
+            ),
+            functions=json.loads(zf.read(FUNCTIONS_FILE_NAME)),
+            functions_embeddings=_embeddings_from_bytes(
+                zf.read(FUNCTIONS_EMBEDDINGS_FILE_NAME), embedding_dimension
+            ),
+        )
+
+    if len(snapshot.apps) != manifest["num_apps"] or len(snapshot.apps_embeddings) != len(
+        snapshot.apps
+    ):
+        raise click.ClickException("number of apps or app embeddings doesn't match the manifest")
+    if len(snapshot.functions) != manifest["num_functions"] or len(
+        snapshot.functions_embeddings
+    ) != len(snapshot.functions):
+        raise click.ClickException(
+            "number of functions or function embeddings doesn't match the manifest"
+        )
+
+    return snapshot
+
+
+def _embeddings_to_bytes(embeddings: list[list[float]], embedding_dimension: int) -> bytes:
+    values = array("f")
+    for embedding in embeddings:
+        if len(embedding) != embedding_dimension:
+            raise click.ClickException(
+                f"expected embedding dimension={embedding_dimension}, got {len(embedding)}"
+            )
+        values.extend(embedding)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _embeddings_from_bytes(data: bytes, embedding_dimension: int) -> list[list[float]]:
+    values = array("f")
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    if len(values) % embedding_dimension != 0:
+        raise click.ClickException(
+            f"embeddings data size is not a multiple of embedding dimension={embedding_dimension}"
+        )
+    return [
+        values[start : start + embedding_dimension].tolist()
+        for start in range(0, len(values), embedding_dimension)
+    ]
@@ -5,7 +5,7 @@ from aci.cli import config
 from aci.common import utils
 from aci.common.db import crud
 from aci.common.db.sql_models import Plan
-from aci.common.schemas.plans import PlanFeatures, PlanUpdate
+from aci.common.schemas.plans import PlanFeatures, PlanRateLimits, PlanUpdate
 
 console = Console()
 
@@ -30,6 +30,11 @@ PLANS_DATA = [
             developer_seats=1,
             custom_oauth=False,
             log_retention_days=7,
+            rate_limits=PlanRateLimits(
+                api_key_per_minute=60,
+                project_per_minute=120,
+                project_app_per_minute=60,
+            ),
         ).model_dump(),
         is_public=True,
     ),
@@ -45,6 +50,11 @@ PLANS_DATA = [
             developer_seats=5,
             custom_oauth=True,
             log_retention_days=30,
+            rate_limits=PlanRateLimits(
+                api_key_per_minute=600,
+                project_per_minute=1200,
+                project_app_per_minute=600,
+            ),
         ).model_dump(),
         is_public=True,
     ),
@@ -60,6 +70,11 @@ PLANS_DATA = [
             developer_seats=10,
             custom_oauth=True,
             log_retention_days=30,
+            rate_limits=PlanRateLimits(
+                api_key_per_minute=1200,
+                project_per_minute=3000,
+                project_app_per_minute=1200,
+            ),
         ).model_dump(),
         is_public=True,
     ),
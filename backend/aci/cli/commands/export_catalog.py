@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import click
+from rich.console import Console
+
+from aci.cli import config
+from aci.cli.catalog_snapshot import CatalogSnapshot, write_snapshot
+from aci.common import utils
+from aci.common.db import crud
+from aci.common.db.sql_models import EMBEDDING_DIMENSION, App, Function
+
+console = Console()
+
+# columns that are not exported, ids are regenerated (and app ids resolved by app name) on import
+APP_EXCLUDED_COLUMNS = {"id", "embedding", "created_at", "updated_at"}
+FUNCTION_EXCLUDED_COLUMNS = {"id", "app_id", "embedding", "created_at", "updated_at"}
+
+
+@click.command()
+@click.option(
+    "--snapshot-file",
+    "snapshot_file",
+    required=True,
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Path to the catalog snapshot file to write",
+)
+def export_catalog(snapshot_file: Path) -> None:
+    """
+    Export all Apps and Functions, including their embeddings, to a catalog snapshot file that can
+    be loaded into another database with the import-catalog command.
+
+    WARNING: the snapshot contains the apps' security schemes and default credentials (e.g., OAuth2
+    client secrets) in plaintext, handle it like the .app.secrets.json files.
+    """
+    with utils.create_db_session(config.DB_FULL_URL) as db_session:
+        apps = crud.apps.get_apps(db_session, False, False, None, None, None)
+        snapshot = CatalogSnapshot(embedding_dimension=EMBEDDING_DIMENSION)
+        for app in sorted(apps, key=lambda app: app.name):
+            snapshot.apps.append(_row_to_dict(app, APP_EXCLUDED_COLUMNS))
+            snapshot.apps_embeddings.append(list(app.embedding))
+            functions = crud.functions.get_functions_by_app_id(db_session, app.id)
+            for function in sorted(functions, key=lambda function: function.name):
+                snapshot.functions.append(
+                    {"app_name": app.name, **_row_to_dict(function, FUNCTION_EXCLUDED_COLUMNS)}
+                )
+                snapshot.functions_embeddings.append(list(function.embedding))
+
+    write_snapshot(snapshot_file, snapshot)
+    console.rule(
+        f"Exported {len(snapshot.apps)} apps and {len(snapshot.functions)} functions to "
+        f"{snapshot_file}"
+    )
+
+
+def _row_to_dict(row: App | Function, excluded_columns: set[str]) -> dict:
+    return {
+        column.name: getattr(row, column.key)
+        for column in row.__table__.columns
+        if column.name not in excluded_columns
+    }
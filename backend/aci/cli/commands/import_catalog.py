@@ -0,0 +1,222 @@
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, cast
+from uuid import uuid4
+
+import click
+from psycopg import sql
+from rich.console import Console
+from sqlalchemy import Column, Table, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.schema import ScalarElementColumnDefault
+
+from aci.cli import config
+from aci.cli.catalog_snapshot import CatalogSnapshot, read_snapshot
+from aci.common import utils
+from aci.common.db.sql_models import EMBEDDING_DIMENSION, App, Function
+
+console = Console()
+
+STAGING_APPS_TABLE = "catalog_import_apps"
+STAGING_FUNCTIONS_TABLE = "catalog_import_functions"
+
+
+@click.command()
+@click.option(
+    "--snapshot-file",
+    "snapshot_file",
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to the catalog snapshot file created by the export-catalog command",
+)
+@click.option(
+    "--skip-dry-run",
+    is_flag=True,
+    help="Provide this flag to run the command and apply changes to the database",
+)
+def import_catalog(snapshot_file: Path, skip_dry_run: bool) -> None:
+    """
+    Import all Apps and Functions, including their embeddings, from a catalog snapshot file.
+
+    The rows are loaded with COPY into temporary staging tables and then inserted or updated by
+    name, in a single transaction. No embeddings are generated.
+    """
+    snapshot = read_snapshot(snapshot_file)
+    if snapshot.embedding_dimension != EMBEDDING_DIMENSION:
+        raise click.ClickException(
+            f"snapshot embedding dimension={snapshot.embedding_dimension} doesn't match the "
+            f"database embedding dimension={EMBEDDING_DIMENSION}"
+        )
+
+    with utils.create_db_session(config.DB_FULL_URL) as db_session:
+        import_catalog_helper(db_session, snapshot)
+
+        if not skip_dry_run:
+            console.rule(
+                f"Provide [bold green]--skip-dry-run[/bold green] to import "
+                f"{len(snapshot.apps)} apps and {len(snapshot.functions)} functions"
+            )
+            db_session.rollback()
+        else:
+            db_session.commit()
+            console.rule(
+                f"Imported {len(snapshot.apps)} apps and {len(snapshot.functions)} functions"
+            )
+
+
+def import_catalog_helper(db_session: Session, snapshot: CatalogSnapshot) -> None:
+    db_session.execute(
+        text(
+            f"CREATE TEMP TABLE {STAGING_APPS_TABLE} (LIKE apps INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+    )
+    db_session.execute(
+        text(
+            f"CREATE TEMP TABLE {STAGING_FUNCTIONS_TABLE} (LIKE functions INCLUDING DEFAULTS) "
+            "ON COMMIT DROP"
+        )
+    )
+    # functions reference their app by name in the snapshot, the app id is resolved on insert
+    db_session.execute(
+        text(
+            f"ALTER TABLE {STAGING_FUNCTIONS_TABLE} ALTER COLUMN app_id DROP NOT NULL, "
+            "ADD COLUMN app_name VARCHAR NOT NULL"
+        )
+    )
+
+    app_columns = _get_imported_columns(App)
+    _copy_rows(
+        db_session,
+        STAGING_APPS_TABLE,
+        app_columns,
+        (
+            _to_copy_row(app, embedding, app_columns)
+            for app, embedding in zip(snapshot.apps, snapshot.apps_embeddings, strict=True)
+        ),
+    )
+    function_columns = _get_imported_columns(Function, excluded_columns={"app_id"})
+    _copy_rows(
+        db_session,
+        STAGING_FUNCTIONS_TABLE,
+        function_columns,
+        (
+            [*_to_copy_row(function, embedding, function_columns), function["app_name"]]
+            for function, embedding in zip(
+                snapshot.functions, snapshot.functions_embeddings, strict=True
+            )
+        ),
+        extra_column_names=["app_name"],
+    )
+
+    num_orphan_functions = db_session.execute(
+        text(
+            f"SELECT count(*) FROM {STAGING_FUNCTIONS_TABLE} f "
+            "WHERE NOT EXISTS (SELECT 1 FROM apps WHERE apps.name = f.app_name) "
+            f"AND NOT EXISTS (SELECT 1 FROM {STAGING_APPS_TABLE} a WHERE a.name = f.app_name)"
+        )
+    ).scalar_one()
+    if num_orphan_functions > 0:
+        raise click.ClickException(
+            f"{num_orphan_functions} functions in the snapshot reference apps that don't exist"
+        )
+
+    app_column_names = [column.name for column in app_columns]
+    db_session.execute(
+        text(
+            f"INSERT INTO apps ({', '.join(app_column_names)}) "
+            f"SELECT {', '.join(app_column_names)} FROM {STAGING_APPS_TABLE} "
+            f"ON CONFLICT (name) DO UPDATE SET {_update_set_clause(app_column_names)}"
+        )
+    )
+    function_column_names = [column.name for column in function_columns]
+    db_session.execute(
+        text(
+            f"INSERT INTO functions (app_id, {', '.join(function_column_names)}) "
+            f"SELECT apps.id, {', '.join(f'f.{name}' for name in function_column_names)} "
+            f"FROM {STAGING_FUNCTIONS_TABLE} f JOIN apps ON apps.name = f.app_name "
+            f"ON CONFLICT (name) DO UPDATE SET "
+            f"app_id = EXCLUDED.app_id, {_update_set_clause(function_column_names)}"
+        )
+    )
+
+
+def _get_imported_columns(
+    model: type[App | Function], excluded_columns: set[str] | None = None
+) -> list[Column]:
+    """
+    Columns loaded from the snapshot, in the order: id, <content columns>, embedding.
+    created_at/updated_at are left to their server defaults.
+    """
+    table = cast(Table, model.__table__)
+    content_columns = [
+        column
+        for column in table.columns
+        if column.name
+        not in {"id", "embedding", "created_at", "updated_at", *(excluded_columns or set())}
+    ]
+    return [table.c.id, *content_columns, table.c.embedding]
+
+
+def _to_copy_row(row: dict, embedding: list[float], columns: list[Column]) -> list[Any]:
+    """
+    Build the values of a snapshot row in the order of the columns, with a new id.
+    Columns missing from the snapshot row (e.g., added after the snapshot was exported) get their
+    (scalar) default, or null if they're nullable.
+    """
+    values_by_column_name = {**row, "id": uuid4(), "embedding": embedding}
+    return [
+        values_by_column_name[column.name]
+        if column.name in values_by_column_name
+        else _get_missing_column_value(column)
+        for column in columns
+    ]
+
+
+def _get_missing_column_value(column: Column) -> Any:
+    if isinstance(column.default, ScalarElementColumnDefault):
+        return column.default.arg
+    if column.nullable:
+        return None
+    raise click.ClickException(
+        f"snapshot rows have no value for column={column.table.name}.{column.name}, which is not "
+        "nullable and has no default, export the snapshot again from an up to date database"
+    )
+
+
+def _copy_rows(
+    db_session: Session,
+    table_name: str,
+    columns: list[Column],
+    rows: Iterable[list[Any]],
+    extra_column_names: list[str] | None = None,
+) -> None:
+    """
+    COPY rows into a table, using the same session (and transaction) as the ORM.
+    Values are converted with the column types' bind processors, e.g., to encrypt secrets, convert
+    enums to their database labels and format embeddings. Values of the extra columns come last in
+    each row and are copied as is.
+    """
+    dialect = db_session.get_bind().dialect
+    bind_processors = [column.type.bind_processor(dialect) for column in columns]
+    column_names = [column.name for column in columns] + (extra_column_names or [])
+
+    copy_statement = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table_name), sql.SQL(", ").join(map(sql.Identifier, column_names))
+    )
+    dbapi_connection = db_session.connection().connection.driver_connection
+    if dbapi_connection is None:
+        raise RuntimeError("the db session has no driver connection")
+    with dbapi_connection.cursor() as cursor, cursor.copy(copy_statement) as copy:
+        for row in rows:
+            values = [
+                bind_processor(value) if bind_processor is not None and value is not None else value
+                for bind_processor, value in zip(bind_processors, row[: len(columns)], strict=True)
+            ]
+            copy.write_row(values + row[len(columns) :])
+
+
+def _update_set_clause(column_names: list[str]) -> str:
+    return ", ".join(
+        [f"{name} = EXCLUDED.{name}" for name in column_names if name not in ("id", "name")]
+        + ["updated_at = now()"]
+    )
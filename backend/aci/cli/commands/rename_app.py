@@ -87,6 +87,8 @@ def rename_app(
         try:
             # Update app name
             app.name = new_name
+            # the names are part of the upserted content, the next upserts compare the fields again
+            app.content_hash = None
             console.print(f"Updating app name from '{current_name}' to '{new_name}'")
 
             # Update function names
@@ -97,6 +99,7 @@ def rename_app(
                     f"Updating function name from '{function.name}' to '{new_function_name}'"
                 )
                 function.name = new_function_name
+                function.content_hash = None
 
             # Update app configurations's enabled_functions (if the functions are from the app)
             for app_config in app_configurations:
@@ -0,0 +1,360 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import click
+from deepdiff import DeepDiff
+from openai import OpenAI
+from rich.console import Console
+from rich.table import Table
+from sqlalchemy.orm import Session
+
+from aci.cli import config
+from aci.cli.catalog_helpers import (
+    need_app_embedding_regeneration,
+    need_function_embedding_regeneration,
+    render_template_to_string,
+)
+from aci.common import embeddings, utils
+from aci.common.db import crud
+from aci.common.db.sql_models import App, Function
+from aci.common.schemas.app import AppEmbeddingFields, AppUpsert
+from aci.common.schemas.function import FunctionEmbeddingFields, FunctionUpsert
+
+console = Console()
+
+openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
+
+APP_FILE_NAME = "app.json"
+FUNCTIONS_FILE_NAME = "functions.json"
+SECRETS_FILE_NAME = ".app.secrets.json"
+
+
+@dataclass
+class LoadedApp:
+    app_dir: Path
+    app_upsert: AppUpsert | None = None
+    functions_upsert: list[FunctionUpsert] = field(default_factory=list)
+    error: str | None = None
+
+
+@dataclass
+class CatalogSyncPlan:
+    """
+    What needs to be written for each app and function.
+    An embedding of None means the embedding needs to be (re)generated.
+    """
+
+    apps_to_write: list[AppUpsert] = field(default_factory=list)
+    apps_embeddings: list[list[float] | None] = field(default_factory=list)
+    functions_to_write: list[FunctionUpsert] = field(default_factory=list)
+    functions_embeddings: list[list[float] | None] = field(default_factory=list)
+    # app name -> app operation, and app name -> function operation -> count, for the summary
+    app_operations: dict[str, str] = field(default_factory=dict)
+    function_operations: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+@click.command()
+@click.option(
+    "--apps-dir",
+    "apps_dir",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    default=Path("./apps"),
+    show_default=True,
+    help="Path to the directory containing one sub directory (app.json, functions.json) per app",
+)
+@click.option(
+    "--max-workers",
+    "max_workers",
+    type=int,
+    default=None,
+    help="Number of processes used to load and validate the app and functions files, defaults to the number of CPUs",
+)
+@click.option(
+    "--embedding-concurrency",
+    "embedding_concurrency",
+    type=int,
+    default=4,
+    show_default=True,
+    help="Max number of concurrent embedding requests",
+)
+@click.option(
+    "--skip-dry-run",
+    is_flag=True,
+    help="Provide this flag to run the command and apply changes to the database",
+)
+def sync_catalog(
+    apps_dir: Path, max_workers: int | None, embedding_concurrency: int, skip_dry_run: bool
+) -> None:
+    """
+    Sync all Apps and Functions under the apps directory to the DB.
+
+    All app.json/functions.json files are loaded and validated in parallel (app.json is rendered
+    with the .app.secrets.json file of the app if it exists), diffed against the DB in bulk,
+    embeddings are generated only for the new and changed apps and functions, and all changes are
+    applied in a single transaction.
+    """
+    sync_catalog_helper(apps_dir, max_workers, embedding_concurrency, skip_dry_run)
+
+
+def sync_catalog_helper(
+    apps_dir: Path, max_workers: int | None, embedding_concurrency: int, skip_dry_run: bool
+) -> CatalogSyncPlan:
+    app_dirs = sorted(
+        app_dir for app_dir in apps_dir.iterdir() if (app_dir / APP_FILE_NAME).is_file()
+    )
+    console.rule(f"Loading {len(app_dirs)} apps from {apps_dir}")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        loaded_apps = list(executor.map(_load_app_dir, app_dirs))
+
+    _validate_loaded_apps(loaded_apps)
+
+    with utils.create_db_session(config.DB_FULL_URL) as db_session:
+        plan = _plan_catalog_sync(db_session, loaded_apps)
+
+        if not skip_dry_run:
+            _print_summary(plan)
+            console.rule("Provide [bold green]--skip-dry-run[/bold green] to sync the catalog")
+            return plan
+
+        _apply_catalog_sync(db_session, plan, embedding_concurrency)
+        db_session.commit()
+
+    _print_summary(plan)
+    console.rule("[bold green]Synced catalog[/bold green]")
+    return plan
+
+
+def _load_app_dir(app_dir: Path) -> LoadedApp:
+    """
+    Load and validate the app and functions files of an app directory.
+    Runs in a worker process, errors are returned instead of raised so all of them can be reported.
+    """
+    try:
+        secrets = {}
+        secrets_file = app_dir / SECRETS_FILE_NAME
+        if secrets_file.is_file():
+            with open(secrets_file) as f:
+                secrets = json.load(f)
+
+        app_upsert = AppUpsert.model_validate(
+            json.loads(render_template_to_string(app_dir / APP_FILE_NAME, secrets))
+        )
+
+        functions_upsert: list[FunctionUpsert] = []
+        functions_file = app_dir / FUNCTIONS_FILE_NAME
+        if functions_file.is_file():
+            with open(functions_file) as f:
+                functions_upsert = [
+                    FunctionUpsert.model_validate(function_data) for function_data in json.load(f)
+                ]
+
+        for function_upsert in functions_upsert:
+            if utils.parse_app_name_from_function_name(function_upsert.name) != app_upsert.name:
+                raise ValueError(
+                    f"Function={function_upsert.name} does not belong to App={app_upsert.name}"
+                )
+
+        return LoadedApp(app_dir=app_dir, app_upsert=app_upsert, functions_upsert=functions_upsert)
+    except Exception as e:
+        return LoadedApp(app_dir=app_dir, error=f"{type(e).__name__}: {e}")
+
+
+def _validate_loaded_apps(loaded_apps: list[LoadedApp]) -> None:
+    errors = [f"{app.app_dir}: {app.error}" for app in loaded_apps if app.error is not None]
+
+    app_names: set[str] = set()
+    function_names: set[str] = set()
+    for loaded_app in loaded_apps:
+        if loaded_app.app_upsert is None:
+            continue
+        if loaded_app.app_upsert.name in app_names:
+            errors.append(f"{loaded_app.app_dir}: duplicate App={loaded_app.app_upsert.name}")
+        app_names.add(loaded_app.app_upsert.name)
+        for function_upsert in loaded_app.functions_upsert:
+            if function_upsert.name in function_names:
+                errors.append(f"{loaded_app.app_dir}: duplicate Function={function_upsert.name}")
+            function_names.add(function_upsert.name)
+
+    if errors:
+        raise click.ClickException(
+            "Failed to load the catalog, nothing was synced:\n" + "\n".join(errors)
+        )
+
+
+def _plan_catalog_sync(db_session: Session, loaded_apps: list[LoadedApp]) -> CatalogSyncPlan:
+    """
+    Diff all loaded apps and functions against the DB, loading the existing rows with one query
+    for apps and one for functions and comparing content hashes.
+    """
+    existing_apps_by_name: dict[str, App] = {
+        app.name: app for app in crud.apps.get_apps(db_session, False, False, None, None, None)
+    }
+    existing_functions_by_name: dict[str, Function] = {
+        function.name: function
+        for function in crud.functions.get_functions_by_names(
+            db_session,
+            [
+                function_upsert.name
+                for loaded_app in loaded_apps
+                for function_upsert in loaded_app.functions_upsert
+            ],
+        )
+    }
+
+    plan = CatalogSyncPlan()
+    for loaded_app in loaded_apps:
+        app_upsert = loaded_app.app_upsert
+        assert app_upsert is not None
+
+        existing_app = existing_apps_by_name.get(app_upsert.name)
+        if existing_app is None:
+            plan.app_operations[app_upsert.name] = "Create"
+            plan.apps_to_write.append(app_upsert)
+            plan.apps_embeddings.append(None)
+        elif existing_app.content_hash == crud.apps.compute_app_content_hash(app_upsert):
+            plan.app_operations[app_upsert.name] = "No changes"
+        else:
+            plan.app_operations[app_upsert.name] = "Update"
+            _print_diff(
+                f"App={app_upsert.name}",
+                AppUpsert.model_validate(existing_app, from_attributes=True),
+                app_upsert,
+            )
+            plan.apps_to_write.append(app_upsert)
+            plan.apps_embeddings.append(
+                None
+                if need_app_embedding_regeneration(existing_app, app_upsert)
+                else existing_app.embedding
+            )
+
+        function_operations = {"Create": 0, "Update": 0, "No changes": 0}
+        for function_upsert in loaded_app.functions_upsert:
+            existing_function = existing_functions_by_name.get(function_upsert.name)
+            if existing_function is None:
+                function_operations["Create"] += 1
+                plan.functions_to_write.append(function_upsert)
+                plan.functions_embeddings.append(None)
+            elif existing_function.content_hash == crud.functions.compute_function_content_hash(
+                function_upsert
+            ):
+                function_operations["No changes"] += 1
+            else:
+                function_operations["Update"] += 1
+                _print_diff(
+                    f"Function={function_upsert.name}",
+                    FunctionUpsert.model_validate(existing_function, from_attributes=True),
+                    function_upsert,
+                )
+                plan.functions_to_write.append(function_upsert)
+                plan.functions_embeddings.append(
+                    None
+                    if need_function_embedding_regeneration(existing_function, function_upsert)
+                    else existing_function.embedding
+                )
+        plan.function_operations[app_upsert.name] = function_operations
+
+    return plan
+
+
+def _apply_catalog_sync(
+    db_session: Session, plan: CatalogSyncPlan, embedding_concurrency: int
+) -> None:
+    apps_to_embed = [
+        app_upsert
+        for app_upsert, embedding in zip(plan.apps_to_write, plan.apps_embeddings, strict=True)
+        if embedding is None
+    ]
+    functions_to_embed = [
+        function_upsert
+        for function_upsert, embedding in zip(
+            plan.functions_to_write, plan.functions_embeddings, strict=True
+        )
+        if embedding is None
+    ]
+    console.rule(
+        f"Generating embeddings for {len(apps_to_embed)} apps and {len(functions_to_embed)} functions"
+    )
+    new_apps_embeddings = iter(
+        embeddings.generate_app_embeddings(
+            [AppEmbeddingFields.model_validate(app.model_dump()) for app in apps_to_embed],
+            openai_client,
+            config.OPENAI_EMBEDDING_MODEL,
+            config.OPENAI_EMBEDDING_DIMENSION,
+            max_concurrency=embedding_concurrency,
+        )
+    )
+    new_functions_embeddings = iter(
+        embeddings.generate_function_embeddings(
+            [
+                FunctionEmbeddingFields.model_validate(func.model_dump())
+                for func in functions_to_embed
+            ],
+            openai_client,
+            config.OPENAI_EMBEDDING_MODEL,
+            config.OPENAI_EMBEDDING_DIMENSION,
+            max_concurrency=embedding_concurrency,
+        )
+    )
+    # Note: the order matters here because the embeddings need to match the apps/functions
+    apps_embeddings = [
+        embedding if embedding is not None else next(new_apps_embeddings)
+        for embedding in plan.apps_embeddings
+    ]
+    functions_embeddings = [
+        embedding if embedding is not None else next(new_functions_embeddings)
+        for embedding in plan.functions_embeddings
+    ]
+
+    crud.apps.upsert_apps(db_session, plan.apps_to_write, apps_embeddings)
+
+    # apps created above are needed to resolve the app ids of their functions
+    app_names = {
+        utils.parse_app_name_from_function_name(function_upsert.name)
+        for function_upsert in plan.functions_to_write
+    }
+    app_ids_by_name = {
+        app.name: app.id
+        for app in crud.apps.get_apps(db_session, False, False, list(app_names), None, None)
+    }
+    functions_by_app_name: dict[str, tuple[list[FunctionUpsert], list[list[float]]]] = {}
+    for function_upsert, embedding in zip(
+        plan.functions_to_write, functions_embeddings, strict=True
+    ):
+        app_functions, app_embeddings = functions_by_app_name.setdefault(
+            utils.parse_app_name_from_function_name(function_upsert.name), ([], [])
+        )
+        app_functions.append(function_upsert)
+        app_embeddings.append(embedding)
+
+    for app_name, (app_functions, app_embeddings) in functions_by_app_name.items():
+        crud.functions.upsert_functions(
+            db_session, app_ids_by_name[app_name], app_functions, app_embeddings
+        )
+
+
+def _print_diff(
+    title: str, existing: AppUpsert | FunctionUpsert, new: AppUpsert | FunctionUpsert
+) -> None:
+    diff = DeepDiff(existing.model_dump(), new.model_dump(), ignore_order=True)
+    console.rule(f"Will update {title} with the following changes:")
+    # Note: the diff can be empty for rows upserted before content hashes were introduced
+    console.print(diff.pretty() if diff else "(no content changes, storing content hash)")
+
+
+def _print_summary(plan: CatalogSyncPlan) -> None:
+    table = Table(
+        "App Name", "App Operation", "Functions Created", "Functions Updated", "Functions Unchanged"
+    )
+    for app_name, app_operation in plan.app_operations.items():
+        function_operations = plan.function_operations[app_name]
+        table.add_row(
+            app_name,
+            app_operation,
+            str(function_operations["Create"]),
+            str(function_operations["Update"]),
+            str(function_operations["No changes"]),
+        )
+
+    console.print(table)
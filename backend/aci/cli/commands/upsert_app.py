@@ -4,12 +4,12 @@ from uuid import UUID
 
 import click
 from deepdiff import DeepDiff
-from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
 from openai import OpenAI
 from rich.console import Console
 from sqlalchemy.orm import Session
 
 from aci.cli import config
+from aci.cli.catalog_helpers import need_app_embedding_regeneration, render_template_to_string
 from aci.common import embeddings, utils
 from aci.common.db import crud
 from aci.common.db.sql_models import App
@@ -61,7 +61,7 @@ def upsert_app_helper(
             secrets = json.load(f)
     # Render the template in-memory and load JSON data
     try:
-        rendered_content = _render_template_to_string(app_file, secrets)
+        rendered_content = render_template_to_string(app_file, secrets)
     except Exception as e:
         console.print(f"[bold red]Error rendering template, failed to upsert app: {e}[/bold red]")
         raise e
@@ -111,16 +111,18 @@ def update_app_helper(
     If fields used for generating embeddings (name, display_name, provider, description, categories) are changed,
     re-generates the app embedding.
     """
-    existing_app_upsert = AppUpsert.model_validate(existing_app, from_attributes=True)
-    if existing_app_upsert == app_upsert:
+    if existing_app.content_hash == crud.apps.compute_app_content_hash(app_upsert):
         console.rule(f"App={existing_app.name} exists and is up to date")
         return existing_app.id
     else:
         console.rule(f"App={existing_app.name} exists and will be updated")
 
+    # only rebuild the existing app for the diff output once we know it changed
+    existing_app_upsert = AppUpsert.model_validate(existing_app, from_attributes=True)
+
     # Determine if any fields affecting the embedding have changed
     new_embedding = None
-    if _need_embedding_regeneration(existing_app_upsert, app_upsert):
+    if need_app_embedding_regeneration(existing_app, app_upsert):
         new_embedding = embeddings.generate_app_embedding(
             AppEmbeddingFields.model_validate(app_upsert.model_dump()),
             openai_client,
@@ -145,25 +147,3 @@ def update_app_helper(
     console.print(diff.pretty())
 
     return updated_app.id
-
-
-def _render_template_to_string(template_path: Path, secrets: dict[str, str]) -> str:
-    """
-    Render a Jinja2 template with the provided secrets and return as string.
-    """
-    env = Environment(
-        loader=FileSystemLoader(template_path.parent),
-        undefined=StrictUndefined,  # Raise error if any placeholders are missing
-        autoescape=False,
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
-
-    template: Template = env.get_template(template_path.name)
-    rendered_content: str = template.render(secrets)
-    return rendered_content
-
-
-def _need_embedding_regeneration(old_app: AppUpsert, new_app: AppUpsert) -> bool:
-    fields = set(AppEmbeddingFields.model_fields.keys())
-    return bool(old_app.model_dump(include=fields) != new_app.model_dump(include=fields))
@@ -1,5 +1,7 @@
 import json
+from dataclasses import dataclass, field
 from pathlib import Path
+from uuid import UUID
 
 import click
 from deepdiff import DeepDiff
@@ -9,8 +11,10 @@ from rich.table import Table
 from sqlalchemy.orm import Session
 
 from aci.cli import config
+from aci.cli.catalog_helpers import need_function_embedding_regeneration
 from aci.common import embeddings, utils
 from aci.common.db import crud
+from aci.common.db.sql_models import App, Function
 from aci.common.schemas.function import FunctionEmbeddingFields, FunctionUpsert
 
 console = Console()
@@ -40,7 +44,8 @@ def upsert_functions(functions_file: Path, skip_dry_run: bool) -> list[str]:
       - Existing functions that require an update,
       - Functions that are unchanged.
 
-    Batch creation and update operations are performed.
+    Existing functions are loaded in one query and created/updated functions are written with a
+    bulk upsert.
     """
     return upsert_functions_helper(functions_file, skip_dry_run)
 
@@ -56,29 +61,18 @@ def upsert_functions_helper(functions_file: Path, skip_dry_run: bool) -> list[st
         ]
         app_name = _validate_all_functions_belong_to_the_app(functions_upsert)
         console.rule(f"App={app_name}")
-        _validate_app_exists(db_session, app_name)
-
-        new_functions: list[FunctionUpsert] = []
-        existing_functions: list[FunctionUpsert] = []
-
-        for function_upsert in functions_upsert:
-            existing_function = crud.functions.get_function(
-                db_session, function_upsert.name, public_only=False, active_only=False
-            )
-
-            if existing_function is None:
-                new_functions.append(function_upsert)
-            else:
-                existing_functions.append(function_upsert)
-
-        console.rule("Checking functions to create...")
-        functions_created = create_functions_helper(db_session, new_functions)
-        console.rule("Checking functions to update...")
-        functions_updated = update_functions_helper(db_session, existing_functions)
-        # for functions that are in existing_functions but not in functions_updated
-        functions_unchanged = [
-            func.name for func in existing_functions if func.name not in functions_updated
-        ]
+        app = _validate_app_exists(db_session, app_name)
+
+        # load all existing functions of the app in one query and diff them in memory
+        existing_functions_by_name = {
+            function.name: function
+            for function in crud.functions.get_functions_by_app_id(db_session, app.id)
+        }
+
+        console.rule("Checking functions to upsert...")
+        result = upsert_app_functions(
+            db_session, app.id, functions_upsert, existing_functions_by_name
+        )
 
         if not skip_dry_run:
             console.rule("Provide [bold green]--skip-dry-run[/bold green] to upsert functions")
@@ -88,104 +82,109 @@ def upsert_functions_helper(functions_file: Path, skip_dry_run: bool) -> list[st
             console.rule("[bold green]Upserted functions[/bold green]")
 
         table = Table("Function Name", "Operation")
-        for func in functions_created:
+        for func in result.created:
             table.add_row(func, "Create")
-        for func in functions_updated:
+        for func in result.updated:
             table.add_row(func, "Update")
-        for func in functions_unchanged:
+        for func in result.unchanged:
             table.add_row(func, "No changes")
 
         console.print(table)
 
-        return functions_created + functions_updated
+        return result.created + result.updated
 
 
-def create_functions_helper(
-    db_session: Session, functions_upsert: list[FunctionUpsert]
-) -> list[str]:
-    """
-    Batch creates functions in the database.
-    Generates embeddings for each new function and calls the CRUD layer for creation.
-    Returns a list of created function names.
-    """
-    functions_embeddings = embeddings.generate_function_embeddings(
-        [FunctionEmbeddingFields.model_validate(func.model_dump()) for func in functions_upsert],
-        openai_client,
-        embedding_model=config.OPENAI_EMBEDDING_MODEL,
-        embedding_dimension=config.OPENAI_EMBEDDING_DIMENSION,
-    )
-    created_functions = crud.functions.create_functions(
-        db_session, functions_upsert, functions_embeddings
-    )
+@dataclass
+class FunctionsUpsertResult:
+    created: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
 
-    return [func.name for func in created_functions]
 
-
-def update_functions_helper(
-    db_session: Session, functions_upsert: list[FunctionUpsert]
-) -> list[str]:
+def upsert_app_functions(
+    db_session: Session,
+    app_id: UUID,
+    functions_upsert: list[FunctionUpsert],
+    existing_functions_by_name: dict[str, Function],
+) -> FunctionsUpsertResult:
     """
-    Batch updates functions in the database.
-
-    For each function to update, determines if the embedding needs to be regenerated.
-    Regenerates embeddings in batch for those that require it and updates the functions accordingly.
-    Returns a list of updated function names.
+    Diff the functions of an app against the existing ones by content hash, generate embeddings in
+    batch only for the new functions and the functions whose embedding fields changed, and write all
+    created and updated functions with a bulk upsert.
+    DeepDiff output is only computed for functions whose content hash changed.
     """
-    functions_with_new_embeddings: list[FunctionUpsert] = []
-    functions_without_new_embeddings: list[FunctionUpsert] = []
+    result = FunctionsUpsertResult()
+    functions_to_write: list[FunctionUpsert] = []
+    # None means the embedding needs to be (re)generated
+    embeddings_to_write: list[list[float] | None] = []
 
     for function_upsert in functions_upsert:
-        existing_function = crud.functions.get_function(
-            db_session, function_upsert.name, public_only=False, active_only=False
-        )
+        existing_function = existing_functions_by_name.get(function_upsert.name)
         if existing_function is None:
-            raise click.ClickException(f"Function '{function_upsert.name}' not found.")
+            result.created.append(function_upsert.name)
+            functions_to_write.append(function_upsert)
+            embeddings_to_write.append(None)
+            continue
+
+        if existing_function.content_hash == crud.functions.compute_function_content_hash(
+            function_upsert
+        ):
+            result.unchanged.append(function_upsert.name)
+            continue
+
         existing_function_upsert = FunctionUpsert.model_validate(
             existing_function, from_attributes=True
         )
-        if existing_function_upsert == function_upsert:
-            continue
-        else:
-            diff = DeepDiff(
-                existing_function_upsert.model_dump(),
-                function_upsert.model_dump(),
-                ignore_order=True,
-            )
-            console.rule(
-                f"Will update function '{existing_function.name}' with the following changes:"
-            )
-            console.print(diff.pretty())
-
-        if _need_function_embedding_regeneration(existing_function_upsert, function_upsert):
-            functions_with_new_embeddings.append(function_upsert)
-        else:
-            functions_without_new_embeddings.append(function_upsert)
-
-    # Generate new embeddings in batch for functions that require regeneration.
-    functions_embeddings = embeddings.generate_function_embeddings(
-        [
-            FunctionEmbeddingFields.model_validate(func.model_dump())
-            for func in functions_with_new_embeddings
-        ],
-        openai_client,
-        embedding_model=config.OPENAI_EMBEDDING_MODEL,
-        embedding_dimension=config.OPENAI_EMBEDDING_DIMENSION,
-    )
+        diff = DeepDiff(
+            existing_function_upsert.model_dump(),
+            function_upsert.model_dump(),
+            ignore_order=True,
+        )
+        console.rule(f"Will update function '{existing_function.name}' with the following changes:")
+        # Note: the diff can be empty for functions upserted before content hashes were introduced
+        console.print(diff.pretty() if diff else "(no content changes, storing content hash)")
+
+        result.updated.append(function_upsert.name)
+        functions_to_write.append(function_upsert)
+        embeddings_to_write.append(
+            None
+            if need_function_embedding_regeneration(existing_function, function_upsert)
+            else existing_function.embedding
+        )
 
-    # Note: the order matters here because the embeddings need to match the functions
-    functions_updated = crud.functions.update_functions(
-        db_session,
-        functions_with_new_embeddings + functions_without_new_embeddings,
-        functions_embeddings + [None] * len(functions_without_new_embeddings),
+    # Generate new embeddings in batch for functions that require (re)generation.
+    functions_to_embed = [
+        func
+        for func, embedding in zip(functions_to_write, embeddings_to_write, strict=True)
+        if embedding is None
+    ]
+    new_embeddings = iter(
+        embeddings.generate_function_embeddings(
+            [
+                FunctionEmbeddingFields.model_validate(func.model_dump())
+                for func in functions_to_embed
+            ],
+            openai_client,
+            embedding_model=config.OPENAI_EMBEDDING_MODEL,
+            embedding_dimension=config.OPENAI_EMBEDDING_DIMENSION,
+        )
     )
+    # Note: the order matters here because the embeddings need to match the functions
+    functions_embeddings = [
+        embedding if embedding is not None else next(new_embeddings)
+        for embedding in embeddings_to_write
+    ]
 
-    return [func.name for func in functions_updated]
+    crud.functions.upsert_functions(db_session, app_id, functions_to_write, functions_embeddings)
 
+    return result
 
-def _validate_app_exists(db_session: Session, app_name: str) -> None:
+
+def _validate_app_exists(db_session: Session, app_name: str) -> App:
     app = crud.apps.get_app(db_session, app_name, False, False)
     if not app:
         raise click.ClickException(f"App={app_name} does not exist")
+    return app
 
 
 def _validate_all_functions_belong_to_the_app(
@@ -198,14 +197,3 @@ def _validate_all_functions_belong_to_the_app(
         )
 
     return app_names.pop()
-
-
-def _need_function_embedding_regeneration(
-    old_func: FunctionUpsert, new_func: FunctionUpsert
-) -> bool:
-    """
-    Determines if the function embedding should be regenerated based on changes in the
-    fields used for embedding (name, description, parameters).
-    """
-    fields = set(FunctionEmbeddingFields.model_fields.keys())
-    return bool(old_func.model_dump(include=fields) != new_func.model_dump(include=fields))
@@ -0,0 +1,12 @@
+import click
+
+
+@click.command()
+def worker() -> None:
+    """
+    Run a background job worker until it's stopped (SIGINT or SIGTERM).
+    """
+    # imported here, the server config is only required by this command
+    from aci.server.worker import start_worker
+
+    start_worker()
@@ -0,0 +1,50 @@
+import zipfile
+from pathlib import Path
+
+import click
+import pytest
+
+from aci.cli.catalog_snapshot import (
+    MANIFEST_FILE_NAME,
+    CatalogSnapshot,
+    read_snapshot,
+    write_snapshot,
+)
+
+
+def test_write_and_read_snapshot(tmp_path: Path) -> None:
+    snapshot = CatalogSnapshot(
+        embedding_dimension=3,
+        apps=[{"name": "APP_1", "security_schemes": {"no_auth": {}}}],
+        apps_embeddings=[[0.5, 0.25, -1.0]],
+        functions=[
+            {"app_name": "APP_1", "name": "APP_1__FUNC_1"},
+            {"app_name": "APP_1", "name": "APP_1__FUNC_2"},
+        ],
+        functions_embeddings=[[1.0, 2.0, 3.0], [0.125, 0.0, -0.5]],
+    )
+    snapshot_file = tmp_path / "catalog.snapshot"
+
+    write_snapshot(snapshot_file, snapshot)
+
+    assert read_snapshot(snapshot_file) == snapshot
+
+
+def test_read_snapshot_with_unsupported_version(tmp_path: Path) -> None:
+    snapshot_file = tmp_path / "catalog.snapshot"
+    with zipfile.ZipFile(snapshot_file, "w") as zf:
+        zf.writestr(MANIFEST_FILE_NAME, '{"format_version": 999}')
+
+    with pytest.raises(click.ClickException):
+        read_snapshot(snapshot_file)
+
+
+def test_write_snapshot_with_wrong_embedding_dimension(tmp_path: Path) -> None:
+    snapshot = CatalogSnapshot(
+        embedding_dimension=3,
+        apps=[{"name": "APP_1"}],
+        apps_embeddings=[[0.5, 0.25]],
+    )
+
+    with pytest.raises(click.ClickException):
+        write_snapshot(tmp_path / "catalog.snapshot", snapshot)
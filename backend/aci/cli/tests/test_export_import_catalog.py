@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import click
+import pytest
+from click.testing import CliRunner
+from sqlalchemy import Column, Integer, MetaData, String, Table
+from sqlalchemy.orm import Session
+
+from aci.cli.commands.export_catalog import export_catalog
+from aci.cli.commands.import_catalog import _to_copy_row, import_catalog
+from aci.cli.commands.upsert_app import upsert_app
+from aci.common.db import crud
+from aci.common.db.sql_models import App, Function
+from aci.common.schemas.app import AppUpsert
+from aci.common.schemas.function import FunctionUpsert
+
+
+def test_export_and_import_catalog(
+    db_session: Session,
+    tmp_path: Path,
+    dummy_app_data: dict,
+    dummy_app_file: Path,
+    dummy_app_secrets_file: Path,
+    dummy_functions_data: list[dict],
+) -> None:
+    runner = CliRunner()
+    result = runner.invoke(
+        upsert_app,
+        [
+            "--app-file",
+            str(dummy_app_file),
+            "--secrets-file",
+            str(dummy_app_secrets_file),
+            "--skip-dry-run",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    app = crud.apps.get_app(db_session, dummy_app_data["name"], False, False)
+    assert app is not None
+    functions_upsert = [FunctionUpsert.model_validate(data) for data in dummy_functions_data]
+    crud.functions.create_functions(
+        db_session, functions_upsert, [app.embedding for _ in functions_upsert]
+    )
+    db_session.commit()
+    expected_app_upsert = AppUpsert.model_validate(app, from_attributes=True)
+
+    snapshot_file = tmp_path / "catalog.snapshot"
+    result = runner.invoke(export_catalog, ["--snapshot-file", snapshot_file])  # type: ignore
+    assert result.exit_code == 0, result.output
+
+    # import into an empty catalog
+    db_session.query(Function).delete()
+    db_session.query(App).delete()
+    db_session.commit()
+
+    result = runner.invoke(
+        import_catalog,
+        ["--snapshot-file", snapshot_file, "--skip-dry-run"],  # type: ignore
+    )
+    assert result.exit_code == 0, result.output
+
+    db_session.expire_all()
+    imported_app = crud.apps.get_app(db_session, dummy_app_data["name"], False, False)
+    assert imported_app is not None
+    assert AppUpsert.model_validate(imported_app, from_attributes=True) == expected_app_upsert
+    assert imported_app.content_hash == crud.apps.compute_app_content_hash(expected_app_upsert)
+    imported_functions = crud.functions.get_functions_by_app_id(db_session, imported_app.id)
+    assert [
+        FunctionUpsert.model_validate(function, from_attributes=True)
+        for function in imported_functions
+    ] == functions_upsert
+
+
+def test_columns_missing_from_snapshot_rows() -> None:
+    table = Table(
+        "apps",
+        MetaData(),
+        Column("id", Integer),
+        Column("name", String, nullable=False),
+        Column("max_concurrency", Integer, nullable=True),
+        Column("version", String, nullable=False, default="1.0.0"),
+        Column("embedding", Integer),
+    )
+    columns = list(table.columns)
+
+    row = _to_copy_row({"name": "GMAIL"}, [0.1], columns)
+    assert row[1:] == ["GMAIL", None, "1.0.0", [0.1]]
+
+    # not nullable and no default
+    with pytest.raises(click.ClickException, match="apps.name"):
+        _to_copy_row({}, [0.1], columns)
@@ -0,0 +1,113 @@
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from sqlalchemy.orm import Session
+
+from aci.cli.commands.sync_catalog import sync_catalog, sync_catalog_helper
+from aci.common.db import crud
+from aci.common.enums import SecurityScheme
+from aci.common.schemas.function import FunctionUpsert
+
+
+@pytest.fixture
+def dummy_apps_dir(
+    tmp_path: Path,
+    dummy_app_data: dict,
+    dummy_app_secrets_data: dict,
+    dummy_functions_data: list[dict],
+) -> Path:
+    apps_dir = tmp_path / "apps"
+    app_dir = apps_dir / "google_calendar"
+    app_dir.mkdir(parents=True)
+    (app_dir / "app.json").write_text(json.dumps(dummy_app_data))
+    (app_dir / ".app.secrets.json").write_text(json.dumps(dummy_app_secrets_data))
+    (app_dir / "functions.json").write_text(json.dumps(dummy_functions_data))
+    return apps_dir
+
+
+@pytest.mark.parametrize("skip_dry_run", [True, False])
+def test_sync_catalog(
+    db_session: Session,
+    dummy_apps_dir: Path,
+    dummy_app_data: dict,
+    dummy_functions_data: list[dict],
+    skip_dry_run: bool,
+) -> None:
+    runner = CliRunner()
+    command = ["--apps-dir", dummy_apps_dir, "--max-workers", "1"]
+    if skip_dry_run:
+        command.append("--skip-dry-run")
+
+    result = runner.invoke(sync_catalog, command)  # type: ignore
+    assert result.exit_code == 0, result.output
+
+    db_session.expire_all()
+    app = crud.apps.get_app(db_session, dummy_app_data["name"], False, False)
+    functions = crud.functions.get_functions_by_names(
+        db_session, [function_data["name"] for function_data in dummy_functions_data]
+    )
+    if skip_dry_run:
+        assert app is not None
+        assert app.security_schemes[SecurityScheme.OAUTH2]["client_id"] == "dummy_client_id"
+        assert len(functions) == len(dummy_functions_data)
+        for function, function_data in zip(functions, dummy_functions_data, strict=True):
+            assert FunctionUpsert.model_validate(
+                function, from_attributes=True
+            ) == FunctionUpsert.model_validate(function_data)
+    else:
+        assert app is None, "App should not be created for dry run"
+        assert len(functions) == 0, "Functions should not be created for dry run"
+
+
+def test_sync_catalog_only_updates_changed_functions(
+    db_session: Session,
+    dummy_apps_dir: Path,
+    dummy_functions_data: list[dict],
+) -> None:
+    runner = CliRunner()
+    result = runner.invoke(
+        sync_catalog,
+        ["--apps-dir", dummy_apps_dir, "--max-workers", "1", "--skip-dry-run"],  # type: ignore
+    )
+    assert result.exit_code == 0, result.output
+
+    # change the description of the function
+    new_description = "new description"
+    dummy_functions_data[0]["description"] = new_description
+    (dummy_apps_dir / "google_calendar" / "functions.json").write_text(
+        json.dumps(dummy_functions_data)
+    )
+
+    plan = sync_catalog_helper(dummy_apps_dir, 1, 1, skip_dry_run=True)
+    assert [app.name for app in plan.apps_to_write] == []
+    assert [function.name for function in plan.functions_to_write] == [
+        dummy_functions_data[0]["name"]
+    ]
+
+    db_session.expire_all()
+    function = crud.functions.get_function(
+        db_session, dummy_functions_data[0]["name"], False, False
+    )
+    assert function is not None
+    assert function.description == new_description
+
+
+def test_sync_catalog_invalid_app_fails_without_changes(
+    db_session: Session,
+    dummy_apps_dir: Path,
+    dummy_app_data: dict,
+) -> None:
+    # missing secrets for the templated app.json
+    (dummy_apps_dir / "google_calendar" / ".app.secrets.json").unlink()
+
+    runner = CliRunner()
+    result = runner.invoke(
+        sync_catalog,
+        ["--apps-dir", dummy_apps_dir, "--max-workers", "1", "--skip-dry-run"],  # type: ignore
+    )
+    assert result.exit_code != 0
+    assert "google_calendar" in result.output
+
+    assert crud.apps.get_app(db_session, dummy_app_data["name"], False, False) is None
@@ -118,3 +118,45 @@ def test_update_app(
         )
         assert app.security_schemes[SecurityScheme.OAUTH2]["client_id"] == "dummy_client_id"
         assert SecurityScheme.API_KEY not in app.security_schemes
+
+
+def test_upsert_app_after_runtime_change(
+    db_session: Session,
+    dummy_app_data: dict,
+    dummy_app_file: Path,
+    dummy_app_secrets_data: dict,
+    dummy_app_secrets_file: Path,
+) -> None:
+    test_create_app(
+        db_session,
+        dummy_app_data,
+        dummy_app_file,
+        dummy_app_secrets_data,
+        dummy_app_secrets_file,
+        True,
+    )
+    # changed outside of an upsert, e.g., by the update-app-status command
+    crud.apps.set_app_active_status(
+        db_session, dummy_app_data["name"], not dummy_app_data["active"]
+    )
+    db_session.commit()
+
+    runner = CliRunner()
+    command = [
+        "--app-file",
+        dummy_app_file,
+        "--secrets-file",
+        dummy_app_secrets_file,
+        "--skip-dry-run",
+    ]
+    result = runner.invoke(upsert_app, command)  # type: ignore
+    assert result.exit_code == 0, result.output
+
+    # the upsert restores the app file's content
+    db_session.expire_all()
+    app = crud.apps.get_app(
+        db_session, dummy_app_data["name"], public_only=False, active_only=False
+    )
+    assert app is not None
+    assert app.active == dummy_app_data["active"]
+    assert app.content_hash is not None
@@ -1,6 +1,9 @@
 from . import (
     app_configurations,
     apps,
+    background_jobs,
+    function_execution_jobs,
+    function_response_blobs,
     functions,
     linked_accounts,
     plans,
@@ -13,6 +16,9 @@ from . import (
 __all__ = [
     "app_configurations",
     "apps",
+    "background_jobs",
+    "function_execution_jobs",
+    "function_response_blobs",
     "functions",
     "linked_accounts",
     "plans",
@@ -2,16 +2,23 @@
 CRUD operations for apps. (not including app_configurations)
 """
 
-from sqlalchemy import select, update
+from uuid import uuid4
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from aci.common import utils
 from aci.common.db.sql_models import App
 from aci.common.enums import SecurityScheme, Visibility
 from aci.common.logging_setup import get_logger
-from aci.common.schemas.app import AppUpsert
+from aci.common.schemas.app import AppEmbeddingFields, AppUpsert
 
 logger = get_logger(__name__)
 
+# number of rows per INSERT ... ON CONFLICT statement when bulk upserting apps
+UPSERT_CHUNK_SIZE = 100
+
 
 def create_app(
     db_session: Session,
@@ -24,6 +31,8 @@ def create_app(
     app = App(
         **app_data,
         embedding=app_embedding,
+        content_hash=compute_app_content_hash(app_upsert),
+        embedding_hash=compute_app_embedding_hash(app_upsert),
     )
 
     db_session.add(app)
@@ -46,6 +55,9 @@ def update_app(
 
     for field, value in new_app_data.items():
         setattr(app, field, value)
+    # Note: the embedding is either regenerated or the embedding fields are unchanged
+    app.content_hash = compute_app_content_hash(app_upsert)
+    app.embedding_hash = compute_app_embedding_hash(app_upsert)
 
     if app_embedding is not None:
         app.embedding = app_embedding
@@ -55,6 +67,61 @@ def update_app(
     return app
 
 
+def upsert_apps(
+    db_session: Session,
+    apps_upsert: list[AppUpsert],
+    apps_embeddings: list[list[float]],
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+) -> None:
+    """
+    Bulk insert or update apps with INSERT ... ON CONFLICT (name) DO UPDATE, in chunks of chunk_size
+    rows per statement.
+    Note: an embedding is required for every app, for existing apps that don't need a new embedding,
+    pass in the existing one.
+    """
+    if len(apps_upsert) != len(apps_embeddings):
+        raise ValueError("apps_upsert and apps_embeddings must have the same length")
+
+    rows = [
+        {
+            # Note: id has no column level default, it's only a dataclass default_factory
+            "id": uuid4(),
+            **app_upsert.model_dump(mode="json"),
+            "embedding": apps_embeddings[i],
+            "content_hash": compute_app_content_hash(app_upsert),
+            "embedding_hash": compute_app_embedding_hash(app_upsert),
+        }
+        for i, app_upsert in enumerate(apps_upsert)
+    ]
+
+    for start in range(0, len(rows), chunk_size):
+        statement = insert(App).values(rows[start : start + chunk_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=[App.name],
+            set_={
+                **{
+                    column: statement.excluded[column]
+                    for column in rows[0]
+                    if column not in ("id", "name")
+                },
+                "updated_at": func.now(),
+            },
+        )
+        db_session.execute(statement)
+
+    logger.debug("upserted apps", extra={"num_apps": len(rows), "chunk_size": chunk_size})
+
+
+def compute_app_content_hash(app_upsert: AppUpsert) -> str:
+    return utils.compute_content_hash(app_upsert)
+
+
+def compute_app_embedding_hash(app_upsert: AppUpsert) -> str:
+    return utils.compute_content_hash(
+        app_upsert, include=set(AppEmbeddingFields.model_fields.keys())
+    )
+
+
 def update_app_default_security_credentials(
     db_session: Session,
     app: App,
@@ -64,6 +131,8 @@ def update_app_default_security_credentials(
     # Note: this update works because of the MutableDict.as_mutable(JSON) in the sql_models.py
     # TODO: check if this is the best practice and double confirm that nested dict update does NOT work
     app.default_security_credentials_by_scheme[security_scheme] = security_credentials
+    # the credentials are part of the upserted content, the next upsert compares the fields again
+    app.content_hash = None
 
 
 def get_app(db_session: Session, app_name: str, public_only: bool, active_only: bool) -> App | None:
@@ -148,10 +217,13 @@ def search_apps(
 
 
 def set_app_active_status(db_session: Session, app_name: str, active: bool) -> None:
-    statement = update(App).filter_by(name=app_name).values(active=active)
+    # content_hash is reset by the changes of upserted fields made outside of an upsert
+    statement = update(App).filter_by(name=app_name).values(active=active, content_hash=None)
     db_session.execute(statement)
 
 
 def set_app_visibility(db_session: Session, app_name: str, visibility: Visibility) -> None:
-    statement = update(App).filter_by(name=app_name).values(visibility=visibility)
+    statement = (
+        update(App).filter_by(name=app_name).values(visibility=visibility, content_hash=None)
+    )
     db_session.execute(statement)
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from aci.common.db.sql_models import BackgroundJob
+from aci.common.enums import BackgroundJobStatus
+
+
+def create_background_job(
+    db_session: Session,
+    job_type: str,
+    payload: dict,
+    max_attempts: int,
+    delay_seconds: float = 0,
+) -> UUID:
+    """Queue a job to run after delay_seconds, returns the id of the job."""
+    job_id = uuid4()
+    stmt = insert(BackgroundJob).values(
+        id=job_id,
+        job_type=job_type,
+        payload=payload,
+        status=BackgroundJobStatus.QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=func.now() + timedelta(seconds=delay_seconds),
+    )
+    db_session.execute(stmt)
+    return job_id
+
+
+def claim_background_jobs(
+    db_session: Session, worker_id: str, limit: int, visibility_timeout_seconds: float
+) -> list[BackgroundJob]:
+    """
+    Claim up to limit due jobs, oldest first: queued jobs whose run_at has passed, and running jobs
+    whose visibility timeout has expired (e.g., their worker died).
+    The claimed jobs are hidden from other workers for visibility_timeout_seconds. Rows locked by
+    a concurrent claim are skipped, so concurrent workers never claim the same job.
+    """
+    claimable = (
+        select(BackgroundJob.id)
+        .where(
+            BackgroundJob.status.in_([BackgroundJobStatus.QUEUED, BackgroundJobStatus.RUNNING]),
+            BackgroundJob.run_at <= func.now(),
+        )
+        .order_by(BackgroundJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(BackgroundJob)
+        .where(BackgroundJob.id.in_(claimable))
+        .values(
+            status=BackgroundJobStatus.RUNNING,
+            attempts=BackgroundJob.attempts + 1,
+            run_at=func.now() + timedelta(seconds=visibility_timeout_seconds),
+            locked_by=worker_id,
+        )
+        .returning(BackgroundJob)
+        .execution_options(synchronize_session=False)
+    )
+    return list(db_session.execute(stmt).scalars().all())
+
+
+def delete_background_job(db_session: Session, job_id: UUID, attempts: int) -> bool:
+    """
+    Delete a job that succeeded, unless it was claimed again since (its visibility timeout
+    expired). Returns whether the job was deleted.
+    """
+    stmt = delete(BackgroundJob).where(
+        BackgroundJob.id == job_id,
+        BackgroundJob.attempts == attempts,
+    )
+    return bool(db_session.execute(stmt).rowcount)
+
+
+def fail_background_job(
+    db_session: Session,
+    job_id: UUID,
+    attempts: int,
+    error: str,
+    retry_delay_seconds: float | None,
+) -> bool:
+    """
+    Record a failed attempt of a job: the job is queued again after retry_delay_seconds, or
+    dead-lettered if retry_delay_seconds is None. Nothing is done if the job was claimed again
+    since. Returns whether the job was updated.
+    """
+    values: dict = {"last_error": error}
+    if retry_delay_seconds is None:
+        values["status"] = BackgroundJobStatus.DEAD
+    else:
+        values["status"] = BackgroundJobStatus.QUEUED
+        values["run_at"] = func.now() + timedelta(seconds=retry_delay_seconds)
+    stmt = (
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.attempts == attempts,
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return bool(db_session.execute(stmt).rowcount)
+
+
+def get_background_jobs_by_status(
+    db_session: Session, status: BackgroundJobStatus, limit: int, offset: int = 0
+) -> list[BackgroundJob]:
+    stmt = (
+        select(BackgroundJob)
+        .where(BackgroundJob.status == status)
+        .order_by(BackgroundJob.created_at)
+        .offset(offset)
+        .limit(limit)
+    )
+    return list(db_session.execute(stmt).scalars().all())
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from aci.common.db.sql_models import FunctionExecutionJob
+from aci.common.enums import FunctionExecutionJobStatus
+from aci.common.logging_setup import get_logger
+from aci.common.schemas.function import FunctionExecute, FunctionExecutionResult
+
+logger = get_logger(__name__)
+
+
+def create_function_execution_job(
+    db_session: Session,
+    project_id: UUID,
+    agent_id: UUID,
+    function_name: str,
+    function_execute: FunctionExecute,
+) -> FunctionExecutionJob:
+    function_execution_job = FunctionExecutionJob(
+        project_id=project_id,
+        agent_id=agent_id,
+        function_name=function_name,
+        function_execute=function_execute.model_dump(mode="json"),
+        status=FunctionExecutionJobStatus.PENDING,
+        result=None,
+        started_at=None,
+        finished_at=None,
+    )
+    db_session.add(function_execution_job)
+    db_session.flush()
+    db_session.refresh(function_execution_job)
+
+    return function_execution_job
+
+
+def get_function_execution_job(
+    db_session: Session, project_id: UUID, job_id: UUID
+) -> FunctionExecutionJob | None:
+    stmt = select(FunctionExecutionJob).where(
+        FunctionExecutionJob.id == job_id,
+        FunctionExecutionJob.project_id == project_id,
+    )
+    return db_session.execute(stmt).scalar_one_or_none()
+
+
+def claim_function_execution_job(db_session: Session, job_id: UUID) -> FunctionExecutionJob | None:
+    """
+    Mark a pending job as running, returns the job if it was claimed, None if it doesn't exist or
+    isn't pending anymore (e.g., it was claimed by another server process first).
+    """
+    stmt = (
+        update(FunctionExecutionJob)
+        .where(
+            FunctionExecutionJob.id == job_id,
+            FunctionExecutionJob.status == FunctionExecutionJobStatus.PENDING,
+        )
+        .values(status=FunctionExecutionJobStatus.RUNNING, started_at=func.now())
+    )
+    if db_session.execute(stmt).rowcount != 1:
+        return None
+    return db_session.get(FunctionExecutionJob, job_id, populate_existing=True)
+
+
+def finish_function_execution_job(
+    db_session: Session, job_id: UUID, result: FunctionExecutionResult
+) -> bool:
+    """
+    Store the result of a running job, returns False (and the result is dropped) if the job isn't
+    running anymore (e.g., it ran past the timeout and was already failed by the sweep).
+    """
+    stmt = (
+        update(FunctionExecutionJob)
+        .where(
+            FunctionExecutionJob.id == job_id,
+            FunctionExecutionJob.status == FunctionExecutionJobStatus.RUNNING,
+        )
+        .values(
+            status=FunctionExecutionJobStatus.SUCCEEDED
+            if result.success
+            else FunctionExecutionJobStatus.FAILED,
+            result=result.model_dump(mode="json", exclude_none=True),
+            finished_at=func.now(),
+        )
+    )
+    if db_session.execute(stmt).rowcount != 1:
+        logger.warning(
+            "function execution job is not running anymore, dropping its result",
+            extra={"job_id": job_id, "success": result.success},
+        )
+        return False
+    return True
+
+
+def get_pending_function_execution_job_ids(
+    db_session: Session, created_before_seconds: float, limit: int
+) -> list[UUID]:
+    """Get the ids of the oldest jobs that have been pending for at least created_before_seconds."""
+    stmt = (
+        select(FunctionExecutionJob.id)
+        .where(
+            FunctionExecutionJob.status == FunctionExecutionJobStatus.PENDING,
+            FunctionExecutionJob.created_at
+            <= func.now() - timedelta(seconds=created_before_seconds),
+        )
+        .order_by(FunctionExecutionJob.created_at)
+        .limit(limit)
+    )
+    return list(db_session.execute(stmt).scalars().all())
+
+
+def fail_timed_out_function_execution_jobs(db_session: Session, timeout_seconds: float) -> int:
+    """Fail the jobs that have been running for longer than timeout_seconds, returns their number."""
+    result = FunctionExecutionResult(
+        success=False, error="Function execution was interrupted or timed out"
+    )
+    stmt = (
+        update(FunctionExecutionJob)
+        .where(
+            FunctionExecutionJob.status == FunctionExecutionJobStatus.RUNNING,
+            FunctionExecutionJob.started_at <= func.now() - timedelta(seconds=timeout_seconds),
+        )
+        .values(
+            status=FunctionExecutionJobStatus.FAILED,
+            result=result.model_dump(mode="json", exclude_none=True),
+            finished_at=func.now(),
+        )
+    )
+    return db_session.execute(stmt).rowcount
+
+
+def delete_finished_function_execution_jobs(db_session: Session, retention_seconds: float) -> int:
+    """Delete the jobs that finished more than retention_seconds ago, returns their number."""
+    stmt = delete(FunctionExecutionJob).where(
+        FunctionExecutionJob.finished_at <= func.now() - timedelta(seconds=retention_seconds)
+    )
+    return db_session.execute(stmt).rowcount
@@ -0,0 +1,50 @@
+from datetime import timedelta
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from aci.common.db.sql_models import FunctionResponseBlob
+
+
+def create_function_response_blob(
+    db_session: Session,
+    project_id: UUID,
+    function_name: str,
+    content_type: str | None,
+    content: bytes,
+    truncated: bool,
+    ttl_seconds: int,
+) -> UUID:
+    """Store a response body that expires after ttl_seconds, returns the id of the blob."""
+    blob_id = uuid4()
+    # expiry computed by the db, consistent with the now() used when reading the blob
+    stmt = insert(FunctionResponseBlob).values(
+        id=blob_id,
+        project_id=project_id,
+        function_name=function_name,
+        content_type=content_type,
+        content=content,
+        truncated=truncated,
+        expires_at=func.now() + timedelta(seconds=ttl_seconds),
+    )
+    db_session.execute(stmt)
+    return blob_id
+
+
+def get_function_response_blob(
+    db_session: Session, project_id: UUID, blob_id: UUID
+) -> FunctionResponseBlob | None:
+    """Get a blob of the project, None if it doesn't exist or has expired."""
+    stmt = select(FunctionResponseBlob).where(
+        FunctionResponseBlob.id == blob_id,
+        FunctionResponseBlob.project_id == project_id,
+        FunctionResponseBlob.expires_at > func.now(),
+    )
+    return db_session.execute(stmt).scalar_one_or_none()
+
+
+def delete_expired_function_response_blobs(db_session: Session) -> int:
+    """Delete the expired blobs, returns the number of deleted blobs."""
+    stmt = delete(FunctionResponseBlob).where(FunctionResponseBlob.expires_at <= func.now())
+    return db_session.execute(stmt).rowcount
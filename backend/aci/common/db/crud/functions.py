@@ -1,17 +1,21 @@
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from aci.common import utils
 from aci.common.db import crud
 from aci.common.db.sql_models import App, Function
-from aci.common.enums import Visibility
+from aci.common.enums import Protocol, Visibility
 from aci.common.logging_setup import get_logger
-from aci.common.schemas.function import FunctionUpsert
+from aci.common.schemas.function import FunctionEmbeddingFields, FunctionUpsert
 
 logger = get_logger(__name__)
 
+# number of rows per INSERT ... ON CONFLICT statement when bulk upserting functions
+UPSERT_CHUNK_SIZE = 100
+
 
 def create_functions(
     db_session: Session,
@@ -24,18 +28,29 @@ def create_functions(
     """
     logger.debug(f"creating functions: {functions_upsert}")
 
+    app_names = {
+        utils.parse_app_name_from_function_name(function_upsert.name)
+        for function_upsert in functions_upsert
+    }
+    app_ids_by_name = {
+        app.name: app.id
+        for app in crud.apps.get_apps(db_session, False, False, list(app_names), None, None)
+    }
+
     functions = []
     for i, function_upsert in enumerate(functions_upsert):
         app_name = utils.parse_app_name_from_function_name(function_upsert.name)
-        app = crud.apps.get_app(db_session, app_name, False, False)
-        if not app:
+        app_id = app_ids_by_name.get(app_name)
+        if not app_id:
             logger.error(f"App={app_name} does not exist for function={function_upsert.name}")
             raise ValueError(f"App={app_name} does not exist for function={function_upsert.name}")
         function_data = function_upsert.model_dump(mode="json", exclude_none=True)
         function = Function(
-            app_id=app.id,
+            app_id=app_id,
             **function_data,
             embedding=functions_embeddings[i],
+            content_hash=compute_function_content_hash(function_upsert),
+            embedding_hash=compute_function_embedding_hash(function_upsert),
         )
         db_session.add(function)
         functions.append(function)
@@ -56,9 +71,15 @@ def update_functions(
     With the option to update the function embedding. (needed if FunctionEmbeddingFields are updated)
     """
     logger.debug(f"updating functions: {functions_upsert}")
+    functions_by_name = {
+        function.name: function
+        for function in get_functions_by_names(
+            db_session, [function_upsert.name for function_upsert in functions_upsert]
+        )
+    }
     functions = []
     for i, function_upsert in enumerate(functions_upsert):
-        function = crud.functions.get_function(db_session, function_upsert.name, False, False)
+        function = functions_by_name.get(function_upsert.name)
         if not function:
             logger.error(f"Function={function_upsert.name} does not exist")
             raise ValueError(f"Function={function_upsert.name} does not exist")
@@ -66,6 +87,9 @@ def update_functions(
         function_data = function_upsert.model_dump(mode="json", exclude_unset=True)
         for field, value in function_data.items():
             setattr(function, field, value)
+        # Note: the embedding is either regenerated or the embedding fields are unchanged
+        function.content_hash = compute_function_content_hash(function_upsert)
+        function.embedding_hash = compute_function_embedding_hash(function_upsert)
         if functions_embeddings[i] is not None:
             function.embedding = functions_embeddings[i]  # type: ignore
         functions.append(function)
@@ -75,6 +99,66 @@ def update_functions(
     return functions
 
 
+def upsert_functions(
+    db_session: Session,
+    app_id: UUID,
+    functions_upsert: list[FunctionUpsert],
+    functions_embeddings: list[list[float]],
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+) -> None:
+    """
+    Bulk insert or update functions of an app with INSERT ... ON CONFLICT (name) DO UPDATE,
+    in chunks of chunk_size rows per statement.
+    Note: an embedding is required for every function, for existing functions that don't need a new
+    embedding, pass in the existing one.
+    """
+    if len(functions_upsert) != len(functions_embeddings):
+        raise ValueError("functions_upsert and functions_embeddings must have the same length")
+
+    rows = [
+        {
+            # Note: id has no column level default, it's only a dataclass default_factory
+            "id": uuid4(),
+            "app_id": app_id,
+            **function_upsert.model_dump(mode="json"),
+            "embedding": functions_embeddings[i],
+            "content_hash": compute_function_content_hash(function_upsert),
+            "embedding_hash": compute_function_embedding_hash(function_upsert),
+        }
+        for i, function_upsert in enumerate(functions_upsert)
+    ]
+
+    for start in range(0, len(rows), chunk_size):
+        statement = insert(Function).values(rows[start : start + chunk_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=[Function.name],
+            set_={
+                **{
+                    column: statement.excluded[column]
+                    for column in rows[0]
+                    if column not in ("id", "name")
+                },
+                "updated_at": func.now(),
+            },
+        )
+        db_session.execute(statement)
+
+    logger.debug(
+        "upserted functions",
+        extra={"app_id": app_id, "num_functions": len(rows), "chunk_size": chunk_size},
+    )
+
+
+def compute_function_content_hash(function_upsert: FunctionUpsert) -> str:
+    return utils.compute_content_hash(function_upsert)
+
+
+def compute_function_embedding_hash(function_upsert: FunctionUpsert) -> str:
+    return utils.compute_content_hash(
+        function_upsert, include=set(FunctionEmbeddingFields.model_fields.keys())
+    )
+
+
 def search_functions(
     db_session: Session,
     public_only: bool,
@@ -145,6 +229,25 @@ def get_functions_by_app_id(db_session: Session, app_id: UUID) -> list[Function]
     return list(db_session.execute(statement).scalars().all())
 
 
+def get_functions_by_names(db_session: Session, function_names: list[str]) -> list[Function]:
+    statement = select(Function).filter(Function.name.in_(function_names))
+
+    return list(db_session.execute(statement).scalars().all())
+
+
+def get_active_function_names_by_protocol(db_session: Session, protocol: Protocol) -> list[str]:
+    """Get the names of the active functions (of active apps) of a protocol."""
+    statement = (
+        select(Function.name)
+        .join(App, Function.app_id == App.id)
+        .filter(App.active)
+        .filter(Function.active)
+        .filter(Function.protocol == protocol)
+    )
+
+    return list(db_session.execute(statement).scalars().all())
+
+
 def get_function(
     db_session: Session, function_name: str, public_only: bool, active_only: bool
 ) -> Function | None:
@@ -169,12 +272,19 @@ def get_function(
 
 
 def set_function_active_status(db_session: Session, function_name: str, active: bool) -> None:
-    statement = update(Function).filter_by(name=function_name).values(active=active)
+    # content_hash is reset by the changes of upserted fields made outside of an upsert
+    statement = (
+        update(Function).filter_by(name=function_name).values(active=active, content_hash=None)
+    )
     db_session.execute(statement)
 
 
 def set_function_visibility(
     db_session: Session, function_name: str, visibility: Visibility
 ) -> None:
-    statement = update(Function).filter_by(name=function_name).values(visibility=visibility)
+    statement = (
+        update(Function)
+        .filter_by(name=function_name)
+        .values(visibility=visibility, content_hash=None)
+    )
     db_session.execute(statement)
@@ -1,7 +1,8 @@
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import DateTime, column, or_, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Session
 
 from aci.common import validators
@@ -144,15 +145,38 @@ def update_linked_account(
     return linked_account
 
 
-def update_linked_account_last_used_at(
+def bulk_update_linked_accounts_last_used_at(
     db_session: Session,
-    last_used_at: datetime,
-    linked_account: LinkedAccount,
-) -> LinkedAccount:
-    linked_account.last_used_at = last_used_at
-    db_session.flush()
-    db_session.refresh(linked_account)
-    return linked_account
+    last_used_at_by_linked_account_id: dict[UUID, datetime],
+) -> int:
+    """
+    Update last_used_at of many linked accounts in a single UPDATE ... FROM (VALUES ...) statement.
+    A timestamp never moves last_used_at backwards, so concurrent flushes from different workers are safe.
+    Returns the number of updated rows.
+    """
+    if not last_used_at_by_linked_account_id:
+        return 0
+
+    last_used_values = values(
+        column("id", PGUUID(as_uuid=True)),
+        column("last_used_at", DateTime(timezone=False)),
+        name="last_used_values",
+    ).data(list(last_used_at_by_linked_account_id.items()))
+
+    statement = (
+        update(LinkedAccount)
+        .where(LinkedAccount.id == last_used_values.c.id)
+        .where(
+            or_(
+                LinkedAccount.last_used_at.is_(None),
+                LinkedAccount.last_used_at < last_used_values.c.last_used_at,
+            )
+        )
+        .values(last_used_at=last_used_values.c.last_used_at)
+        .execution_options(synchronize_session=False)
+    )
+    result = db_session.execute(statement)
+    return int(result.rowcount)
 
 
 def delete_linked_accounts(db_session: Session, project_id: UUID, app_name: str) -> int:
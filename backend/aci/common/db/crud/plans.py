@@ -3,7 +3,7 @@ from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from aci.common.db.sql_models import Plan
+from aci.common.db.sql_models import Plan, Subscription
 from aci.common.schemas.plans import PlanFeatures, PlanUpdate
 
 
@@ -19,6 +19,16 @@ def get_by_id(db: Session, id: UUID) -> Plan | None:
     return db.execute(stmt).scalar_one_or_none()
 
 
+def get_by_org_id(db: Session, org_id: UUID) -> Plan | None:
+    """Get the plan an organization is subscribed to, None if the org has no subscription."""
+    stmt = (
+        select(Plan)
+        .join(Subscription, Subscription.plan_id == Plan.id)
+        .where(Subscription.org_id == org_id)
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
 def get_by_stripe_price_id(db: Session, stripe_price_id: str) -> Plan | None:
     """Get a plan by its Stripe price id."""
     stmt = select(Plan).where(
@@ -22,7 +22,9 @@ from pgvector.sqlalchemy import Vector
 from sqlalchemy import (
     Boolean,
     DateTime,
+    Double,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -44,6 +46,8 @@ from aci.common.db.custom_sql_types import (
 )
 from aci.common.enums import (
     APIKeyStatus,
+    BackgroundJobStatus,
+    FunctionExecutionJobStatus,
     Protocol,
     SecurityScheme,
     StripeSubscriptionInterval,
@@ -226,6 +230,11 @@ class Function(Base):
     response: Mapped[dict] = mapped_column(MutableDict.as_mutable(JSONB), nullable=False)
     # TODO: should we provide EMBEDDING_DIMENSION here? which makes it less flexible if we want to change the embedding dimention in the future
     embedding: Mapped[list[float]] = mapped_column(Vector(EMBEDDING_DIMENSION), nullable=False)
+    # sha256 of the canonical FunctionUpsert content and of the FunctionEmbeddingFields, used by
+    # catalog sync to skip unchanged functions and to decide if the embedding needs regeneration.
+    # nullable for functions upserted before the hashes were introduced.
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, default=None)
+    embedding_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, default=None)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=False), server_default=func.now(), nullable=False, init=False
@@ -277,6 +286,13 @@ class App(Base):
     )
     # embedding vector for similarity search
     embedding: Mapped[list[float]] = mapped_column(Vector(EMBEDDING_DIMENSION), nullable=False)
+    # max number of concurrent function executions of the app per server process, unlimited if null
+    max_concurrency: Mapped[int | None] = mapped_column(Integer, nullable=True, default=None)
+    # sha256 of the canonical AppUpsert content and of the AppEmbeddingFields, used by catalog sync
+    # to skip unchanged apps and to decide if the embedding needs regeneration.
+    # nullable for apps upserted before the hashes were introduced.
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, default=None)
+    embedding_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, default=None)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=False), server_default=func.now(), nullable=False, init=False
@@ -550,13 +566,141 @@ class ProcessedStripeEvent(Base):
     )
 
 
+class RateLimitBucket(Base):
+    """
+    Shared rate limit state (GCRA), used by the postgres rate limit storage.
+    The table is UNLOGGED: it's not crash safe (emptied after a crash) but much cheaper to write,
+    which is fine for rate limit counters.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[str] = mapped_column(String(MAX_STRING_LENGTH), primary_key=True)
+    # theoretical arrival time of the next request, in seconds since epoch
+    tat: Mapped[float] = mapped_column(Double, nullable=False)
+
+
+class FunctionResponseBlob(Base):
+    """
+    Raw response body of a function execution that was too large to return inline, retrievable
+    by the project for a limited time (until expires_at).
+    """
+
+    __tablename__ = "function_response_blobs"
+
+    id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), primary_key=True, default_factory=uuid4, init=False
+    )
+    project_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    function_name: Mapped[str] = mapped_column(String(MAX_STRING_LENGTH), nullable=False)
+    content_type: Mapped[str | None] = mapped_column(String(MAX_STRING_LENGTH), nullable=True)
+    content: Mapped[bytes] = mapped_column(BYTEA, nullable=False)
+    # true if the body was also larger than the max blob size and was cut off
+    truncated: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=False, index=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), server_default=func.now(), nullable=False, init=False
+    )
+
+
+class FunctionExecutionJob(Base):
+    """
+    An asynchronous execution of a function, executed in the background by any server process and
+    whose result is retrievable by the project until the job is deleted (a while after it finished).
+    """
+
+    __tablename__ = "function_execution_jobs"
+
+    id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), primary_key=True, default_factory=uuid4, init=False
+    )
+    project_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    # the agent whose api key submitted the job, its allowed apps are checked when the job runs
+    agent_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("agents.id", ondelete="CASCADE"), nullable=False
+    )
+    function_name: Mapped[str] = mapped_column(String(MAX_STRING_LENGTH), nullable=False)
+    # FunctionExecute body of the submission
+    function_execute: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    status: Mapped[FunctionExecutionJobStatus] = mapped_column(
+        SqlEnum(FunctionExecutionJobStatus), nullable=False, index=True
+    )
+    # FunctionExecutionResult of the job, once it has finished
+    result: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=False), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=False), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), server_default=func.now(), nullable=False, init=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+        init=False,
+    )
+
+
+class BackgroundJob(Base):
+    """
+    A job of the durable background job queue, see aci/server/job_queue.py.
+    Jobs are deleted once they succeed.
+    """
+
+    __tablename__ = "background_jobs"
+
+    id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), primary_key=True, default_factory=uuid4, init=False
+    )
+    # the registered handler of the job
+    job_type: Mapped[str] = mapped_column(String(MAX_STRING_LENGTH), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    status: Mapped[BackgroundJobStatus] = mapped_column(
+        SqlEnum(BackgroundJobStatus), nullable=False
+    )
+    # number of times the job has been claimed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    # when the job can be claimed: when it's due if queued, or when its visibility timeout
+    # expires if running
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), nullable=False)
+    # the worker that last claimed the job
+    locked_by: Mapped[str | None] = mapped_column(String(MAX_STRING_LENGTH), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), server_default=func.now(), nullable=False, init=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+        init=False,
+    )
+
+    __table_args__ = (Index("ix_background_jobs_status_run_at", "status", "run_at"),)
+
+
 __all__ = [
     "APIKey",
     "Agent",
     "App",
     "AppConfiguration",
+    "BackgroundJob",
     "Base",
     "Function",
+    "FunctionExecutionJob",
+    "FunctionResponseBlob",
     "LinkedAccount",
     "Project",
     "Secret",
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from openai import OpenAI
 
 from aci.common.logging_setup import get_logger
@@ -6,6 +8,9 @@ from aci.common.schemas.function import FunctionEmbeddingFields
 
 logger = get_logger(__name__)
 
+# max number of inputs sent in a single embeddings request
+EMBEDDING_BATCH_SIZE = 100
+
 
 def generate_app_embedding(
     app: AppEmbeddingFields,
@@ -26,24 +31,46 @@ def generate_app_embedding(
     )
 
 
-# TODO: batch generate function embeddings
+def generate_app_embeddings(
+    apps: list[AppEmbeddingFields],
+    openai_client: OpenAI,
+    embedding_model: str,
+    embedding_dimension: int,
+    max_concurrency: int = 1,
+) -> list[list[float]]:
+    """
+    Generate embeddings for multiple apps, in batches of EMBEDDING_BATCH_SIZE apps per request.
+    """
+    logger.debug(f"Generating embeddings for {len(apps)} apps...")
+    return generate_embeddings(
+        openai_client,
+        embedding_model,
+        embedding_dimension,
+        [app.model_dump_json() for app in apps],
+        max_concurrency=max_concurrency,
+    )
+
+
 # TODO: update app embedding to include function embeddings whenever functions are added/updated?
 def generate_function_embeddings(
     functions: list[FunctionEmbeddingFields],
     openai_client: OpenAI,
     embedding_model: str,
     embedding_dimension: int,
+    max_concurrency: int = 1,
 ) -> list[list[float]]:
+    """
+    Generate embeddings for multiple functions, in batches of EMBEDDING_BATCH_SIZE functions per
+    request.
+    """
     logger.debug(f"Generating embeddings for {len(functions)} functions...")
-    function_embeddings: list[list[float]] = []
-    for function in functions:
-        function_embeddings.append(
-            generate_function_embedding(
-                function, openai_client, embedding_model, embedding_dimension
-            )
-        )
-
-    return function_embeddings
+    return generate_embeddings(
+        openai_client,
+        embedding_model,
+        embedding_dimension,
+        [function.model_dump_json() for function in functions],
+        max_concurrency=max_concurrency,
+    )
 
 
 def generate_function_embedding(
@@ -80,3 +107,41 @@ def generate_embedding(
     except Exception:
         logger.error("Error generating embedding", exc_info=True)
         raise
+
+
+def generate_embeddings(
+    openai_client: OpenAI,
+    embedding_model: str,
+    embedding_dimension: int,
+    texts: list[str],
+    max_concurrency: int = 1,
+) -> list[list[float]]:
+    """
+    Generate embeddings for multiple texts, sending EMBEDDING_BATCH_SIZE texts per request and up to
+    max_concurrency requests at a time. The returned embeddings are in the same order as the texts.
+    """
+    batches = [
+        texts[start : start + EMBEDDING_BATCH_SIZE]
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE)
+    ]
+
+    def _generate_batch(batch: list[str]) -> list[list[float]]:
+        try:
+            response = openai_client.embeddings.create(
+                input=batch,
+                model=embedding_model,
+                dimensions=embedding_dimension,
+            )
+        except Exception:
+            logger.error("Error generating embeddings", exc_info=True)
+            raise
+        # Note: the embeddings are not guaranteed to be returned in the order of the inputs
+        return [data.embedding for data in sorted(response.data, key=lambda data: data.index)]
+
+    if max_concurrency <= 1 or len(batches) <= 1:
+        batch_embeddings = [_generate_batch(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as executor:
+            batch_embeddings = list(executor.map(_generate_batch, batches))
+
+    return [embedding for batch in batch_embeddings for embedding in batch]
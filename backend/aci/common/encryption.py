@@ -1,5 +1,6 @@
 import hashlib
 import hmac
+from concurrent.futures import ThreadPoolExecutor
 from typing import cast
 
 import aws_encryption_sdk  # type: ignore
@@ -49,6 +50,18 @@ def decrypt(cipher_data: bytes) -> bytes:
     return cast(bytes, my_plaintext)
 
 
+def decrypt_batch(cipher_datas: list[bytes], max_concurrency: int = 8) -> list[bytes]:
+    """
+    Decrypt several ciphertexts, up to max_concurrency at a time (each is encrypted under its own
+    data key, so each needs a KMS call, and KMS has no batch decrypt).
+    The returned plaintexts are in the same order as the ciphertexts.
+    """
+    if max_concurrency <= 1 or len(cipher_datas) <= 1:
+        return [decrypt(cipher_data) for cipher_data in cipher_datas]
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(cipher_datas))) as executor:
+        return list(executor.map(decrypt, cipher_datas))
+
+
 def hmac_sha256(message: str) -> str:
     return hmac.new(
         config.API_KEY_HASHING_SECRET.encode("utf-8"), message.encode("utf-8"), hashlib.sha256
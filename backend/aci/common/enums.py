@@ -109,3 +109,32 @@ class StripeSubscriptionInterval(StrEnum):
 
     MONTH = "month"
     YEAR = "year"
+
+
+class PaginationType(StrEnum):
+    """how a REST function's upstream paginates its results"""
+
+    # the next page url is in the Link header (rel="next"), e.g., GitHub
+    LINK_HEADER = "link_header"
+    # the response body has the cursor of the next page, sent back in a query parameter
+    CURSOR = "cursor"
+    # page number query parameter
+    PAGE = "page"
+    # offset query parameter, incremented by the number of items of each page
+    OFFSET = "offset"
+
+
+class FunctionExecutionJobStatus(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class BackgroundJobStatus(StrEnum):
+    # waiting to be claimed by a worker, at or after its run_at
+    QUEUED = "queued"
+    # claimed by a worker, claimable again once its visibility timeout (run_at) has passed
+    RUNNING = "running"
+    # failed max_attempts times, kept for inspection and not retried anymore
+    DEAD = "dead"
@@ -211,6 +211,21 @@ class DailyQuotaExceeded(ACIException):
         )
 
 
+class RateLimitExceeded(ACIException):
+    """
+    Exception raised when a rate limit is exceeded, headers (e.g., Retry-After) are added to the
+    error response
+    """
+
+    def __init__(self, message: str | None = None, headers: dict[str, str] | None = None):
+        super().__init__(
+            title="Rate limit exceeded",
+            message=message,
+            error_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.headers = headers
+
+
 class MaxProjectsReached(ACIException):
     """
     Exception raised when a user/organization has reached the maximum number of projects
@@ -263,6 +278,33 @@ class FunctionNotFound(ACIException):
         )
 
 
+class FunctionResponseBlobNotFound(ACIException):
+    """
+    Exception raised when a function response blob is not found or has expired
+    """
+
+    def __init__(self, message: str | None = None):
+        super().__init__(
+            title="Function response blob not found",
+            message=message,
+            error_code=status.HTTP_404_NOT_FOUND,
+        )
+
+
+class FunctionExecutionJobNotFound(ACIException):
+    """
+    Exception raised when a function execution job is not found (or has been deleted after its
+    retention period)
+    """
+
+    def __init__(self, message: str | None = None):
+        super().__init__(
+            title="Function execution job not found",
+            message=message,
+            error_code=status.HTTP_404_NOT_FOUND,
+        )
+
+
 class InvalidFunctionInput(ACIException):
     """
     Exception raised when a function input is invalid
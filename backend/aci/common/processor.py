@@ -84,3 +84,73 @@ def remove_none_values(data: Any) -> Any:
         return [remove_none_values(item) for item in data if item is not None]
     else:
         return data
+
+
+# a response projection maps keys to the projection of their value, None to keep the whole value
+ResponseProjection = dict[str, "ResponseProjection | None"]
+
+
+def parse_response_fields(response_fields: list[str]) -> ResponseProjection:
+    """
+    Parse field paths into a response projection.
+    A path is dot separated keys, e.g., "items.owner.login". Lists are projected element-wise, so
+    "items.id" and "items[*].id" are the same. "*" matches any key. A leading "$." is ignored.
+
+    Raises:
+        ValueError: if a path is empty or has an empty key.
+    """
+    projection: ResponseProjection = {}
+    for path in response_fields:
+        path = path.removeprefix("$").removeprefix(".")
+        keys = [key.removesuffix("[*]").removesuffix("[]") for key in path.split(".")]
+        if not all(keys):
+            raise ValueError(f"invalid response field path: '{path}'")
+
+        node = projection
+        for key in keys[:-1]:
+            child = node.setdefault(key, {})
+            if child is None:
+                # a shorter path already keeps the whole value
+                break
+            node = child
+        else:
+            node[keys[-1]] = None
+    return projection
+
+
+def get_response_schema_projection(response_schema: dict) -> ResponseProjection | None:
+    """
+    Get the projection of the properties declared in a function's response json schema,
+    None if the schema doesn't declare any properties.
+    """
+
+    def schema_projection(schema: dict) -> ResponseProjection | None:
+        items = schema.get("items")
+        if isinstance(items, dict):
+            return schema_projection(items)
+        properties: dict | None = schema.get("properties")
+        if not properties:
+            return None
+        return {key: schema_projection(subschema) for key, subschema in properties.items()}
+
+    return schema_projection(response_schema)
+
+
+def project_response_data(data: Any, projection: ResponseProjection) -> Any:
+    """
+    Keep only the fields of the projection in the data. Keys missing from the data are skipped,
+    and values that are not objects or lists are kept as is.
+    """
+    if isinstance(data, list):
+        return [project_response_data(item, projection) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    projected = {}
+    for key, subprojection in projection.items():
+        values = data.items() if key == "*" else [(key, data[key])] if key in data else []
+        for value_key, value in values:
+            projected[value_key] = (
+                value if subprojection is None else project_response_data(value, subprojection)
+            )
+    return projected
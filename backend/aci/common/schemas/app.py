@@ -32,6 +32,8 @@ class AppUpsert(BaseModel, extra="forbid"):
     default_security_credentials_by_scheme: dict[
         SecurityScheme, APIKeySchemeCredentials | OAuth2SchemeCredentials | NoAuthSchemeCredentials
     ]
+    # max number of concurrent function executions of the app per server process, unlimited if None
+    max_concurrency: int | None = Field(default=None, gt=0)
 
     @field_validator("name", check_fields=False)
     def validate_name(cls, v: str) -> str:
@@ -5,11 +5,14 @@ from uuid import UUID
 import jsonschema
 from pydantic import BaseModel, ConfigDict, Field, RootModel, field_validator, model_validator
 
+from aci.common import processor
 from aci.common.db.sql_models import MAX_STRING_LENGTH
 from aci.common.enums import (
     FunctionDefinitionFormat,
+    FunctionExecutionJobStatus,
     HttpLocation,
     HttpMethod,
+    PaginationType,
     Protocol,
     Visibility,
 )
@@ -19,10 +22,52 @@ from aci.common.validator import (
 )
 
 
+class RestPagination(BaseModel):
+    """How to follow the pagination of a REST function's upstream, see PaginationType"""
+
+    type: PaginationType
+    # dot separated path of the list of items in the response body, the body itself if not set
+    items_field: str | None = None
+    # dot separated path of the next page's cursor in the response body, for cursor pagination
+    cursor_field: str | None = None
+    # query parameter of the cursor, page number or offset
+    param: str | None = None
+    # number of the first page, if the page number is not in the function input
+    first_page: int = 1
+
+    @model_validator(mode="after")
+    def validate_pagination(self) -> "RestPagination":
+        if self.type == PaginationType.CURSOR and self.cursor_field is None:
+            raise ValueError("cursor_field is required for cursor pagination")
+        if self.type != PaginationType.LINK_HEADER and self.param is None:
+            raise ValueError(f"param is required for {self.type} pagination")
+        return self
+
+
 class RestMetadata(BaseModel):
     method: HttpMethod
     path: str
     server_url: str
+    # opt-in hedged requests for read-only (GET) functions, to cut tail latency of slow upstreams
+    hedge: bool = False
+    # opt-in caching of successful results of read-only (GET) functions, per linked account and input
+    cache_ttl_seconds: int | None = Field(default=None, gt=0)
+    # return response bodies too large to return inline as a temporary blob reference, instead of
+    # truncating them
+    large_response_as_blob: bool = False
+    # pagination of the upstream, followed for executions with follow_pagination
+    pagination: RestPagination | None = None
+
+    @model_validator(mode="after")
+    def validate_read_only_options(self) -> "RestMetadata":
+        if self.method != HttpMethod.GET:
+            if self.hedge:
+                raise ValueError("hedge is only supported for GET functions")
+            if self.cache_ttl_seconds is not None:
+                raise ValueError("cache_ttl_seconds is only supported for GET functions")
+            if self.pagination is not None:
+                raise ValueError("pagination is only supported for GET functions")
+        return self
 
 
 class ConnectorMetadata(RootModel[dict]):
@@ -153,6 +198,26 @@ class FunctionExecute(BaseModel):
         max_length=MAX_STRING_LENGTH,
         description="The owner id of the linked account. This is the id of the linked account owner in the linked account provider.",
     )
+    response_fields: list[str] | None = Field(
+        default=None,
+        description="The fields of the response data to return, as dot separated paths, e.g., "
+        "'items.owner.login'. Lists are projected element-wise and '*' matches any key. "
+        "Defaults to the fields declared in the function's response schema (if any), "
+        "an empty list returns the full response data.",
+    )
+
+    follow_pagination: bool = Field(
+        default=False,
+        description="For functions that declare the pagination of their upstream, fetch the "
+        "following pages too and return the items of all pages (up to a max number of pages and "
+        "items), as {'items': [...], 'pages': <number of pages>, 'has_more': <bool>}.",
+    )
+
+    @field_validator("response_fields")
+    def validate_response_fields(cls, v: list[str] | None) -> list[str] | None:
+        if v is not None:
+            processor.parse_response_fields(v)
+        return v
 
 
 class FunctionDetails(BaseModel):
@@ -216,3 +281,30 @@ class FunctionExecutionResult(BaseModel):
     success: bool
     data: Any | None = None  # adding "| None" just for clarity
     error: str | None = None
+    # true if the result was served from the function result cache (or shared with an identical
+    # concurrent execution) instead of calling the upstream
+    cached: bool | None = None
+
+
+class FunctionExecutionJobPublic(BaseModel):
+    id: UUID
+    function_name: str
+    status: FunctionExecutionJobStatus
+    # set once the job has finished (succeeded or failed)
+    result: FunctionExecutionResult | None = None
+
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FunctionExecutionJobGet(BaseModel):
+    wait_seconds: float = Field(
+        default=0,
+        ge=0,
+        le=30,
+        description="Wait up to this many seconds for the job to finish before returning (long "
+        "polling), 0 returns the current status of the job right away.",
+    )
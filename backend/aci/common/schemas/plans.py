@@ -1,6 +1,17 @@
 from pydantic import BaseModel, Field
 
 
+class PlanRateLimits(BaseModel):
+    """
+    Requests per minute allowed for a plan, enforced with token buckets that hold up to a minute of
+    requests. None means the server default (SERVER_RATE_LIMIT_*_PER_MINUTE) applies.
+    """
+
+    api_key_per_minute: int | None = Field(default=None, gt=0)
+    project_per_minute: int | None = Field(default=None, gt=0)
+    project_app_per_minute: int | None = Field(default=None, gt=0)
+
+
 class PlanFeatures(BaseModel):
     linked_accounts: int
     api_calls_monthly: int
@@ -8,6 +19,8 @@ class PlanFeatures(BaseModel):
     developer_seats: int
     custom_oauth: bool
     log_retention_days: int
+    # optional so plans created before rate limits were configurable stay valid
+    rate_limits: PlanRateLimits = Field(default_factory=PlanRateLimits)
 
 
 class PlanUpdate(BaseModel, extra="forbid"):
@@ -54,3 +54,12 @@ class StripeSubscriptionMetadata(BaseModel):
 class StripeCheckoutSessionCreate(BaseModel):
     plan_name: str
     interval: StripeSubscriptionInterval
+
+
+class StripeEventJobPayload(BaseModel):
+    """payload of the background job processing a Stripe webhook event"""
+
+    event_id: str
+    event_type: str
+    # event.data.object
+    data_object: dict
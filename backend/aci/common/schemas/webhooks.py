@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class UserCreatedJobPayload(BaseModel):
+    """payload of the background job provisioning a new user (the user.created auth webhook)"""
+
+    user_id: str
@@ -0,0 +1,38 @@
+from unittest.mock import MagicMock
+
+from aci.common import embeddings
+
+
+def _mock_openai_client() -> MagicMock:
+    """
+    Mock client that returns the embedding [float(text)] for each input, in reverse order.
+    """
+
+    def create(input: list[str], model: str, dimensions: int) -> MagicMock:
+        response = MagicMock()
+        response.data = [
+            MagicMock(index=index, embedding=[float(text)])
+            for index, text in reversed(list(enumerate(input)))
+        ]
+        return response
+
+    client = MagicMock()
+    client.embeddings.create.side_effect = create
+    return client
+
+
+def test_generate_embeddings_in_batches_keeps_order() -> None:
+    client = _mock_openai_client()
+    texts = [str(i) for i in range(embeddings.EMBEDDING_BATCH_SIZE * 2 + 1)]
+
+    result = embeddings.generate_embeddings(client, "model", 1, texts, max_concurrency=3)
+
+    assert result == [[float(text)] for text in texts]
+    assert client.embeddings.create.call_count == 3
+
+
+def test_generate_embeddings_empty_input() -> None:
+    client = _mock_openai_client()
+
+    assert embeddings.generate_embeddings(client, "model", 1, []) == []
+    client.embeddings.create.assert_not_called()
@@ -0,0 +1,83 @@
+import pytest
+
+from aci.common.processor import (
+    get_response_schema_projection,
+    parse_response_fields,
+    project_response_data,
+)
+
+DATA = {
+    "total_count": 2,
+    "incomplete_results": False,
+    "items": [
+        {"id": 1, "name": "aci", "owner": {"login": "aipotheosis", "id": 10}, "topics": ["mcp"]},
+        {"id": 2, "name": "web", "owner": {"login": "aipotheosis", "id": 10}, "topics": []},
+    ],
+}
+
+
+def test_parse_response_fields() -> None:
+    assert parse_response_fields(["total_count", "items[*].owner.login", "$.items.name"]) == {
+        "total_count": None,
+        "items": {"owner": {"login": None}, "name": None},
+    }
+    # a shorter path keeps the whole value, whatever the order
+    assert parse_response_fields(["items", "items.name"]) == {"items": None}
+    assert parse_response_fields(["items.name", "items"]) == {"items": None}
+
+
+@pytest.mark.parametrize("path", ["", "items..name", "items."])
+def test_parse_invalid_response_fields(path: str) -> None:
+    with pytest.raises(ValueError):
+        parse_response_fields([path])
+
+
+def test_project_response_data() -> None:
+    projection = parse_response_fields(["total_count", "items.name", "items.owner.login"])
+    assert project_response_data(DATA, projection) == {
+        "total_count": 2,
+        "items": [
+            {"name": "aci", "owner": {"login": "aipotheosis"}},
+            {"name": "web", "owner": {"login": "aipotheosis"}},
+        ],
+    }
+
+
+def test_project_response_data_wildcard_and_missing_keys() -> None:
+    projection = parse_response_fields(["items.owner.*", "items.topics", "missing.key"])
+    assert project_response_data(DATA, projection) == {
+        "items": [
+            {"owner": {"login": "aipotheosis", "id": 10}, "topics": ["mcp"]},
+            {"owner": {"login": "aipotheosis", "id": 10}, "topics": []},
+        ],
+    }
+    assert project_response_data(DATA, parse_response_fields(["*"])) == DATA
+    # top level list, scalars are kept as is
+    assert project_response_data([{"a": 1, "b": 2}, 3], parse_response_fields(["a"])) == [
+        {"a": 1},
+        3,
+    ]
+
+
+def test_response_schema_projection() -> None:
+    assert get_response_schema_projection({}) is None
+    assert get_response_schema_projection({"type": "object"}) is None
+
+    schema = {
+        "type": "object",
+        "properties": {
+            "total_count": {"type": "integer"},
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "owner": {"type": "object", "properties": {"login": {"type": "string"}}},
+                    },
+                },
+            },
+        },
+    }
+    projection = get_response_schema_projection(schema)
+    assert projection == parse_response_fields(["total_count", "items.name", "items.owner.login"])
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+
+from aci.common.utils import compute_content_hash
+
+
+class _Model(BaseModel):
+    name: str
+    description: str
+    parameters: dict
+
+
+def test_same_content_same_hash() -> None:
+    model_1 = _Model(name="A", description="a", parameters={"x": 1, "y": [1, 2]})
+    model_2 = _Model(name="A", description="a", parameters={"y": [1, 2], "x": 1})
+
+    assert compute_content_hash(model_1) == compute_content_hash(model_2)
+    assert len(compute_content_hash(model_1)) == 64
+
+
+def test_different_content_different_hash() -> None:
+    model_1 = _Model(name="A", description="a", parameters={})
+    model_2 = _Model(name="A", description="b", parameters={})
+
+    assert compute_content_hash(model_1) != compute_content_hash(model_2)
+
+
+def test_include_only_hashes_given_fields() -> None:
+    model_1 = _Model(name="A", description="a", parameters={})
+    model_2 = _Model(name="A", description="b", parameters={})
+
+    assert compute_content_hash(model_1, include={"name", "parameters"}) == compute_content_hash(
+        model_2, include={"name", "parameters"}
+    )
@@ -1,7 +1,11 @@
+import functools
+import hashlib
+import json
 import os
 import re
 from uuid import UUID
 
+from pydantic import BaseModel
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
@@ -47,6 +51,17 @@ def create_db_session(db_url: str) -> Session:
     return SessionMaker()
 
 
+@functools.cache
+def get_db_session_factory(db_url: str) -> sessionmaker[Session]:
+    """
+    Get a session factory of an engine shared by the process, so the sessions reuse the engine's
+    pooled connections (unlike create_db_session, which creates an engine per session).
+    """
+    return sessionmaker(
+        autocommit=False, autoflush=False, bind=create_engine(db_url, pool_pre_ping=True)
+    )
+
+
 def parse_app_name_from_function_name(function_name: str) -> str:
     """
     Parse the app name from a function name.
@@ -72,3 +87,18 @@ def is_uuid(value: str | UUID) -> bool:
         return True
     except ValueError:
         return False
+
+
+def compute_content_hash(model: BaseModel, include: set[str] | None = None) -> str:
+    """
+    Compute a sha256 hex digest of the canonical json representation of a pydantic model,
+    optionally limited to the given fields. Keys are sorted so the hash doesn't depend on field order.
+    e.g., used to detect whether an App or Function (or its embedding fields) changed since last upsert.
+    """
+    canonical_json = json.dumps(
+        model.model_dump(mode="json", include=include),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
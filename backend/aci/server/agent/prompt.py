@@ -1,7 +1,13 @@
 # mypy: ignore-errors
+import asyncio
 import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any
 
-from openai import OpenAI
+import anyio
+from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessageParam
 
 from aci.common.logging_setup import get_logger
@@ -12,6 +18,9 @@ from .types import ClientMessage
 
 logger = get_logger(__name__)
 
+# error part of the ai sdk data stream protocol, sent when a stream runs out of time
+_STREAM_TIMEOUT_ERROR_PART = f"3:{json.dumps('The response took too long and was stopped.')}\n"
+
 
 def convert_to_openai_messages(messages: list[ClientMessage]) -> list[ChatCompletionMessageParam]:
     """
@@ -59,54 +68,282 @@ def convert_to_openai_messages(messages: list[ClientMessage]) -> list[ChatComple
     return openai_messages
 
 
+@dataclass
+class _StreamedResponse:
+    text: str = ""
+    # output index -> function call item
+    tool_calls: dict[int, Any] = field(default_factory=dict)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # None if the response didn't complete (e.g., the client disconnected)
+    finish_reason: str | None = None
+
+
+class _StreamBudget:
+    """The time budget of a chat stream, and the throttled checks of the client's connection."""
+
+    def __init__(
+        self, timeout_seconds: float, is_disconnected: Callable[[], Awaitable[bool]] | None
+    ):
+        loop = asyncio.get_running_loop()
+        self.timeout_seconds = timeout_seconds
+        self.deadline = loop.time() + timeout_seconds
+        self.is_disconnected = is_disconnected
+        self._disconnect_checked_at = loop.time()
+
+    async def client_disconnected(self) -> bool:
+        if self.is_disconnected is None:
+            return False
+        now = asyncio.get_running_loop().time()
+        if now - self._disconnect_checked_at < config.AGENT_CHAT_DISCONNECT_CHECK_INTERVAL_SECONDS:
+            return False
+        self._disconnect_checked_at = now
+        if await self.is_disconnected():
+            logger.info("client disconnected, stopping agent chat stream")
+            return True
+        return False
+
+
 async def openai_chat_stream(
+    openai_client: AsyncOpenAI,
     messages: list[ChatCompletionMessageParam],
-    tools: list[OpenAIResponsesFunctionDefinition],
-):
+    tools: list[OpenAIResponsesFunctionDefinition | dict],
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    tool_executor: Callable[[str, str], Awaitable[Any]] | None = None,
+    max_output_tokens: int = config.AGENT_CHAT_MAX_OUTPUT_TOKENS,
+    timeout_seconds: float = config.AGENT_CHAT_STREAM_TIMEOUT_SECONDS,
+    max_tool_rounds: int = config.AGENT_CHAT_MAX_TOOL_ROUNDS,
+) -> AsyncIterator[str]:
     """
     Stream chat completion responses and handle tool calls asynchronously.
 
+    Without a tool_executor, the tool calls are streamed to the client, which executes them and
+    sends their results in the next chat request. With one, the server executes the tool calls
+    (the parallel calls of a response concurrently), streams their results as they complete and
+    calls the model again with them, for up to max_tool_rounds rounds of tool calls.
+
+    An event is only read from OpenAI once the previous part was sent to the client, so a slow
+    client slows down the stream instead of buffering it. The stream is stopped (and the OpenAI
+    response closed) when the client disconnects or after timeout_seconds.
+
     Args:
+        openai_client: Async OpenAI client, shared by the streams
         messages: List of chat messages
         tools: List of tools to use
+        is_disconnected: Whether the client disconnected, e.g. Request.is_disconnected
+        tool_executor: Executes a tool call on the server, from the tool name and the json
+            arguments, returning a json serializable result (failures included)
+        max_output_tokens: Max tokens generated per response
+        timeout_seconds: Max duration of the stream
+        max_tool_rounds: Max rounds of tool calls executed by the server
     """
     logger.info("Messages", extra={"messages": json.dumps(messages)})
-    client = OpenAI(api_key=config.OPENAI_API_KEY)
+    budget = _StreamBudget(timeout_seconds, is_disconnected)
+    input_items = list(messages)
+    input_tokens = output_tokens = 0
+
+    for tool_round in range(max_tool_rounds + 1):
+        response = _StreamedResponse()
+        # the model has to answer once the server executed max_tool_rounds rounds of tool calls
+        tool_choice = "none" if tool_executor and tool_round == max_tool_rounds else None
+        try:
+            # closed explicitly, so the OpenAI response is closed as soon as this stream is
+            async with aclosing(
+                _stream_response(
+                    openai_client,
+                    input_items,
+                    tools,
+                    tool_choice,
+                    max_output_tokens,
+                    budget,
+                    response,
+                )
+            ) as parts:
+                async for part in parts:
+                    yield part
+            if response.finish_reason is None:
+                return
+            input_tokens += response.input_tokens
+            output_tokens += response.output_tokens
+
+            if tool_executor is None or response.finish_reason != "tool-calls":
+                yield _finish_part("d", response.finish_reason, input_tokens, output_tokens)
+                return
+
+            if response.text:
+                input_items.append(
+                    {
+                        "role": "assistant",
+                        "type": "message",
+                        "content": [{"type": "output_text", "text": response.text}],
+                    }
+                )
+            tool_calls = list(response.tool_calls.values())
+            for tool_call in tool_calls:
+                input_items.append(
+                    {
+                        "type": "function_call",
+                        "call_id": tool_call.call_id,
+                        "name": tool_call.name,
+                        "arguments": tool_call.arguments,
+                    }
+                )
+            async with aclosing(
+                _execute_tool_calls(tool_executor, tool_calls, budget)
+            ) as tool_results:
+                async for tool_call, result in tool_results:
+                    result_json = json.dumps(result, default=str)
+                    yield f'a:{{"toolCallId":"{tool_call.call_id}","result":{result_json}}}\n'
+                    input_items.append(
+                        {
+                            "type": "function_call_output",
+                            "call_id": tool_call.call_id,
+                            "output": result_json,
+                        }
+                    )
+                    if await budget.client_disconnected():
+                        return
+            # finish of the step, the next response is another step of the same message
+            yield _finish_part(
+                "e",
+                "tool-calls",
+                response.input_tokens,
+                response.output_tokens,
+                is_continued=False,
+            )
+        except TimeoutError:
+            logger.warning(
+                "agent chat stream timed out", extra={"timeout_seconds": timeout_seconds}
+            )
+            yield _STREAM_TIMEOUT_ERROR_PART
+            return
 
-    # TODO: support different meta function mode ACI_META_FUNCTIONS_SCHEMA_LIST
-    stream = client.responses.create(model="gpt-4o", input=messages, stream=True, tools=tools)
 
-    for event in stream:
-        final_tool_calls = {}
+async def _stream_response(
+    openai_client: AsyncOpenAI,
+    input_items: list,
+    tools: list[OpenAIResponsesFunctionDefinition | dict],
+    tool_choice: str | None,
+    max_output_tokens: int,
+    budget: _StreamBudget,
+    response: _StreamedResponse,
+) -> AsyncIterator[str]:
+    """
+    Stream the text and tool call parts of a model response, recorded in response.
+    Raises TimeoutError when the stream's time budget runs out.
+    """
+    async with asyncio.timeout_at(budget.deadline):
+        stream = await openai_client.responses.create(
+            model="gpt-4o",
+            input=input_items,
+            stream=True,
+            tools=tools,
+            max_output_tokens=max_output_tokens,
+            **({"tool_choice": tool_choice} if tool_choice else {}),
+        )
+    events = aiter(stream)
+    try:
+        while True:
+            try:
+                async with asyncio.timeout_at(budget.deadline):
+                    event = await anext(events)
+            except StopAsyncIteration:
+                break
+
+            if await budget.client_disconnected():
+                break
 
-        for event in stream:
             if event.type == "response.output_text.delta":
                 # Stream text content
                 if event.delta:
+                    response.text += event.delta
                     yield f"0:{json.dumps(event.delta)}\n"
 
             elif event.type == "response.output_item.added":
-                final_tool_calls[event.output_index] = event.item
+                if event.item.type == "function_call":
+                    response.tool_calls[event.output_index] = event.item
 
             elif event.type == "response.function_call_arguments.delta":
-                index = event.output_index
-                if final_tool_calls[index]:
-                    final_tool_calls[index].arguments += event.delta
+                tool_call = response.tool_calls.get(event.output_index)
+                if tool_call:
+                    tool_call.arguments += event.delta
 
             elif event.type == "response.function_call_arguments.done":
                 # Emit completed tool call
-                index = event.output_index
-                if final_tool_calls[index]:
-                    tool_call = final_tool_calls[index]
-
+                tool_call = response.tool_calls.get(event.output_index)
+                if tool_call:
                     yield f'9:{{"toolCallId":"{tool_call.call_id}","toolName":"{tool_call.name}","args":{tool_call.arguments}}}\n'
                     logger.info("Tool_call_id", extra={"tool_call_id": tool_call.call_id})
                     logger.info("Tool_id", extra={"tool_id": tool_call.id})
 
-            elif event.type == "response.completed":
-                if hasattr(event, "usage"):
-                    yield 'd:{{"finishReason":"{reason}","usage":{{"promptTokens":{prompt},"completionTokens":{completion}}}}}\n'.format(
-                        reason="tool-calls" if final_tool_calls else "stop",
-                        prompt=event.usage.prompt_tokens,
-                        completion=event.usage.completion_tokens,
+            elif event.type in ("response.completed", "response.incomplete"):
+                if event.type == "response.incomplete":
+                    # the max_output_tokens budget was reached, or the content was filtered
+                    incomplete_details = event.response.incomplete_details
+                    incomplete_reason = incomplete_details.reason if incomplete_details else None
+                    logger.warning(
+                        "agent chat response incomplete",
+                        extra={"incomplete_reason": incomplete_reason},
                     )
+                    response.finish_reason = (
+                        "content-filter" if incomplete_reason == "content_filter" else "length"
+                    )
+                else:
+                    response.finish_reason = "tool-calls" if response.tool_calls else "stop"
+                usage = event.response.usage
+                if usage:
+                    response.input_tokens = usage.input_tokens
+                    response.output_tokens = usage.output_tokens
+    finally:
+        # release the connection to OpenAI (and stop the generation) also when the stream is
+        # cancelled or closed early, shielded as the cancellation of the request is level-triggered
+        with anyio.CancelScope(shield=True):
+            await stream.close()
+
+
+async def _execute_tool_calls(
+    tool_executor: Callable[[str, str], Awaitable[Any]],
+    tool_calls: list[Any],
+    budget: _StreamBudget,
+) -> AsyncIterator[tuple[Any, Any]]:
+    """
+    Execute the tool calls concurrently (up to AGENT_CHAT_MAX_CONCURRENT_TOOL_CALLS at once),
+    yielding (tool call, result) as they complete. The executions still running are cancelled if
+    the stream stops. Raises TimeoutError when the stream's time budget runs out.
+    """
+    semaphore = asyncio.Semaphore(config.AGENT_CHAT_MAX_CONCURRENT_TOOL_CALLS)
+
+    async def execute(tool_call: Any) -> tuple[Any, Any]:
+        async with semaphore:
+            logger.info(
+                "executing agent chat tool call",
+                extra={"tool_call_id": tool_call.call_id, "tool_name": tool_call.name},
+            )
+            return tool_call, await tool_executor(tool_call.name, tool_call.arguments)
+
+    tasks = [asyncio.create_task(execute(tool_call)) for tool_call in tool_calls]
+    try:
+        for next_completed in asyncio.as_completed(tasks):
+            async with asyncio.timeout_at(budget.deadline):
+                tool_call, result = await next_completed
+            yield tool_call, result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _finish_part(
+    part_type: str,
+    finish_reason: str,
+    input_tokens: int,
+    output_tokens: int,
+    is_continued: bool | None = None,
+) -> str:
+    """Finish message ("d") or finish step ("e") part of the ai sdk data stream protocol."""
+    finish: dict[str, Any] = {
+        "finishReason": finish_reason,
+        "usage": {"promptTokens": input_tokens, "completionTokens": output_tokens},
+    }
+    if is_continued is not None:
+        finish["isContinued"] = is_continued
+    return f"{part_type}:{json.dumps(finish, separators=(',', ':'))}\n"
@@ -0,0 +1,188 @@
+"""
+Server side execution of the tool calls of agent chats (AgentChatMode.SERVER_TOOLS): the meta
+functions and the selected functions are executed in-process, with the function catalog and the
+function execution pipeline of the functions routes instead of HTTP calls to them. Each tool call
+is charged to the project's daily quota and the API key's rate limits, like a request to the
+functions routes.
+"""
+
+import json
+from collections.abc import Callable
+from typing import Any
+from uuid import UUID
+
+from fastapi import Response
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from aci.common import utils
+from aci.common.db import crud
+from aci.common.db.sql_models import Agent, Project
+from aci.common.enums import FunctionDefinitionFormat, Visibility
+from aci.common.exceptions import ACIException, FunctionNotFound
+from aci.common.logging_setup import get_logger
+from aci.common.schemas.function import FunctionExecutionResult, FunctionsSearch
+from aci.server import config, rate_limiting
+from aci.server import dependencies as deps
+from aci.server.agent.meta_functions import (
+    ACI_EXECUTE_FUNCTION_SCHEMA,
+    ACI_GET_FUNCTION_DEFINITION_SCHEMA,
+    ACI_SEARCH_FUNCTIONS_SCHEMA,
+)
+from aci.server.rate_limiting import ProjectRateLimits
+from aci.server.routes import functions
+
+logger = get_logger(__name__)
+
+
+class AgentToolExecutor:
+    """
+    Executes the tool calls of an agent chat on behalf of the chat's agent and linked account
+    owner. Each tool call uses its own db session, so the tool calls of a response can be executed
+    concurrently.
+    """
+
+    def __init__(
+        self,
+        api_key_id: UUID,
+        agent_id: UUID,
+        linked_account_owner_id: str,
+        selected_apps: list[str],
+        rate_limits: ProjectRateLimits,
+        db_session_factory: Callable[[], Session] | None = None,
+    ):
+        self.api_key_id = api_key_id
+        self.agent_id = agent_id
+        self.linked_account_owner_id = linked_account_owner_id
+        self.selected_apps = selected_apps
+        self.rate_limits = rate_limits
+        self.db_session_factory = db_session_factory or utils.get_db_session_factory(
+            config.DB_FULL_URL
+        )
+
+    async def execute(self, tool_name: str, arguments: str) -> Any:
+        """
+        Execute a tool call, from the tool name and its json arguments. Failures are returned as a
+        failed FunctionExecutionResult, for the model to see.
+        """
+        try:
+            tool_input = json.loads(arguments) if arguments else {}
+            if not isinstance(tool_input, dict):
+                raise ValueError("arguments must be a json object")
+        except ValueError as e:
+            return _failed_result(f"Invalid arguments, {e}")
+
+        try:
+            with self.db_session_factory() as db_session:
+                # loaded per tool call, the request's db session is closed while streaming
+                project = deps.validate_project_quota(db_session, self.api_key_id)
+                await rate_limiting.enforce_rate_limits(
+                    Response(), self.rate_limits.get_api_key_limits(self.api_key_id, project.id)
+                )
+                agent = crud.projects.get_agent_by_id(db_session, self.agent_id)
+                if not agent:
+                    return _failed_result("Agent not found")
+
+                if tool_name == ACI_SEARCH_FUNCTIONS_SCHEMA["name"]:
+                    return await self._search_functions(db_session, project, agent, tool_input)
+                if tool_name == ACI_GET_FUNCTION_DEFINITION_SCHEMA["name"]:
+                    return self._get_function_definition(db_session, project, tool_input)
+                if tool_name == ACI_EXECUTE_FUNCTION_SCHEMA["name"]:
+                    function_name = tool_input.get("function_name")
+                    function_arguments = tool_input.get("function_arguments") or {}
+                    if not isinstance(function_name, str) or not isinstance(
+                        function_arguments, dict
+                    ):
+                        return _failed_result(
+                            "Invalid arguments, function_name must be a string and "
+                            "function_arguments an object"
+                        )
+                    return await self._execute_function(
+                        db_session, project, agent, function_name, function_arguments
+                    )
+                # a selected function, called directly
+                return await self._execute_function(
+                    db_session, project, agent, tool_name, tool_input
+                )
+        except ValidationError as e:
+            return _failed_result(f"Invalid arguments, {e}")
+        except ACIException as e:
+            return _failed_result(f"{e.title}, {e.message}" if e.message else e.title)
+        except Exception:
+            logger.exception(
+                "failed to execute agent chat tool call", extra={"tool_name": tool_name}
+            )
+            return _failed_result("Internal server error")
+
+    async def _search_functions(
+        self, db_session: Session, project: Project, agent: Agent, tool_input: dict
+    ) -> list[dict]:
+        # the functions of the chat's selected apps the agent can execute, or of all the apps the
+        # agent can execute if no app was selected
+        query_params = FunctionsSearch(
+            app_names=self.selected_apps or None,
+            intent=tool_input.get("intent"),
+            allowed_apps_only=True,
+            format=FunctionDefinitionFormat.BASIC,
+            limit=tool_input.get("limit", 20),
+            offset=tool_input.get("offset", 0),
+        )
+        # the intent's embedding is generated with a blocking call
+        function_definitions = await run_in_threadpool(
+            functions.search_function_definitions, db_session, project, agent, query_params
+        )
+        return [
+            function_definition.model_dump(exclude_none=True)
+            for function_definition in function_definitions
+        ]
+
+    def _get_function_definition(
+        self, db_session: Session, project: Project, tool_input: dict
+    ) -> dict:
+        function_name = tool_input.get("function_name")
+        function = (
+            crud.functions.get_function(
+                db_session,
+                function_name,
+                project.visibility_access == Visibility.PUBLIC,
+                True,
+            )
+            if isinstance(function_name, str)
+            else None
+        )
+        if not function:
+            raise FunctionNotFound(f"function={function_name} not found")
+        return functions.format_function_definition(
+            function, FunctionDefinitionFormat.OPENAI_RESPONSES
+        ).model_dump(exclude_none=True)
+
+    async def _execute_function(
+        self,
+        db_session: Session,
+        project: Project,
+        agent: Agent,
+        function_name: str,
+        function_input: dict,
+    ) -> dict:
+        # same per (project, app) rate limit as the execute route
+        await rate_limiting.enforce_rate_limits(
+            Response(),
+            self.rate_limits.get_project_app_limits(
+                project.id, utils.parse_app_name_from_function_name(function_name)
+            ),
+        )
+        result = await functions.execute_function(
+            db_session=db_session,
+            project=project,
+            agent=agent,
+            function_name=function_name,
+            function_input=function_input,
+            linked_account_owner_id=self.linked_account_owner_id,
+            openai_client=functions.openai_client,
+        )
+        return result.model_dump(exclude_none=True)
+
+
+def _failed_result(error: str) -> dict:
+    return FunctionExecutionResult(success=False, error=error).model_dump(exclude_none=True)
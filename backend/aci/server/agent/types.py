@@ -1,6 +1,20 @@
+from enum import StrEnum
+
 from pydantic import BaseModel, Field
 
 
+class AgentChatMode(StrEnum):
+    """
+    who executes the tool calls of an agent chat.
+    """
+
+    # tool calls are streamed to the client, which sends their results in the next chat request
+    CLIENT_TOOLS = "client_tools"
+    # the server executes the tool calls (the meta functions and the selected functions) and
+    # calls the model again with their results, streaming the tool calls and results
+    SERVER_TOOLS = "server_tools"
+
+
 class ToolInvocation(BaseModel):
     tool_call_id: str = Field(alias="toolCallId")
     tool_name: str = Field(alias="toolName")
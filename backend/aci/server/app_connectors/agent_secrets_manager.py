@@ -1,4 +1,9 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from typing import override
+from uuid import UUID
 
 from aci.common import encryption
 from aci.common.db import crud
@@ -10,11 +15,125 @@ from aci.common.schemas.app_connectors.agent_secrets_manager import (
 )
 from aci.common.schemas.secret import SecretCreate, SecretUpdate
 from aci.common.schemas.security_scheme import NoAuthScheme, NoAuthSchemeCredentials
-from aci.common.utils import create_db_session
 from aci.server import config
 from aci.server.app_connectors.base import AppConnectorBase
 
 
+@dataclass
+class _CachedSecrets:
+    expires_at: float
+    # domain -> decrypted secret value
+    values: dict[str, SecretValue] = field(default_factory=dict)
+    # whether values has all the secrets of the linked account
+    complete: bool = False
+
+
+class DecryptedSecretsCache:
+    """
+    In-memory TTL cache of the decrypted secrets of linked accounts, so that repeated reads don't
+    decrypt them again (a KMS call per secret). Bounded by the number of linked accounts, least
+    recently used are evicted.
+    The cache is per server process, and invalidated on changes made by the process: the other
+    processes may return outdated (or deleted) secrets for up to the TTL.
+    Values loaded from the db are only cached if the linked account wasn't invalidated since the
+    load started (see get_generation), so a slow load can't cache secrets changed meanwhile.
+    """
+
+    def __init__(self, ttl_seconds: float, max_linked_accounts: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_linked_accounts = max_linked_accounts
+        self._entries: OrderedDict[UUID, _CachedSecrets] = OrderedDict()
+        # incremented on every invalidation
+        self._generation = 0
+        # linked account -> generation of its last invalidation, least recently invalidated first
+        self._invalidated_at: OrderedDict[UUID, int] = OrderedDict()
+        # latest generation evicted from _invalidated_at, assumed for the accounts not in it
+        self._evicted_generation = 0
+        self._lock = threading.Lock()
+
+    def get_generation(self) -> int:
+        """Get the current generation, to pass to set_all or set after loading the secrets."""
+        with self._lock:
+            return self._generation
+
+    def get_all(self, linked_account_id: UUID) -> dict[str, SecretValue] | None:
+        """Get all the secrets of the linked account, None if not cached."""
+        with self._lock:
+            entry = self._get_entry(linked_account_id)
+            if entry is None or not entry.complete:
+                return None
+            return dict(entry.values)
+
+    def get(self, linked_account_id: UUID, domain: str) -> SecretValue | None:
+        """Get the secret of a domain, None if not cached."""
+        with self._lock:
+            entry = self._get_entry(linked_account_id)
+            return entry.values.get(domain) if entry is not None else None
+
+    def set_all(
+        self, linked_account_id: UUID, values: dict[str, SecretValue], generation: int
+    ) -> None:
+        """Cache all the secrets of the linked account, loaded since the generation."""
+        with self._lock:
+            if self._is_invalidated_since(linked_account_id, generation):
+                return
+            self._set_entry(
+                linked_account_id,
+                _CachedSecrets(time.monotonic() + self.ttl_seconds, dict(values), complete=True),
+            )
+
+    def set(
+        self, linked_account_id: UUID, domain: str, value: SecretValue, generation: int
+    ) -> None:
+        """Cache the secret of a domain, loaded since the generation."""
+        with self._lock:
+            if self._is_invalidated_since(linked_account_id, generation):
+                return
+            entry = self._get_entry(linked_account_id)
+            if entry is None:
+                entry = _CachedSecrets(time.monotonic() + self.ttl_seconds)
+                self._set_entry(linked_account_id, entry)
+            entry.values[domain] = value
+
+    def invalidate(self, linked_account_id: UUID) -> None:
+        with self._lock:
+            self._entries.pop(linked_account_id, None)
+            self._generation += 1
+            self._invalidated_at[linked_account_id] = self._generation
+            self._invalidated_at.move_to_end(linked_account_id)
+            while len(self._invalidated_at) > self.max_linked_accounts:
+                _, self._evicted_generation = self._invalidated_at.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _is_invalidated_since(self, linked_account_id: UUID, generation: int) -> bool:
+        return self._invalidated_at.get(linked_account_id, self._evicted_generation) > generation
+
+    def _get_entry(self, linked_account_id: UUID) -> _CachedSecrets | None:
+        entry = self._entries.get(linked_account_id)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[linked_account_id]
+            return None
+        self._entries.move_to_end(linked_account_id)
+        return entry
+
+    def _set_entry(self, linked_account_id: UUID, entry: _CachedSecrets) -> None:
+        self._entries[linked_account_id] = entry
+        self._entries.move_to_end(linked_account_id)
+        while len(self._entries) > self.max_linked_accounts:
+            self._entries.popitem(last=False)
+
+
+decrypted_secrets_cache = DecryptedSecretsCache(
+    ttl_seconds=config.AGENT_SECRETS_CACHE_TTL_SECONDS,
+    max_linked_accounts=config.AGENT_SECRETS_CACHE_MAX_LINKED_ACCOUNTS,
+)
+
+
 class AgentSecretsManager(AppConnectorBase):
     """
     Agent Secrets Manager Connector that manages user credentials (username/password) for
@@ -42,17 +161,26 @@ class AgentSecretsManager(AppConnectorBase):
         Returns:
             list[DomainCredential]: List of domain credentials.
         """
-        with create_db_session(config.DB_FULL_URL) as db_session:
-            secrets = crud.secret.list_secrets(db_session, self.linked_account.id)
-
-            result = []
-            for secret in secrets:
-                decrypted_value = encryption.decrypt(secret.value)
-                secret_value = SecretValue.model_validate_json(decrypted_value.decode())
-
-                result.append(DomainCredential(domain=secret.key, **secret_value.model_dump()))
+        secret_values = decrypted_secrets_cache.get_all(self.linked_account.id)
+        if secret_values is None:
+            generation = decrypted_secrets_cache.get_generation()
+            with self.db_session_factory() as db_session:
+                secrets = crud.secret.list_secrets(db_session, self.linked_account.id)
+
+            decrypted_values = encryption.decrypt_batch(
+                [secret.value for secret in secrets],
+                max_concurrency=config.AGENT_SECRETS_DECRYPT_MAX_CONCURRENCY,
+            )
+            secret_values = {
+                secret.key: SecretValue.model_validate_json(decrypted_value.decode())
+                for secret, decrypted_value in zip(secrets, decrypted_values, strict=True)
+            }
+            decrypted_secrets_cache.set_all(self.linked_account.id, secret_values, generation)
 
-            return result
+        return [
+            DomainCredential(domain=domain, **secret_value.model_dump())
+            for domain, secret_value in secret_values.items()
+        ]
 
     def get_credential_for_domain(self, domain: str) -> DomainCredential:
         """
@@ -69,20 +197,29 @@ class AgentSecretsManager(AppConnectorBase):
         Raises:
             KeyError: If no credential exists for the specified domain.
         """
-        with create_db_session(config.DB_FULL_URL) as db_session:
-            secret = crud.secret.get_secret(db_session, self.linked_account.id, domain)
-            if not secret:
-                raise AgentSecretsManagerError(
-                    message=f"No credentials found for domain '{domain}'"
-                )
-
-            decrypted_value = encryption.decrypt(secret.value)
-            secret_value = SecretValue.model_validate_json(decrypted_value.decode())
-
-            return DomainCredential(
-                domain=domain,
-                **secret_value.model_dump(),
-            )
+        all_secret_values = decrypted_secrets_cache.get_all(self.linked_account.id)
+        if all_secret_values is not None:
+            secret_value = all_secret_values.get(domain)
+        else:
+            secret_value = decrypted_secrets_cache.get(self.linked_account.id, domain)
+            if secret_value is None:
+                generation = decrypted_secrets_cache.get_generation()
+                with self.db_session_factory() as db_session:
+                    secret = crud.secret.get_secret(db_session, self.linked_account.id, domain)
+                if secret:
+                    decrypted_value = encryption.decrypt(secret.value)
+                    secret_value = SecretValue.model_validate_json(decrypted_value.decode())
+                    decrypted_secrets_cache.set(
+                        self.linked_account.id, domain, secret_value, generation
+                    )
+
+        if secret_value is None:
+            raise AgentSecretsManagerError(message=f"No credentials found for domain '{domain}'")
+
+        return DomainCredential(
+            domain=domain,
+            **secret_value.model_dump(),
+        )
 
     def create_credential_for_domain(self, domain: str, username: str, password: str) -> None:
         """
@@ -98,7 +235,7 @@ class AgentSecretsManager(AppConnectorBase):
         Raises:
             ValueError: If a credential for the domain already exists.
         """
-        with create_db_session(config.DB_FULL_URL) as db_session:
+        with self.db_session_factory() as db_session:
             existing = crud.secret.get_secret(db_session, self.linked_account.id, domain)
             if existing:
                 raise AgentSecretsManagerError(
@@ -114,6 +251,7 @@ class AgentSecretsManager(AppConnectorBase):
             )
             crud.secret.create_secret(db_session, self.linked_account.id, secret_create)
             db_session.commit()
+        decrypted_secrets_cache.invalidate(self.linked_account.id)
 
     def update_credential_for_domain(self, domain: str, username: str, password: str) -> None:
         """
@@ -129,7 +267,7 @@ class AgentSecretsManager(AppConnectorBase):
         Raises:
             KeyError: If no credential exists for the specified domain.
         """
-        with create_db_session(config.DB_FULL_URL) as db_session:
+        with self.db_session_factory() as db_session:
             secret = crud.secret.get_secret(db_session, self.linked_account.id, domain)
             if not secret:
                 raise AgentSecretsManagerError(
@@ -144,6 +282,7 @@ class AgentSecretsManager(AppConnectorBase):
             )
             crud.secret.update_secret(db_session, secret, secret_update)
             db_session.commit()
+        decrypted_secrets_cache.invalidate(self.linked_account.id)
 
     def delete_credential_for_domain(self, domain: str) -> None:
         """
@@ -157,7 +296,7 @@ class AgentSecretsManager(AppConnectorBase):
         Raises:
             KeyError: If no credential exists for the specified domain.
         """
-        with create_db_session(config.DB_FULL_URL) as db_session:
+        with self.db_session_factory() as db_session:
             secret = crud.secret.get_secret(db_session, self.linked_account.id, domain)
             if not secret:
                 raise AgentSecretsManagerError(
@@ -165,3 +304,4 @@ class AgentSecretsManager(AppConnectorBase):
                 )
             crud.secret.delete_secret(db_session, secret)
             db_session.commit()
+        decrypted_secrets_cache.invalidate(self.linked_account.id)
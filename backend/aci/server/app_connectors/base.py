@@ -1,5 +1,16 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, ClassVar
 
+from sqlalchemy.orm import Session
+
+from aci.common import utils
 from aci.common.db.sql_models import LinkedAccount
 from aci.common.exceptions import NoImplementationFound
 from aci.common.logging_setup import get_logger
@@ -12,15 +23,52 @@ from aci.common.schemas.security_scheme import (
     OAuth2Scheme,
     OAuth2SchemeCredentials,
 )
+from aci.server import config
 
 logger = get_logger(__name__)
 
+# thread pools of the connectors' sync methods when executed from the event loop, one per connector
+# class so a connector with slow blocking calls can't starve the others
+_sync_method_executors: dict[type["AppConnectorBase"], ThreadPoolExecutor] = {}
+_sync_method_executors_lock = threading.Lock()
+
+
+def get_sync_method_executor(app_connector_class: type["AppConnectorBase"]) -> ThreadPoolExecutor:
+    with _sync_method_executors_lock:
+        executor = _sync_method_executors.get(app_connector_class)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=app_connector_class.sync_method_max_workers,
+                thread_name_prefix=f"app-connector-{app_connector_class.__name__}",
+            )
+            _sync_method_executors[app_connector_class] = executor
+        return executor
+
+
+def shutdown_sync_method_executors() -> None:
+    with _sync_method_executors_lock:
+        executors = list(_sync_method_executors.values())
+        _sync_method_executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 
 class AppConnectorBase(ABC):
     """
     Base class for all app connectors.
+
+    Connector methods can be sync or async (async def). Prefer async methods for connectors with
+    an async sdk, sync methods are run in a thread pool of the connector (of
+    sync_method_max_workers threads) when executed from the event loop.
     """
 
+    # whether instances are reused across executions of the same linked account, for connectors
+    # that are expensive to create (e.g., they build an sdk client), see app_connectors/pool.py.
+    # pooled connectors must not keep per-execution state.
+    pooled: ClassVar[bool] = False
+    # max concurrent executions of the connector's sync methods per server process
+    sync_method_max_workers: ClassVar[int] = config.APP_CONNECTOR_SYNC_METHOD_MAX_WORKERS
+
     # Note: security_scheme might not be necessary in most cases because we probably use some sdks
     # that handles credentials differently per App. It can be useful if inside the connector we still
     # need to construct the raw http request object.
@@ -35,6 +83,11 @@ class AppConnectorBase(ABC):
         self.linked_account = linked_account
         self.security_scheme = security_scheme
         self.security_credentials = security_credentials
+        # sessions for connectors that access the db, on the process' pooled engine by default,
+        # the executor sets the one of the execution
+        self.db_session_factory: Callable[[], Session] = utils.get_db_session_factory(
+            config.DB_FULL_URL
+        )
 
     @abstractmethod
     def _before_execute(self) -> None:
@@ -45,14 +98,9 @@ class AppConnectorBase(ABC):
 
     def execute(self, method_name: str, function_input: dict) -> FunctionExecutionResult:
         """
-        This method is the main entry point for executing a function.
+        This method is the main entry point for executing a function by method name.
         """
-        logger.info(
-            "executing via connector",
-            extra={"method_name": method_name, "class_name": self.__class__.__name__},
-        )
-        self._before_execute()
-        method = getattr(self, method_name, None)
+        method = getattr(type(self), method_name, None)
         if not method:
             logger.error(
                 "method not found",
@@ -64,28 +112,78 @@ class AppConnectorBase(ABC):
             raise NoImplementationFound(
                 f"method={method_name} not found in class={self.__class__.__name__}"
             )
+        return self.execute_method(method_name, method, function_input)
+
+    def execute_method(
+        self, method_name: str, method: Callable[..., Any], function_input: dict
+    ) -> FunctionExecutionResult:
+        """
+        Execute an (unbound) method of the connector class, already resolved e.g. by the
+        connector registry. Must not be called from the event loop, see execute_method_async.
+        """
+        self._log_execute(method_name, function_input)
+        self._before_execute()
 
         try:
-            logger.info(
-                "executing method",
-                extra={
-                    "method_name": method_name,
-                    "class_name": self.__class__.__name__,
-                    "function_input": function_input,
-                },
-            )
-            result = method(**function_input)
-            logger.info(
-                "execution result",
-                extra={"result": result},
-            )
-            return FunctionExecutionResult(success=True, data=result)
+            if inspect.iscoroutinefunction(method):
+                result = asyncio.run(method(self, **function_input))
+            else:
+                result = method(self, **function_input)
         except Exception as e:
-            logger.exception(
-                f"error executing method, {e}",
-                extra={
-                    "method_name": method_name,
-                    "class_name": self.__class__.__name__,
-                },
-            )
-            return FunctionExecutionResult(success=False, error=str(e))
+            return self._failed_result(method_name, e)
+        return self._succeeded_result(result)
+
+    async def execute_method_async(
+        self, method_name: str, method: Callable[..., Any], function_input: dict
+    ) -> FunctionExecutionResult:
+        """
+        Execute an (unbound) method of the connector class from the event loop: async methods are
+        awaited, sync ones are run in the connector's thread pool.
+        """
+        self._log_execute(method_name, function_input)
+        self._before_execute()
+
+        try:
+            if inspect.iscoroutinefunction(method):
+                result = await method(self, **function_input)
+            else:
+                # copy the context so the request's context (e.g., request id for logging) is kept
+                result = await asyncio.get_running_loop().run_in_executor(
+                    get_sync_method_executor(type(self)),
+                    contextvars.copy_context().run,
+                    functools.partial(method, self, **function_input),
+                )
+        except Exception as e:
+            return self._failed_result(method_name, e)
+        return self._succeeded_result(result)
+
+    def _log_execute(self, method_name: str, function_input: dict) -> None:
+        logger.info(
+            "executing via connector",
+            extra={"method_name": method_name, "class_name": self.__class__.__name__},
+        )
+        logger.info(
+            "executing method",
+            extra={
+                "method_name": method_name,
+                "class_name": self.__class__.__name__,
+                "function_input": function_input,
+            },
+        )
+
+    def _succeeded_result(self, result: Any) -> FunctionExecutionResult:
+        logger.info(
+            "execution result",
+            extra={"result": result},
+        )
+        return FunctionExecutionResult(success=True, data=result)
+
+    def _failed_result(self, method_name: str, e: Exception) -> FunctionExecutionResult:
+        logger.exception(
+            f"error executing method, {e}",
+            extra={
+                "method_name": method_name,
+                "class_name": self.__class__.__name__,
+            },
+        )
+        return FunctionExecutionResult(success=False, error=str(e))
@@ -1,7 +1,5 @@
 from typing import Any, override
 
-from e2b_code_interpreter import Sandbox
-
 from aci.common.db.sql_models import LinkedAccount
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.security_scheme import (
@@ -9,6 +7,7 @@ from aci.common.schemas.security_scheme import (
     APIKeySchemeCredentials,
 )
 from aci.server.app_connectors.base import AppConnectorBase
+from aci.server.app_connectors.e2b_sandboxes import e2b_sandbox_manager
 
 logger = get_logger(__name__)
 
@@ -31,13 +30,18 @@ class E2b(AppConnectorBase):
     def _before_execute(self) -> None:
         pass
 
-    def run_code(
+    async def run_code(
         self,
         code: str,
+        session_key: str | None = None,
     ) -> dict[str, Any]:
         """
         Execute code in E2B sandbox and return the result.
+        Successive executions with the same session_key run in the same sandbox, sharing its
+        interpreter state.
         """
-        with Sandbox(api_key=self.api_key) as sandbox:
-            execution = sandbox.run_code(code)
+        async with e2b_sandbox_manager.sandbox(
+            self.linked_account.id, self.api_key, session_key
+        ) as sandbox:
+            execution = await sandbox.run_code(code)
             return {"text": execution.text}
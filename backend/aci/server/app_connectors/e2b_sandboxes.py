@@ -0,0 +1,309 @@
+"""
+Pool of warm E2B sandboxes per linked account, used by the E2B connector.
+
+Booting a sandbox dominates the latency of running code, so the manager keeps a few pre-warmed
+sandboxes per linked account (per api key) that recently ran code. A sandbox taken from the warm
+pool runs a single execution and is then killed, so executions never share interpreter state,
+unless they pass the same session key: the sandbox of a sticky session is kept for the session's
+successive executions (run one at a time) to reuse the same interpreter.
+
+Sandboxes are health checked before they're reused, and killed once idle for longer than the idle
+TTL (swept periodically) or when evicted (least recently used first) to keep at most max_size
+sandboxes per linked account.
+
+The pool is per server process (sticky sessions are sticky within a process), and only used from
+the event loop it was started in, other callers get a one-off sandbox.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+from uuid import UUID
+
+from e2b_code_interpreter import AsyncSandbox
+
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+class Sandbox(Protocol):
+    async def run_code(self, code: str) -> Any: ...
+
+    async def is_running(self) -> bool: ...
+
+    async def kill(self) -> bool: ...
+
+
+async def create_e2b_sandbox(api_key: str) -> Sandbox:
+    sandbox: Sandbox = await AsyncSandbox.create(
+        api_key=api_key, timeout=config.E2B_SANDBOX_TIMEOUT_SECONDS
+    )
+    return sandbox
+
+
+@dataclass(eq=False)
+class _PooledSandbox:
+    # None until the sandbox of a new sticky session is created
+    sandbox: Sandbox | None
+    created_at: float = field(default_factory=time.monotonic)
+    last_used_at: float = field(default_factory=time.monotonic)
+    # serializes the executions of a sticky session, which share the sandbox's interpreter
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # executions using or waiting for the sandbox, it's not evicted while there are any
+    num_users: int = 0
+
+
+@dataclass(eq=False)
+class _LinkedAccountSandboxes:
+    warm: list[_PooledSandbox] = field(default_factory=list)
+    # session key -> sandbox, least recently used first
+    sticky: OrderedDict[str, _PooledSandbox] = field(default_factory=OrderedDict)
+    num_warming: int = 0
+
+    def size(self) -> int:
+        return len(self.warm) + len(self.sticky) + self.num_warming
+
+
+class E2bSandboxManager:
+    def __init__(
+        self,
+        sandbox_factory: Callable[[str], Awaitable[Sandbox]],
+        warm_size: int,
+        max_size: int,
+        idle_ttl_seconds: float,
+        max_age_seconds: float,
+        sweep_interval_seconds: float,
+    ):
+        self.sandbox_factory = sandbox_factory
+        self.warm_size = warm_size
+        self.max_size = max_size
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._linked_accounts: dict[tuple[UUID, str], _LinkedAccountSandboxes] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._sweep_task: asyncio.Task[None] | None = None
+        # background tasks warming up and killing sandboxes
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def start(self) -> None:
+        """Start the periodic sweep, must be called from within a running event loop."""
+        if self._sweep_task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._sweep_task = asyncio.create_task(self._sweep_periodically())
+
+    async def stop(self) -> None:
+        """Stop the sweep and kill all the pooled sandboxes."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            await asyncio.gather(self._sweep_task, return_exceptions=True)
+            self._sweep_task = None
+        self._loop = None
+
+        for linked_account_sandboxes in self._linked_accounts.values():
+            for pooled in [
+                *linked_account_sandboxes.warm,
+                *linked_account_sandboxes.sticky.values(),
+            ]:
+                self._kill(pooled)
+        self._linked_accounts.clear()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @asynccontextmanager
+    async def sandbox(
+        self, linked_account_id: UUID, api_key: str, session_key: str | None = None
+    ) -> AsyncIterator[Sandbox]:
+        """
+        Get a healthy sandbox of the linked account: the sandbox of the sticky session if a
+        session key is given, or else a warm (or new) sandbox that is killed after use.
+        """
+        if self._loop is None or self._loop is not asyncio.get_running_loop():
+            sandbox = await self.sandbox_factory(api_key)
+            try:
+                yield sandbox
+            finally:
+                await sandbox.kill()
+            return
+
+        key = (linked_account_id, hashlib.sha256(api_key.encode()).hexdigest())
+        linked_account_sandboxes = self._linked_accounts.setdefault(key, _LinkedAccountSandboxes())
+        if session_key is None:
+            warm = await self._take_warm_sandbox(linked_account_sandboxes)
+            warm_sandbox = warm.sandbox if warm else None
+            sandbox = warm_sandbox or await self.sandbox_factory(api_key)
+            self._warm_up(key, linked_account_sandboxes, api_key)
+            try:
+                yield sandbox
+            finally:
+                self._kill(_PooledSandbox(sandbox))
+            return
+
+        pooled = linked_account_sandboxes.sticky.get(session_key)
+        if pooled is None:
+            pooled = _PooledSandbox(sandbox=None)
+            linked_account_sandboxes.sticky[session_key] = pooled
+            self._evict(linked_account_sandboxes)
+        linked_account_sandboxes.sticky.move_to_end(session_key)
+
+        pooled.num_users += 1
+        try:
+            async with pooled.lock:
+                if pooled.sandbox is None or not await self._is_healthy(pooled):
+                    if pooled.sandbox is not None:
+                        logger.warning(
+                            "sandbox of sticky session is unhealthy, replacing it, its interpreter "
+                            "state is lost",
+                            extra={"linked_account_id": linked_account_id},
+                        )
+                        self._kill(_PooledSandbox(pooled.sandbox))
+                    warm = await self._take_warm_sandbox(linked_account_sandboxes)
+                    if warm is not None:
+                        pooled.sandbox, pooled.created_at = warm.sandbox, warm.created_at
+                    else:
+                        pooled.sandbox = await self.sandbox_factory(api_key)
+                        pooled.created_at = time.monotonic()
+                    self._warm_up(key, linked_account_sandboxes, api_key)
+                sticky_sandbox = pooled.sandbox
+                assert sticky_sandbox is not None
+                yield sticky_sandbox
+                pooled.last_used_at = time.monotonic()
+        finally:
+            pooled.num_users -= 1
+
+    def sweep(self) -> None:
+        """Kill the sandboxes idle for longer than the idle TTL."""
+        now = time.monotonic()
+        num_killed = 0
+        for key, linked_account_sandboxes in list(self._linked_accounts.items()):
+            for pooled in list(linked_account_sandboxes.warm):
+                if now - pooled.last_used_at > self.idle_ttl_seconds:
+                    linked_account_sandboxes.warm.remove(pooled)
+                    self._kill(pooled)
+                    num_killed += 1
+            for session_key, pooled in list(linked_account_sandboxes.sticky.items()):
+                if pooled.num_users == 0 and now - pooled.last_used_at > self.idle_ttl_seconds:
+                    del linked_account_sandboxes.sticky[session_key]
+                    self._kill(pooled)
+                    num_killed += 1
+            if linked_account_sandboxes.size() == 0:
+                del self._linked_accounts[key]
+
+        if num_killed:
+            logger.info("killed idle e2b sandboxes", extra={"num_killed": num_killed})
+
+    async def _take_warm_sandbox(
+        self, linked_account_sandboxes: _LinkedAccountSandboxes
+    ) -> _PooledSandbox | None:
+        while linked_account_sandboxes.warm:
+            pooled = linked_account_sandboxes.warm.pop(0)
+            if await self._is_healthy(pooled):
+                return pooled
+            self._kill(pooled)
+        return None
+
+    async def _is_healthy(self, pooled: _PooledSandbox) -> bool:
+        assert pooled.sandbox is not None
+        if time.monotonic() - pooled.created_at > self.max_age_seconds:
+            return False
+        try:
+            return await pooled.sandbox.is_running()
+        except Exception:
+            logger.warning("e2b sandbox health check failed", exc_info=True)
+            return False
+
+    def _warm_up(
+        self,
+        key: tuple[UUID, str],
+        linked_account_sandboxes: _LinkedAccountSandboxes,
+        api_key: str,
+    ) -> None:
+        """Create sandboxes in the background to keep warm_size warm sandboxes."""
+        while (
+            len(linked_account_sandboxes.warm) + linked_account_sandboxes.num_warming
+            < self.warm_size
+            and linked_account_sandboxes.size() < self.max_size
+        ):
+            linked_account_sandboxes.num_warming += 1
+            self._spawn(self._create_warm_sandbox(key, linked_account_sandboxes, api_key))
+
+    async def _create_warm_sandbox(
+        self,
+        key: tuple[UUID, str],
+        linked_account_sandboxes: _LinkedAccountSandboxes,
+        api_key: str,
+    ) -> None:
+        try:
+            sandbox = await self.sandbox_factory(api_key)
+        except Exception:
+            logger.exception("failed to warm up e2b sandbox", extra={"linked_account_id": key[0]})
+            return
+        finally:
+            linked_account_sandboxes.num_warming -= 1
+
+        if self._linked_accounts.get(key) is not linked_account_sandboxes:
+            # stopped or swept while warming up
+            self._kill(_PooledSandbox(sandbox))
+            return
+        linked_account_sandboxes.warm.append(_PooledSandbox(sandbox))
+        self._evict(linked_account_sandboxes)
+
+    def _evict(self, linked_account_sandboxes: _LinkedAccountSandboxes) -> None:
+        """Kill warm, then least recently used idle sticky sandboxes, to keep at most max_size."""
+        while linked_account_sandboxes.size() > self.max_size:
+            if linked_account_sandboxes.warm:
+                self._kill(linked_account_sandboxes.warm.pop(0))
+                continue
+            session_key = next(
+                (
+                    session_key
+                    for session_key, pooled in linked_account_sandboxes.sticky.items()
+                    if pooled.num_users == 0
+                ),
+                None,
+            )
+            if session_key is None:
+                break
+            self._kill(linked_account_sandboxes.sticky.pop(session_key))
+
+    def _kill(self, pooled: _PooledSandbox) -> None:
+        if pooled.sandbox is not None:
+            self._spawn(self._kill_sandbox(pooled.sandbox))
+
+    async def _kill_sandbox(self, sandbox: Sandbox) -> None:
+        try:
+            await sandbox.kill()
+        except Exception:
+            # it's killed by e2b anyway once its timeout expires
+            logger.warning("failed to kill e2b sandbox", exc_info=True)
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("failed to sweep e2b sandboxes")
+
+
+e2b_sandbox_manager = E2bSandboxManager(
+    sandbox_factory=create_e2b_sandbox,
+    warm_size=config.E2B_SANDBOX_WARM_SIZE,
+    max_size=config.E2B_SANDBOX_MAX_SIZE,
+    idle_ttl_seconds=config.E2B_SANDBOX_IDLE_TTL_SECONDS,
+    # not reused close to the sandbox's timeout, after which e2b kills it
+    max_age_seconds=config.E2B_SANDBOX_TIMEOUT_SECONDS - 60,
+    sweep_interval_seconds=config.E2B_SANDBOX_SWEEP_INTERVAL_SECONDS,
+)
@@ -1,9 +1,10 @@
 import base64
+import functools
 from email.mime.text import MIMEText
-from typing import override
+from typing import Any, override
 
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.discovery import Resource
 
 from aci.common.db.sql_models import LinkedAccount
 from aci.common.logging_setup import get_logger
@@ -11,10 +12,40 @@ from aci.common.schemas.security_scheme import (
     OAuth2Scheme,
     OAuth2SchemeCredentials,
 )
+from aci.server import config
 from aci.server.app_connectors.base import AppConnectorBase
+from aci.server.app_connectors.google_api import (
+    BatchItemResult,
+    build_service,
+    execute_batch,
+    get_quota_pacer,
+)
 
 logger = get_logger(__name__)
 
+# gmail api quota units per call, see https://developers.google.com/gmail/api/reference/quota
+MESSAGES_SEND_QUOTA_UNITS = 100
+DRAFTS_CREATE_QUOTA_UNITS = 10
+
+
+def _encode_message(
+    recipient: str,
+    body: str,
+    subject: str | None = None,
+    cc: list[str] | None = None,
+    bcc: list[str] | None = None,
+) -> str:
+    """Create an email message, encoded as the "raw" field of the gmail api"""
+    message = MIMEText(body)
+    message["to"] = recipient
+    if subject:
+        message["subject"] = subject
+    if cc:
+        message["cc"] = ", ".join(cc)
+    if bcc:
+        message["bcc"] = ", ".join(bcc)
+    return base64.urlsafe_b64encode(message.as_bytes()).decode()
+
 
 # TODO: how should we handle args are passed as flattened? separated by double underscore?
 # e.g. person__name, person__title. maybe need to preprocess the args before passing to the method?
@@ -23,6 +54,9 @@ class Gmail(AppConnectorBase):
     Gmail Connector.
     """
 
+    # building the gmail service (and its http transport) is expensive, reuse it across executions
+    pooled = True
+
     def __init__(
         self,
         linked_account: LinkedAccount,
@@ -44,6 +78,28 @@ class Gmail(AppConnectorBase):
         # (which was built for generic oauht2/api_key rest apis)
         pass
 
+    @functools.cached_property
+    def _service(self) -> Resource:
+        return build_service("gmail", "v1", self.credentials)
+
+    def _execute_batch(
+        self, requests: list[Any], quota_units_per_request: int
+    ) -> list[BatchItemResult]:
+        return execute_batch(
+            self._service,
+            requests,
+            quota_units_per_request,
+            # gmail's quota is per user, shared by the executions of the linked account
+            get_quota_pacer(
+                ("GMAIL", self.linked_account.id),
+                config.GMAIL_QUOTA_UNITS_PER_SECOND,
+                config.GMAIL_QUOTA_BURST_UNITS,
+            ),
+            max_batch_size=config.GMAIL_BATCH_MAX_SIZE,
+            max_retries=config.GMAIL_BATCH_MAX_RETRIES,
+            retry_backoff_seconds=config.GMAIL_BATCH_RETRY_BACKOFF_SECONDS,
+        )
+
     # TODO: support HTML type for body
     def send_email(
         self,
@@ -84,7 +140,7 @@ class Gmail(AppConnectorBase):
         # Create the final message body
         message_body = {"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()}
 
-        service = build("gmail", "v1", credentials=self.credentials)
+        service = self._service
 
         sent_message = service.users().messages().send(userId=sender, body=message_body).execute()  # type: ignore
 
@@ -133,7 +189,7 @@ class Gmail(AppConnectorBase):
         # Create the message body
         message_body = {"message": {"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()}}
 
-        service = build("gmail", "v1", credentials=self.credentials)
+        service = self._service
 
         # Create the draft
         draft = service.users().drafts().create(userId=sender, body=message_body).execute()  # type: ignore
@@ -187,7 +243,7 @@ class Gmail(AppConnectorBase):
             "message": {"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()},
         }
 
-        service = build("gmail", "v1", credentials=self.credentials)
+        service = self._service
 
         # Update the draft
         updated_draft = (
@@ -197,3 +253,73 @@ class Gmail(AppConnectorBase):
         logger.info(f"Draft updated successfully. Draft ID: {updated_draft.get('id', 'unknown')}")
 
         return {"draft_id": updated_draft.get("id", "unknown")}
+
+    # TODO: support HTML type for body
+    def send_emails_batch(
+        self,
+        sender: str,
+        emails: list[dict[str, Any]],
+    ) -> dict[str, list[dict[str, str]]]:
+        """
+        Send multiple emails using Gmail API batch requests, paced by the user's quota.
+
+        Args:
+            sender: Sender email address
+            emails: Emails to send, each with a recipient, body and optional subject, cc and bcc
+
+        Returns:
+            dict: The result of each email in the same order, its message ID or its error
+        """
+        logger.info("executing send_emails_batch", extra={"num_emails": len(emails)})
+
+        requests = [
+            self._service.users()  # type: ignore
+            .messages()
+            .send(userId=sender, body={"raw": _encode_message(**email)})
+            for email in emails
+        ]
+        results = self._execute_batch(requests, MESSAGES_SEND_QUOTA_UNITS)
+
+        return {
+            "results": [
+                {"message_id": result.response.get("id", "unknown")}
+                if result.error is None
+                else {"error": result.error}
+                for result in results
+            ]
+        }
+
+    # TODO: support HTML type for body
+    def drafts_create_batch(
+        self,
+        sender: str,
+        drafts: list[dict[str, Any]],
+    ) -> dict[str, list[dict[str, str]]]:
+        """
+        Create multiple draft emails using Gmail API batch requests, paced by the user's quota.
+
+        Args:
+            sender: Sender email address
+            drafts: Drafts to create, each with a recipient, body and optional subject, cc and bcc
+
+        Returns:
+            dict: The result of each draft in the same order, its draft ID or its error
+        """
+        logger.info("executing drafts_create_batch", extra={"num_drafts": len(drafts)})
+
+        requests = [
+            self._service.users()  # type: ignore
+            .drafts()
+            .create(userId=sender, body={"message": {"raw": _encode_message(**draft)}})
+            for draft in drafts
+        ]
+        results = self._execute_batch(requests, DRAFTS_CREATE_QUOTA_UNITS)
+
+        return {
+            "results": [
+                {"draft_id": result.response.get("id", "unknown")}
+                if result.error is None
+                else {"error": result.error}
+                for result in results
+            ]
+        }
@@ -0,0 +1,184 @@
+"""
+Helpers for the connectors of Google APIs, built with the google-api-python-client.
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import (  # type: ignore[attr-defined]
+    Resource,
+    build_from_document,
+)
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from aci.common.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# reasons of the 403 errors that are rate limits, like 429
+_RATE_LIMIT_REASONS = frozenset({"rateLimitExceeded", "userRateLimitExceeded"})
+# quota pacers are kept for the most recently used keys (e.g., linked accounts)
+MAX_QUOTA_PACERS = 10_000
+
+
+@functools.cache
+def get_discovery_document(service_name: str, version: str) -> str:
+    """
+    Get the discovery document of a Google API from the static documents bundled with the client,
+    read once per process instead of per build().
+    """
+    document: str | None = get_static_doc(service_name, version)  # type: ignore[no-untyped-call]
+    if document is None:
+        raise ValueError(f"no static discovery document for {service_name} {version}")
+    return document
+
+
+def build_service(service_name: str, version: str, credentials: Credentials) -> Resource:
+    # the document is passed as a string as the client mutates the parsed document
+    service: Resource = build_from_document(
+        get_discovery_document(service_name, version), credentials=credentials
+    )
+    return service
+
+
+class QuotaPacer:
+    """
+    Client-side pacing of the quota units spent on a Google API (e.g., per user quotas), a token
+    bucket of burst_units refilled at units_per_second.
+    """
+
+    def __init__(self, units_per_second: float, burst_units: float):
+        self.units_per_second = units_per_second
+        self.burst_units = burst_units
+        self._units = burst_units
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units: float) -> None:
+        """Wait until the units can be spent, units over burst_units wait for a full bucket."""
+        with self._lock:
+            now = time.monotonic()
+            self._units = min(
+                self.burst_units, self._units + (now - self._updated_at) * self.units_per_second
+            )
+            self._updated_at = now
+            # reserve the units, concurrent callers wait for their turn after this one
+            self._units -= units
+            wait_seconds = -self._units / self.units_per_second if self._units < 0 else 0.0
+
+        if wait_seconds > 0:
+            logger.info("pacing google api quota", extra={"wait_seconds": wait_seconds})
+            time.sleep(wait_seconds)
+
+
+_quota_pacers: OrderedDict[Hashable, QuotaPacer] = OrderedDict()
+_quota_pacers_lock = threading.Lock()
+
+
+def get_quota_pacer(key: Hashable, units_per_second: float, burst_units: float) -> QuotaPacer:
+    """Get the quota pacer of the key, shared by the process."""
+    with _quota_pacers_lock:
+        pacer = _quota_pacers.get(key)
+        if pacer is None:
+            pacer = QuotaPacer(units_per_second, burst_units)
+            _quota_pacers[key] = pacer
+            while len(_quota_pacers) > MAX_QUOTA_PACERS:
+                _quota_pacers.popitem(last=False)
+        _quota_pacers.move_to_end(key)
+        return pacer
+
+
+@dataclass
+class BatchItemResult:
+    response: Any = None
+    error: str | None = None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    if not isinstance(error, HttpError):
+        return False
+    if error.status_code == 429:
+        return True
+    # typed as a str, but a list of dicts when the error response has details
+    error_details: Any = error.error_details
+    return error.status_code == 403 and any(
+        detail.get("reason") in _RATE_LIMIT_REASONS
+        for detail in error_details or []
+        if isinstance(detail, dict)
+    )
+
+
+def execute_batch(
+    service: Resource,
+    requests: list[HttpRequest],
+    quota_units_per_request: int,
+    quota_pacer: QuotaPacer,
+    max_batch_size: int,
+    max_retries: int,
+    retry_backoff_seconds: float,
+) -> list[BatchItemResult]:
+    """
+    Execute the requests in multipart batch requests of up to max_batch_size requests (fewer if
+    the quota pacer's burst can't cover them), paced by their quota units.
+    Requests that are rate limited are retried up to max_retries times, other errors are returned
+    as the request's result, as are errors of a whole batch (which isn't retried as its requests
+    may have been executed).
+    The results are in the same order as the requests.
+    """
+    results = [BatchItemResult() for _ in requests]
+    # errors of the requests of the current attempt
+    errors: dict[int, Exception] = {}
+
+    def callback(request_id: str, response: Any, exception: Exception | None) -> None:
+        index = int(request_id)
+        if exception is None:
+            results[index] = BatchItemResult(response=response)
+        else:
+            errors[index] = exception
+
+    batch_size = max(
+        1, min(max_batch_size, int(quota_pacer.burst_units // quota_units_per_request))
+    )
+    pending = list(range(len(requests)))
+    for attempt in range(max_retries + 1):
+        errors.clear()
+        for start in range(0, len(pending), batch_size):
+            indexes = pending[start : start + batch_size]
+            quota_pacer.acquire(len(indexes) * quota_units_per_request)
+            batch = service.new_batch_http_request(callback=callback)  # type: ignore
+            for index in indexes:
+                batch.add(requests[index], request_id=str(index))
+            try:
+                batch.execute()
+            except Exception as e:
+                logger.exception("google api batch request failed")
+                for index in indexes:
+                    results[index] = BatchItemResult(error=str(e))
+
+        rate_limited = sorted(
+            index
+            for index, error in errors.items()
+            if is_rate_limit_error(error) and attempt < max_retries
+        )
+        for index, error in errors.items():
+            if index not in rate_limited:
+                results[index] = BatchItemResult(error=str(error))
+        if not rate_limited:
+            break
+
+        logger.warning(
+            "google api batch requests rate limited, retrying",
+            extra={"num_rate_limited": len(rate_limited), "attempt": attempt},
+        )
+        pending = rate_limited
+        time.sleep(retry_backoff_seconds * 2**attempt)
+
+    return results
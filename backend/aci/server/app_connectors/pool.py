@@ -0,0 +1,159 @@
+"""
+Pool of app connector instances, for connectors that are expensive to create (e.g., they build an
+sdk client with its own http transport) and opt in with `pooled = True`.
+
+Instances are pooled per (connector class, linked account). An instance is checked out for the
+duration of an execution, so it's never used by two executions at once (concurrent executions of
+the same linked account create another instance). A pooled instance is only reused if it was
+created with the same credentials, so rotated credentials (e.g., a refreshed oauth2 access token)
+get a new instance. An instance whose execution failed is discarded, see `discard`.
+The pool is bounded, evicting the least recently used instances, and instances idle for too long
+are not reused.
+
+The pool is per server process.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from aci.common.db.sql_models import LinkedAccount
+from aci.common.logging_setup import get_logger
+from aci.server import config
+from aci.server.app_connectors.base import AppConnectorBase
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _PooledAppConnector:
+    app_connector: AppConnectorBase
+    credentials_fingerprint: str
+    released_at: float
+
+
+def get_credentials_fingerprint(security_credentials: BaseModel) -> str:
+    return hashlib.sha256(security_credentials.model_dump_json().encode()).hexdigest()
+
+
+class AppConnectorPool:
+    def __init__(self, max_size: int, idle_ttl_seconds: float):
+        self.max_size = max_size
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._idle: OrderedDict[tuple[type[AppConnectorBase], UUID], _PooledAppConnector] = (
+            OrderedDict()
+        )
+        # ids of the checked out instances not to return to the pool
+        self._discarded: set[int] = set()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(
+        self,
+        app_connector_class: type[AppConnectorBase],
+        linked_account: LinkedAccount,
+        security_scheme: BaseModel,
+        security_credentials: BaseModel,
+        db_session_factory: Callable[[], Session] | None = None,
+    ) -> Iterator[AppConnectorBase]:
+        """
+        Get an instance of the connector class for the linked account and credentials, reusing a
+        pooled one if possible. The instance is returned to the pool on exit, unless an exception
+        was raised or it was discarded.
+        """
+        if not app_connector_class.pooled:
+            app_connector = app_connector_class(
+                linked_account,
+                security_scheme,  # type: ignore
+                security_credentials,  # type: ignore
+            )
+            if db_session_factory is not None:
+                app_connector.db_session_factory = db_session_factory
+            yield app_connector
+            return
+
+        key = (app_connector_class, linked_account.id)
+        credentials_fingerprint = get_credentials_fingerprint(security_credentials)
+        pooled_app_connector = self._take(key, credentials_fingerprint)
+        if pooled_app_connector is None:
+            app_connector = app_connector_class(
+                linked_account,
+                security_scheme,  # type: ignore
+                security_credentials,  # type: ignore
+            )
+        else:
+            app_connector = pooled_app_connector
+            # the linked account and security scheme are loaded per request
+            app_connector.linked_account = linked_account
+            app_connector.security_scheme = security_scheme  # type: ignore
+        if db_session_factory is not None:
+            app_connector.db_session_factory = db_session_factory
+
+        try:
+            yield app_connector
+        finally:
+            with self._lock:
+                discarded = id(app_connector) in self._discarded
+                self._discarded.discard(id(app_connector))
+        if not discarded:
+            self._release(key, app_connector, credentials_fingerprint)
+
+    def discard(self, app_connector: AppConnectorBase) -> None:
+        """
+        Don't return a checked out instance to the pool, e.g., because the execution failed and
+        the instance (or its client) may be in a bad state.
+        """
+        if not app_connector.pooled:
+            return
+        with self._lock:
+            self._discarded.add(id(app_connector))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+
+    def _take(
+        self, key: tuple[type[AppConnectorBase], UUID], credentials_fingerprint: str
+    ) -> AppConnectorBase | None:
+        with self._lock:
+            pooled = self._idle.pop(key, None)
+        if pooled is None:
+            return None
+        if pooled.credentials_fingerprint != credentials_fingerprint:
+            logger.info(
+                "credentials rotated, discarding pooled app connector",
+                extra={"class_name": key[0].__name__, "linked_account_id": key[1]},
+            )
+            return None
+        if time.monotonic() - pooled.released_at > self.idle_ttl_seconds:
+            return None
+        return pooled.app_connector
+
+    def _release(
+        self,
+        key: tuple[type[AppConnectorBase], UUID],
+        app_connector: AppConnectorBase,
+        credentials_fingerprint: str,
+    ) -> None:
+        with self._lock:
+            # keep the most recently used instance if concurrent executions created several
+            self._idle[key] = _PooledAppConnector(
+                app_connector, credentials_fingerprint, time.monotonic()
+            )
+            self._idle.move_to_end(key)
+            while len(self._idle) > self.max_size:
+                self._idle.popitem(last=False)
+
+
+app_connector_pool = AppConnectorPool(
+    max_size=config.APP_CONNECTOR_POOL_MAX_SIZE,
+    idle_ttl_seconds=config.APP_CONNECTOR_POOL_IDLE_TTL_SECONDS,
+)
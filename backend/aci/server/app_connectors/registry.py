@@ -0,0 +1,116 @@
+"""
+Registry of the app connectors, built once when the server starts.
+
+Connectors are discovered by convention: the module aci.server.app_connectors.<app name lowercase>
+defines a subclass of AppConnectorBase named after the app in CamelCase, whose public methods
+implement the app's functions, e.g., GMAIL__SEND_EMAIL -> gmail.Gmail.send_email.
+"""
+
+import importlib
+import inspect
+import pkgutil
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from aci.common.exceptions import NoImplementationFound
+from aci.common.logging_setup import get_logger
+from aci.common.schemas.function import FunctionExecutionResult
+from aci.server import app_connectors
+from aci.server.app_connectors.base import AppConnectorBase
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class AppConnectorMethod:
+    app_connector_class: type[AppConnectorBase]
+    method_name: str
+    # the (unbound) method of the class, sync or async
+    method: Callable[..., Any]
+
+    def dispatch(
+        self, app_connector: AppConnectorBase, function_input: dict
+    ) -> FunctionExecutionResult:
+        return app_connector.execute_method(self.method_name, self.method, function_input)
+
+    async def dispatch_async(
+        self, app_connector: AppConnectorBase, function_input: dict
+    ) -> FunctionExecutionResult:
+        return await app_connector.execute_method_async(
+            self.method_name, self.method, function_input
+        )
+
+
+def get_app_connector_class_name(app_name: str) -> str:
+    """e.g., "BRAVE_SEARCH" -> "BraveSearch" """
+    return "".join(word.capitalize() for word in app_name.split("_"))
+
+
+class AppConnectorRegistry:
+    def __init__(self) -> None:
+        self._app_connector_classes: dict[str, type[AppConnectorBase]] = {}
+        # function name -> method implementing it
+        self._methods: dict[str, AppConnectorMethod] = {}
+
+    def register(self, app_name: str, app_connector_class: type[AppConnectorBase]) -> None:
+        """Register the connector class of an app, and its public methods as the app's functions."""
+        self._app_connector_classes[app_name] = app_connector_class
+        for method_name, method in inspect.getmembers(app_connector_class, inspect.isfunction):
+            if method_name.startswith("_") or hasattr(AppConnectorBase, method_name):
+                continue
+            self._methods[f"{app_name}__{method_name.upper()}"] = AppConnectorMethod(
+                app_connector_class, method_name, method
+            )
+
+    def discover(self) -> None:
+        """Import the modules of the app_connectors package and register their connector classes."""
+        for module_info in pkgutil.iter_modules(app_connectors.__path__):
+            module = importlib.import_module(f"{app_connectors.__name__}.{module_info.name}")
+            app_name = module_info.name.upper()
+            app_connector_class = getattr(module, get_app_connector_class_name(app_name), None)
+            if inspect.isclass(app_connector_class) and issubclass(
+                app_connector_class, AppConnectorBase
+            ):
+                self.register(app_name, app_connector_class)
+
+        logger.info(
+            "discovered app connectors",
+            extra={
+                "app_names": sorted(self._app_connector_classes),
+                "num_functions": len(self._methods),
+            },
+        )
+
+    def get_method(self, function_name: str) -> AppConnectorMethod:
+        """
+        Get the connector method implementing a function.
+
+        Raises:
+            NoImplementationFound: If no connector method implements the function.
+        """
+        method = self._methods.get(function_name)
+        if method is None:
+            logger.error(
+                "no app connector method found for function",
+                extra={"function_name": function_name},
+            )
+            raise NoImplementationFound(f"no app connector method found for {function_name}")
+        return method
+
+    def validate(self, function_names: Iterable[str]) -> None:
+        """
+        Check that all the functions are implemented by a connector method.
+
+        Raises:
+            NoImplementationFound: If any function isn't implemented.
+        """
+        missing = sorted(name for name in function_names if name not in self._methods)
+        if missing:
+            raise NoImplementationFound(
+                f"no app connector method found for connector functions: {', '.join(missing)}"
+            )
+
+
+app_connector_registry = AppConnectorRegistry()
+app_connector_registry.discover()
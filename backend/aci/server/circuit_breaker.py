@@ -0,0 +1,147 @@
+"""
+Per upstream host circuit breakers for function executions.
+
+A breaker opens after failure_threshold consecutive failures (connection errors, timeouts, 5xx
+responses) to the host. While open, calls fail fast instead of tying up workers on timeouts of an
+upstream that is down. After recovery_timeout_seconds a single trial call is let through
+(half open), which closes the breaker if it succeeds or opens it again if it fails.
+
+The state of the breakers is per server process, and reported as the
+upstream_circuit_breaker_state gauge (0 closed, 1 half open, 2 open) and the
+upstream_circuit_breaker_transitions counter.
+"""
+
+import threading
+import time
+from collections.abc import Iterable
+from enum import StrEnum
+
+import logfire
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+_STATE_GAUGE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+_transitions_counter = logfire.metric_counter(
+    "upstream_circuit_breaker_transitions",
+    unit="1",
+    description="number of state transitions of the upstream circuit breakers",
+)
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, failure_threshold: int, recovery_timeout_seconds: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout_seconds = recovery_timeout_seconds
+        self.state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout_seconds:
+                    return False
+                self._transition(CircuitState.HALF_OPEN)
+            # half open, only one trial request at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            if self.state != CircuitState.CLOSED:
+                self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == CircuitState.HALF_OPEN or (
+                self.state == CircuitState.CLOSED
+                and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(CircuitState.OPEN)
+
+    def retry_after(self) -> float:
+        """Seconds until a trial request is let through, 0 if requests are allowed"""
+        with self._lock:
+            if self.state != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.recovery_timeout_seconds - time.monotonic())
+
+    def _transition(self, state: CircuitState) -> None:
+        logger.warning(
+            "upstream circuit breaker state changed",
+            extra={
+                "host": self.host,
+                "from_state": self.state,
+                "to_state": state,
+                "consecutive_failures": self._consecutive_failures,
+            },
+        )
+        self.state = state
+        _transitions_counter.add(1, {"host": self.host, "state": str(state)})
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, failure_threshold: int, recovery_timeout_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout_seconds = recovery_timeout_seconds
+        self._circuit_breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            circuit_breaker = self._circuit_breakers.get(host)
+            if circuit_breaker is None:
+                circuit_breaker = CircuitBreaker(
+                    host, self.failure_threshold, self.recovery_timeout_seconds
+                )
+                self._circuit_breakers[host] = circuit_breaker
+            return circuit_breaker
+
+    def states(self) -> dict[str, CircuitState]:
+        with self._lock:
+            return {host: breaker.state for host, breaker in self._circuit_breakers.items()}
+
+
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout_seconds=config.CIRCUIT_BREAKER_RECOVERY_TIMEOUT_SECONDS,
+)
+
+
+def _observe_states(options: CallbackOptions) -> Iterable[Observation]:
+    return [
+        Observation(_STATE_GAUGE_VALUES[state], {"host": host})
+        for host, state in circuit_breakers.states().items()
+    ]
+
+
+logfire.metric_gauge_callback(
+    "upstream_circuit_breaker_state",
+    callbacks=[_observe_states],
+    unit="1",
+    description="state of the upstream circuit breakers, 0 closed, 1 half open, 2 open",
+)
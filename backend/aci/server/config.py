@@ -6,6 +6,15 @@ ENVIRONMENT = check_and_get_env_variable("SERVER_ENVIRONMENT")
 OPENAI_API_KEY = check_and_get_env_variable("SERVER_OPENAI_API_KEY")
 OPENAI_EMBEDDING_MODEL = check_and_get_env_variable("SERVER_OPENAI_EMBEDDING_MODEL")
 OPENAI_EMBEDDING_DIMENSION = int(check_and_get_env_variable("SERVER_OPENAI_EMBEDDING_DIMENSION"))
+# agent chat streams (/v1/agent/chat): max output tokens of a response and max duration of a stream
+AGENT_CHAT_MAX_OUTPUT_TOKENS = 4096
+AGENT_CHAT_STREAM_TIMEOUT_SECONDS = 120.0
+# how often a stream checks whether the client disconnected, to stop generating the response
+AGENT_CHAT_DISCONNECT_CHECK_INTERVAL_SECONDS = 1.0
+# agent chats executing the tool calls on the server (AgentChatMode.SERVER_TOOLS): max rounds of
+# tool calls in a stream, and max tool calls of a round executed concurrently
+AGENT_CHAT_MAX_TOOL_ROUNDS = 10
+AGENT_CHAT_MAX_CONCURRENT_TOOL_CALLS = 8
 
 # JWT
 SIGNING_KEY = check_and_get_env_variable("SERVER_SIGNING_KEY")
@@ -37,6 +46,26 @@ SVIX_SIGNING_SECRET = check_and_get_env_variable("SERVER_SVIX_SIGNING_SECRET")
 # RATE LIMITS
 RATE_LIMIT_IP_PER_SECOND = int(check_and_get_env_variable("SERVER_RATE_LIMIT_IP_PER_SECOND"))
 RATE_LIMIT_IP_PER_DAY = int(check_and_get_env_variable("SERVER_RATE_LIMIT_IP_PER_DAY"))
+# default limits for projects without a plan or whose plan doesn't configure them,
+# see PlanFeatures.rate_limits
+RATE_LIMIT_API_KEY_PER_MINUTE = int(
+    check_and_get_env_variable("SERVER_RATE_LIMIT_API_KEY_PER_MINUTE")
+)
+RATE_LIMIT_PROJECT_PER_MINUTE = int(
+    check_and_get_env_variable("SERVER_RATE_LIMIT_PROJECT_PER_MINUTE")
+)
+RATE_LIMIT_PROJECT_APP_PER_MINUTE = int(
+    check_and_get_env_variable("SERVER_RATE_LIMIT_PROJECT_APP_PER_MINUTE")
+)
+# how long the rate limits of an org's plan are cached
+RATE_LIMIT_PLAN_CACHE_TTL_SECONDS = 60
+# where rate limit state is shared across workers and instances, see aci/server/rate_limit_storage.py
+# memory:// (per process), redis://host:port/db or postgres:// (the server db)
+RATE_LIMIT_STORAGE_URI = check_and_get_env_variable("SERVER_RATE_LIMIT_STORAGE_URI")
+# max number of tokens a worker takes at once from a shared rate limit storage, 1 to disable
+RATE_LIMIT_PREALLOCATION_BATCH_SIZE = 10
+# max time a request waits for the shared rate limit storage (redis) before failing open
+RATE_LIMIT_STORAGE_TIMEOUT_SECONDS = 0.5
 AOPOLABS_API_KEY_NAME = "X-API-KEY"
 
 # QUOTA
@@ -45,6 +74,116 @@ MAX_PROJECTS_PER_ORG = int(check_and_get_env_variable("SERVER_MAX_PROJECTS_PER_O
 MAX_AGENTS_PER_PROJECT = int(check_and_get_env_variable("SERVER_MAX_AGENTS_PER_PROJECT"))
 APPLICATION_LOAD_BALANCER_DNS = check_and_get_env_variable("SERVER_APPLICATION_LOAD_BALANCER_DNS")
 
+# LINKED ACCOUNTS
+# how often the buffered linked_accounts.last_used_at timestamps are written to the db
+LINKED_ACCOUNT_LAST_USED_AT_FLUSH_INTERVAL_SECONDS = 10
+
+# FUNCTION EXECUTION
+# max time a function execution waits for an upstream's rate limit to reset or for a free
+# concurrency slot of its app, before failing without calling the upstream
+UPSTREAM_THROTTLE_MAX_WAIT_SECONDS = 3.0
+# retries of REST function executions: connection errors are retried for any method (the request
+# wasn't sent), other transport errors and the retryable status codes only for these methods
+FUNCTION_EXECUTION_MAX_RETRIES = 2
+FUNCTION_EXECUTION_RETRY_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+FUNCTION_EXECUTION_RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+# jittered exponential backoff, a longer Retry-After from the upstream is not retried
+FUNCTION_EXECUTION_RETRY_BACKOFF_BASE_SECONDS = 0.5
+FUNCTION_EXECUTION_RETRY_BACKOFF_MAX_SECONDS = 8.0
+# per upstream host circuit breaker: opens after this many consecutive failures (connection errors,
+# timeouts and 5xx responses) and lets a trial request through after the recovery timeout
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RECOVERY_TIMEOUT_SECONDS = 30.0
+# hedged requests of functions with "hedge": true, see aci/server/hedging.py
+# a hedge is sent if the first attempt takes longer than this percentile of the host's recent latencies
+HEDGE_LATENCY_PERCENTILE = 95.0
+HEDGE_LATENCY_WINDOW_SIZE = 200
+HEDGE_LATENCY_MIN_SAMPLES = 20
+# max fraction of the hedgeable requests that are hedged, and max burst of hedges
+HEDGE_BUDGET_RATIO = 0.05
+HEDGE_BUDGET_MAX_TOKENS = 10.0
+# results of functions with "cache_ttl_seconds", see aci/server/function_result_cache.py
+# the cache is bounded by the json size of the cached results, least recently used are evicted
+FUNCTION_RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# larger results are not cached
+FUNCTION_RESULT_CACHE_MAX_ENTRY_BYTES = 1024 * 1024
+# response bodies of REST functions are read up to this size, larger ones are truncated (with the
+# complete part of a JSON body returned), or stored as a blob for functions with
+# "large_response_as_blob": true
+FUNCTION_RESPONSE_MAX_BYTES = 2 * 1024 * 1024
+FUNCTION_RESPONSE_BLOB_MAX_BYTES = 32 * 1024 * 1024
+# how long a stored response blob can be retrieved
+FUNCTION_RESPONSE_BLOB_TTL_SECONDS = 3600
+# caps of executions that follow the upstream's pagination, the response bodies of all pages are
+# also capped at FUNCTION_RESPONSE_MAX_BYTES
+FUNCTION_PAGINATION_MAX_PAGES = 10
+FUNCTION_PAGINATION_MAX_ITEMS = 1000
+# asynchronous function execution jobs, see aci/server/function_execution_jobs.py
+# max jobs executed concurrently per server process, and max jobs queued in memory (the others wait
+# in the db to be picked up by a periodic sweep, of this or any other server process)
+FUNCTION_EXECUTION_JOB_MAX_WORKERS = 8
+FUNCTION_EXECUTION_JOB_MAX_QUEUED = 100
+FUNCTION_EXECUTION_JOB_SWEEP_INTERVAL_SECONDS = 5.0
+# jobs running for longer than this are considered interrupted (e.g., the server process died) and
+# are failed, they are not retried as the function may have had side effects
+FUNCTION_EXECUTION_JOB_TIMEOUT_SECONDS = 600
+# how long the results of finished jobs can be retrieved
+FUNCTION_EXECUTION_JOB_RETENTION_SECONDS = 24 * 3600
+# how often the status of a job is checked while long polling for its result
+FUNCTION_EXECUTION_JOB_POLL_INTERVAL_SECONDS = 0.5
+# pooled instances of the app connectors that opt in with `pooled = True`, per (connector, linked
+# account), see aci/server/app_connectors/pool.py
+APP_CONNECTOR_POOL_MAX_SIZE = 1000
+# pooled instances idle for longer than this are not reused
+APP_CONNECTOR_POOL_IDLE_TTL_SECONDS = 600
+# size of the thread pool of each app connector, running its sync methods (async ones run on the
+# event loop), see aci/server/app_connectors/base.py
+APP_CONNECTOR_SYNC_METHOD_MAX_WORKERS = 16
+# warm e2b sandboxes per linked account, see aci/server/app_connectors/e2b_sandboxes.py
+E2B_SANDBOX_WARM_SIZE = 1
+# max pooled (warm and sticky session) sandboxes per linked account
+E2B_SANDBOX_MAX_SIZE = 5
+E2B_SANDBOX_IDLE_TTL_SECONDS = 300
+# e2b kills a sandbox after this long, pooled sandboxes aren't reused close to it
+E2B_SANDBOX_TIMEOUT_SECONDS = 3600
+E2B_SANDBOX_SWEEP_INTERVAL_SECONDS = 30.0
+# decrypted secrets of the agent secrets manager cached per linked account, see
+# aci/server/app_connectors/agent_secrets_manager.py. Invalidated on changes made by the same
+# server process, other processes may return outdated secrets for up to the TTL
+AGENT_SECRETS_CACHE_TTL_SECONDS = 60
+AGENT_SECRETS_CACHE_MAX_LINKED_ACCOUNTS = 1000
+# max concurrent KMS calls when decrypting the secrets of a linked account
+AGENT_SECRETS_DECRYPT_MAX_CONCURRENCY = 8
+# batch functions of the gmail connector: calls per multipart batch request (the api allows 100,
+# but recommends at most 50), and client-side pacing of the user's quota (250 units per second
+# as a moving average, so short bursts are allowed)
+GMAIL_BATCH_MAX_SIZE = 50
+GMAIL_QUOTA_UNITS_PER_SECOND = 250
+GMAIL_QUOTA_BURST_UNITS = 500
+# retries of the rate limited calls of a batch, with exponential backoff
+GMAIL_BATCH_MAX_RETRIES = 2
+GMAIL_BATCH_RETRY_BACKOFF_SECONDS = 1.0
+
+# BACKGROUND JOB QUEUE
+# durable job queue on the background_jobs table, see aci/server/job_queue.py
+# jobs run concurrently by a worker process (python -m aci.server.worker, or python -m aci.cli worker)
+JOB_QUEUE_WORKER_CONCURRENCY = 8
+# how often an idle worker checks for due jobs
+JOB_QUEUE_POLL_INTERVAL_SECONDS = 1.0
+# a claimed job is hidden from other workers for this long, after which it's claimed again (e.g.,
+# if its worker died)
+JOB_QUEUE_VISIBILITY_TIMEOUT_SECONDS = 300
+# max run time of a job's handler, less than the visibility timeout to leave time for claiming and
+# finishing the job
+JOB_QUEUE_HANDLER_TIMEOUT_SECONDS = 240
+# default max attempts of a job before it's dead-lettered, retries are delayed by a jittered
+# exponential backoff
+JOB_QUEUE_MAX_ATTEMPTS = 8
+JOB_QUEUE_RETRY_BACKOFF_BASE_SECONDS = 5.0
+JOB_QUEUE_RETRY_BACKOFF_MAX_SECONDS = 3600.0
+# how long a stopping worker waits for its running jobs to finish
+JOB_QUEUE_SHUTDOWN_GRACE_SECONDS = 30.0
+
 # APP
 APP_TITLE = "ACI"
 APP_VERSION = "0.0.1-beta.4"
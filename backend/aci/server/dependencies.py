@@ -3,9 +3,10 @@ from datetime import UTC, datetime, timedelta
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import Depends, Security
+from fastapi import Depends, Response, Security
 from fastapi.security import APIKeyHeader, HTTPBearer
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from aci.common import utils
 from aci.common.db import crud
@@ -18,7 +19,8 @@ from aci.common.exceptions import (
     ProjectNotFound,
 )
 from aci.common.logging_setup import get_logger
-from aci.server import config
+from aci.server import config, rate_limiting
+from aci.server.rate_limiting import ProjectRateLimits
 
 logger = get_logger(__name__)
 http_bearer = HTTPBearer(auto_error=True, description="login to receive a JWT token")
@@ -30,11 +32,19 @@ api_key_header = APIKeyHeader(
 
 
 class RequestContext:
-    def __init__(self, db_session: Session, api_key_id: UUID, project: Project, agent: Agent):
+    def __init__(
+        self,
+        db_session: Session,
+        api_key_id: UUID,
+        project: Project,
+        agent: Agent,
+        rate_limits: ProjectRateLimits,
+    ):
         self.db_session = db_session
         self.api_key_id = api_key_id
         self.project = project
         self.agent = agent
+        self.rate_limits = rate_limits
 
 
 def yield_db_session() -> Generator[Session, None, None]:
@@ -122,11 +132,31 @@ def validate_project_quota(
     return project
 
 
+async def validate_rate_limits(
+    response: Response,
+    db_session: Annotated[Session, Depends(yield_db_session)],
+    api_key_id: Annotated[UUID, Depends(validate_api_key)],
+    project: Annotated[Project, Depends(validate_project_quota)],
+) -> ProjectRateLimits:
+    """
+    Enforce the per api key and per project rate limits of the project's plan, and return the rate
+    limits so routes can enforce finer grained ones (e.g., per app).
+    """
+    rate_limits = await run_in_threadpool(
+        rate_limiting.get_project_rate_limits, db_session, project.org_id
+    )
+    await rate_limiting.enforce_rate_limits(
+        response, rate_limits.get_api_key_limits(api_key_id, project.id)
+    )
+    return rate_limits
+
+
 def get_request_context(
     db_session: Annotated[Session, Depends(yield_db_session)],
     api_key_id: Annotated[UUID, Depends(validate_api_key)],
     agent: Annotated[Agent, Depends(validate_agent)],
     project: Annotated[Project, Depends(validate_project_quota)],
+    rate_limits: Annotated[ProjectRateLimits, Depends(validate_rate_limits)],
 ) -> RequestContext:
     """
     Returns a RequestContext object containing the DB session,
@@ -141,4 +171,5 @@ def get_request_context(
         api_key_id=api_key_id,
         project=project,
         agent=agent,
+        rate_limits=rate_limits,
     )
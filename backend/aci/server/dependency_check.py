@@ -1,5 +1,10 @@
+from aci.common import utils
+from aci.common.db import crud
 from aci.common.encryption import decrypt, encrypt
+from aci.common.enums import Protocol
 from aci.common.exceptions import DependencyCheckError
+from aci.server import config
+from aci.server.app_connectors.registry import app_connector_registry
 
 
 def check_aws_kms_dependency() -> None:
@@ -15,5 +20,15 @@ def check_aws_kms_dependency() -> None:
         )
 
 
+def check_app_connectors() -> None:
+    """Fail fast if a connector function in the db has no app connector method implementing it."""
+    with utils.create_db_session(config.DB_FULL_URL) as db_session:
+        function_names = crud.functions.get_active_function_names_by_protocol(
+            db_session, Protocol.CONNECTOR
+        )
+    app_connector_registry.validate(function_names)
+
+
 def check_dependencies() -> None:
     check_aws_kms_dependency()
+    check_app_connectors()
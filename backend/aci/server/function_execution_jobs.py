@@ -0,0 +1,150 @@
+"""
+Background runner of asynchronous function execution jobs.
+
+Jobs are persisted in the function_execution_jobs table when submitted, and executed by a bounded
+pool of worker tasks of the server process. A job is claimed (pending -> running) with a
+conditional update before it's executed, so it runs once even if several server processes try to
+run it. Jobs that weren't run by the process they were submitted to (its in-memory queue was full,
+or the process restarted) are picked up by a periodic sweep of any server process.
+
+The sweep also fails the jobs that have been running for too long (e.g., their process died), and
+deletes the finished jobs whose results are past their retention period.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from uuid import UUID
+
+from aci.common import utils
+from aci.common.db import crud
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+class FunctionExecutionJobRunner:
+    def __init__(
+        self,
+        max_workers: int,
+        max_queued: int,
+        sweep_interval_seconds: float,
+        timeout_seconds: float,
+        retention_seconds: float,
+    ):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.retention_seconds = retention_seconds
+        self._queue: asyncio.Queue[UUID] | None = None
+        # ids of the jobs queued or being run by this process, so the sweep doesn't queue them again
+        self._job_ids: set[UUID] = set()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._run_job: Callable[[UUID], Awaitable[None]] | None = None
+
+    def start(self, run_job: Callable[[UUID], Awaitable[None]]) -> None:
+        """
+        Start the workers and the periodic sweep, must be called from within a running event loop.
+        run_job claims and executes a job, and stores its result.
+        """
+        if self._tasks:
+            return
+        self._run_job = run_job
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.max_workers)]
+        self._tasks.append(asyncio.create_task(self._sweep_periodically()))
+
+    async def stop(self) -> None:
+        """
+        Stop the workers and the sweep. Queued jobs stay pending and are picked up by the sweep of
+        another (or the restarted) server process.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._job_ids.clear()
+
+    def submit(self, job_id: UUID) -> bool:
+        """
+        Queue a (committed) pending job to be run by this process, returns False if the queue is full
+        or the runner isn't started, in which case the job is left to the sweep.
+        """
+        if self._queue is None or job_id in self._job_ids:
+            return False
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            logger.warning(
+                "function execution job queue is full, leaving job to the sweep",
+                extra={"job_id": job_id, "max_queued": self.max_queued},
+            )
+            return False
+        self._job_ids.add(job_id)
+        return True
+
+    def sweep(self, limit: int) -> list[UUID]:
+        """
+        Fail the timed out jobs, delete the expired ones, and return the ids of up to limit jobs
+        that have been pending for longer than the sweep interval.
+        """
+        with utils.get_db_session_factory(config.DB_FULL_URL)() as db_session:
+            num_timed_out = crud.function_execution_jobs.fail_timed_out_function_execution_jobs(
+                db_session, self.timeout_seconds
+            )
+            num_deleted = crud.function_execution_jobs.delete_finished_function_execution_jobs(
+                db_session, self.retention_seconds
+            )
+            pending_job_ids = (
+                crud.function_execution_jobs.get_pending_function_execution_job_ids(
+                    db_session, self.sweep_interval_seconds, limit
+                )
+                if limit > 0
+                else []
+            )
+            db_session.commit()
+
+        if num_timed_out or num_deleted:
+            logger.info(
+                "swept function execution jobs",
+                extra={"num_timed_out": num_timed_out, "num_deleted": num_deleted},
+            )
+        return pending_job_ids
+
+    async def _work(self) -> None:
+        assert self._queue is not None and self._run_job is not None
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except Exception:
+                # the job stays running and is failed by the sweep once timed out
+                logger.exception("failed to run function execution job", extra={"job_id": job_id})
+            finally:
+                self._job_ids.discard(job_id)
+                self._queue.task_done()
+
+    async def _sweep_periodically(self) -> None:
+        assert self._queue is not None
+        while True:
+            try:
+                # the sweep does blocking db io, run it in a thread to not block the event loop
+                pending_job_ids = await asyncio.to_thread(
+                    self.sweep, self.max_queued - self._queue.qsize()
+                )
+                for job_id in pending_job_ids:
+                    self.submit(job_id)
+            except Exception:
+                logger.exception("failed to sweep function execution jobs")
+            await asyncio.sleep(self.sweep_interval_seconds)
+
+
+function_execution_job_runner = FunctionExecutionJobRunner(
+    max_workers=config.FUNCTION_EXECUTION_JOB_MAX_WORKERS,
+    max_queued=config.FUNCTION_EXECUTION_JOB_MAX_QUEUED,
+    sweep_interval_seconds=config.FUNCTION_EXECUTION_JOB_SWEEP_INTERVAL_SECONDS,
+    timeout_seconds=config.FUNCTION_EXECUTION_JOB_TIMEOUT_SECONDS,
+    retention_seconds=config.FUNCTION_EXECUTION_JOB_RETENTION_SECONDS,
+)
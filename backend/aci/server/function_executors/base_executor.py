@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import Generic, TypeVar
 
 import jsonschema
+from starlette.concurrency import run_in_threadpool
 
 from aci.common import processor
 from aci.common.db.sql_models import Function, LinkedAccount
@@ -34,10 +35,14 @@ class FunctionExecutor(ABC, Generic[TScheme, TCred]):
         function_input: dict,
         security_scheme: TScheme,
         security_credentials: TCred,
+        response_projection: processor.ResponseProjection | None = None,
+        follow_pagination: bool = False,
     ) -> FunctionExecutionResult:
         """
         Execute the function based on end-user input and security credentials.
         Input validation, default values injection, and security credentials injection are done here.
+        If a response projection is given, only its fields of the response data are returned.
+        follow_pagination fetches all the pages of functions that declare their pagination.
         """
         logger.info(
             "executing function",
@@ -45,7 +50,37 @@ class FunctionExecutor(ABC, Generic[TScheme, TCred]):
         )
         function_input = self._preprocess_function_input(function, function_input)
 
-        return self._execute(function, function_input, security_scheme, security_credentials)
+        return self._execute(
+            function,
+            function_input,
+            security_scheme,
+            security_credentials,
+            response_projection,
+            follow_pagination,
+        )
+
+    async def execute_async(
+        self,
+        function: Function,
+        function_input: dict,
+        security_scheme: TScheme,
+        security_credentials: TCred,
+        response_projection: processor.ResponseProjection | None = None,
+        follow_pagination: bool = False,
+    ) -> FunctionExecutionResult:
+        """
+        Execute the function from the event loop. By default execute() runs in a worker thread, as
+        executors do blocking io (and may wait for the upstream's rate limit to reset).
+        """
+        return await run_in_threadpool(
+            self.execute,
+            function,
+            function_input,
+            security_scheme,
+            security_credentials,
+            response_projection,
+            follow_pagination,
+        )
 
     def _preprocess_function_input(self, function: Function, function_input: dict) -> dict:
         # validate user input against the "visible" parameters
@@ -90,5 +125,7 @@ class FunctionExecutor(ABC, Generic[TScheme, TCred]):
         function_input: dict,
         security_scheme: TScheme,
         security_credentials: TCred,
+        response_projection: processor.ResponseProjection | None,
+        follow_pagination: bool,
     ) -> FunctionExecutionResult:
         pass
@@ -1,38 +1,40 @@
-import importlib
+from collections.abc import Callable
 from typing import Generic, override
 
-from aci.common.db.sql_models import Function
-from aci.common.exceptions import NoImplementationFound
+from sqlalchemy.orm import Session
+
+from aci.common import processor, utils
+from aci.common.db.sql_models import Function, LinkedAccount
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.function import FunctionExecutionResult
 from aci.common.schemas.security_scheme import (
     TCred,
     TScheme,
 )
-from aci.server.app_connectors.base import AppConnectorBase
+from aci.server import config
+from aci.server.app_connectors.pool import app_connector_pool
+from aci.server.app_connectors.registry import app_connector_registry
 from aci.server.function_executors.base_executor import FunctionExecutor
 
 logger = get_logger(__name__)
 
 
-def parse_function_name(function_name: str) -> tuple[str, str, str]:
-    """
-    Parse function name to get module name, class name and method name.
-    e.g. "BRAVE_SEARCH__WEB_SEARCH" -> "aci.server.app_connectors.brave_search", "BraveSearch", "web_search"
-    """
-    app_name, method_name = function_name.split("__", 1)
-    module_name = f"aci.server.app_connectors.{app_name.lower()}"
-    class_name = "".join(word.capitalize() for word in app_name.split("_"))
-    method_name = method_name.lower()
-
-    return module_name, class_name, method_name
-
-
 class ConnectorFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TScheme, TCred]):
     """
     Function executor for local connector-based Apps/Functions.
     """
 
+    def __init__(
+        self,
+        linked_account: LinkedAccount,
+        db_session_factory: Callable[[], Session] | None = None,
+    ):
+        super().__init__(linked_account)
+        # sessions of the connectors that access the db, on the process' pooled engine by default
+        self.db_session_factory = db_session_factory or utils.get_db_session_factory(
+            config.DB_FULL_URL
+        )
+
     @override
     def _execute(
         self,
@@ -40,63 +42,75 @@ class ConnectorFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TSchem
         function_input: dict,
         security_scheme: TScheme,
         security_credentials: TCred,
+        response_projection: processor.ResponseProjection | None,
+        follow_pagination: bool,
     ) -> FunctionExecutionResult:
         """
-        Execute a function by importing the connector module and calling the function.
+        Execute a function by calling the method of its app connector, looked up in the registry
+        of app connectors, on a (pooled, for connectors that opt in) instance of the connector.
+
+        Raises:
+            NoImplementationFound: If no app connector method implements the function.
         """
         logger.info(
             "executing connector function",
             extra={"function_name": function.name},
         )
-        module_name, class_name, method_name = parse_function_name(function.name)
-        logger.info(
-            "parsed function name",
-            extra={
-                "module_name": module_name,
-                "class_name": class_name,
-                "method_name": method_name,
-            },
-        )
+        app_connector_method = app_connector_registry.get_method(function.name)
 
-        app_connector_class = self._get_app_connector_class(module_name, class_name)
-        logger.info(
-            "got app connector class",
-            extra={"app_connector_class": app_connector_class},
-        )
-        # TODO: caching? singleton per app per enduser account? executing in a thread pool?
-        # another tricky thing is the access token expiration if using long-live cached objects
-        app_connector_instance = app_connector_class(
-            self.linked_account, security_scheme, security_credentials
-        )
-        return app_connector_instance.execute(method_name, function_input)
+        with app_connector_pool.checkout(
+            app_connector_method.app_connector_class,
+            self.linked_account,
+            security_scheme,
+            security_credentials,
+            self.db_session_factory,
+        ) as app_connector:
+            result = app_connector_method.dispatch(app_connector, function_input)
+            if not result.success:
+                app_connector_pool.discard(app_connector)
+        return self._project_response(result, response_projection)
 
-    def _get_app_connector_class(self, module_name: str, class_name: str) -> type[AppConnectorBase]:
+    @override
+    async def execute_async(
+        self,
+        function: Function,
+        function_input: dict,
+        security_scheme: TScheme,
+        security_credentials: TCred,
+        response_projection: processor.ResponseProjection | None = None,
+        follow_pagination: bool = False,
+    ) -> FunctionExecutionResult:
         """
-        Get the app connector class.
-
-        Returns:
-            The app connector class.
+        Execute a function from the event loop: async connector methods are awaited, and sync ones
+        run in the thread pool of their connector instead of the server's worker threads.
 
         Raises:
-            NoImplementationFound: If the app connector class is not found.
+            NoImplementationFound: If no app connector method implements the function.
         """
+        logger.info(
+            "executing connector function",
+            extra={"function_name": function.name, "function_input": function_input},
+        )
+        function_input = self._preprocess_function_input(function, function_input)
+        app_connector_method = app_connector_registry.get_method(function.name)
 
-        try:
-            app_connector_class: type[AppConnectorBase] = getattr(
-                importlib.import_module(module_name), class_name
-            )
-            logger.debug(
-                "found app connector class",
-                extra={
-                    "module_name": module_name,
-                    "class_name": class_name,
-                    "app_connector_class": app_connector_class,
-                },
-            )
-            return app_connector_class
-        except (ImportError, AttributeError) as e:
-            logger.exception(
-                "failed to find app connector class",
-                extra={"module_name": module_name, "class_name": class_name},
-            )
-            raise NoImplementationFound("no app connector class found") from e
+        with app_connector_pool.checkout(
+            app_connector_method.app_connector_class,
+            self.linked_account,
+            security_scheme,
+            security_credentials,
+            self.db_session_factory,
+        ) as app_connector:
+            result = await app_connector_method.dispatch_async(app_connector, function_input)
+            if not result.success:
+                app_connector_pool.discard(app_connector)
+        return self._project_response(result, response_projection)
+
+    def _project_response(
+        self,
+        result: FunctionExecutionResult,
+        response_projection: processor.ResponseProjection | None,
+    ) -> FunctionExecutionResult:
+        if result.success and response_projection is not None:
+            result.data = processor.project_response_data(result.data, response_projection)
+        return result
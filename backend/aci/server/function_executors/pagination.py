@@ -0,0 +1,83 @@
+"""
+Following the pagination of REST functions' upstreams, as declared in RestMetadata.pagination.
+"""
+
+from typing import Any
+
+import httpx
+
+from aci.common.enums import PaginationType
+from aci.common.logging_setup import get_logger
+from aci.common.schemas.function import RestPagination
+
+logger = get_logger(__name__)
+
+
+def get_page_items(page_data: Any, pagination: RestPagination) -> list:
+    """The items of a page, an empty list if the page doesn't have a list of items"""
+    items = _get_field(page_data, pagination.items_field) if pagination.items_field else page_data
+    return items if isinstance(items, list) else []
+
+
+def get_next_page_request(
+    request: httpx.Request,
+    response: httpx.Response,
+    page_data: Any,
+    num_page_items: int,
+    pagination: RestPagination,
+) -> httpx.Request | None:
+    """The request of the next page, None if it was the last page"""
+    match pagination.type:
+        case PaginationType.LINK_HEADER:
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url:
+                return None
+            url = request.url.join(next_url)
+            if url.host != request.url.host:
+                # don't send the credentials of the request to another host
+                logger.warning(
+                    "not following pagination to another host",
+                    extra={"host": request.url.host, "next_host": url.host},
+                )
+                return None
+            # keep the query parameters the next url doesn't have (e.g., an api key)
+            params = dict(request.url.params)
+            params.update(url.params)
+            return _copy_request(request, url.copy_with(params=params))
+
+        case PaginationType.CURSOR:
+            assert pagination.cursor_field is not None and pagination.param is not None
+            cursor = _get_field(page_data, pagination.cursor_field)
+            if cursor is None or cursor == "" or num_page_items == 0:
+                return None
+            return _copy_request(request, request.url.copy_set_param(pagination.param, cursor))
+
+        case PaginationType.PAGE:
+            assert pagination.param is not None
+            if num_page_items == 0:
+                return None
+            page = int(request.url.params.get(pagination.param, pagination.first_page))
+            return _copy_request(request, request.url.copy_set_param(pagination.param, page + 1))
+
+        case PaginationType.OFFSET:
+            assert pagination.param is not None
+            if num_page_items == 0:
+                return None
+            offset = int(request.url.params.get(pagination.param, 0))
+            return _copy_request(
+                request, request.url.copy_set_param(pagination.param, offset + num_page_items)
+            )
+
+
+def _get_field(data: Any, path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _copy_request(request: httpx.Request, url: httpx.URL) -> httpx.Request:
+    # the host header is set from the url
+    headers = {key: value for key, value in request.headers.items() if key.lower() != "host"}
+    return httpx.Request(method=request.method, url=url, headers=headers)
@@ -0,0 +1,157 @@
+"""
+Size-capped reading of upstream response bodies, and salvaging of truncated JSON bodies.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_PREFIX = re.compile(r"-?[0-9]*\.?[0-9]*([eE][+-]?[0-9]*)?")
+
+
+@dataclass
+class ResponseBody:
+    content: bytes
+    # true if the body was larger than the max size and was cut off
+    truncated: bool
+
+
+def read_response_body(response: httpx.Response, max_bytes: int) -> ResponseBody:
+    """
+    Read the body of a (streamed) response up to max_bytes, the rest of the body is not read
+    (the caller closes the response).
+    """
+    content = bytearray()
+    for chunk in response.iter_bytes():
+        if len(content) + len(chunk) > max_bytes:
+            content += chunk[: max_bytes - len(content)]
+            return ResponseBody(content=bytes(content), truncated=True)
+        content += chunk
+    return ResponseBody(content=bytes(content), truncated=False)
+
+
+async def aread_response_body(response: httpx.Response, max_bytes: int) -> ResponseBody:
+    """Same as read_response_body, for a response of an async client."""
+    content = bytearray()
+    async for chunk in response.aiter_bytes():
+        if len(content) + len(chunk) > max_bytes:
+            content += chunk[: max_bytes - len(content)]
+            return ResponseBody(content=bytes(content), truncated=True)
+        content += chunk
+    return ResponseBody(content=bytes(content), truncated=False)
+
+
+class _Incomplete(Exception):  # noqa: N818
+    pass
+
+
+def parse_truncated_json(text: str) -> Any:
+    """
+    Parse the beginning of a JSON document that was cut off, keeping the array items that are
+    complete and the object members parsed so far.
+    e.g., '{"total": 5, "items": [{"id": 1}, {"id": 2, "na' -> {"total": 5, "items": [{"id": 1}]}
+
+    Raises:
+        ValueError: if the text is not the beginning of a JSON document.
+    """
+    try:
+        value, _, _ = _parse_value(text, _skip_whitespace(text, 0))
+    except _Incomplete as e:
+        raise ValueError("not enough of the JSON document to parse a value") from e
+    return value
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    match = _WHITESPACE.match(text, pos)
+    return match.end() if match else pos
+
+
+def _parse_value(text: str, pos: int) -> tuple[Any, int, bool]:
+    """
+    Parse the value at pos, returns the value, the position after it, and whether it's complete
+    (an array or object cut off is returned with its complete items).
+
+    Raises:
+        _Incomplete: if the value is cut off before anything of it could be kept.
+        ValueError: if the text is not valid JSON.
+    """
+    if pos >= len(text):
+        raise _Incomplete()
+    if text[pos] == "[":
+        return _parse_array(text, pos + 1)
+    if text[pos] == "{":
+        return _parse_object(text, pos + 1)
+
+    try:
+        value, end = _decoder.raw_decode(text, pos)
+    except json.JSONDecodeError as e:
+        # a string, literal or number cut off, vs an invalid document
+        rest = text[pos:]
+        if (
+            rest.startswith('"')
+            or any(literal.startswith(rest) for literal in ("true", "false", "null"))
+            or _NUMBER_PREFIX.fullmatch(rest)
+        ):
+            raise _Incomplete() from e
+        raise ValueError(f"invalid JSON at position {pos}") from e
+    # a number at the very end may have been cut off (e.g., 12 of 1234, or 1.5 of 1.5e3)
+    if isinstance(value, int | float) and _NUMBER_PREFIX.fullmatch(text, pos):
+        raise _Incomplete()
+    return value, end, True
+
+
+def _parse_array(text: str, pos: int) -> tuple[list, int, bool]:
+    items: list = []
+    while True:
+        pos = _skip_whitespace(text, pos)
+        if pos >= len(text):
+            return items, pos, False
+        if text[pos] == "]":
+            return items, pos + 1, True
+        if items:
+            if text[pos] != ",":
+                raise ValueError(f"invalid JSON at position {pos}")
+            pos = _skip_whitespace(text, pos + 1)
+        try:
+            item, pos, complete = _parse_value(text, pos)
+        except _Incomplete:
+            return items, pos, False
+        # items cut off are dropped, so the items returned are whole (e.g., records of a list)
+        if not complete:
+            return items, pos, False
+        items.append(item)
+
+
+def _parse_object(text: str, pos: int) -> tuple[dict, int, bool]:
+    members: dict = {}
+    while True:
+        pos = _skip_whitespace(text, pos)
+        if pos >= len(text):
+            return members, pos, False
+        if text[pos] == "}":
+            return members, pos + 1, True
+        if members:
+            if text[pos] != ",":
+                raise ValueError(f"invalid JSON at position {pos}")
+            pos = _skip_whitespace(text, pos + 1)
+        try:
+            key, pos, _ = _parse_value(text, pos)
+            if not isinstance(key, str):
+                raise ValueError(f"invalid JSON object key at position {pos}")
+            pos = _skip_whitespace(text, pos)
+            if pos >= len(text):
+                raise _Incomplete()
+            if text[pos] != ":":
+                raise ValueError(f"invalid JSON at position {pos}")
+            value, pos, complete = _parse_value(text, _skip_whitespace(text, pos + 1))
+        except _Incomplete:
+            return members, pos, False
+        # but a member cut off is kept with what it has, e.g., the first items of a big list
+        members[key] = value
+        if not complete:
+            return members, pos, False
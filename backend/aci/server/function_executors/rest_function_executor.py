@@ -1,9 +1,15 @@
+import json
+import math
+import random
+import time
 from abc import abstractmethod
 from typing import Any, Generic, override
 
 import httpx
 from httpx import HTTPStatusError
 
+from aci.common import processor, utils
+from aci.common.db import crud
 from aci.common.db.sql_models import Function
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.function import FunctionExecutionResult, RestMetadata
@@ -11,11 +17,26 @@ from aci.common.schemas.security_scheme import (
     TCred,
     TScheme,
 )
+from aci.server import config
+from aci.server.circuit_breaker import circuit_breakers
 from aci.server.function_executors.base_executor import FunctionExecutor
+from aci.server.function_executors.pagination import get_next_page_request, get_page_items
+from aci.server.function_executors.response_body import (
+    ResponseBody,
+    aread_response_body,
+    parse_truncated_json,
+    read_response_body,
+)
+from aci.server.hedging import hedged_request_sender
+from aci.server.upstream_throttle import UpstreamThrottled, parse_retry_after, upstream_throttle
 
 logger = get_logger(__name__)
 
 
+class _FunctionRequestFailed(Exception):  # noqa: N818
+    pass
+
+
 class RestFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TScheme, TCred]):
     """
     Function executor for REST functions.
@@ -40,6 +61,8 @@ class RestFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TScheme, TC
         function_input: dict,
         security_scheme: TScheme,
         security_credentials: TCred,
+        response_projection: processor.ResponseProjection | None,
+        follow_pagination: bool,
     ) -> FunctionExecutionResult:
         # Extract parameters by location
         path: dict = function_input.get("path", {})
@@ -78,46 +101,388 @@ class RestFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TScheme, TC
             },
         )
 
-        return self._send_request(request)
+        try:
+            with upstream_throttle.acquire(
+                function.app.name, self.linked_account.id, function.app.max_concurrency
+            ):
+                return self._send_request(
+                    function, request, protocol_data, response_projection, follow_pagination
+                )
+        except UpstreamThrottled as e:
+            logger.warning(
+                f"function execution throttled, {e}",
+                extra={"function_name": function.name, "retry_after": e.retry_after},
+            )
+            return FunctionExecutionResult(success=False, error=str(e))
 
-    def _send_request(self, request: httpx.Request) -> FunctionExecutionResult:
+    def _send_request(
+        self,
+        function: Function,
+        request: httpx.Request,
+        protocol_data: RestMetadata,
+        response_projection: processor.ResponseProjection | None,
+        follow_pagination: bool,
+    ) -> FunctionExecutionResult:
         # TODO: one client for all requests? cache the client? concurrency control? async client?
-        # TODO: add retry
         timeout = httpx.Timeout(10.0, read=30.0)
         with httpx.Client(timeout=timeout) as client:
+            if follow_pagination and protocol_data.pagination is not None:
+                return self._send_paginated_requests(
+                    function, client, request, protocol_data, response_projection
+                )
+
+            max_bytes = (
+                config.FUNCTION_RESPONSE_BLOB_MAX_BYTES
+                if protocol_data.large_response_as_blob
+                else config.FUNCTION_RESPONSE_MAX_BYTES
+            )
             try:
-                response = client.send(request)
-            except Exception as e:
-                logger.exception(f"failed to send function execution http request, {e}")
+                response, body = self._fetch(function, client, request, protocol_data, max_bytes)
+            except _FunctionRequestFailed as e:
                 return FunctionExecutionResult(success=False, error=str(e))
 
+            return FunctionExecutionResult(
+                success=True,
+                data=self._get_response_data(function, response, body, response_projection),
+            )
+
+    def _send_paginated_requests(
+        self,
+        function: Function,
+        client: httpx.Client,
+        request: httpx.Request,
+        protocol_data: RestMetadata,
+        response_projection: processor.ResponseProjection | None,
+    ) -> FunctionExecutionResult:
+        """
+        Follow the pagination of the upstream and aggregate the items of the pages, up to
+        FUNCTION_PAGINATION_MAX_PAGES pages, FUNCTION_PAGINATION_MAX_ITEMS items and
+        FUNCTION_RESPONSE_MAX_BYTES of response bodies.
+        The response projection applies to each page (the upstream's response), before its items
+        are extracted.
+        """
+        pagination = protocol_data.pagination
+        assert pagination is not None
+        items: list = []
+        pages = 0
+        total_bytes = 0
+        has_more = False
+        error: str | None = None
+        while True:
+            try:
+                response, body = self._fetch(
+                    function, client, request, protocol_data, config.FUNCTION_RESPONSE_MAX_BYTES
+                )
+            except _FunctionRequestFailed as e:
+                if pages == 0:
+                    return FunctionExecutionResult(success=False, error=str(e))
+                # keep the items of the pages fetched so far
+                error, has_more = str(e), True
+                break
+
+            pages += 1
+            total_bytes += len(body.content)
             try:
-                response.raise_for_status()
-            except httpx.HTTPStatusError as e:
-                logger.exception(f"http error occurred for function execution, {e}")
-                return FunctionExecutionResult(
-                    success=False, error=self._get_error_message(response, e)
+                text = body.content.decode(response.encoding or "utf-8", errors="replace")
+                page_data = parse_truncated_json(text) if body.truncated else json.loads(text)
+            except ValueError as e:
+                logger.exception(f"error parsing function execution paginated http response, {e}")
+                if pages == 1:
+                    return FunctionExecutionResult(
+                        success=False, error=f"paginated response is not json, {e}"
+                    )
+                error, has_more = f"paginated response is not json, {e}", True
+                break
+
+            page_items = get_page_items(page_data, pagination)
+            next_request = get_next_page_request(
+                request, response, page_data, len(page_items), pagination
+            )
+            if response_projection is not None:
+                page_items = get_page_items(
+                    processor.project_response_data(page_data, response_projection), pagination
                 )
+            items.extend(page_items)
 
-            return FunctionExecutionResult(success=True, data=self._get_response_data(response))
+            if len(items) >= config.FUNCTION_PAGINATION_MAX_ITEMS:
+                has_more = len(items) > config.FUNCTION_PAGINATION_MAX_ITEMS or bool(next_request)
+                items = items[: config.FUNCTION_PAGINATION_MAX_ITEMS]
+                break
+            if next_request is None:
+                break
+            if (
+                body.truncated
+                or pages >= config.FUNCTION_PAGINATION_MAX_PAGES
+                or total_bytes >= config.FUNCTION_RESPONSE_MAX_BYTES
+            ):
+                has_more = True
+                break
+            request = next_request
+
+        logger.info(
+            "followed function execution pagination",
+            extra={
+                "function_name": function.name,
+                "pages": pages,
+                "items": len(items),
+                "has_more": has_more,
+            },
+        )
+        data: dict = {"items": items, "pages": pages, "has_more": has_more}
+        if error is not None:
+            data["error"] = error
+        return FunctionExecutionResult(success=True, data=data)
 
-    def _get_response_data(self, response: httpx.Response) -> Any:
+    def _fetch(
+        self,
+        function: Function,
+        client: httpx.Client,
+        request: httpx.Request,
+        protocol_data: RestMetadata,
+        max_bytes: int,
+    ) -> tuple[httpx.Response, ResponseBody]:
+        """
+        Send the request, with retries, and read its response body up to max_bytes.
+
+        Raises:
+            _FunctionRequestFailed: if the request failed or the response is an http error.
+        """
+        host = request.url.host
+        circuit_breaker = circuit_breakers.get(host)
+        retry = 0
+        while True:
+            if not circuit_breaker.allow_request():
+                logger.warning(
+                    "upstream circuit breaker open, failing fast",
+                    extra={"function_name": function.name, "host": host},
+                )
+                raise _FunctionRequestFailed(
+                    f"upstream host={host} is unavailable, retry after "
+                    f"{math.ceil(circuit_breaker.retry_after())} seconds"
+                )
+
+            try:
+                if protocol_data.hedge:
+                    # the body is read by the hedged request sender, up to the max size too
+                    response, hedged_body = hedged_request_sender.send(
+                        request,
+                        client.timeout,
+                        lambda hedged_response: aread_response_body(hedged_response, max_bytes),
+                    )
+                else:
+                    # streamed, so a large body is not read into memory past the max size
+                    response, hedged_body = client.send(request, stream=True), None
+            except httpx.TransportError as e:
+                circuit_breaker.record_failure()
+                if retry < config.FUNCTION_EXECUTION_MAX_RETRIES and _is_retryable_error(
+                    request, e
+                ):
+                    retry += 1
+                    _sleep_before_retry(function, request, retry, _get_backoff_seconds(retry))
+                    continue
+                logger.exception(f"failed to send function execution http request, {e}")
+                raise _FunctionRequestFailed(str(e)) from e
+            except Exception as e:
+                # recorded so a half open breaker's trial request doesn't stay in flight forever
+                circuit_breaker.record_failure()
+                logger.exception(f"failed to send function execution http request, {e}")
+                raise _FunctionRequestFailed(str(e)) from e
+
+            upstream_throttle.record_response(
+                function.app.name,
+                self.linked_account.id,
+                response.status_code,
+                response.headers,
+            )
+            if response.status_code >= 500:
+                circuit_breaker.record_failure()
+            else:
+                circuit_breaker.record_success()
+
+            if retry < config.FUNCTION_EXECUTION_MAX_RETRIES:
+                retry_delay = _get_retry_delay_seconds(request, response, retry + 1)
+                if retry_delay is not None:
+                    if hedged_body is None:
+                        response.close()
+                    retry += 1
+                    _sleep_before_retry(function, request, retry, retry_delay)
+                    continue
+            break
+
+        if hedged_body is not None:
+            # already read, and closed, by the hedged request sender
+            body = hedged_body
+        else:
+            try:
+                body = read_response_body(response, max_bytes)
+            except httpx.HTTPError as e:
+                logger.exception(f"failed to read function execution http response, {e}")
+                raise _FunctionRequestFailed(str(e)) from e
+            finally:
+                response.close()
+
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            logger.exception(f"http error occurred for function execution, {e}")
+            raise _FunctionRequestFailed(self._get_error_message(response, body, e)) from e
+
+        return response, body
+
+    def _get_response_data(
+        self,
+        function: Function,
+        response: httpx.Response,
+        body: ResponseBody,
+        response_projection: processor.ResponseProjection | None,
+    ) -> Any:
         """Get the response data from the response.
-        If the response is json, return the json data, otherwise fallback to the text.
+        If the response is json, return the json data (projected if a projection is given),
+        otherwise fallback to the text.
+        A body larger than FUNCTION_RESPONSE_MAX_BYTES is either stored as a blob (for functions
+        with large_response_as_blob) or truncated.
         """
+        if len(body.content) > config.FUNCTION_RESPONSE_MAX_BYTES:
+            try:
+                return self._store_response_blob(function, response, body)
+            except Exception as e:
+                logger.exception(f"failed to store function execution response blob, {e}")
+                body = ResponseBody(
+                    content=body.content[: config.FUNCTION_RESPONSE_MAX_BYTES], truncated=True
+                )
+
+        if body.truncated:
+            logger.warning(
+                "function execution http response too large, truncated",
+                extra={
+                    "function_name": function.name,
+                    "max_bytes": config.FUNCTION_RESPONSE_MAX_BYTES,
+                },
+            )
+            text = body.content.decode(response.encoding or "utf-8", errors="replace")
+            try:
+                data = parse_truncated_json(text)
+                if response_projection is not None:
+                    data = processor.project_response_data(data, response_projection)
+            except ValueError:
+                data = text
+            return {
+                "truncated": True,
+                "message": f"the response body is larger than {config.FUNCTION_RESPONSE_MAX_BYTES} "
+                "bytes, only the beginning of it is returned",
+                "data": data,
+            }
+
         try:
-            response_data = response.json() if response.content else {}
+            response_data = json.loads(body.content) if body.content else {}
         except Exception as e:
             logger.exception(f"error parsing function execution http response, {e}")
-            response_data = response.text
+            return body.content.decode(response.encoding or "utf-8", errors="replace")
 
+        if response_projection is not None:
+            response_data = processor.project_response_data(response_data, response_projection)
         return response_data
 
-    def _get_error_message(self, response: httpx.Response, error: HTTPStatusError) -> str:
+    def _store_response_blob(
+        self, function: Function, response: httpx.Response, body: ResponseBody
+    ) -> dict:
+        with utils.get_db_session_factory(config.DB_FULL_URL)() as db_session:
+            blob_id = crud.function_response_blobs.create_function_response_blob(
+                db_session,
+                self.linked_account.project_id,
+                function.name,
+                response.headers.get("content-type"),
+                body.content,
+                body.truncated,
+                config.FUNCTION_RESPONSE_BLOB_TTL_SECONDS,
+            )
+            crud.function_response_blobs.delete_expired_function_response_blobs(db_session)
+            db_session.commit()
+
+        logger.info(
+            "function execution http response too large, stored as blob",
+            extra={
+                "function_name": function.name,
+                "blob_id": blob_id,
+                "size_bytes": len(body.content),
+                "truncated": body.truncated,
+            },
+        )
+        return {
+            "response_blob": {
+                "id": str(blob_id),
+                "url": f"{config.ROUTER_PREFIX_FUNCTIONS}/response-blobs/{blob_id}",
+                "content_type": response.headers.get("content-type"),
+                "size_bytes": len(body.content),
+                "truncated": body.truncated,
+                "expires_in_seconds": config.FUNCTION_RESPONSE_BLOB_TTL_SECONDS,
+            },
+            "message": f"the response body is larger than {config.FUNCTION_RESPONSE_MAX_BYTES} "
+            "bytes, it can be retrieved from the url of the response blob until it expires",
+        }
+
+    def _get_error_message(
+        self, response: httpx.Response, body: ResponseBody, error: HTTPStatusError
+    ) -> str:
         """Get the error message from the response or fallback to the error message from the HTTPStatusError.
         Usually the response json contains more details about the error.
         """
         try:
-            return str(response.json())
+            return str(json.loads(body.content))
         except Exception:
             return str(error)
+
+
+def _is_retryable_error(request: httpx.Request, error: httpx.TransportError) -> bool:
+    # the request wasn't sent if the connection couldn't be established, safe to retry any method
+    if isinstance(error, httpx.ConnectError | httpx.ConnectTimeout):
+        return True
+    return request.method in config.FUNCTION_EXECUTION_RETRY_METHODS
+
+
+def _get_retry_delay_seconds(
+    request: httpx.Request, response: httpx.Response, retry: int
+) -> float | None:
+    """
+    Get how long to wait before retrying the request, None if the response shouldn't be retried.
+    A Retry-After from the upstream is honoured, unless it's longer than the max backoff.
+    """
+    if (
+        request.method not in config.FUNCTION_EXECUTION_RETRY_METHODS
+        or response.status_code not in config.FUNCTION_EXECUTION_RETRY_STATUS_CODES
+    ):
+        return None
+
+    retry_after = parse_retry_after(response.headers.get("retry-after"), time.time())
+    if retry_after is None:
+        return _get_backoff_seconds(retry)
+    if retry_after > config.FUNCTION_EXECUTION_RETRY_BACKOFF_MAX_SECONDS:
+        return None
+    return retry_after
+
+
+def _get_backoff_seconds(retry: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(
+        0,
+        min(
+            config.FUNCTION_EXECUTION_RETRY_BACKOFF_MAX_SECONDS,
+            config.FUNCTION_EXECUTION_RETRY_BACKOFF_BASE_SECONDS * 2 ** (retry - 1),
+        ),
+    )
+
+
+def _sleep_before_retry(
+    function: Function, request: httpx.Request, retry: int, delay_seconds: float
+) -> None:
+    logger.warning(
+        "retrying function execution http request",
+        extra={
+            "function_name": function.name,
+            "method": request.method,
+            "host": request.url.host,
+            "retry": retry,
+            "delay_seconds": delay_seconds,
+        },
+    )
+    time.sleep(delay_seconds)
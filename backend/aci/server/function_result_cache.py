@@ -0,0 +1,157 @@
+"""
+Cache of function execution results, for read-only functions that opt in with "cache_ttl_seconds"
+in the function's protocol_data.
+
+Results are keyed on (function, linked account, canonicalized function input and execution
+options), only successful results are cached. Identical executions that run concurrently are
+coalesced (single flight): only the first one calls the upstream, the others wait for and share its
+result.
+The cache is bounded by the size of the cached results, evicting the least recently used ones.
+
+The cache is per server process.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from uuid import UUID
+
+from aci.common.db.sql_models import Function
+from aci.common.enums import Protocol
+from aci.common.logging_setup import get_logger
+from aci.common.processor import ResponseProjection
+from aci.common.schemas.function import FunctionExecutionResult, RestMetadata
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _CacheEntry:
+    result: FunctionExecutionResult
+    expires_at: float
+    size_bytes: int
+
+
+class FunctionResultCache:
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._size_bytes = 0
+        self._in_flight: dict[str, asyncio.Future[FunctionExecutionResult]] = {}
+        self._lock = threading.Lock()
+
+    async def get_or_execute(
+        self,
+        key: str,
+        ttl_seconds: int,
+        execute: Callable[[], Awaitable[FunctionExecutionResult]],
+    ) -> FunctionExecutionResult:
+        """
+        Get the cached result for the key, or wait for the identical execution in flight, or run
+        the execution and cache its result if successful.
+        """
+        cached_result = self._get(key)
+        if cached_result is not None:
+            return cached_result.model_copy(update={"cached": True})
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            # shield so a cancelled waiter doesn't cancel the execution shared with the others
+            result = await asyncio.shield(in_flight)
+            return result.model_copy(update={"cached": True})
+
+        future: asyncio.Future[FunctionExecutionResult] = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await execute()
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+            # mark the exception as retrieved, there may be no other waiter
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._in_flight[key]
+
+        if result.success:
+            self._put(key, result, ttl_seconds)
+        return result
+
+    def _get(self, key: str) -> FunctionExecutionResult | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.result
+
+    def _put(self, key: str, result: FunctionExecutionResult, ttl_seconds: int) -> None:
+        size_bytes = len(result.model_dump_json())
+        if size_bytes > self.max_entry_bytes:
+            logger.info(
+                "function result too large to cache",
+                extra={"size_bytes": size_bytes, "max_entry_bytes": self.max_entry_bytes},
+            )
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(
+                result=result, expires_at=time.monotonic() + ttl_seconds, size_bytes=size_bytes
+            )
+            self._size_bytes += size_bytes
+            while self._size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size_bytes -= entry.size_bytes
+
+
+def get_cache_ttl_seconds(function: Function) -> int | None:
+    """The cache ttl of the function's results, None if the function's results are not cached"""
+    if function.protocol != Protocol.REST:
+        return None
+    return RestMetadata.model_validate(function.protocol_data).cache_ttl_seconds
+
+
+def make_cache_key(
+    function_name: str,
+    linked_account_id: UUID,
+    function_input: dict,
+    response_projection: ResponseProjection | None,
+    follow_pagination: bool,
+) -> str:
+    # canonicalized so inputs that only differ in key order share a cache entry
+    canonical_input = json.dumps(
+        {
+            "input": function_input,
+            "projection": response_projection,
+            "follow_pagination": follow_pagination,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    input_hash = hashlib.sha256(canonical_input.encode()).hexdigest()
+    return f"{function_name}:{linked_account_id}:{input_hash}"
+
+
+function_result_cache = FunctionResultCache(
+    max_bytes=config.FUNCTION_RESULT_CACHE_MAX_BYTES,
+    max_entry_bytes=config.FUNCTION_RESULT_CACHE_MAX_ENTRY_BYTES,
+)
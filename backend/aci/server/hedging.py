@@ -0,0 +1,204 @@
+"""
+Hedged requests for read-only REST functions (opted in with "hedge": true in the function's
+protocol_data).
+
+If the first attempt hasn't answered within the per host latency percentile
+(HEDGE_LATENCY_PERCENTILE) of recent requests, a second attempt is sent on another connection of
+the pool. The first response wins and the other attempt is cancelled. Hedges are limited by a
+global budget (HEDGE_BUDGET_RATIO of the hedgeable requests), so a slow upstream doesn't get twice
+the traffic.
+
+Attempts are sent by a long-lived async client, on an event loop running in a background thread,
+so connections are pooled across function executions.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+import httpx
+import logfire
+
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+TBody = TypeVar("TBody")
+
+_hedges_counter = logfire.metric_counter(
+    "upstream_hedged_requests",
+    unit="1",
+    description="number of hedged requests sent, by host and by which attempt won",
+)
+
+
+class LatencyTracker:
+    """Recent latencies of successful requests per host"""
+
+    def __init__(self, window_size: int, min_samples: int):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self._latencies: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, host: str, latency_seconds: float) -> None:
+        with self._lock:
+            latencies = self._latencies.get(host)
+            if latencies is None:
+                latencies = deque(maxlen=self.window_size)
+                self._latencies[host] = latencies
+            latencies.append(latency_seconds)
+
+    def percentile(self, host: str, percentile: float) -> float | None:
+        """None until there are at least min_samples latencies for the host"""
+        with self._lock:
+            latencies = sorted(self._latencies.get(host, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index]
+
+
+class HedgeBudget:
+    """
+    Every hedgeable request deposits ratio tokens (up to max_tokens), a hedge withdraws one.
+    So hedges are at most ratio of the requests, with bursts of up to max_tokens hedges.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class HedgedRequestSender:
+    def __init__(self, latency_tracker: LatencyTracker, budget: HedgeBudget, percentile: float):
+        self.latency_tracker = latency_tracker
+        self.budget = budget
+        self.percentile = percentile
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_lock = threading.Lock()
+        # only used from the event loop's thread
+        self._client: httpx.AsyncClient | None = None
+
+    def send(
+        self,
+        request: httpx.Request,
+        timeout: httpx.Timeout,
+        read_body: Callable[[httpx.Response], Awaitable[TBody]],
+    ) -> tuple[httpx.Response, TBody]:
+        """
+        Send the request, hedging it if it's slow, and read the winning (streamed) response's body
+        with read_body, e.g., up to a max size. Blocking, meant to be called from the worker
+        thread of the function execution.
+        The response is closed, its body is returned separately.
+        """
+        self.budget.deposit()
+        request.extensions["timeout"] = timeout.as_dict()
+        return asyncio.run_coroutine_threadsafe(
+            self._send(request, read_body), self._get_loop()
+        ).result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="hedged-requests", daemon=True
+                ).start()
+            return self._loop
+
+    async def _send(
+        self, request: httpx.Request, read_body: Callable[[httpx.Response], Awaitable[TBody]]
+    ) -> tuple[httpx.Response, TBody]:
+        if self._client is None:
+            self._client = httpx.AsyncClient()
+        response = await self._send_hedged(self._client, request)
+        try:
+            return response, await read_body(response)
+        finally:
+            await response.aclose()
+
+    async def _send_hedged(
+        self, client: httpx.AsyncClient, request: httpx.Request
+    ) -> httpx.Response:
+        """Returns the first response, streamed, the other attempt is cancelled or closed."""
+        host = request.url.host
+        hedge_delay = self.latency_tracker.percentile(host, self.percentile)
+
+        primary = asyncio.create_task(self._send_attempt(client, request))
+        if hedge_delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done or not self.budget.try_withdraw():
+            return await primary
+
+        logger.info(
+            "upstream request slow, sending hedged request",
+            extra={"host": host, "url": str(request.url), "hedge_delay": hedge_delay},
+        )
+        hedge = asyncio.create_task(self._send_attempt(client, request))
+        pending = {primary, hedge}
+        winner: asyncio.Task[httpx.Response] | None = None
+        first_error: BaseException | None = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        first_error = first_error or error
+                    elif winner is None:
+                        winner = task
+                        _hedges_counter.add(
+                            1, {"host": host, "winner": "primary" if task is primary else "hedge"}
+                        )
+                    else:
+                        # both attempts answered at once, the loser's connection is released
+                        await task.result().aclose()
+        finally:
+            # cancel the losing attempt, which closes its connection
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is not None:
+            return winner.result()
+        assert first_error is not None
+        raise first_error
+
+    async def _send_attempt(
+        self, client: httpx.AsyncClient, request: httpx.Request
+    ) -> httpx.Response:
+        start = time.monotonic()
+        response = await client.send(request, stream=True)
+        if response.status_code < 500:
+            self.latency_tracker.record(request.url.host, time.monotonic() - start)
+        return response
+
+
+hedged_request_sender = HedgedRequestSender(
+    latency_tracker=LatencyTracker(
+        window_size=config.HEDGE_LATENCY_WINDOW_SIZE,
+        min_samples=config.HEDGE_LATENCY_MIN_SAMPLES,
+    ),
+    budget=HedgeBudget(ratio=config.HEDGE_BUDGET_RATIO, max_tokens=config.HEDGE_BUDGET_MAX_TOKENS),
+    percentile=config.HEDGE_LATENCY_PERCENTILE,
+)
@@ -0,0 +1,284 @@
+"""
+Durable background job queue on the background_jobs table.
+
+Work that doesn't need to happen inline with a request (e.g., processing a webhook event) is
+enqueued as a job of a registered type, with a pydantic payload. Jobs are inserted in the caller's
+transaction, so a job is only queued if the caller's changes are committed.
+
+Jobs are run by worker processes (python -m aci.server.worker). Workers claim due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can share the queue, and hide a claimed
+job from the other workers for a visibility timeout: if a worker dies, its jobs are claimed again
+once that expires. Failed jobs are retried with a jittered exponential backoff, and dead-lettered
+(status dead, kept for inspection) after their max attempts.
+
+Jobs run at least once, handlers must be idempotent. Handlers are coroutine functions, or plain
+functions for handlers doing blocking io (e.g., calls to sync SDKs), which are run in a thread with
+their own db session so they don't block the worker's event loop.
+"""
+
+import asyncio
+import inspect
+import random
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar, cast
+from uuid import UUID
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+
+from aci.common import utils
+from aci.common.db import crud
+from aci.common.db.sql_models import BackgroundJob
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+TPayload = TypeVar("TPayload", bound=BaseModel)
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    job_type: str
+    payload_model: type[BaseModel]
+    # called with the validated payload and a db session, raising fails the attempt
+    handle: Callable[[Any, Session], Awaitable[None] | None]
+    max_attempts: int
+
+
+_job_handlers: dict[str, JobHandler] = {}
+
+
+def job_handler(
+    job_type: str,
+    payload_model: type[TPayload],
+    max_attempts: int = config.JOB_QUEUE_MAX_ATTEMPTS,
+) -> Callable[
+    [Callable[[TPayload, Session], Awaitable[None] | None]],
+    Callable[[TPayload, Session], Awaitable[None] | None],
+]:
+    """
+    Register the decorated function as the handler of the jobs of job_type. Blocking handlers
+    must be plain functions (run in a thread), coroutine functions run on the worker's event loop.
+    """
+
+    def decorator(
+        handle: Callable[[TPayload, Session], Awaitable[None] | None],
+    ) -> Callable[[TPayload, Session], Awaitable[None] | None]:
+        if job_type in _job_handlers:
+            raise ValueError(f"a handler is already registered for job type={job_type}")
+        _job_handlers[job_type] = JobHandler(job_type, payload_model, handle, max_attempts)
+        return handle
+
+    return decorator
+
+
+def get_job_handler(job_type: str) -> JobHandler | None:
+    return _job_handlers.get(job_type)
+
+
+def enqueue_job(
+    db_session: Session, job_type: str, payload: BaseModel, delay_seconds: float = 0
+) -> UUID:
+    """
+    Queue a job in the db_session's transaction (committed by the caller), returns the job id.
+
+    Raises:
+        ValueError: if there is no handler for job_type or the payload isn't of its payload model.
+    """
+    handler = _job_handlers.get(job_type)
+    if handler is None:
+        raise ValueError(f"no handler registered for job type={job_type}")
+    if not isinstance(payload, handler.payload_model):
+        raise ValueError(
+            f"payload of job type={job_type} must be a {handler.payload_model.__name__}"
+        )
+
+    job_id = crud.background_jobs.create_background_job(
+        db_session,
+        job_type,
+        payload.model_dump(mode="json"),
+        handler.max_attempts,
+        delay_seconds,
+    )
+    logger.info("enqueued background job", extra={"job_id": job_id, "job_type": job_type})
+    return job_id
+
+
+def get_retry_delay_seconds(attempts: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(
+        0,
+        min(
+            config.JOB_QUEUE_RETRY_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+            config.JOB_QUEUE_RETRY_BACKOFF_MAX_SECONDS,
+        ),
+    )
+
+
+class JobWorker:
+    def __init__(
+        self,
+        worker_id: str,
+        concurrency: int,
+        poll_interval_seconds: float,
+        visibility_timeout_seconds: float,
+        handler_timeout_seconds: float,
+    ):
+        # the visibility timeout starts when the job is claimed, before its handler runs, and the
+        # job has to be finished before it expires
+        if handler_timeout_seconds >= visibility_timeout_seconds:
+            raise ValueError("handler_timeout_seconds must be less than visibility_timeout_seconds")
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.poll_interval_seconds = poll_interval_seconds
+        self.visibility_timeout_seconds = visibility_timeout_seconds
+        self.handler_timeout_seconds = handler_timeout_seconds
+        self._running: set[asyncio.Task[None]] = set()
+
+    def claim_jobs(self, limit: int) -> list[BackgroundJob]:
+        with utils.get_db_session_factory(config.DB_FULL_URL)() as db_session:
+            jobs = crud.background_jobs.claim_background_jobs(
+                db_session, self.worker_id, limit, self.visibility_timeout_seconds
+            )
+            # detached before the commit expires them, the jobs are used after the session is closed
+            db_session.expunge_all()
+            db_session.commit()
+        return jobs
+
+    async def run(self, stop: asyncio.Event, shutdown_grace_seconds: float) -> None:
+        """
+        Claim and run jobs until stop is set, then wait up to shutdown_grace_seconds for the
+        running jobs to finish (the others are claimed again once their visibility timeout expires).
+        """
+        logger.info(
+            "background job worker started",
+            extra={"worker_id": self.worker_id, "concurrency": self.concurrency},
+        )
+        while not stop.is_set():
+            free_slots = self.concurrency - len(self._running)
+            jobs: list[BackgroundJob] = []
+            if free_slots > 0:
+                try:
+                    # claiming does blocking db io, run it in a thread to not block the event loop
+                    jobs = await asyncio.to_thread(self.claim_jobs, free_slots)
+                except Exception:
+                    logger.exception(
+                        "failed to claim background jobs", extra={"worker_id": self.worker_id}
+                    )
+
+            for job in jobs:
+                task = asyncio.create_task(self.run_job(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            # poll again right away if there may be more due jobs
+            if not jobs or len(jobs) < free_slots:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval_seconds)
+                except TimeoutError:
+                    pass
+            elif len(self._running) >= self.concurrency:
+                await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+
+        if self._running:
+            logger.info(
+                "waiting for running background jobs to finish",
+                extra={"worker_id": self.worker_id, "num_jobs": len(self._running)},
+            )
+            await asyncio.wait(self._running, timeout=shutdown_grace_seconds)
+        logger.info("background job worker stopped", extra={"worker_id": self.worker_id})
+
+    async def run_job(self, job: BackgroundJob) -> None:
+        """Run a claimed job, and delete it if it succeeded or record the failed attempt."""
+        handler = _job_handlers.get(job.job_type)
+        if handler is None:
+            error: str | None = f"no handler registered for job type={job.job_type}"
+            retry = False
+        elif job.attempts > job.max_attempts:
+            # claimed again after its worker died (or its handler didn't return) on the last attempt
+            error = "job exceeded its max attempts (visibility timeout expired)"
+            retry = False
+        else:
+            error, retry = await self._handle(handler, job)
+
+        try:
+            await asyncio.to_thread(self.finish_job, job, error, retry)
+        except Exception:
+            # claimed again once its visibility timeout expires
+            logger.exception(
+                "failed to finish background job",
+                extra={"job_id": job.id, "job_type": job.job_type, "attempts": job.attempts},
+            )
+
+    def finish_job(self, job: BackgroundJob, error: str | None, retry: bool) -> None:
+        log_extra = {"job_id": job.id, "job_type": job.job_type, "attempts": job.attempts}
+        with utils.get_db_session_factory(config.DB_FULL_URL)() as db_session:
+            if error is None:
+                updated = crud.background_jobs.delete_background_job(
+                    db_session, job.id, job.attempts
+                )
+                retry_delay_seconds = None
+            else:
+                retry_delay_seconds = (
+                    get_retry_delay_seconds(job.attempts)
+                    if retry and job.attempts < job.max_attempts
+                    else None
+                )
+                updated = crud.background_jobs.fail_background_job(
+                    db_session, job.id, job.attempts, error, retry_delay_seconds
+                )
+            db_session.commit()
+
+        if not updated:
+            logger.warning(
+                "background job was claimed again before it finished, its visibility timeout "
+                "expired",
+                extra=log_extra,
+            )
+        elif error is None:
+            logger.info("background job succeeded", extra=log_extra)
+        elif retry_delay_seconds is None:
+            logger.error("background job dead-lettered", extra={**log_extra, "error": error})
+        else:
+            logger.warning(
+                "background job will be retried",
+                extra={**log_extra, "retry_delay_seconds": retry_delay_seconds},
+            )
+
+    async def _handle(self, handler: JobHandler, job: BackgroundJob) -> tuple[str | None, bool]:
+        """Run the handler of a job, returns the error if it failed, and whether to retry it."""
+        log_extra = {"job_id": job.id, "job_type": job.job_type, "attempts": job.attempts}
+        try:
+            payload = handler.payload_model.model_validate(job.payload)
+        except ValidationError as e:
+            logger.error("invalid background job payload", extra={**log_extra, "error": str(e)})
+            return f"invalid payload: {e}", False
+
+        try:
+            # fail the attempt before another worker can claim the job again
+            if inspect.iscoroutinefunction(handler.handle):
+                with utils.get_db_session_factory(config.DB_FULL_URL)() as db_session:
+                    await asyncio.wait_for(
+                        cast(Awaitable[None], handler.handle(payload, db_session)),
+                        timeout=self.handler_timeout_seconds,
+                    )
+            else:
+                # a thread can't be cancelled, a timed out handler keeps running in the background
+                await asyncio.wait_for(
+                    asyncio.to_thread(_run_blocking_handler, handler, payload),
+                    timeout=self.handler_timeout_seconds,
+                )
+        except TimeoutError:
+            logger.error("background job timed out", extra=log_extra)
+            return "job timed out", True
+        except Exception as e:
+            logger.exception("background job failed", extra=log_extra)
+            return f"{type(e).__name__}: {e}", True
+        return None, True
+
+
+def _run_blocking_handler(handler: JobHandler, payload: BaseModel) -> None:
+    with utils.get_db_session_factory(config.DB_FULL_URL)() as db_session:
+        handler.handle(payload, db_session)
@@ -0,0 +1,98 @@
+"""
+Write-behind buffer for linked_accounts.last_used_at.
+
+Recording when a linked account was last used doesn't need to happen inline with every function
+execution. Timestamps are coalesced in memory per linked account (only the latest one is kept) and
+written to the database periodically by a background task, in a single statement per flush.
+The buffer is also flushed on server shutdown.
+"""
+
+import asyncio
+import threading
+from datetime import datetime
+from uuid import UUID
+
+from aci.common import utils
+from aci.common.db import crud
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+class LastUsedBuffer:
+    def __init__(self, flush_interval_seconds: float):
+        self.flush_interval_seconds = flush_interval_seconds
+        self._last_used_at_by_linked_account_id: dict[UUID, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def record(self, linked_account_id: UUID, last_used_at: datetime) -> None:
+        """Record a usage of a linked account, only the latest timestamp per linked account is kept."""
+        with self._lock:
+            existing = self._last_used_at_by_linked_account_id.get(linked_account_id)
+            if existing is None or existing < last_used_at:
+                self._last_used_at_by_linked_account_id[linked_account_id] = last_used_at
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._last_used_at_by_linked_account_id)
+
+    def flush(self) -> int:
+        """
+        Write all buffered timestamps to the database. Returns the number of linked accounts flushed.
+        If the write fails, the timestamps are merged back into the buffer to be retried on the next flush.
+        """
+        with self._lock:
+            pending = self._last_used_at_by_linked_account_id
+            self._last_used_at_by_linked_account_id = {}
+
+        if not pending:
+            return 0
+
+        try:
+            with utils.get_db_session_factory(config.DB_FULL_URL)() as db_session:
+                crud.linked_accounts.bulk_update_linked_accounts_last_used_at(db_session, pending)
+                db_session.commit()
+        except Exception:
+            logger.exception(
+                "failed to flush linked accounts last_used_at, will retry on next flush",
+                extra={"num_linked_accounts": len(pending)},
+            )
+            for linked_account_id, last_used_at in pending.items():
+                self.record(linked_account_id, last_used_at)
+            return 0
+
+        logger.info(
+            "flushed linked accounts last_used_at",
+            extra={"num_linked_accounts": len(pending)},
+        )
+        return len(pending)
+
+    def start(self) -> None:
+        """Start the periodic background flush, must be called from within a running event loop."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stop the periodic background flush and flush whatever is left in the buffer."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await asyncio.to_thread(self.flush)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            # the flush does blocking db io, run it in a thread to not block the event loop
+            await asyncio.to_thread(self.flush)
+
+
+last_used_buffer = LastUsedBuffer(
+    flush_interval_seconds=config.LINKED_ACCOUNT_LAST_USED_AT_FLUSH_INTERVAL_SECONDS
+)
@@ -1,3 +1,5 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 
 import logfire
@@ -7,17 +9,21 @@ from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from pythonjsonlogger.json import JsonFormatter
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
-from aci.common.exceptions import ACIException
+from aci.common.exceptions import ACIException, RateLimitExceeded
 from aci.common.logging_setup import setup_logging
 from aci.server import config
 from aci.server import dependencies as deps
 from aci.server.acl import get_propelauth
+from aci.server.app_connectors.base import shutdown_sync_method_executors
+from aci.server.app_connectors.e2b_sandboxes import e2b_sandbox_manager
 from aci.server.dependency_check import check_dependencies
+from aci.server.function_execution_jobs import function_execution_job_runner
+from aci.server.last_used_buffer import last_used_buffer
 from aci.server.middleware.interceptor import InterceptorMiddleware, RequestIDLogFilter
 from aci.server.middleware.ratelimit import RateLimitMiddleware
+from aci.server.middleware.session import PathScopedSessionMiddleware
 from aci.server.routes import (
     agent,
     analytics,
@@ -53,6 +59,20 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    last_used_buffer.start()
+    function_execution_job_runner.start(functions.run_function_execution_job)
+    e2b_sandbox_manager.start()
+    yield
+    await function_execution_job_runner.stop()
+    await e2b_sandbox_manager.stop()
+    shutdown_sync_method_executors()
+    await agent.openai_client.close()
+    # flush buffered linked accounts last_used_at before shutting down
+    await last_used_buffer.stop()
+
+
 # TODO: move to config
 app = FastAPI(
     title=config.APP_TITLE,
@@ -61,6 +81,7 @@ app = FastAPI(
     redoc_url=config.APP_REDOC_URL,
     openapi_url=config.APP_OPENAPI_URL,
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 auth = get_propelauth()
@@ -82,7 +103,12 @@ if config.ENVIRONMENT != "local":
 
 """middlewares are executed in the reverse order"""
 app.add_middleware(RateLimitMiddleware)
-app.add_middleware(SessionMiddleware, secret_key=config.SIGNING_KEY)
+# only the OAuth2 account linking routes need a session, don't load and sign the cookie on other routes
+app.add_middleware(
+    PathScopedSessionMiddleware,
+    path_prefixes=[f"{config.ROUTER_PREFIX_LINKED_ACCOUNTS}/oauth2"],
+    secret_key=config.SIGNING_KEY,
+)
 # TODO: for now, we don't use TrustedHostMiddleware because it blocks health check from AWS ALB:
 # When ALB send health check request, it uses the task IP as the host, instead of the DNS name.
 # ALB health check headers example: Headers({'host': '10.0.164.143:8000', 'user-agent': 'ELB-HealthChecker/2.0'})
@@ -118,6 +144,15 @@ async def global_exception_handler(request: Request, exc: ACIException) -> JSONR
     )
 
 
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.error_code,
+        content={"error": f"{exc.title}, {exc.message}" if exc.message else exc.title},
+        headers=exc.headers,
+    )
+
+
 # TODO: custom rate limiting on different routes
 app.include_router(
     health.router,
@@ -136,13 +171,21 @@ app.include_router(
     apps.router,
     prefix=config.ROUTER_PREFIX_APPS,
     tags=[config.ROUTER_PREFIX_APPS.split("/")[-1]],
-    dependencies=[Depends(deps.validate_api_key), Depends(deps.validate_project_quota)],
+    dependencies=[
+        Depends(deps.validate_api_key),
+        Depends(deps.validate_project_quota),
+        Depends(deps.validate_rate_limits),
+    ],
 )
 app.include_router(
     functions.router,
     prefix=config.ROUTER_PREFIX_FUNCTIONS,
     tags=[config.ROUTER_PREFIX_FUNCTIONS.split("/")[-1]],
-    dependencies=[Depends(deps.validate_api_key), Depends(deps.validate_project_quota)],
+    dependencies=[
+        Depends(deps.validate_api_key),
+        Depends(deps.validate_project_quota),
+        Depends(deps.validate_rate_limits),
+    ],
 )
 app.include_router(
     app_configurations.router,
@@ -2,9 +2,10 @@ import logging
 import uuid
 from datetime import UTC, datetime
 
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from aci.common.logging_setup import get_logger
 from aci.server.context import request_id_ctx_var
@@ -12,17 +13,27 @@ from aci.server.context import request_id_ctx_var
 logger = get_logger(__name__)
 
 
-class InterceptorMiddleware(BaseHTTPMiddleware):
+class InterceptorMiddleware:
     """
     Middleware for logging structured analytics data for every request/response.
     It generates a unique request ID and logs some baseline details.
+    Implemented as a pure ASGI middleware so streaming responses are passed through as they are
+    produced, the response is logged once its last body chunk is sent.
     """
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = datetime.now(UTC)
         request_id = str(uuid.uuid4())
         request_id_ctx_var.set(request_id)
 
+        request = Request(scope)
         request_log_data = {
             "method": request.method,
             "url": str(request.url),
@@ -33,28 +44,43 @@ class InterceptorMiddleware(BaseHTTPMiddleware):
         }
         logger.info("received request", extra=request_log_data)
 
+        response_started = False
+        status_code: int | None = None
+        content_length: str | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started, status_code, content_length
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                content_length = headers.get("content-length")
+                headers["X-Request-ID"] = request_id
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_log_data = {
+                    "status_code": status_code,
+                    "duration": (datetime.now(UTC) - start_time).total_seconds(),
+                    "content_length": content_length,
+                }
+                logger.info("response sent", extra=response_log_data)
+
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             logger.exception(
                 e,
                 extra={"duration": (datetime.now(UTC) - start_time).total_seconds()},
             )
-            return JSONResponse(
+            # can't send an error response once the response has started (e.g., mid stream)
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={"error": "Internal server error"},
             )
-
-        response_log_data = {
-            "status_code": response.status_code,
-            "duration": (datetime.now(UTC) - start_time).total_seconds(),
-            "content_length": response.headers.get("content-length"),
-        }
-        logger.info("response sent", extra=response_log_data)
-
-        response.headers["X-Request-ID"] = request_id
-
-        return response
+            await response(scope, receive, send_wrapper)
 
     def _get_client_ip(self, request: Request) -> str:
         """
@@ -1,36 +1,57 @@
 import json
+import math
 
 from fastapi import status
 from limits import RateLimitItem, RateLimitItemPerDay, RateLimitItemPerSecond
-from limits.aio.storage import MemoryStorage
-from limits.aio.strategies import MovingWindowRateLimiter
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
 from starlette.responses import Response
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from aci.common.logging_setup import get_logger
-from aci.server.config import RATE_LIMIT_IP_PER_DAY, RATE_LIMIT_IP_PER_SECOND
+from aci.server import config
+from aci.server.rate_limit_storage import RateLimitResult
+from aci.server.rate_limiting import get_rate_limit_storage
 
 logger = get_logger(__name__)
 
 
-# TODO: replace with redis storage
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
+    """
+    IP based rate limiting, implemented as a pure ASGI middleware so responses (including streaming
+    ones) are passed through untouched apart from the added rate limit headers.
+    The rate limit state is kept in the storage configured by SERVER_RATE_LIMIT_STORAGE_URI, so it
+    can be shared across workers and instances. If the storage is unavailable, requests are
+    allowed (fail open) rather than taking the whole API down with it.
+    """
+
     def __init__(self, app: ASGIApp) -> None:
-        super().__init__(app)
-        self.storage = MemoryStorage()
-        self.limiter = MovingWindowRateLimiter(self.storage)
+        self.app = app
+        self.storage = get_rate_limit_storage()
         self.rate_limits: dict[str, RateLimitItem] = {
-            "ip-per-second": RateLimitItemPerSecond(amount=RATE_LIMIT_IP_PER_SECOND),
-            "ip-per-day": RateLimitItemPerDay(amount=RATE_LIMIT_IP_PER_DAY),
+            "ip-per-second": RateLimitItemPerSecond(amount=config.RATE_LIMIT_IP_PER_SECOND),
+            "ip-per-day": RateLimitItemPerDay(amount=config.RATE_LIMIT_IP_PER_DAY),
         }
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Determine the rate limit key based on authentication method
-        rate_limit_key = self._get_rate_limit_key(request)
+        rate_limit_key = self._get_rate_limit_key(Request(scope))
+        results: dict[str, RateLimitResult] = {}
         for rate_limit_name, rate_limit in self.rate_limits.items():
-            if not await self.limiter.hit(rate_limit, rate_limit_key):
+            try:
+                results[rate_limit_name] = await self.storage.hit(rate_limit_key, rate_limit)
+            except Exception:
+                logger.exception(
+                    "rate limit storage error, allowing request",
+                    extra={"rate_limit_name": rate_limit_name, "rate_limit_key": rate_limit_key},
+                )
+                continue
+
+            if not results[rate_limit_name].allowed:
                 # NOTE: raising a custom ACIException here doesn't work as expected
                 logger.warning(
                     "rate limit exceeded",
@@ -39,22 +60,29 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                         "rate_limit_key": rate_limit_key,
                     },
                 )
-                return Response(
+                response = Response(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                     content=json.dumps({"error": f"Rate limit exceeded: {rate_limit_name}"}),
-                    headers=await self._get_rate_limit_headers(rate_limit_key),
+                    headers={
+                        **self._get_rate_limit_headers(results),
+                        "Retry-After": str(math.ceil(results[rate_limit_name].retry_after)),
+                    },
                 )
-
-        response = await call_next(request)
+                await response(scope, receive, send)
+                return
 
         # Add rate limit headers for all limits
-        headers = await self._get_rate_limit_headers(rate_limit_key)
-        response.headers.update(headers)
+        rate_limit_headers = self._get_rate_limit_headers(results)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(rate_limit_headers)
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_wrapper)
 
-    # TODO: only do ip based rate limiting in middleware
-    # consider api key based rate limiting in dependencies where api key is validated
+    # NOTE: api key and project based rate limits are enforced in the dependencies, where the api
+    # key is validated, see aci/server/rate_limiting.py
     def _get_rate_limit_key(self, request: Request) -> str:
         # Note: client.host will be set correctly (if running behind proxy like ALB) because of ProxyHeadersMiddleware.
         if request.client and request.client.host:
@@ -63,12 +91,11 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             logger.error("failed to generate rate limit key, request.client.host not set")
             return "ip:127.0.0.1"
 
-    async def _get_rate_limit_headers(self, key: str) -> dict:
+    def _get_rate_limit_headers(self, results: dict[str, RateLimitResult]) -> dict:
+        """Build the headers from the results of the hits, without extra roundtrips to the storage"""
         headers = {}
-        for rate_limit_name, rate_limit in self.rate_limits.items():
-            window_stats = await self.limiter.get_window_stats(rate_limit, key)
-
-            headers[f"X-RateLimit-Limit-{rate_limit_name}"] = str(rate_limit.amount)
-            headers[f"X-RateLimit-Remaining-{rate_limit_name}"] = str(window_stats.remaining)
-            headers[f"X-RateLimit-Reset-{rate_limit_name}"] = str(window_stats.reset_time)
+        for rate_limit_name, result in results.items():
+            headers[f"X-RateLimit-Limit-{rate_limit_name}"] = str(result.limit)
+            headers[f"X-RateLimit-Remaining-{rate_limit_name}"] = str(result.remaining)
+            headers[f"X-RateLimit-Reset-{rate_limit_name}"] = str(result.reset_at)
         return headers
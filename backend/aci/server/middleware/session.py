@@ -0,0 +1,21 @@
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class PathScopedSessionMiddleware:
+    """
+    Apply Starlette's SessionMiddleware only to requests whose path starts with one of the given
+    prefixes (e.g., the OAuth2 account linking routes), so other routes don't pay for loading and
+    signing the session cookie.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: list[str], secret_key: str) -> None:
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.session_middleware = SessionMiddleware(app, secret_key=secret_key)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket") and scope["path"].startswith(self.path_prefixes):
+            await self.session_middleware(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -0,0 +1,561 @@
+"""
+Rate limit storages shared across uvicorn workers and server instances.
+
+All storages implement GCRA (generic cell rate algorithm): for each key only the "theoretical
+arrival time" (tat) of the next request is stored, and a hit is a single atomic
+read-compare-update of that value, i.e., one roundtrip to the shared store.
+A limit of N requests per period allows a burst of N requests, after which one request is allowed
+every period / N seconds.
+
+Storages are created from a uri:
+- memory://: per process, only for local development and tests
+- redis://[:password@]host[:port][/db]: any server speaking the Redis protocol (with EVAL support)
+- postgres://: the UNLOGGED rate_limit_buckets table of the server database
+
+PreallocatingRateLimitStorage can wrap a shared storage to take tokens from it in batches, so hot
+keys don't hit the shared store on every request.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+
+from limits import RateLimitItem
+from sqlalchemy import create_engine, delete, func, text
+
+from aci.common.db.sql_models import RateLimitBucket
+from aci.common.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# to avoid floor() rounding down exact results because of floating point errors
+_EPSILON = 1e-9
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    # seconds until the limit is fully replenished
+    reset_after: float
+    # seconds until the next request would be allowed, 0 if allowed
+    retry_after: float
+
+    @property
+    def reset_at(self) -> int:
+        """Epoch seconds at which the limit is fully replenished."""
+        return math.ceil(time.time() + self.reset_after)
+
+
+class RateLimitStorage(ABC):
+    @abstractmethod
+    async def hit(self, key: str, rate_limit: RateLimitItem, cost: int = 1) -> RateLimitResult:
+        """
+        Consume cost tokens of the rate limit for the key, if (and only if) they are all available.
+        """
+
+    async def close(self) -> None:  # noqa: B027
+        pass
+
+
+def gcra_update(
+    tat: float | None, now: float, rate_limit: RateLimitItem, cost: int
+) -> tuple[float | None, RateLimitResult]:
+    """
+    Apply a hit to the stored theoretical arrival time.
+    Returns the new tat to store (None if the hit is rejected and nothing should be stored) and the
+    result of the hit.
+    """
+    period = float(rate_limit.get_expiry())
+    emission_interval = period / rate_limit.amount
+    tat = max(tat if tat is not None else now, now)
+    new_tat = tat + cost * emission_interval
+    allow_at = new_tat - period
+
+    if allow_at > now + _EPSILON:
+        return None, RateLimitResult(
+            allowed=False,
+            limit=rate_limit.amount,
+            remaining=max(0, math.floor((period - (tat - now)) / emission_interval + _EPSILON)),
+            reset_after=tat - now,
+            retry_after=allow_at - now,
+        )
+
+    return new_tat, RateLimitResult(
+        allowed=True,
+        limit=rate_limit.amount,
+        remaining=max(0, math.floor((period - (new_tat - now)) / emission_interval + _EPSILON)),
+        reset_after=new_tat - now,
+        retry_after=0.0,
+    )
+
+
+def _rejected_cost_too_high(rate_limit: RateLimitItem) -> RateLimitResult:
+    # a hit costing more than the limit can never be allowed
+    return RateLimitResult(
+        allowed=False,
+        limit=rate_limit.amount,
+        remaining=0,
+        reset_after=float(rate_limit.get_expiry()),
+        retry_after=float(rate_limit.get_expiry()),
+    )
+
+
+class MemoryRateLimitStorage(RateLimitStorage):
+    """Per process storage, for local development and tests."""
+
+    # how often expired keys are purged
+    PURGE_INTERVAL_SECONDS = 60
+
+    def __init__(self) -> None:
+        self._tats: dict[str, float] = {}
+        self._last_purge = time.time()
+
+    async def hit(self, key: str, rate_limit: RateLimitItem, cost: int = 1) -> RateLimitResult:
+        if cost > rate_limit.amount:
+            return _rejected_cost_too_high(rate_limit)
+
+        now = time.time()
+        self._purge_expired(now)
+        storage_key = rate_limit.key_for(key)
+        new_tat, result = gcra_update(self._tats.get(storage_key), now, rate_limit, cost)
+        if new_tat is not None:
+            self._tats[storage_key] = new_tat
+        return result
+
+    def _purge_expired(self, now: float) -> None:
+        if now - self._last_purge < self.PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+
+
+# GCRA in a single atomic script, using the server's clock.
+# returns {allowed, remaining, reset_after_ms, retry_after_ms}, only integers survive the
+# conversion of lua numbers to redis replies
+_REDIS_GCRA_SCRIPT = """
+local period = tonumber(ARGV[1])
+local emission_interval = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local redis_time = redis.call('TIME')
+local now = tonumber(redis_time[1]) + tonumber(redis_time[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + cost * emission_interval
+local allow_at = new_tat - period
+if allow_at > now + 1e-9 then
+    local remaining = math.floor((period - (tat - now)) / emission_interval + 1e-9)
+    return {0, math.max(remaining, 0), math.ceil((tat - now) * 1000), math.ceil((allow_at - now) * 1000)}
+end
+redis.call('SET', KEYS[1], string.format('%.6f', new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+local remaining = math.floor((period - (new_tat - now)) / emission_interval + 1e-9)
+return {1, math.max(remaining, 0), math.ceil((new_tat - now) * 1000), 0}
+"""
+_REDIS_GCRA_SCRIPT_SHA = hashlib.sha1(_REDIS_GCRA_SCRIPT.encode()).hexdigest()
+
+
+class RedisProtocolError(Exception):
+    pass
+
+
+class RedisReplyError(RedisProtocolError):
+    """An error reply of the server, the connection can still be used for the next command."""
+
+
+class RedisConnection:
+    """
+    Minimal asyncio client for the Redis serialization protocol (RESP2), supporting just what the
+    rate limit storage needs: sending a command and reading its reply.
+    Commands are serialized on a single connection, which is (re)opened lazily.
+    Each command, including the wait for the connection and connecting, is bounded by
+    timeout_seconds so a stalled server fails requests instead of blocking them.
+    """
+
+    def __init__(
+        self, host: str, port: int, db: int, password: str | None, timeout_seconds: float
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout_seconds = timeout_seconds
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    async def execute(self, *args: str | int | float) -> Any:
+        async with asyncio.timeout(self.timeout_seconds), self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                return await self._execute(*args)
+            except RedisReplyError:
+                raise
+            except BaseException:
+                # the reply of a command interrupted midway (connection loss, timeout,
+                # cancellation) would be read by the next command, so the connection is dropped
+                self._abort()
+                raise
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._close()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password is not None:
+                await self._execute("AUTH", self.password)
+            if self.db != 0:
+                await self._execute("SELECT", self.db)
+        except BaseException:
+            self._abort()
+            raise
+
+    async def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = None
+        self._writer = None
+
+    def _abort(self) -> None:
+        if self._writer is not None:
+            self._writer.transport.abort()
+        self._reader = None
+        self._writer = None
+
+    async def _execute(self, *args: str | int | float) -> Any:
+        assert self._reader is not None and self._writer is not None
+        encoded_args = [str(arg).encode() for arg in args]
+        command = b"*%d\r\n" % len(encoded_args) + b"".join(
+            b"$%d\r\n%s\r\n" % (len(arg), arg) for arg in encoded_args
+        )
+        self._writer.write(command)
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def _read_reply(self) -> Any:
+        assert self._reader is not None
+        line = await self._reader.readuntil(b"\r\n")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise RedisReplyError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode()
+        if prefix == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisProtocolError(f"unexpected reply: {line!r}")
+
+
+class RedisRateLimitStorage(RateLimitStorage):
+    KEY_PREFIX = "aci:ratelimit:"
+
+    def __init__(self, connection: RedisConnection) -> None:
+        self.connection = connection
+
+    @classmethod
+    def from_uri(cls, uri: str, timeout_seconds: float) -> "RedisRateLimitStorage":
+        parsed = urlparse(uri)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(
+            RedisConnection(
+                parsed.hostname or "localhost",
+                parsed.port or 6379,
+                db,
+                parsed.password,
+                timeout_seconds,
+            )
+        )
+
+    async def hit(self, key: str, rate_limit: RateLimitItem, cost: int = 1) -> RateLimitResult:
+        if cost > rate_limit.amount:
+            return _rejected_cost_too_high(rate_limit)
+
+        period = float(rate_limit.get_expiry())
+        args = (
+            1,
+            f"{self.KEY_PREFIX}{rate_limit.key_for(key)}",
+            period,
+            period / rate_limit.amount,
+            cost,
+        )
+        try:
+            reply = await self.connection.execute("EVALSHA", _REDIS_GCRA_SCRIPT_SHA, *args)
+        except RedisReplyError as e:
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+            # first call on this server, EVAL also caches the script for the next EVALSHA
+            reply = await self.connection.execute("EVAL", _REDIS_GCRA_SCRIPT, *args)
+
+        allowed, remaining, reset_after_ms, retry_after_ms = reply
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=rate_limit.amount,
+            remaining=remaining,
+            reset_after=reset_after_ms / 1000,
+            retry_after=retry_after_ms / 1000,
+        )
+
+    async def close(self) -> None:
+        await self.connection.close()
+
+
+class PostgresRateLimitStorage(RateLimitStorage):
+    """
+    Stores the GCRA state in the UNLOGGED rate_limit_buckets table, a hit is a single
+    INSERT ... ON CONFLICT DO UPDATE ... WHERE statement, executed in a thread.
+    """
+
+    # how often expired buckets are deleted
+    PURGE_INTERVAL_SECONDS = 60
+
+    # the time is taken from the database clock, so the clocks of the server instances sharing
+    # the buckets don't need to agree. The update only happens if the hit is allowed, the current
+    # tat is read from the snapshot taken before the statement to report the retry time of
+    # rejected hits
+    _HIT_STATEMENT = text(
+        f"""
+        WITH clock AS (
+            SELECT extract(epoch FROM clock_timestamp())::double precision AS now
+        ),
+        current_bucket AS (
+            SELECT tat FROM {RateLimitBucket.__tablename__} WHERE key = :key
+        ),
+        updated_bucket AS (
+            INSERT INTO {RateLimitBucket.__tablename__} (key, tat)
+            SELECT :key, now + :increment FROM clock
+            ON CONFLICT (key) DO UPDATE
+            SET tat = GREATEST({RateLimitBucket.__tablename__}.tat, (SELECT now FROM clock))
+                + :increment
+            WHERE GREATEST({RateLimitBucket.__tablename__}.tat, (SELECT now FROM clock))
+                + :increment - :period <= (SELECT now FROM clock) + :epsilon
+            RETURNING tat
+        )
+        SELECT
+            (SELECT tat FROM updated_bucket),
+            (SELECT tat FROM current_bucket),
+            (SELECT now FROM clock)
+        """
+    )
+
+    _PURGE_STATEMENT = delete(RateLimitBucket).where(
+        RateLimitBucket.tat < func.extract("epoch", func.clock_timestamp())
+    )
+
+    def __init__(self, db_url: str, pool_size: int = 5) -> None:
+        self.engine = create_engine(db_url, pool_size=pool_size, pool_pre_ping=True)
+        self._last_purge = time.monotonic()
+
+    async def hit(self, key: str, rate_limit: RateLimitItem, cost: int = 1) -> RateLimitResult:
+        if cost > rate_limit.amount:
+            return _rejected_cost_too_high(rate_limit)
+        return await asyncio.to_thread(self._hit, key, rate_limit, cost)
+
+    def _hit(self, key: str, rate_limit: RateLimitItem, cost: int) -> RateLimitResult:
+        period = float(rate_limit.get_expiry())
+        with self.engine.begin() as connection:
+            new_tat, current_tat, now = connection.execute(
+                self._HIT_STATEMENT,
+                {
+                    "key": rate_limit.key_for(key),
+                    "increment": cost * period / rate_limit.amount,
+                    "period": period,
+                    "epsilon": _EPSILON,
+                },
+            ).one()
+            if time.monotonic() - self._last_purge >= self.PURGE_INTERVAL_SECONDS:
+                self._last_purge = time.monotonic()
+                connection.execute(self._PURGE_STATEMENT)
+
+        # recompute the result from the tat before the hit, consistent with what was stored
+        _, result = gcra_update(
+            current_tat if new_tat is None else new_tat - cost * period / rate_limit.amount,
+            now,
+            rate_limit,
+            cost,
+        )
+        return result
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.engine.dispose)
+
+
+@dataclass
+class _PreallocatedTokens:
+    tokens: int
+    allocated_at: float
+    expires_at: float
+    # result of the hit that allocated the tokens
+    result: RateLimitResult
+
+
+@dataclass
+class _HitCounter:
+    """Hits of a key in the current and the previous window of max_age_seconds."""
+
+    window_start: float
+    hits: int = 0
+    previous_hits: int = 0
+
+
+class PreallocatingRateLimitStorage(RateLimitStorage):
+    """
+    Takes tokens from the shared storage in batches and hands them out locally, so a hot key only
+    hits the shared storage once every batch. Unused tokens are dropped after max_age_seconds.
+
+    Dropped tokens stay charged, so only keys that are hot enough to use a whole batch within
+    max_age_seconds are preallocated: a key is hot once this worker saw batch_size hits for it in
+    the current or the previous window of max_age_seconds. Other keys hit the shared storage on
+    every request. The batch is also capped to a twentieth of the limit, so keys with small limits
+    are never preallocated, and only one batch per key is allocated at a time. The trade-off is
+    that tokens held by one worker are not available to the others until they are used or expire.
+    """
+
+    # how often the state of idle keys is deleted
+    PURGE_INTERVAL_SECONDS = 60
+
+    def __init__(
+        self, storage: RateLimitStorage, batch_size: int, max_age_seconds: float = 1.0
+    ) -> None:
+        self.storage = storage
+        self.batch_size = batch_size
+        self.max_age_seconds = max_age_seconds
+        self._preallocated: dict[str, _PreallocatedTokens] = {}
+        self._hit_counters: dict[str, _HitCounter] = {}
+        # keys with a batch allocation in flight
+        self._allocating: set[str] = set()
+        self._last_purge = time.time()
+
+    async def hit(self, key: str, rate_limit: RateLimitItem, cost: int = 1) -> RateLimitResult:
+        batch_size = min(self.batch_size, rate_limit.amount // 20)
+        if batch_size <= cost:
+            return await self.storage.hit(key, rate_limit, cost)
+
+        storage_key = rate_limit.key_for(key)
+        now = time.time()
+        self._purge(now)
+        is_hot = self._count_hit(storage_key, now, cost) >= batch_size
+        preallocated = self._preallocated.get(storage_key)
+        if preallocated is not None and (
+            preallocated.expires_at < now or preallocated.tokens < cost
+        ):
+            del self._preallocated[storage_key]
+            preallocated = None
+
+        if preallocated is None:
+            if not is_hot or storage_key in self._allocating:
+                return await self.storage.hit(key, rate_limit, cost)
+
+            self._allocating.add(storage_key)
+            try:
+                result = await self.storage.hit(key, rate_limit, batch_size)
+            finally:
+                self._allocating.discard(storage_key)
+            if not result.allowed:
+                # not enough tokens left for a whole batch, fall back to a single hit
+                return await self.storage.hit(key, rate_limit, cost)
+            preallocated = _PreallocatedTokens(
+                tokens=batch_size,
+                allocated_at=now,
+                expires_at=now + min(self.max_age_seconds, float(rate_limit.get_expiry())),
+                result=result,
+            )
+            self._preallocated[storage_key] = preallocated
+
+        preallocated.tokens -= cost
+        return RateLimitResult(
+            allowed=True,
+            limit=rate_limit.amount,
+            remaining=preallocated.result.remaining + preallocated.tokens,
+            reset_after=max(
+                0.0, preallocated.result.reset_after - (now - preallocated.allocated_at)
+            ),
+            retry_after=0.0,
+        )
+
+    def _count_hit(self, storage_key: str, now: float, cost: int) -> int:
+        """
+        Count the hit and return the key's hits in the current or the previous window, whichever
+        is higher, as an estimate of the tokens it uses every max_age_seconds.
+        """
+        counter = self._hit_counters.get(storage_key)
+        if counter is None:
+            counter = self._hit_counters[storage_key] = _HitCounter(window_start=now)
+        elif now - counter.window_start >= self.max_age_seconds:
+            # the previous window only counts if it directly precedes the current one
+            counter.previous_hits = (
+                counter.hits if now - counter.window_start < 2 * self.max_age_seconds else 0
+            )
+            counter.hits = 0
+            counter.window_start = now
+        # the hit itself is not counted, it is served either way
+        hits = max(counter.hits, counter.previous_hits)
+        counter.hits += cost
+        return hits
+
+    def _purge(self, now: float) -> None:
+        if now - self._last_purge < self.PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        self._hit_counters = {
+            storage_key: counter
+            for storage_key, counter in self._hit_counters.items()
+            if now - counter.window_start < 2 * self.max_age_seconds
+        }
+        self._preallocated = {
+            storage_key: preallocated
+            for storage_key, preallocated in self._preallocated.items()
+            if preallocated.expires_at >= now
+        }
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+def create_rate_limit_storage(
+    uri: str, db_url: str, preallocation_batch_size: int, timeout_seconds: float
+) -> RateLimitStorage:
+    """
+    Create a rate limit storage from a uri, see the module docstring for the supported uris.
+    Shared storages are wrapped with PreallocatingRateLimitStorage if preallocation_batch_size > 1.
+    timeout_seconds bounds each command sent to a redis storage.
+    """
+    scheme = urlparse(uri).scheme
+    storage: RateLimitStorage
+    if scheme == "memory":
+        return MemoryRateLimitStorage()
+    elif scheme in ("redis", "rediss"):
+        if scheme == "rediss":
+            raise ValueError("TLS (rediss://) is not supported by the redis rate limit storage")
+        storage = RedisRateLimitStorage.from_uri(uri, timeout_seconds)
+    elif scheme in ("postgres", "postgresql"):
+        storage = PostgresRateLimitStorage(db_url)
+    else:
+        raise ValueError(f"unsupported rate limit storage uri scheme: {scheme}")
+
+    if preallocation_batch_size > 1:
+        return PreallocatingRateLimitStorage(storage, preallocation_batch_size)
+    return storage
@@ -0,0 +1,148 @@
+"""
+Per API key, per project and per (project, app) rate limits, enforced after the API key is
+validated (unlike the IP based rate limits of RateLimitMiddleware).
+
+The limits are token buckets holding up to a minute of requests, configured per plan in
+Plan.features (see PlanRateLimits) with server defaults for orgs without a plan. The buckets are
+kept in the shared rate limit storage, which with preallocation hands out tokens from memory and
+only goes to the shared store once every batch.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from functools import cache
+from uuid import UUID
+
+from fastapi import Response
+from limits import RateLimitItem, RateLimitItemPerMinute
+from sqlalchemy.orm import Session
+
+from aci.common.db import crud
+from aci.common.exceptions import RateLimitExceeded
+from aci.common.logging_setup import get_logger
+from aci.common.schemas.plans import PlanFeatures, PlanRateLimits
+from aci.server import config
+from aci.server.rate_limit_storage import (
+    RateLimitResult,
+    RateLimitStorage,
+    create_rate_limit_storage,
+)
+
+logger = get_logger(__name__)
+
+# plan without a subscription, see routes/billing.py
+FREE_PLAN_NAME = "free"
+
+
+@dataclass(frozen=True)
+class ProjectRateLimits:
+    """Requests per minute, the rate limits of the plan with the server defaults filled in"""
+
+    api_key_per_minute: int
+    project_per_minute: int
+    project_app_per_minute: int
+
+    def get_api_key_limits(self, api_key_id: UUID, project_id: UUID) -> dict[str, RateLimitItem]:
+        return {
+            f"api_key:{api_key_id}": RateLimitItemPerMinute(self.api_key_per_minute),
+            f"project:{project_id}": RateLimitItemPerMinute(self.project_per_minute),
+        }
+
+    def get_project_app_limits(self, project_id: UUID, app_name: str) -> dict[str, RateLimitItem]:
+        return {
+            f"project_app:{project_id}:{app_name}": RateLimitItemPerMinute(
+                self.project_app_per_minute
+            )
+        }
+
+
+# org_id -> (rate limits, expires at)
+_rate_limits_cache: dict[UUID, tuple[ProjectRateLimits, float]] = {}
+
+
+@cache
+def get_rate_limit_storage() -> RateLimitStorage:
+    """The rate limit storage shared by the middleware and the dependencies of a server process."""
+    return create_rate_limit_storage(
+        config.RATE_LIMIT_STORAGE_URI,
+        config.DB_FULL_URL,
+        config.RATE_LIMIT_PREALLOCATION_BATCH_SIZE,
+        config.RATE_LIMIT_STORAGE_TIMEOUT_SECONDS,
+    )
+
+
+def get_project_rate_limits(db_session: Session, org_id: UUID) -> ProjectRateLimits:
+    """
+    Get the rate limits of the org's plan, with the server defaults filled in.
+    Cached for RATE_LIMIT_PLAN_CACHE_TTL_SECONDS, so plan changes take effect within that time.
+    """
+    now = time.monotonic()
+    cached = _rate_limits_cache.get(org_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    plan = crud.plans.get_by_org_id(db_session, org_id) or crud.plans.get_by_name(
+        db_session, FREE_PLAN_NAME
+    )
+    plan_rate_limits = (
+        PlanFeatures.model_validate(plan.features).rate_limits if plan else PlanRateLimits()
+    )
+    rate_limits = ProjectRateLimits(
+        api_key_per_minute=plan_rate_limits.api_key_per_minute
+        or config.RATE_LIMIT_API_KEY_PER_MINUTE,
+        project_per_minute=plan_rate_limits.project_per_minute
+        or config.RATE_LIMIT_PROJECT_PER_MINUTE,
+        project_app_per_minute=plan_rate_limits.project_app_per_minute
+        or config.RATE_LIMIT_PROJECT_APP_PER_MINUTE,
+    )
+    _rate_limits_cache[org_id] = (rate_limits, now + config.RATE_LIMIT_PLAN_CACHE_TTL_SECONDS)
+    return rate_limits
+
+
+async def enforce_rate_limits(response: Response, limits: dict[str, RateLimitItem]) -> None:
+    """
+    Hit the rate limits (key -> limit) in order and set the RateLimit-* headers of the most
+    restrictive one on the response.
+    Raises RateLimitExceeded, with the RateLimit-* and Retry-After headers, on the first exceeded
+    limit. If the rate limit storage is unavailable, the limit is skipped (fail open).
+    """
+    storage = get_rate_limit_storage()
+    for key, rate_limit in limits.items():
+        try:
+            result = await storage.hit(key, rate_limit)
+        except Exception:
+            logger.exception(
+                "rate limit storage error, allowing request", extra={"rate_limit_key": key}
+            )
+            continue
+
+        if not result.allowed:
+            logger.warning(
+                "rate limit exceeded",
+                extra={"rate_limit_key": key, "rate_limit": str(rate_limit)},
+            )
+            raise RateLimitExceeded(
+                f"{rate_limit.amount} requests per minute for {key.split(':')[0]}",
+                headers={
+                    **_get_rate_limit_headers(result),
+                    "Retry-After": str(math.ceil(result.retry_after)),
+                },
+            )
+        _set_rate_limit_headers(response, result)
+
+
+def _get_rate_limit_headers(result: RateLimitResult) -> dict[str, str]:
+    # https://datatracker.ietf.org/doc/draft-ietf-httpapi-ratelimit-headers/
+    return {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
+
+
+def _set_rate_limit_headers(response: Response, result: RateLimitResult) -> None:
+    """Set the headers of the result, unless a more restrictive limit was already set"""
+    remaining = response.headers.get("RateLimit-Remaining")
+    if remaining is None or result.remaining < int(remaining):
+        response.headers.update(_get_rate_limit_headers(result))
@@ -1,8 +1,8 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import StreamingResponse
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 
 from aci.common.enums import FunctionDefinitionFormat
@@ -10,16 +10,20 @@ from aci.common.logging_setup import get_logger
 from aci.common.schemas.function import OpenAIResponsesFunctionDefinition
 from aci.server import config
 from aci.server import dependencies as deps
+from aci.server.agent.meta_functions import ACI_META_FUNCTIONS_SCHEMA_LIST
 from aci.server.agent.prompt import (
     ClientMessage,
     convert_to_openai_messages,
     openai_chat_stream,
 )
+from aci.server.agent.tools import AgentToolExecutor
+from aci.server.agent.types import AgentChatMode
 from aci.server.routes.functions import get_functions_definitions
 
 router = APIRouter()
 logger = get_logger(__name__)
-openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
+# shared by the chat streams of the process, closed on shutdown
+openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
 
 
 class AgentChat(BaseModel):
@@ -28,6 +32,7 @@ class AgentChat(BaseModel):
     selected_apps: list[str]
     selected_functions: list[str]
     messages: list[ClientMessage]
+    mode: AgentChatMode = AgentChatMode.CLIENT_TOOLS
 
 
 @router.post(
@@ -38,6 +43,7 @@ class AgentChat(BaseModel):
     response_description="Streamed chat completion responses",
 )
 async def handle_chat(
+    request: Request,
     context: Annotated[deps.RequestContext, Depends(deps.get_request_context)],
     agent_chat: AgentChat,
 ) -> StreamingResponse:
@@ -45,6 +51,7 @@ async def handle_chat(
     Handle chat requests and stream responses.
 
     Args:
+        request: The request, to stop the stream when the client disconnects
         context: Request context with authentication and project info
         agent_chat: Chat request containing messages and function information
 
@@ -54,7 +61,6 @@ async def handle_chat(
     logger.info("Processing chat request", extra={"project_id": context.project.id})
 
     openai_messages = convert_to_openai_messages(agent_chat.messages)
-    # TODO: support different meta function mode.
     selected_functions = await get_functions_definitions(
         context.db_session, agent_chat.selected_functions, FunctionDefinitionFormat.OPENAI_RESPONSES
     )
@@ -63,11 +69,30 @@ async def handle_chat(
         extra={"functions": [func.model_dump() for func in selected_functions]},
     )
 
-    tools = [
+    tools: list[OpenAIResponsesFunctionDefinition | dict] = [
         func for func in selected_functions if isinstance(func, OpenAIResponsesFunctionDefinition)
     ]
+    tool_executor = None
+    if agent_chat.mode == AgentChatMode.SERVER_TOOLS:
+        # the model can also discover and execute other functions with the meta functions
+        tools.extend(ACI_META_FUNCTIONS_SCHEMA_LIST)
+        tool_executor = AgentToolExecutor(
+            api_key_id=context.api_key_id,
+            agent_id=context.agent.id,
+            linked_account_owner_id=agent_chat.linked_account_owner_id,
+            selected_apps=agent_chat.selected_apps,
+            rate_limits=context.rate_limits,
+        ).execute
 
-    response = StreamingResponse(openai_chat_stream(openai_messages, tools=tools))
+    response = StreamingResponse(
+        openai_chat_stream(
+            openai_client,
+            openai_messages,
+            tools=tools,
+            is_disconnected=request.is_disconnected,
+            tool_executor=tool_executor,
+        )
+    )
     response.headers["x-vercel-ai-data-stream"] = "v1"
 
     return response
@@ -21,6 +21,7 @@ from aci.common.exceptions import BillingError, SubscriptionPlanNotFound
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.subscription import (
     StripeCheckoutSessionCreate,
+    StripeEventJobPayload,
     StripeSubscriptionDetails,
     StripeSubscriptionMetadata,
     SubscriptionPublic,
@@ -28,10 +29,20 @@ from aci.common.schemas.subscription import (
 )
 from aci.server import acl, config
 from aci.server import dependencies as deps
+from aci.server.job_queue import enqueue_job, job_handler
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+STRIPE_EVENT_JOB_TYPE = "stripe_event"
+HANDLED_STRIPE_EVENT_TYPES = frozenset(
+    {
+        "checkout.session.completed",
+        "customer.subscription.updated",
+        "customer.subscription.deleted",
+    }
+)
+
 auth = acl.get_propelauth()
 
 
@@ -204,45 +215,82 @@ async def handle_stripe_webhook(
         raise BillingError() from e
 
     # 2. Idempotency Check: if event has already been processed, return directly
+    if crud.processed_stripe_event.is_event_processed(db_session, event.id):
+        logger.info(
+            "Event already processed. Skipping.",
+            extra={"event_id": event.id},
+        )
+        return
+
+    if event.type not in HANDLED_STRIPE_EVENT_TYPES:
+        logger.warning(
+            "Unhandled event",
+            extra={"event_id": event.id, "event_type": event.type},
+        )
+        return
+
+    # 3. Queue the event to be processed by a background worker, and acknowledge it right away.
+    # If queueing fails, Stripe retries the delivery.
+    enqueue_job(
+        db_session,
+        STRIPE_EVENT_JOB_TYPE,
+        StripeEventJobPayload(
+            event_id=event.id, event_type=event.type, data_object=event.data.object
+        ),
+    )
+    db_session.commit()
+    logger.info(
+        "Queued event for processing",
+        extra={"event_id": event.id, "event_type": event.type},
+    )
+
+
+@job_handler(STRIPE_EVENT_JOB_TYPE, StripeEventJobPayload)
+def process_stripe_event(payload: StripeEventJobPayload, db_session: Session) -> None:
+    """
+    Process a Stripe webhook event in a background worker. Errors (e.g., BillingError when the
+    event arrived before the one it depends on) fail the job, which is retried with backoff.
+    """
+    # Idempotency Check: the event may have been delivered (and queued) more than once
     # Don't need to worry about race condition or locking here because our event
     # handlers are idempotent. The worst case is just the event is processed twice,
     # but only one of the two inserted into the processed_stripe_event table.
-    if crud.processed_stripe_event.is_event_processed(db_session, event.id):
+    if crud.processed_stripe_event.is_event_processed(db_session, payload.event_id):
         logger.info(
             "Event already processed. Skipping.",
-            extra={"event_id": event.id},
+            extra={"event_id": payload.event_id},
         )
         return
 
-    # 3. Handle the event
+    # 1. Handle the event
     start_time = time.time()
     logger.info(
         "Processing event",
-        extra={"event_id": event.id, "event_type": event.type},
+        extra={"event_id": payload.event_id, "event_type": payload.event_type},
     )
 
-    match event.type:
+    match payload.event_type:
         case "checkout.session.completed":
-            await handle_checkout_session_completed(event.data.object, db_session)
+            handle_checkout_session_completed(payload.data_object, db_session)
         case "customer.subscription.updated":
-            await handle_customer_subscription_updated(event.data.object, db_session)
+            handle_customer_subscription_updated(payload.data_object, db_session)
         case "customer.subscription.deleted":
-            await handle_customer_subscription_deleted(event.data.object, db_session)
+            handle_customer_subscription_deleted(payload.data_object, db_session)
         case _:
             logger.warning(
                 "Unhandled event",
-                extra={"event_id": event.id, "event_type": event.type},
+                extra={"event_id": payload.event_id, "event_type": payload.event_type},
             )
             return
 
-    # 4. Record Processed Event
+    # 2. Record Processed Event
     try:
-        crud.processed_stripe_event.record_processed_event(db_session, event.id)
+        crud.processed_stripe_event.record_processed_event(db_session, payload.event_id)
         db_session.commit()
     except IntegrityError as e:
         logger.warn(
             "The event has already been processed and inserted into the processed_stripe_event table",
-            extra={"event_id": event.id, "error": e},
+            extra={"event_id": payload.event_id, "error": e},
         )
         return
 
@@ -250,14 +298,14 @@ async def handle_stripe_webhook(
     logger.info(
         "Successfully processed and recorded event",
         extra={
-            "event_id": event.id,
-            "event_type": event.type,
+            "event_id": payload.event_id,
+            "event_type": payload.event_type,
             "processing_time": processing_time,
         },
     )
 
 
-async def handle_checkout_session_completed(session_data: dict, db_session: Session) -> None:
+def handle_checkout_session_completed(session_data: dict, db_session: Session) -> None:
     """
     Handles the checkout.session.completed event.
     1. Retrieve the client_reference_id and subscription details from the session data
@@ -399,9 +447,7 @@ async def handle_checkout_session_completed(session_data: dict, db_session: Sess
     )
 
 
-async def handle_customer_subscription_updated(
-    subscription_data: dict, db_session: Session
-) -> None:
+def handle_customer_subscription_updated(subscription_data: dict, db_session: Session) -> None:
     """
     Handles the customer.subscription.updated event.
     1. Find the existing subscription record in db and also retrieve the latest
@@ -517,9 +563,7 @@ async def handle_customer_subscription_updated(
     )
 
 
-async def handle_customer_subscription_deleted(
-    subscription_data: dict, db_session: Session
-) -> None:
+def handle_customer_subscription_deleted(subscription_data: dict, db_session: Session) -> None:
     """
     Handles the customer.subscription.deleted event.
     1. Find the existing subscription record by stripe_subscription_id
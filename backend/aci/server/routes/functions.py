@@ -1,20 +1,31 @@
+import asyncio
+import functools
+import time
 from datetime import UTC, datetime
 from typing import Annotated
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response, status
 from openai import OpenAI
 from sqlalchemy.orm import Session
 
-from aci.common import processor
+from aci.common import processor, utils
 from aci.common.db import crud
-from aci.common.db.sql_models import Agent, Function, Project
+from aci.common.db.sql_models import Agent, Function, FunctionExecutionJob, Project
 from aci.common.embeddings import generate_embedding
-from aci.common.enums import FunctionDefinitionFormat, Visibility
+from aci.common.enums import (
+    FunctionDefinitionFormat,
+    FunctionExecutionJobStatus,
+    Visibility,
+)
 from aci.common.exceptions import (
+    ACIException,
     AppConfigurationDisabled,
     AppConfigurationNotFound,
     AppNotAllowedForThisAgent,
+    FunctionExecutionJobNotFound,
     FunctionNotFound,
+    FunctionResponseBlobNotFound,
     InvalidFunctionDefinitionFormat,
     LinkedAccountDisabled,
     LinkedAccountNotFound,
@@ -25,6 +36,8 @@ from aci.common.schemas.function import (
     BasicFunctionDefinition,
     FunctionDetails,
     FunctionExecute,
+    FunctionExecutionJobGet,
+    FunctionExecutionJobPublic,
     FunctionExecutionResult,
     FunctionsList,
     FunctionsSearch,
@@ -32,10 +45,17 @@ from aci.common.schemas.function import (
     OpenAIFunctionDefinition,
     OpenAIResponsesFunctionDefinition,
 )
-from aci.server import config, custom_instructions
+from aci.server import config, custom_instructions, rate_limiting
 from aci.server import dependencies as deps
 from aci.server import security_credentials_manager as scm
+from aci.server.function_execution_jobs import function_execution_job_runner
 from aci.server.function_executors import get_executor
+from aci.server.function_result_cache import (
+    function_result_cache,
+    get_cache_ttl_seconds,
+    make_cache_key,
+)
+from aci.server.last_used_buffer import last_used_buffer
 from aci.server.security_credentials_manager import SecurityCredentialsResponse
 
 router = APIRouter()
@@ -78,58 +98,10 @@ async def search_functions(
     """
     Returns the basic information of a list of functions.
     """
-    # TODO: currently the search is done across all apps, we might want to add flags to account for below scenarios:
-    # - when clients search for functions, if the app of the functions is configured but disabled by client, should the functions be discoverable?
-    logger.info(
-        "search functions",
-        extra={"function_search": query_params.model_dump(exclude_none=True)},
-    )
-    intent_embedding = (
-        generate_embedding(
-            openai_client,
-            config.OPENAI_EMBEDDING_MODEL,
-            config.OPENAI_EMBEDDING_DIMENSION,
-            query_params.intent,
-        )
-        if query_params.intent
-        else None
-    )
-    logger.debug(
-        "generated intent embedding",
-        extra={"intent": query_params.intent, "intent_embedding": intent_embedding},
+    return search_function_definitions(
+        context.db_session, context.project, context.agent, query_params
     )
 
-    # get the apps to filter (or not) based on the allowed_apps_only and app_names query params
-    if query_params.allowed_apps_only:
-        if query_params.app_names is None:
-            apps_to_filter = context.agent.allowed_apps
-        else:
-            apps_to_filter = list(set(query_params.app_names) & set(context.agent.allowed_apps))
-    else:
-        if query_params.app_names is None:
-            apps_to_filter = None
-        else:
-            apps_to_filter = query_params.app_names
-
-    functions = crud.functions.search_functions(
-        context.db_session,
-        context.project.visibility_access == Visibility.PUBLIC,
-        True,
-        apps_to_filter,
-        intent_embedding,
-        query_params.limit,
-        query_params.offset,
-    )
-    logger.info(
-        "search functions result",
-        extra={"function_names": [function.name for function in functions]},
-    )
-    function_definitions = [
-        format_function_definition(function, query_params.format) for function in functions
-    ]
-
-    return function_definitions
-
 
 # TODO: have "structured_outputs" flag ("structured_outputs_if_possible") to support openai's structured outputs function calling?
 # which need "strict: true" and only support a subset of json schema and a bunch of other restrictions like "All fields must be required"
@@ -191,6 +163,69 @@ async def get_function_definition(
     return function_definition
 
 
+@router.get("/response-blobs/{blob_id}", response_class=Response)
+async def get_function_response_blob(
+    context: Annotated[deps.RequestContext, Depends(deps.get_request_context)],
+    blob_id: UUID,
+) -> Response:
+    """
+    Get the raw response body of a function execution that was too large to return inline, for
+    functions that return large responses as blobs. Blobs expire after a while.
+    """
+    blob = crud.function_response_blobs.get_function_response_blob(
+        context.db_session, context.project.id, blob_id
+    )
+    if not blob:
+        logger.error(
+            "failed to get function response blob, not found or expired",
+            extra={"blob_id": blob_id},
+        )
+        raise FunctionResponseBlobNotFound(f"response blob={blob_id} not found or expired")
+
+    return Response(content=blob.content, media_type=blob.content_type)
+
+
+@router.get(
+    "/execution-jobs/{job_id}",
+    response_model=FunctionExecutionJobPublic,
+    response_model_exclude_none=True,
+)
+async def get_function_execution_job(
+    context: Annotated[deps.RequestContext, Depends(deps.get_request_context)],
+    job_id: UUID,
+    query_params: Annotated[FunctionExecutionJobGet, Query()],
+) -> FunctionExecutionJobPublic:
+    """
+    Get the status of an asynchronous function execution job, and its result once it has finished.
+    With wait_seconds, waits for the job to finish for up to that long (long polling).
+    """
+    deadline = time.monotonic() + query_params.wait_seconds
+    while True:
+        function_execution_job = crud.function_execution_jobs.get_function_execution_job(
+            context.db_session, context.project.id, job_id
+        )
+        if not function_execution_job:
+            logger.error(
+                "failed to get function execution job, not found",
+                extra={"job_id": job_id},
+            )
+            raise FunctionExecutionJobNotFound(f"function execution job={job_id} not found")
+
+        job = FunctionExecutionJobPublic.model_validate(function_execution_job)
+        if (
+            job.status in (FunctionExecutionJobStatus.SUCCEEDED, FunctionExecutionJobStatus.FAILED)
+            or time.monotonic() >= deadline
+        ):
+            return job
+
+        # end the transaction while waiting, which releases the db connection and expires the
+        # loaded job so the next get sees its latest status
+        context.db_session.rollback()
+        await asyncio.sleep(
+            min(config.FUNCTION_EXECUTION_JOB_POLL_INTERVAL_SECONDS, deadline - time.monotonic())
+        )
+
+
 # TODO: is there any way to abstract and generalize the checks and validations
 # (enabled, configured, accessible, etc.)?
 @router.post(
@@ -202,7 +237,16 @@ async def execute(
     context: Annotated[deps.RequestContext, Depends(deps.get_request_context)],
     function_name: str,
     body: FunctionExecute,
+    response: Response,
 ) -> FunctionExecutionResult:
+    # per (project, app) limit, so a single app can't use up the whole project's rate limit
+    await rate_limiting.enforce_rate_limits(
+        response,
+        context.rate_limits.get_project_app_limits(
+            context.project.id, utils.parse_app_name_from_function_name(function_name)
+        ),
+    )
+
     # Log the execution request
     logger.info(
         "execute function",
@@ -221,10 +265,186 @@ async def execute(
         function_input=body.function_input,
         linked_account_owner_id=body.linked_account_owner_id,
         openai_client=openai_client,
+        response_fields=body.response_fields,
+        follow_pagination=body.follow_pagination,
     )
     return result
 
 
+@router.post(
+    "/{function_name}/execution-jobs",
+    response_model=FunctionExecutionJobPublic,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_function_execution_job(
+    context: Annotated[deps.RequestContext, Depends(deps.get_request_context)],
+    function_name: str,
+    body: FunctionExecute,
+    response: Response,
+) -> FunctionExecutionJob:
+    """
+    Submit an asynchronous execution of a function, for long running functions. The function is
+    executed in the background, poll GET /execution-jobs/{job_id} for its result.
+    """
+    await rate_limiting.enforce_rate_limits(
+        response,
+        context.rate_limits.get_project_app_limits(
+            context.project.id, utils.parse_app_name_from_function_name(function_name)
+        ),
+    )
+
+    function_execution_job = crud.function_execution_jobs.create_function_execution_job(
+        context.db_session, context.project.id, context.agent.id, function_name, body
+    )
+    context.db_session.commit()
+    logger.info(
+        "submitted function execution job",
+        extra={
+            "function_name": function_name,
+            "job_id": function_execution_job.id,
+            "function_execute": body.model_dump(exclude_none=True),
+        },
+    )
+
+    function_execution_job_runner.submit(function_execution_job.id)
+    return function_execution_job
+
+
+async def run_function_execution_job(job_id: UUID) -> None:
+    """
+    Claim a pending function execution job and execute it, storing its result (a failed result if
+    the function couldn't be executed, e.g., the app isn't configured anymore).
+    """
+    with utils.get_db_session_factory(config.DB_FULL_URL)() as db_session:
+        function_execution_job = crud.function_execution_jobs.claim_function_execution_job(
+            db_session, job_id
+        )
+        if not function_execution_job:
+            logger.info(
+                "function execution job not pending anymore, skipping",
+                extra={"job_id": job_id},
+            )
+            return
+        db_session.commit()
+
+        project = crud.projects.get_project(db_session, function_execution_job.project_id)
+        agent = crud.projects.get_agent_by_id(db_session, function_execution_job.agent_id)
+        if not project or not agent:
+            # deleted since the job was claimed, the job is deleted along with them
+            logger.warning(
+                "project or agent of function execution job not found, skipping",
+                extra={"job_id": job_id},
+            )
+            return
+
+        body = FunctionExecute.model_validate(function_execution_job.function_execute)
+        logger.info(
+            "running function execution job",
+            extra={"job_id": job_id, "function_name": function_execution_job.function_name},
+        )
+        try:
+            result = await execute_function(
+                db_session=db_session,
+                project=project,
+                agent=agent,
+                function_name=function_execution_job.function_name,
+                function_input=body.function_input,
+                linked_account_owner_id=body.linked_account_owner_id,
+                openai_client=openai_client,
+                response_fields=body.response_fields,
+                follow_pagination=body.follow_pagination,
+            )
+        except ACIException as e:
+            db_session.rollback()
+            result = FunctionExecutionResult(
+                success=False, error=f"{e.title}, {e.message}" if e.message else e.title
+            )
+        except Exception:
+            logger.exception("failed to run function execution job", extra={"job_id": job_id})
+            db_session.rollback()
+            result = FunctionExecutionResult(success=False, error="Internal server error")
+
+        finished = crud.function_execution_jobs.finish_function_execution_job(
+            db_session, job_id, result
+        )
+        db_session.commit()
+        if not finished:
+            return
+        logger.info(
+            "finished function execution job",
+            extra={"job_id": job_id, "success": result.success},
+        )
+
+
+def search_function_definitions(
+    db_session: Session,
+    project: Project,
+    agent: Agent,
+    query_params: FunctionsSearch,
+) -> list[
+    BasicFunctionDefinition
+    | OpenAIFunctionDefinition
+    | OpenAIResponsesFunctionDefinition
+    | AnthropicFunctionDefinition
+]:
+    """
+    Search the functions visible to the project, sorted by relevance to the intent if any, and
+    return their definitions. Used by the search route and in-process by the agent chat.
+    """
+    # TODO: currently the search is done across all apps, we might want to add flags to account for below scenarios:
+    # - when clients search for functions, if the app of the functions is configured but disabled by client, should the functions be discoverable?
+    logger.info(
+        "search functions",
+        extra={"function_search": query_params.model_dump(exclude_none=True)},
+    )
+    intent_embedding = (
+        generate_embedding(
+            openai_client,
+            config.OPENAI_EMBEDDING_MODEL,
+            config.OPENAI_EMBEDDING_DIMENSION,
+            query_params.intent,
+        )
+        if query_params.intent
+        else None
+    )
+    logger.debug(
+        "generated intent embedding",
+        extra={"intent": query_params.intent, "intent_embedding": intent_embedding},
+    )
+
+    # get the apps to filter (or not) based on the allowed_apps_only and app_names query params
+    if query_params.allowed_apps_only:
+        if query_params.app_names is None:
+            apps_to_filter = agent.allowed_apps
+        else:
+            apps_to_filter = list(set(query_params.app_names) & set(agent.allowed_apps))
+    else:
+        if query_params.app_names is None:
+            apps_to_filter = None
+        else:
+            apps_to_filter = query_params.app_names
+
+    functions = crud.functions.search_functions(
+        db_session,
+        project.visibility_access == Visibility.PUBLIC,
+        True,
+        apps_to_filter,
+        intent_embedding,
+        query_params.limit,
+        query_params.offset,
+    )
+    logger.info(
+        "search functions result",
+        extra={"function_names": [function.name for function in functions]},
+    )
+    function_definitions = [
+        format_function_definition(function, query_params.format) for function in functions
+    ]
+
+    return function_definitions
+
+
 # TODO: move to agent/tools.py or a util function
 def format_function_definition(
     function: Function, format: FunctionDefinitionFormat
@@ -275,6 +495,8 @@ async def execute_function(
     function_input: dict,
     linked_account_owner_id: str,
     openai_client: OpenAI,
+    response_fields: list[str] | None = None,
+    follow_pagination: bool = False,
 ) -> FunctionExecutionResult:
     """
     Execute a function with the given parameters.
@@ -287,6 +509,9 @@ async def execute_function(
         function_input: Input parameters for the function
         linked_account_owner_id: ID of the linked account owner
         openai_client: Optional OpenAI client for custom instructions validation
+        response_fields: Fields of the response data to return, defaults to the fields of the
+            function's response schema
+        follow_pagination: Whether to fetch and aggregate all the pages of a paginated function
 
     Returns:
         FunctionExecutionResult: Result of the function execution
@@ -440,21 +665,41 @@ async def execute_function(
         extra={"function_name": function_name, "function_executor": type(function_executor)},
     )
 
-    # Execute the function
-    execution_result = function_executor.execute(
+    if response_fields is not None:
+        response_projection = (
+            processor.parse_response_fields(response_fields) if response_fields else None
+        )
+    else:
+        response_projection = processor.get_response_schema_projection(function.response)
+
+    # executors doing blocking io run in a worker thread, so they don't block the event loop
+    execute = functools.partial(
+        function_executor.execute_async,
         function,
         function_input,
         security_credentials_response.scheme,
         security_credentials_response.credentials,
+        response_projection,
+        follow_pagination,
     )
+    cache_ttl_seconds = get_cache_ttl_seconds(function)
+    if cache_ttl_seconds is None:
+        execution_result = await execute()
+    else:
+        execution_result = await function_result_cache.get_or_execute(
+            make_cache_key(
+                function.name,
+                linked_account.id,
+                function_input,
+                response_projection,
+                follow_pagination,
+            ),
+            cache_ttl_seconds,
+            execute,
+        )
 
-    last_used_at: datetime = datetime.now(UTC)
-    crud.linked_accounts.update_linked_account_last_used_at(
-        db_session,
-        last_used_at,
-        linked_account,
-    )
-    db_session.commit()
+    # last_used_at is written to the db in batches by the background flush of the buffer
+    last_used_buffer.record(linked_account.id, datetime.now(UTC))
 
     if not execution_result.success:
         logger.error(
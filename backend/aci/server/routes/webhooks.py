@@ -8,10 +8,13 @@ from svix import Webhook, WebhookVerificationError
 
 from aci.common.db import crud
 from aci.common.enums import OrganizationRole
+from aci.common.exceptions import UserNotFound
 from aci.common.logging_setup import get_logger
+from aci.common.schemas.webhooks import UserCreatedJobPayload
 from aci.server import config
 from aci.server import dependencies as deps
 from aci.server.acl import get_propelauth
+from aci.server.job_queue import enqueue_job, job_handler
 
 # Create router instance
 router = APIRouter()
@@ -19,6 +22,8 @@ logger = get_logger(__name__)
 
 auth = get_propelauth()
 
+USER_CREATED_JOB_TYPE = "user_created"
+
 
 @router.post("/auth/user-created", status_code=status.HTTP_204_NO_CONTENT)
 async def handle_user_created_webhook(
@@ -55,14 +60,26 @@ async def handle_user_created_webhook(
         )
         return
 
-    user = auth.fetch_user_metadata_by_user_id(msg["user_id"], include_orgs=True)
+    # provision the user in a background worker, and acknowledge the webhook right away
+    enqueue_job(db_session, USER_CREATED_JOB_TYPE, UserCreatedJobPayload(user_id=msg["user_id"]))
+    db_session.commit()
+    logger.info("queued new user provisioning", extra={"user_id": msg["user_id"]})
+
+
+@job_handler(USER_CREATED_JOB_TYPE, UserCreatedJobPayload)
+def provision_new_user(payload: UserCreatedJobPayload, db_session: Session) -> None:
+    """
+    Create a personal organization, with a default project and agent, for a new user.
+    Users who already have a personal organization are skipped.
+    """
+    user = auth.fetch_user_metadata_by_user_id(payload.user_id, include_orgs=True)
     if user is None:
-        response.status_code = status.HTTP_404_NOT_FOUND
         logger.error(
             "user not found",
-            extra={"user_id": msg["user_id"]},
+            extra={"user_id": payload.user_id},
         )
-        return
+        # fails the job, retried in case the user isn't visible yet
+        raise UserNotFound(f"user={payload.user_id} not found")
 
     logger.info(
         "a new user has signed up",
@@ -80,11 +97,9 @@ async def handle_user_created_webhook(
                     "org_metadata is not a dict",
                     extra={"org_id": org_id, "org_metadata": org_metadata},
                 )
-                response.status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
                 return
 
             if org_metadata["personal"] is True:
-                response.status_code = status.HTTP_409_CONFLICT
                 logger.error(
                     "user already has a personal organization",
                     extra={"user_id": user.user_id, "org_id": org_id},
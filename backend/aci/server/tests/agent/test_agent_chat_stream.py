@@ -0,0 +1,274 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from aci.server.agent.prompt import openai_chat_stream
+
+
+class FakeStream:
+    """Local fake of an OpenAI responses stream, yielding its events with a delay."""
+
+    def __init__(self, events: list[SimpleNamespace], delay_seconds: float = 0.0):
+        self.events = events
+        self.delay_seconds = delay_seconds
+        self.num_read = 0
+        self.closed = False
+
+    def __aiter__(self) -> "FakeStream":
+        return self
+
+    async def __anext__(self) -> SimpleNamespace:
+        if self.num_read == len(self.events):
+            raise StopAsyncIteration
+        await asyncio.sleep(self.delay_seconds)
+        self.num_read += 1
+        return self.events[self.num_read - 1]
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeOpenAIClient:
+    """Returns the streams in turn, one per response."""
+
+    def __init__(self, *streams: FakeStream):
+        self.streams = list(streams)
+        self.create_kwargs: list[dict[str, Any]] = []
+        self.responses = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs: Any) -> FakeStream:
+        # the input is extended by the next rounds of tool calls
+        self.create_kwargs.append({**kwargs, "input": list(kwargs["input"])})
+        return self.streams[len(self.create_kwargs) - 1]
+
+
+def _text_delta(delta: str) -> SimpleNamespace:
+    return SimpleNamespace(type="response.output_text.delta", delta=delta)
+
+
+def _completed(
+    event_type: str = "response.completed", reason: str | None = None
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        type=event_type,
+        response=SimpleNamespace(
+            usage=SimpleNamespace(input_tokens=10, output_tokens=3),
+            incomplete_details=SimpleNamespace(reason=reason) if reason else None,
+        ),
+    )
+
+
+def _tool_call_events(output_index: int, call_id: str, name: str, arguments: str) -> list:
+    tool_call = SimpleNamespace(
+        type="function_call", call_id=call_id, id=f"fc_{call_id}", name=name, arguments=""
+    )
+    return [
+        SimpleNamespace(
+            type="response.output_item.added", output_index=output_index, item=tool_call
+        ),
+        SimpleNamespace(
+            type="response.function_call_arguments.delta",
+            output_index=output_index,
+            delta=arguments,
+        ),
+        SimpleNamespace(type="response.function_call_arguments.done", output_index=output_index),
+    ]
+
+
+async def _collect(client: FakeOpenAIClient, **kwargs: Any) -> list[str]:
+    return [part async for part in openai_chat_stream(client, [], tools=[], **kwargs)]  # type: ignore
+
+
+def test_stream_text_and_tool_calls() -> None:
+    tool_call = SimpleNamespace(
+        type="function_call", call_id="call_1", id="fc_1", name="GMAIL__SEND_EMAIL", arguments=""
+    )
+    stream = FakeStream(
+        [
+            SimpleNamespace(
+                type="response.output_item.added",
+                output_index=0,
+                item=SimpleNamespace(type="message"),
+            ),
+            _text_delta("Hello"),
+            SimpleNamespace(type="response.output_item.added", output_index=1, item=tool_call),
+            SimpleNamespace(
+                type="response.function_call_arguments.delta", output_index=1, delta='{"to":'
+            ),
+            SimpleNamespace(
+                type="response.function_call_arguments.delta", output_index=1, delta='"a@b.c"}'
+            ),
+            SimpleNamespace(type="response.function_call_arguments.done", output_index=1),
+            _completed(),
+        ]
+    )
+    client = FakeOpenAIClient(stream)
+
+    parts = asyncio.run(_collect(client, max_output_tokens=100))
+
+    assert parts == [
+        '0:"Hello"\n',
+        '9:{"toolCallId":"call_1","toolName":"GMAIL__SEND_EMAIL","args":{"to":"a@b.c"}}\n',
+        'd:{"finishReason":"tool-calls","usage":{"promptTokens":10,"completionTokens":3}}\n',
+    ]
+    assert client.create_kwargs[0]["max_output_tokens"] == 100
+    assert stream.closed
+
+
+def test_stream_out_of_tokens() -> None:
+    client = FakeOpenAIClient(
+        FakeStream([_text_delta("Hel"), _completed("response.incomplete", "max_output_tokens")])
+    )
+
+    parts = asyncio.run(_collect(client))
+
+    assert json.loads(parts[-1].removeprefix("d:"))["finishReason"] == "length"
+
+
+def test_stream_timeout() -> None:
+    stream = FakeStream([_text_delta("a")] * 100, delay_seconds=0.01)
+    client = FakeOpenAIClient(stream)
+
+    parts = asyncio.run(_collect(client, timeout_seconds=0.05))
+
+    assert parts[-1].startswith("3:")
+    assert stream.num_read < 100
+    assert stream.closed
+
+
+def test_stream_stops_when_client_disconnects() -> None:
+    stream = FakeStream([_text_delta("a")] * 100)
+    client = FakeOpenAIClient(stream)
+
+    async def is_disconnected() -> bool:
+        return stream.num_read >= 3
+
+    with patch("aci.server.agent.prompt.config.AGENT_CHAT_DISCONNECT_CHECK_INTERVAL_SECONDS", 0.0):
+        parts = asyncio.run(_collect(client, is_disconnected=is_disconnected))
+
+    assert len(parts) == 2
+    assert stream.num_read == 3
+    assert stream.closed
+
+
+def test_stream_closed_when_cancelled() -> None:
+    stream = FakeStream([_text_delta("a")] * 100, delay_seconds=0.01)
+    client = FakeOpenAIClient(stream)
+
+    async def run() -> None:
+        task = asyncio.create_task(_collect(client))
+        await asyncio.sleep(0.03)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert stream.num_read < 100
+    assert stream.closed
+
+
+def test_server_tools_executed_concurrently() -> None:
+    client = FakeOpenAIClient(
+        FakeStream(
+            [
+                *_tool_call_events(0, "call_1", "ACI_SEARCH_FUNCTIONS", '{"intent":"email"}'),
+                *_tool_call_events(1, "call_2", "GMAIL__SEND_EMAIL", '{"recipient":"a@b.c"}'),
+                _completed(),
+            ]
+        ),
+        FakeStream([_text_delta("Done"), _completed()]),
+    )
+    num_running = max_num_running = 0
+
+    async def tool_executor(tool_name: str, arguments: str) -> dict:
+        nonlocal num_running, max_num_running
+        num_running += 1
+        max_num_running = max(max_num_running, num_running)
+        # the first tool call completes last
+        await asyncio.sleep(0.02 if tool_name == "ACI_SEARCH_FUNCTIONS" else 0.01)
+        num_running -= 1
+        return {"success": True, "data": tool_name}
+
+    parts = asyncio.run(_collect(client, tool_executor=tool_executor))
+
+    assert max_num_running == 2
+    assert parts == [
+        '9:{"toolCallId":"call_1","toolName":"ACI_SEARCH_FUNCTIONS","args":{"intent":"email"}}\n',
+        '9:{"toolCallId":"call_2","toolName":"GMAIL__SEND_EMAIL","args":{"recipient":"a@b.c"}}\n',
+        # results are streamed as they complete
+        'a:{"toolCallId":"call_2","result":{"success": true, "data": "GMAIL__SEND_EMAIL"}}\n',
+        'a:{"toolCallId":"call_1","result":{"success": true, "data": "ACI_SEARCH_FUNCTIONS"}}\n',
+        'e:{"finishReason":"tool-calls","usage":{"promptTokens":10,"completionTokens":3},"isContinued":false}\n',
+        '0:"Done"\n',
+        'd:{"finishReason":"stop","usage":{"promptTokens":20,"completionTokens":6}}\n',
+    ]
+    # the next response has the tool calls and their results
+    assert client.create_kwargs[1]["input"] == [
+        {
+            "type": "function_call",
+            "call_id": "call_1",
+            "name": "ACI_SEARCH_FUNCTIONS",
+            "arguments": '{"intent":"email"}',
+        },
+        {
+            "type": "function_call",
+            "call_id": "call_2",
+            "name": "GMAIL__SEND_EMAIL",
+            "arguments": '{"recipient":"a@b.c"}',
+        },
+        {
+            "type": "function_call_output",
+            "call_id": "call_2",
+            "output": '{"success": true, "data": "GMAIL__SEND_EMAIL"}',
+        },
+        {
+            "type": "function_call_output",
+            "call_id": "call_1",
+            "output": '{"success": true, "data": "ACI_SEARCH_FUNCTIONS"}',
+        },
+    ]
+
+
+def test_server_tool_rounds_are_capped() -> None:
+    client = FakeOpenAIClient(
+        FakeStream([*_tool_call_events(0, "call_1", "ACI_SEARCH_FUNCTIONS", "{}"), _completed()]),
+        FakeStream([_text_delta("Done"), _completed()]),
+    )
+
+    async def tool_executor(tool_name: str, arguments: str) -> list:
+        return []
+
+    parts = asyncio.run(_collect(client, tool_executor=tool_executor, max_tool_rounds=1))
+
+    assert "tool_choice" not in client.create_kwargs[0]
+    # the model has to answer after the last round of tool calls
+    assert client.create_kwargs[1]["tool_choice"] == "none"
+    assert parts[-1].startswith('d:{"finishReason":"stop"')
+
+
+def test_server_tool_calls_cancelled_on_timeout() -> None:
+    client = FakeOpenAIClient(
+        FakeStream([*_tool_call_events(0, "call_1", "ACI_SEARCH_FUNCTIONS", "{}"), _completed()])
+    )
+    cancelled = False
+
+    async def tool_executor(tool_name: str, arguments: str) -> list:
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        return []
+
+    async def run() -> list[str]:
+        parts = await _collect(client, tool_executor=tool_executor, timeout_seconds=0.05)
+        await asyncio.sleep(0)
+        return parts
+
+    parts = asyncio.run(run())
+
+    assert parts[-1].startswith("3:")
+    assert cancelled
@@ -0,0 +1,122 @@
+import asyncio
+import json
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from aci.common.db.sql_models import Agent, Function, LinkedAccount, Project
+from aci.server.agent.tools import AgentToolExecutor
+from aci.server.rate_limiting import ProjectRateLimits
+
+ECHO_INPUT = {
+    "input_string": "test_string",
+    "input_int": 1,
+    "input_bool": True,
+    "input_list": ["test_string1", "test_string2"],
+}
+
+
+def _tool_executor(
+    agent: Agent, linked_account: LinkedAccount, api_key_per_minute: int = 1000
+) -> AgentToolExecutor:
+    return AgentToolExecutor(
+        api_key_id=agent.api_keys[0].id,
+        agent_id=agent.id,
+        linked_account_owner_id=linked_account.linked_account_owner_id,
+        selected_apps=[],
+        rate_limits=ProjectRateLimits(
+            api_key_per_minute=api_key_per_minute,
+            project_per_minute=1000,
+            project_app_per_minute=1000,
+        ),
+    )
+
+
+def test_execute_tool_calls_concurrently(
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_function_mock_app_connector__echo: Function,
+    dummy_linked_account_no_auth_mock_app_connector_project_1: LinkedAccount,
+) -> None:
+    tool_executor = _tool_executor(
+        dummy_agent_1_with_all_apps_allowed,
+        dummy_linked_account_no_auth_mock_app_connector_project_1,
+    )
+    function_name = dummy_function_mock_app_connector__echo.name
+
+    async def run() -> tuple[Any, ...]:
+        return await asyncio.gather(
+            # a selected function, called directly
+            tool_executor.execute(function_name, json.dumps(ECHO_INPUT)),
+            tool_executor.execute(
+                "ACI_EXECUTE_FUNCTION",
+                json.dumps({"function_name": function_name, "function_arguments": ECHO_INPUT}),
+            ),
+            tool_executor.execute(
+                "ACI_GET_FUNCTION_DEFINITION", json.dumps({"function_name": function_name})
+            ),
+            tool_executor.execute("ACI_SEARCH_FUNCTIONS", json.dumps({"limit": 1000})),
+        )
+
+    direct_result, meta_result, definition, search_results = asyncio.run(run())
+
+    assert direct_result["success"]
+    assert direct_result["data"]["input_string"] == "test_string"
+    assert meta_result == direct_result
+    assert definition["name"] == function_name
+    assert "parameters" in definition
+    assert function_name in [function["name"] for function in search_results]
+
+
+def test_failed_tool_calls_return_errors(
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_linked_account_no_auth_mock_app_connector_project_1: LinkedAccount,
+) -> None:
+    tool_executor = _tool_executor(
+        dummy_agent_1_with_all_apps_allowed,
+        dummy_linked_account_no_auth_mock_app_connector_project_1,
+    )
+
+    async def run() -> tuple[Any, ...]:
+        return await asyncio.gather(
+            tool_executor.execute("NOT_EXIST__FUNCTION", "{}"),
+            tool_executor.execute(
+                "ACI_GET_FUNCTION_DEFINITION", json.dumps({"function_name": "NOT_EXIST__FUNCTION"})
+            ),
+            tool_executor.execute("ACI_SEARCH_FUNCTIONS", json.dumps({"limit": 0})),
+            tool_executor.execute("ACI_EXECUTE_FUNCTION", "not json"),
+        )
+
+    results = asyncio.run(run())
+
+    for result in results:
+        assert not result["success"]
+        assert result["error"]
+
+
+def test_tool_calls_are_charged_to_quota_and_rate_limits(
+    db_session: Session,
+    dummy_project_1: Project,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_linked_account_no_auth_mock_app_connector_project_1: LinkedAccount,
+) -> None:
+    # the third tool call exceeds the rate limit of the api key
+    tool_executor = _tool_executor(
+        dummy_agent_1_with_all_apps_allowed,
+        dummy_linked_account_no_auth_mock_app_connector_project_1,
+        api_key_per_minute=2,
+    )
+    daily_quota_used = dummy_project_1.daily_quota_used
+
+    async def run() -> list[Any]:
+        return [
+            await tool_executor.execute("ACI_SEARCH_FUNCTIONS", json.dumps({"limit": 1}))
+            for _ in range(3)
+        ]
+
+    results = asyncio.run(run())
+
+    db_session.refresh(dummy_project_1)
+    assert dummy_project_1.daily_quota_used == daily_quota_used + 3
+    assert isinstance(results[1], list)
+    assert not results[2]["success"]
+    assert "Rate limit exceeded" in results[2]["error"]
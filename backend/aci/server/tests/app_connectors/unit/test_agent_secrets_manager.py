@@ -1,4 +1,5 @@
 import json
+from collections.abc import Generator
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -10,9 +11,17 @@ from aci.common.schemas.security_scheme import NoAuthScheme, NoAuthSchemeCredent
 from aci.server.app_connectors.agent_secrets_manager import (
     AgentSecretsManager,
     DomainCredential,
+    decrypted_secrets_cache,
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_decrypted_secrets_cache() -> Generator[None, None, None]:
+    decrypted_secrets_cache.clear()
+    yield
+    decrypted_secrets_cache.clear()
+
+
 @pytest.fixture
 def secrets_manager() -> AgentSecretsManager:
     linked_account = MagicMock(spec=LinkedAccount)
@@ -41,8 +50,9 @@ def test_list_credentials(secrets_manager: AgentSecretsManager) -> None:
     mock_secret2.value = b"encrypted_value_2"
 
     with (
-        patch(
-            "aci.server.app_connectors.agent_secrets_manager.create_db_session",
+        patch.object(
+            secrets_manager,
+            "db_session_factory",
             return_value=MagicMock(__enter__=MagicMock(return_value=mock_db_session)),
         ) as mock_create_db_session,
         patch(
@@ -50,12 +60,12 @@ def test_list_credentials(secrets_manager: AgentSecretsManager) -> None:
             return_value=[mock_secret1, mock_secret2],
         ) as mock_list_secrets,
         patch(
-            "aci.server.app_connectors.agent_secrets_manager.encryption.decrypt",
-            side_effect=[
+            "aci.server.app_connectors.agent_secrets_manager.encryption.decrypt_batch",
+            return_value=[
                 b'{"username": "user1", "password": "pass1"}',
                 b'{"username": "user2", "password": "pass2"}',
             ],
-        ),
+        ) as mock_decrypt_batch,
     ):
         # When
         result = secrets_manager.list_credentials()
@@ -65,6 +75,10 @@ def test_list_credentials(secrets_manager: AgentSecretsManager) -> None:
         mock_list_secrets.assert_called_once_with(
             mock_db_session, secrets_manager.linked_account.id
         )
+        assert mock_decrypt_batch.call_args.args[0] == [
+            b"encrypted_value_1",
+            b"encrypted_value_2",
+        ]
 
         assert len(result) == 2
 
@@ -88,8 +102,9 @@ def test_get_credential_for_domain_success(secrets_manager: AgentSecretsManager)
     mock_secret.value = b"encrypted_value"
 
     with (
-        patch(
-            "aci.server.app_connectors.agent_secrets_manager.create_db_session",
+        patch.object(
+            secrets_manager,
+            "db_session_factory",
             return_value=MagicMock(__enter__=MagicMock(return_value=mock_db_session)),
         ) as mock_create_db_session,
         patch(
@@ -122,8 +137,9 @@ def test_get_credential_for_domain_not_found(secrets_manager: AgentSecretsManage
     mock_db_session = MagicMock()
 
     with (
-        patch(
-            "aci.server.app_connectors.agent_secrets_manager.create_db_session",
+        patch.object(
+            secrets_manager,
+            "db_session_factory",
             return_value=MagicMock(__enter__=MagicMock(return_value=mock_db_session)),
         ) as mock_create_db_session,
         patch(
@@ -151,8 +167,9 @@ def test_create_credential_for_domain_success(secrets_manager: AgentSecretsManag
     mock_secret_create = MagicMock(spec=SecretCreate)
 
     with (
-        patch(
-            "aci.server.app_connectors.agent_secrets_manager.create_db_session",
+        patch.object(
+            secrets_manager,
+            "db_session_factory",
             return_value=MagicMock(__enter__=MagicMock(return_value=mock_db_session)),
         ) as mock_create_db_session,
         patch(
@@ -200,8 +217,9 @@ def test_create_credential_for_domain_already_exists(
     mock_secret = MagicMock()
 
     with (
-        patch(
-            "aci.server.app_connectors.agent_secrets_manager.create_db_session",
+        patch.object(
+            secrets_manager,
+            "db_session_factory",
             return_value=MagicMock(__enter__=MagicMock(return_value=mock_db_session)),
         ) as mock_create_db_session,
         patch(
@@ -230,8 +248,9 @@ def test_update_credential_for_domain(secrets_manager: AgentSecretsManager) -> N
     mock_secret_update = MagicMock(spec=SecretUpdate)
 
     with (
-        patch(
-            "aci.server.app_connectors.agent_secrets_manager.create_db_session",
+        patch.object(
+            secrets_manager,
+            "db_session_factory",
             return_value=MagicMock(__enter__=MagicMock(return_value=mock_db_session)),
         ) as mock_create_db_session,
         patch(
@@ -275,8 +294,9 @@ def test_delete_credential_for_domain(secrets_manager: AgentSecretsManager) -> N
     mock_secret = MagicMock()
 
     with (
-        patch(
-            "aci.server.app_connectors.agent_secrets_manager.create_db_session",
+        patch.object(
+            secrets_manager,
+            "db_session_factory",
             return_value=MagicMock(__enter__=MagicMock(return_value=mock_db_session)),
         ) as mock_create_db_session,
         patch(
@@ -297,3 +317,91 @@ def test_delete_credential_for_domain(secrets_manager: AgentSecretsManager) -> N
         )
         mock_delete_secret.assert_called_once_with(mock_db_session, mock_secret)
         mock_db_session.commit.assert_called_once()
+
+
+def test_decrypted_secrets_are_cached_until_changed(
+    secrets_manager: AgentSecretsManager,
+) -> None:
+    # Given
+    mock_db_session = MagicMock()
+    mock_secret = MagicMock()
+    mock_secret.key = "example.com"
+    mock_secret.value = b"encrypted_value"
+
+    with (
+        patch.object(
+            secrets_manager,
+            "db_session_factory",
+            return_value=MagicMock(__enter__=MagicMock(return_value=mock_db_session)),
+        ),
+        patch(
+            "aci.server.app_connectors.agent_secrets_manager.crud.secret.list_secrets",
+            return_value=[mock_secret],
+        ) as mock_list_secrets,
+        patch(
+            "aci.server.app_connectors.agent_secrets_manager.crud.secret.get_secret",
+            return_value=mock_secret,
+        ) as mock_get_secret,
+        patch(
+            "aci.server.app_connectors.agent_secrets_manager.encryption.decrypt_batch",
+            return_value=[b'{"username": "user1", "password": "pass1"}'],
+        ) as mock_decrypt_batch,
+        patch(
+            "aci.server.app_connectors.agent_secrets_manager.encryption.encrypt",
+            return_value=b"encrypted_value_2",
+        ),
+        patch("aci.server.app_connectors.agent_secrets_manager.crud.secret.update_secret"),
+    ):
+        # When
+        secrets_manager.list_credentials()
+        secrets_manager.list_credentials()
+        credential = secrets_manager.get_credential_for_domain("example.com")
+
+        # Then the secrets are read and decrypted once
+        assert credential.username == "user1"
+        mock_list_secrets.assert_called_once()
+        mock_decrypt_batch.assert_called_once()
+        mock_get_secret.assert_not_called()
+        with pytest.raises(AgentSecretsManagerError):
+            secrets_manager.get_credential_for_domain("nonexistent.com")
+
+        # When the secrets change, the cache is invalidated
+        secrets_manager.update_credential_for_domain("example.com", "user2", "pass2")
+        secrets_manager.list_credentials()
+
+        # Then
+        assert mock_list_secrets.call_count == 2
+        assert mock_decrypt_batch.call_count == 2
+
+
+def test_secrets_changed_while_loading_are_not_cached(
+    secrets_manager: AgentSecretsManager,
+) -> None:
+    # Given
+    mock_secret = MagicMock()
+    mock_secret.key = "example.com"
+    mock_secret.value = b"encrypted_value"
+
+    def decrypt_batch(values: list[bytes], max_concurrency: int) -> list[bytes]:
+        # the secrets are changed by another execution while they are decrypted
+        decrypted_secrets_cache.invalidate(secrets_manager.linked_account.id)
+        return [b'{"username": "user1", "password": "pass1"}']
+
+    with (
+        patch.object(secrets_manager, "db_session_factory", return_value=MagicMock()),
+        patch(
+            "aci.server.app_connectors.agent_secrets_manager.crud.secret.list_secrets",
+            return_value=[mock_secret],
+        ) as mock_list_secrets,
+        patch(
+            "aci.server.app_connectors.agent_secrets_manager.encryption.decrypt_batch",
+            side_effect=decrypt_batch,
+        ),
+    ):
+        # When
+        secrets_manager.list_credentials()
+        secrets_manager.list_credentials()
+
+        # Then the outdated secrets were not cached
+        assert mock_list_secrets.call_count == 2
+        assert decrypted_secrets_cache.get_all(secrets_manager.linked_account.id) is None
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from typing import override
+from unittest.mock import MagicMock
+
+from aci.common.schemas.security_scheme import NoAuthScheme, NoAuthSchemeCredentials
+from aci.server.app_connectors.base import AppConnectorBase, get_sync_method_executor
+from aci.server.context import request_id_ctx_var
+
+
+class SyncAndAsyncConnector(AppConnectorBase):
+    sync_method_max_workers = 2
+
+    @override
+    def _before_execute(self) -> None:
+        pass
+
+    def sync_echo(self, value: str) -> dict:
+        return {
+            "value": value,
+            "thread_name": threading.current_thread().name,
+            "request_id": request_id_ctx_var.get(),
+        }
+
+    async def async_echo(self, value: str) -> dict:
+        await asyncio.sleep(0)
+        return {"value": value, "thread_name": threading.current_thread().name}
+
+    async def async_fail(self) -> None:
+        raise ValueError("upstream error")
+
+
+def _connector() -> SyncAndAsyncConnector:
+    return SyncAndAsyncConnector(MagicMock(), NoAuthScheme(), NoAuthSchemeCredentials())
+
+
+def test_async_method_is_awaited_on_the_event_loop() -> None:
+    async def run() -> None:
+        result = await _connector().execute_method_async(
+            "async_echo", SyncAndAsyncConnector.async_echo, {"value": "aci"}
+        )
+        assert result.success
+        assert result.data == {"value": "aci", "thread_name": threading.current_thread().name}
+
+    asyncio.run(run())
+
+
+def test_sync_method_runs_in_the_connector_thread_pool() -> None:
+    async def run() -> None:
+        request_id_ctx_var.set("request-id")
+        result = await _connector().execute_method_async(
+            "sync_echo", SyncAndAsyncConnector.sync_echo, {"value": "aci"}
+        )
+        assert result.success
+        assert result.data is not None
+        assert result.data["value"] == "aci"
+        assert result.data["thread_name"].startswith("app-connector-SyncAndAsyncConnector")
+        # the caller's context is kept
+        assert result.data["request_id"] == "request-id"
+
+    asyncio.run(run())
+    executor = get_sync_method_executor(SyncAndAsyncConnector)
+    assert executor._max_workers == SyncAndAsyncConnector.sync_method_max_workers
+
+
+def test_async_method_executed_outside_the_event_loop() -> None:
+    result = _connector().execute("async_echo", {"value": "aci"})
+    assert result.success
+    assert result.data is not None
+    assert result.data["value"] == "aci"
+
+
+def test_async_method_failure() -> None:
+    result = asyncio.run(
+        _connector().execute_method_async("async_fail", SyncAndAsyncConnector.async_fail, {})
+    )
+    assert not result.success
+    assert result.error == "upstream error"
@@ -0,0 +1,173 @@
+from typing import Any, override
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from aci.common.schemas.security_scheme import (
+    APIKeyScheme,
+    APIKeySchemeCredentials,
+    NoAuthScheme,
+    NoAuthSchemeCredentials,
+)
+from aci.server.app_connectors.base import AppConnectorBase
+from aci.server.app_connectors.pool import AppConnectorPool
+from aci.server.app_connectors.registry import AppConnectorRegistry
+from aci.server.function_executors.connector_function_executor import ConnectorFunctionExecutor
+
+
+class PooledConnector(AppConnectorBase):
+    pooled = True
+
+    @override
+    def _before_execute(self) -> None:
+        pass
+
+
+class UnpooledConnector(AppConnectorBase):
+    @override
+    def _before_execute(self) -> None:
+        pass
+
+
+class FlakyConnector(AppConnectorBase):
+    pooled = True
+    instances_created = 0
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        type(self).instances_created += 1
+
+    @override
+    def _before_execute(self) -> None:
+        pass
+
+    def call(self, fail: bool) -> str:
+        if fail:
+            raise RuntimeError("upstream error")
+        return "ok"
+
+
+def _linked_account() -> MagicMock:
+    linked_account = MagicMock()
+    linked_account.id = uuid4()
+    return linked_account
+
+
+def _api_key(secret_key: str) -> tuple[APIKeyScheme, APIKeySchemeCredentials]:
+    return (
+        APIKeyScheme(location="header", name="X-API-KEY"),  # type: ignore
+        APIKeySchemeCredentials(secret_key=secret_key),
+    )
+
+
+def test_pooled_instance_is_reused_per_linked_account() -> None:
+    pool = AppConnectorPool(max_size=10, idle_ttl_seconds=60)
+    linked_account = _linked_account()
+    scheme, credentials = _api_key("key")
+
+    with pool.checkout(PooledConnector, linked_account, scheme, credentials) as first:
+        # checked out instances are not shared by concurrent executions
+        with pool.checkout(PooledConnector, linked_account, scheme, credentials) as concurrent:
+            assert concurrent is not first
+    with pool.checkout(PooledConnector, linked_account, scheme, credentials) as second:
+        assert second is first
+
+    # the linked account loaded by the later request is rebound
+    reloaded_linked_account = MagicMock(id=linked_account.id)
+    with pool.checkout(PooledConnector, reloaded_linked_account, scheme, credentials) as third:
+        assert third is first
+        assert third.linked_account is reloaded_linked_account
+
+    with pool.checkout(PooledConnector, _linked_account(), scheme, credentials) as other:
+        assert other is not first
+
+
+def test_rotated_credentials_get_a_new_instance() -> None:
+    pool = AppConnectorPool(max_size=10, idle_ttl_seconds=60)
+    linked_account = _linked_account()
+    scheme, credentials = _api_key("key")
+    _, rotated_credentials = _api_key("rotated-key")
+
+    with pool.checkout(PooledConnector, linked_account, scheme, credentials) as first:
+        pass
+    with pool.checkout(PooledConnector, linked_account, scheme, rotated_credentials) as second:
+        assert second is not first
+        assert second.security_credentials == rotated_credentials
+
+
+def test_unpooled_connectors_are_not_reused() -> None:
+    pool = AppConnectorPool(max_size=10, idle_ttl_seconds=60)
+    linked_account = _linked_account()
+
+    with pool.checkout(
+        UnpooledConnector, linked_account, NoAuthScheme(), NoAuthSchemeCredentials()
+    ) as first:
+        pass
+    with pool.checkout(
+        UnpooledConnector, linked_account, NoAuthScheme(), NoAuthSchemeCredentials()
+    ) as second:
+        assert second is not first
+
+
+def test_instance_is_discarded_on_error() -> None:
+    pool = AppConnectorPool(max_size=10, idle_ttl_seconds=60)
+    linked_account = _linked_account()
+    scheme, credentials = _api_key("key")
+
+    with pytest.raises(RuntimeError):
+        with pool.checkout(PooledConnector, linked_account, scheme, credentials) as first:
+            raise RuntimeError("boom")
+    with pool.checkout(PooledConnector, linked_account, scheme, credentials) as second:
+        assert second is not first
+
+
+def test_instance_is_discarded_when_its_method_fails() -> None:
+    registry = AppConnectorRegistry()
+    registry.register("FLAKY", FlakyConnector)
+    pool = AppConnectorPool(max_size=10, idle_ttl_seconds=60)
+    scheme, credentials = _api_key("key")
+    function = MagicMock()
+    function.name = "FLAKY__CALL"
+    executor: ConnectorFunctionExecutor = ConnectorFunctionExecutor(
+        _linked_account(), db_session_factory=MagicMock()
+    )
+    FlakyConnector.instances_created = 0
+
+    def call(fail: bool) -> bool:
+        result = executor._execute(function, {"fail": fail}, scheme, credentials, None, False)
+        return result.success
+
+    with patch.multiple(
+        "aci.server.function_executors.connector_function_executor",
+        app_connector_registry=registry,
+        app_connector_pool=pool,
+    ):
+        assert call(fail=False)
+        assert call(fail=False)
+        assert FlakyConnector.instances_created == 1
+
+        # the method's exception is turned into a failed result, the instance is still discarded
+        assert not call(fail=True)
+        assert call(fail=False)
+        assert FlakyConnector.instances_created == 2
+
+
+def test_least_recently_used_and_idle_instances_are_evicted() -> None:
+    pool = AppConnectorPool(max_size=2, idle_ttl_seconds=60)
+    linked_accounts = [_linked_account() for _ in range(3)]
+    scheme, credentials = _api_key("key")
+
+    instances = []
+    for linked_account in linked_accounts:
+        with pool.checkout(PooledConnector, linked_account, scheme, credentials) as instance:
+            instances.append(instance)
+
+    with pool.checkout(PooledConnector, linked_accounts[0], scheme, credentials) as instance:
+        assert instance is not instances[0]
+    with pool.checkout(PooledConnector, linked_accounts[2], scheme, credentials) as instance:
+        assert instance is instances[2]
+
+    with patch("aci.server.app_connectors.pool.time.monotonic", return_value=1e12):
+        with pool.checkout(PooledConnector, linked_accounts[2], scheme, credentials) as instance:
+            assert instance is not instances[2]
@@ -0,0 +1,65 @@
+from typing import override
+from unittest.mock import MagicMock
+
+import pytest
+
+from aci.common.exceptions import NoImplementationFound
+from aci.common.schemas.security_scheme import NoAuthScheme, NoAuthSchemeCredentials
+from aci.server.app_connectors.base import AppConnectorBase
+from aci.server.app_connectors.mock_app_connector import MockAppConnector
+from aci.server.app_connectors.registry import AppConnectorRegistry, app_connector_registry
+
+
+class Greeter(AppConnectorBase):
+    @override
+    def _before_execute(self) -> None:
+        pass
+
+    def say_hello(self, name: str) -> str:
+        return self._greet("hello", name)
+
+    def _greet(self, greeting: str, name: str) -> str:
+        return f"{greeting} {name}"
+
+
+def test_registry_discovers_app_connectors() -> None:
+    method = app_connector_registry.get_method("MOCK_APP_CONNECTOR__ECHO")
+    assert method.app_connector_class is MockAppConnector
+    assert method.method_name == "echo"
+
+    with pytest.raises(NoImplementationFound):
+        app_connector_registry.get_method("MOCK_APP_CONNECTOR__NON_EXISTENT")
+
+
+def test_register_only_public_methods() -> None:
+    registry = AppConnectorRegistry()
+    registry.register("GREETER", Greeter)
+
+    assert registry.get_method("GREETER__SAY_HELLO").method_name == "say_hello"
+    for function_name in ("GREETER___GREET", "GREETER__EXECUTE", "GREETER__EXECUTE_METHOD"):
+        with pytest.raises(NoImplementationFound):
+            registry.get_method(function_name)
+
+
+def test_validate() -> None:
+    registry = AppConnectorRegistry()
+    registry.register("GREETER", Greeter)
+
+    registry.validate(["GREETER__SAY_HELLO"])
+    with pytest.raises(NoImplementationFound, match="GREETER__SAY_GOODBYE"):
+        registry.validate(["GREETER__SAY_HELLO", "GREETER__SAY_GOODBYE"])
+
+
+def test_dispatch() -> None:
+    registry = AppConnectorRegistry()
+    registry.register("GREETER", Greeter)
+    method = registry.get_method("GREETER__SAY_HELLO")
+    greeter = Greeter(MagicMock(), NoAuthScheme(), NoAuthSchemeCredentials())
+
+    result = method.dispatch(greeter, {"name": "aci"})
+    assert result.success
+    assert result.data == "hello aci"
+
+    # invalid input fails the execution
+    result = method.dispatch(greeter, {"unknown": "aci"})
+    assert not result.success
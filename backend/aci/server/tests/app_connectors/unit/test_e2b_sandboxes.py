@@ -0,0 +1,186 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+from aci.server.app_connectors.e2b_sandboxes import E2bSandboxManager
+
+
+class FakeSandbox:
+    """Local fake of an e2b sandbox, whose interpreter state is the list of the code it ran."""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.history: list[str] = []
+        self.running = True
+        self.killed = False
+
+    async def run_code(self, code: str) -> SimpleNamespace:
+        self.history.append(code)
+        return SimpleNamespace(text=";".join(self.history))
+
+    async def is_running(self) -> bool:
+        return self.running
+
+    async def kill(self) -> bool:
+        self.running = False
+        self.killed = True
+        return True
+
+
+class FakeSandboxFactory:
+    def __init__(self) -> None:
+        self.sandboxes: list[FakeSandbox] = []
+
+    async def __call__(self, api_key: str) -> FakeSandbox:
+        sandbox = FakeSandbox(api_key)
+        self.sandboxes.append(sandbox)
+        return sandbox
+
+
+def _manager(
+    factory: FakeSandboxFactory, warm_size: int = 1, max_size: int = 3
+) -> E2bSandboxManager:
+    return E2bSandboxManager(
+        sandbox_factory=factory,
+        warm_size=warm_size,
+        max_size=max_size,
+        idle_ttl_seconds=60,
+        max_age_seconds=3600,
+        sweep_interval_seconds=3600,
+    )
+
+
+async def _settle() -> None:
+    # let the background warm up and kill tasks run
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_executions_use_warm_sandboxes_once() -> None:
+    async def run() -> None:
+        factory = FakeSandboxFactory()
+        manager = _manager(factory)
+        manager.start()
+        linked_account_id = uuid4()
+
+        async with manager.sandbox(linked_account_id, "key") as first:
+            await first.run_code("x = 1")
+        await _settle()
+        # the first execution booted its sandbox, and warmed up the next one
+        assert len(factory.sandboxes) == 2
+        assert factory.sandboxes[0].killed
+
+        async with manager.sandbox(linked_account_id, "key") as second:
+            assert second is factory.sandboxes[1]
+            execution = await second.run_code("print(x)")
+            # executions don't share interpreter state
+            assert execution.text == "print(x)"
+        await _settle()
+        assert factory.sandboxes[1].killed
+        assert len(factory.sandboxes) == 3
+
+        await manager.stop()
+        assert all(sandbox.killed for sandbox in factory.sandboxes)
+
+    asyncio.run(run())
+
+
+def test_sticky_session_reuses_interpreter() -> None:
+    async def run() -> None:
+        factory = FakeSandboxFactory()
+        manager = _manager(factory, warm_size=0)
+        manager.start()
+        linked_account_id = uuid4()
+
+        async with manager.sandbox(linked_account_id, "key", "session") as sandbox:
+            await sandbox.run_code("x = 1")
+        async with manager.sandbox(linked_account_id, "key", "session") as sandbox:
+            execution = await sandbox.run_code("print(x)")
+            assert execution.text == "x = 1;print(x)"
+        async with manager.sandbox(linked_account_id, "key", "other-session") as other:
+            assert other is not sandbox
+        async with manager.sandbox(uuid4(), "key", "session") as other:
+            assert other is not sandbox
+
+        assert not sandbox.killed  # type: ignore
+        await manager.stop()
+
+    asyncio.run(run())
+
+
+def test_unhealthy_sticky_sandbox_is_replaced() -> None:
+    async def run() -> None:
+        factory = FakeSandboxFactory()
+        manager = _manager(factory, warm_size=0)
+        manager.start()
+        linked_account_id = uuid4()
+
+        async with manager.sandbox(linked_account_id, "key", "session") as first:
+            pass
+        factory.sandboxes[0].running = False
+        async with manager.sandbox(linked_account_id, "key", "session") as second:
+            assert second is not first
+        await _settle()
+        assert factory.sandboxes[0].killed
+
+        await manager.stop()
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_sticky_sandboxes_are_evicted() -> None:
+    async def run() -> None:
+        factory = FakeSandboxFactory()
+        manager = _manager(factory, warm_size=0, max_size=2)
+        manager.start()
+        linked_account_id = uuid4()
+
+        for session_key in ("a", "b", "a", "c"):
+            async with manager.sandbox(linked_account_id, "key", session_key):
+                pass
+        await _settle()
+        # "b" was the least recently used
+        assert [sandbox.killed for sandbox in factory.sandboxes] == [False, True, False]
+
+        await manager.stop()
+
+    asyncio.run(run())
+
+
+def test_idle_sandboxes_are_swept() -> None:
+    async def run() -> None:
+        factory = FakeSandboxFactory()
+        manager = _manager(factory)
+        manager.start()
+
+        async with manager.sandbox(uuid4(), "key", "session"):
+            pass
+        await _settle()
+        assert len(factory.sandboxes) == 2
+
+        manager.sweep()
+        await _settle()
+        assert not any(sandbox.killed for sandbox in factory.sandboxes)
+
+        with patch("aci.server.app_connectors.e2b_sandboxes.time.monotonic", return_value=1e12):
+            manager.sweep()
+        await _settle()
+        assert all(sandbox.killed for sandbox in factory.sandboxes)
+
+        await manager.stop()
+
+    asyncio.run(run())
+
+
+def test_not_started_manager_uses_one_off_sandboxes() -> None:
+    async def run() -> None:
+        factory = FakeSandboxFactory()
+        manager = _manager(factory)
+
+        async with manager.sandbox(uuid4(), "key", "session") as sandbox:
+            await sandbox.run_code("x = 1")
+        assert len(factory.sandboxes) == 1
+        assert factory.sandboxes[0].killed
+
+    asyncio.run(run())
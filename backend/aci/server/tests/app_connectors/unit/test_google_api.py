@@ -0,0 +1,91 @@
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from aci.server.app_connectors.google_api import QuotaPacer, execute_batch
+
+
+def _http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FakeBatch:
+    def __init__(self, service: "FakeService", callback: Callable[[str, Any, Any], None]):
+        self.service = service
+        self.callback = callback
+        self.requests: list[tuple[str, str]] = []
+
+    def add(self, request: str, request_id: str) -> None:
+        self.requests.append((request_id, request))
+
+    def execute(self) -> None:
+        self.service.batches.append([request for _, request in self.requests])
+        for request_id, request in self.requests:
+            outcome = self.service.outcomes[request].pop(0)
+            if isinstance(outcome, Exception):
+                self.callback(request_id, None, outcome)
+            else:
+                self.callback(request_id, outcome, None)
+
+
+class FakeService:
+    def __init__(self, outcomes: dict[str, list[Any]]):
+        # request -> outcome of each attempt, a response or an exception
+        self.outcomes = outcomes
+        self.batches: list[list[str]] = []
+
+    def new_batch_http_request(self, callback: Callable[[str, Any, Any], None]) -> FakeBatch:
+        return FakeBatch(self, callback)
+
+
+def test_execute_batch() -> None:
+    service = FakeService(
+        {
+            "a": [{"id": "1"}],
+            "b": [_http_error(429), {"id": "2"}],
+            "c": [_http_error(400)],
+            "d": [_http_error(429), _http_error(429)],
+        }
+    )
+    quota_pacer = MagicMock(burst_units=300)
+
+    with patch("aci.server.app_connectors.google_api.time.sleep") as mock_sleep:
+        results = execute_batch(
+            service,  # type: ignore
+            ["a", "b", "c", "d"],  # type: ignore
+            quota_units_per_request=100,
+            quota_pacer=quota_pacer,
+            max_batch_size=50,
+            max_retries=1,
+            retry_backoff_seconds=1.0,
+        )
+
+    # batches are capped by the quota pacer's burst, only the rate limited requests are retried
+    assert service.batches == [["a", "b", "c"], ["d"], ["b", "d"]]
+    assert [call.args[0] for call in quota_pacer.acquire.call_args_list] == [300, 100, 200]
+    mock_sleep.assert_called_once_with(1.0)
+
+    assert results[0].response == {"id": "1"} and results[0].error is None
+    assert results[1].response == {"id": "2"} and results[1].error is None
+    assert results[2].error is not None
+    # still rate limited after the retries
+    assert results[3].error is not None
+
+
+def test_quota_pacer_waits_for_units() -> None:
+    with (
+        patch("aci.server.app_connectors.google_api.time.monotonic", return_value=0.0),
+        patch("aci.server.app_connectors.google_api.time.sleep") as mock_sleep,
+    ):
+        quota_pacer = QuotaPacer(units_per_second=100, burst_units=200)
+        quota_pacer.acquire(200)
+        mock_sleep.assert_not_called()
+
+        quota_pacer.acquire(50)
+        mock_sleep.assert_called_once_with(0.5)
+        # the units of concurrent callers are reserved in turn
+        quota_pacer.acquire(100)
+        assert mock_sleep.call_args.args[0] == 1.5
@@ -0,0 +1,74 @@
+from sqlalchemy.orm import Session
+
+from aci.common import utils
+from aci.common.db import crud
+from aci.common.db.sql_models import BackgroundJob
+from aci.common.enums import BackgroundJobStatus
+from aci.server import config
+
+
+def test_claim_background_jobs(db_session: Session) -> None:
+    due_job_ids = [
+        crud.background_jobs.create_background_job(db_session, "greet", {"name": name}, 3)
+        for name in ("a", "b")
+    ]
+    crud.background_jobs.create_background_job(
+        db_session, "greet", {"name": "later"}, 3, delay_seconds=3600
+    )
+    db_session.commit()
+
+    jobs = crud.background_jobs.claim_background_jobs(db_session, "worker-1", 10, 300)
+    db_session.commit()
+    assert sorted(job.id for job in jobs) == sorted(due_job_ids)
+    assert all(job.status == BackgroundJobStatus.RUNNING for job in jobs)
+    assert all(job.attempts == 1 and job.locked_by == "worker-1" for job in jobs)
+
+    # claimed jobs are hidden until their visibility timeout expires
+    assert crud.background_jobs.claim_background_jobs(db_session, "worker-2", 10, 300) == []
+
+
+def test_claim_background_jobs_skips_locked_rows(db_session: Session) -> None:
+    for name in ("a", "b"):
+        crud.background_jobs.create_background_job(db_session, "greet", {"name": name}, 3)
+    db_session.commit()
+
+    # a concurrent claim holding the lock of one job, in another transaction
+    with utils.create_db_session(config.DB_FULL_URL) as other_db_session:
+        claimed_by_other = crud.background_jobs.claim_background_jobs(
+            other_db_session, "worker-1", 1, 300
+        )
+        claimed = crud.background_jobs.claim_background_jobs(db_session, "worker-2", 10, 300)
+        other_db_session.commit()
+    db_session.commit()
+
+    assert len(claimed_by_other) == 1
+    assert len(claimed) == 1
+    assert claimed[0].id != claimed_by_other[0].id
+
+
+def test_fail_and_delete_background_job(db_session: Session) -> None:
+    job_id = crud.background_jobs.create_background_job(db_session, "greet", {"name": "a"}, 2)
+    db_session.commit()
+
+    # expired visibility timeout, the job is claimable again right away
+    [job] = crud.background_jobs.claim_background_jobs(db_session, "worker-1", 1, -1)
+    assert crud.background_jobs.fail_background_job(db_session, job_id, 1, "boom", 0)
+    db_session.commit()
+    db_session.expire_all()
+    job = db_session.get_one(BackgroundJob, job_id)
+    assert job.status == BackgroundJobStatus.QUEUED
+    assert job.last_error == "boom"
+
+    [job] = crud.background_jobs.claim_background_jobs(db_session, "worker-1", 1, 300)
+    # a stale attempt doesn't update the job
+    assert not crud.background_jobs.fail_background_job(db_session, job_id, 1, "stale", None)
+    assert not crud.background_jobs.delete_background_job(db_session, job_id, 1)
+    assert crud.background_jobs.fail_background_job(db_session, job_id, 2, "boom", None)
+    db_session.commit()
+
+    [dead_job] = crud.background_jobs.get_background_jobs_by_status(
+        db_session, BackgroundJobStatus.DEAD, 10
+    )
+    assert dead_job.id == job_id
+    assert crud.background_jobs.delete_background_job(db_session, job_id, 2)
+    db_session.commit()
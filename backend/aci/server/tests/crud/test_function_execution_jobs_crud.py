@@ -0,0 +1,58 @@
+from sqlalchemy.orm import Session
+
+from aci.common.db import crud
+from aci.common.db.sql_models import Agent
+from aci.common.enums import FunctionExecutionJobStatus
+from aci.common.schemas.function import FunctionExecute, FunctionExecutionResult
+
+
+def test_finish_function_execution_job_only_if_running(
+    db_session: Session, dummy_agent_1_with_all_apps_allowed: Agent
+) -> None:
+    function_execution_job = crud.function_execution_jobs.create_function_execution_job(
+        db_session,
+        dummy_agent_1_with_all_apps_allowed.project_id,
+        dummy_agent_1_with_all_apps_allowed.id,
+        "ACI_TEST__HELLO_WORLD",
+        FunctionExecute(linked_account_owner_id="owner"),
+    )
+    job_id = function_execution_job.id
+    result = FunctionExecutionResult(success=True, data={"message": "hello"})
+
+    # not claimed yet
+    assert not crud.function_execution_jobs.finish_function_execution_job(
+        db_session, job_id, result
+    )
+
+    assert crud.function_execution_jobs.claim_function_execution_job(db_session, job_id)
+    # failed by the sweep, the result of the late execution is dropped
+    assert crud.function_execution_jobs.fail_timed_out_function_execution_jobs(db_session, 0) == 1
+    assert not crud.function_execution_jobs.finish_function_execution_job(
+        db_session, job_id, result
+    )
+    db_session.refresh(function_execution_job)
+    assert function_execution_job.status == FunctionExecutionJobStatus.FAILED
+    assert function_execution_job.result is not None
+    assert not function_execution_job.result["success"]
+
+
+def test_finish_function_execution_job(
+    db_session: Session, dummy_agent_1_with_all_apps_allowed: Agent
+) -> None:
+    function_execution_job = crud.function_execution_jobs.create_function_execution_job(
+        db_session,
+        dummy_agent_1_with_all_apps_allowed.project_id,
+        dummy_agent_1_with_all_apps_allowed.id,
+        "ACI_TEST__HELLO_WORLD",
+        FunctionExecute(linked_account_owner_id="owner"),
+    )
+    job_id = function_execution_job.id
+    assert crud.function_execution_jobs.claim_function_execution_job(db_session, job_id)
+
+    assert crud.function_execution_jobs.finish_function_execution_job(
+        db_session, job_id, FunctionExecutionResult(success=False, error="failed")
+    )
+    db_session.refresh(function_execution_job)
+    assert function_execution_job.status == FunctionExecutionJobStatus.FAILED
+    assert function_execution_job.result == {"success": False, "error": "failed"}
+    assert function_execution_job.finished_at is not None
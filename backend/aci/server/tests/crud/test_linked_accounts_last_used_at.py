@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from aci.common.db import crud
+from aci.common.db.sql_models import LinkedAccount
+
+
+def test_bulk_update_linked_accounts_last_used_at(
+    db_session: Session,
+    dummy_linked_account_oauth2_google_project_1: LinkedAccount,
+    dummy_linked_account_api_key_github_project_1: LinkedAccount,
+) -> None:
+    google_linked_account = dummy_linked_account_oauth2_google_project_1
+    github_linked_account = dummy_linked_account_api_key_github_project_1
+    now = datetime.now().replace(microsecond=0)
+    google_linked_account.last_used_at = now
+    # never used
+    github_linked_account.last_used_at = None  # type: ignore[assignment]
+    db_session.commit()
+
+    # a newer timestamp, a timestamp of a never used linked account and an unknown id
+    assert (
+        crud.linked_accounts.bulk_update_linked_accounts_last_used_at(
+            db_session,
+            {
+                google_linked_account.id: now + timedelta(seconds=10),
+                github_linked_account.id: now,
+                uuid4(): now,
+            },
+        )
+        == 2
+    )
+    db_session.commit()
+    db_session.refresh(google_linked_account)
+    db_session.refresh(github_linked_account)
+    assert google_linked_account.last_used_at == now + timedelta(seconds=10)
+    assert github_linked_account.last_used_at == now
+
+    # an older timestamp doesn't move last_used_at backwards
+    assert (
+        crud.linked_accounts.bulk_update_linked_accounts_last_used_at(
+            db_session, {google_linked_account.id: now}
+        )
+        == 0
+    )
+    db_session.commit()
+    db_session.refresh(google_linked_account)
+    assert google_linked_account.last_used_at == now + timedelta(seconds=10)
+
+    assert crud.linked_accounts.bulk_update_linked_accounts_last_used_at(db_session, {}) == 0
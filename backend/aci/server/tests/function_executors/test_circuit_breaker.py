@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+from aci.server.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitState
+
+
+def _state(circuit_breaker: CircuitBreaker) -> CircuitState:
+    # read through a function, so mypy doesn't narrow the state across the calls changing it
+    return circuit_breaker.state
+
+
+def test_opens_after_consecutive_failures() -> None:
+    circuit_breaker = CircuitBreaker(
+        "api.github.com", failure_threshold=3, recovery_timeout_seconds=30
+    )
+    for _ in range(2):
+        circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    for _ in range(2):
+        circuit_breaker.record_failure()
+    assert _state(circuit_breaker) == CircuitState.CLOSED
+    assert circuit_breaker.allow_request()
+
+    circuit_breaker.record_failure()
+    assert _state(circuit_breaker) == CircuitState.OPEN
+    assert not circuit_breaker.allow_request()
+    assert 29 < circuit_breaker.retry_after() <= 30
+
+
+def test_half_open_trial_request() -> None:
+    circuit_breaker = CircuitBreaker(
+        "api.github.com", failure_threshold=1, recovery_timeout_seconds=30
+    )
+    with patch("aci.server.circuit_breaker.time.monotonic", return_value=1000.0):
+        circuit_breaker.record_failure()
+
+    with patch("aci.server.circuit_breaker.time.monotonic", return_value=1031.0):
+        # only one trial request at a time
+        assert circuit_breaker.allow_request()
+        assert _state(circuit_breaker) == CircuitState.HALF_OPEN
+        assert not circuit_breaker.allow_request()
+
+        # failed trial opens the breaker again
+        circuit_breaker.record_failure()
+        assert _state(circuit_breaker) == CircuitState.OPEN
+        assert not circuit_breaker.allow_request()
+
+    with patch("aci.server.circuit_breaker.time.monotonic", return_value=1062.0):
+        assert circuit_breaker.allow_request()
+        circuit_breaker.record_success()
+        assert _state(circuit_breaker) == CircuitState.CLOSED
+        assert circuit_breaker.allow_request()
+        assert circuit_breaker.allow_request()
+
+
+def test_registry_has_one_breaker_per_host() -> None:
+    registry = CircuitBreakerRegistry(failure_threshold=1, recovery_timeout_seconds=30)
+    assert registry.get("api.github.com") is registry.get("api.github.com")
+    registry.get("api.github.com").record_failure()
+    registry.get("slack.com")
+    assert registry.states() == {
+        "api.github.com": CircuitState.OPEN,
+        "slack.com": CircuitState.CLOSED,
+    }
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import respx
+
+from aci.common.schemas.function import RestMetadata
+from aci.server.function_executors.response_body import ResponseBody, aread_response_body
+from aci.server.hedging import HedgeBudget, HedgedRequestSender, LatencyTracker
+
+TIMEOUT = httpx.Timeout(5.0)
+
+
+async def _read_body(response: httpx.Response) -> ResponseBody:
+    return await aread_response_body(response, 1000)
+
+
+def _warm_tracker(host: str, latency_seconds: float) -> LatencyTracker:
+    latency_tracker = LatencyTracker(window_size=100, min_samples=10)
+    for _ in range(10):
+        latency_tracker.record(host, latency_seconds)
+    return latency_tracker
+
+
+def test_latency_percentile() -> None:
+    latency_tracker = LatencyTracker(window_size=100, min_samples=10)
+    for i in range(1, 10):
+        latency_tracker.record("api.github.com", i / 100)
+    assert latency_tracker.percentile("api.github.com", 95) is None
+
+    latency_tracker.record("api.github.com", 0.1)
+    assert latency_tracker.percentile("api.github.com", 50) == 0.06
+    assert latency_tracker.percentile("api.github.com", 95) == 0.1
+    assert latency_tracker.percentile("slack.com", 95) is None
+
+
+def test_hedge_budget_ratio() -> None:
+    budget = HedgeBudget(ratio=0.25, max_tokens=2)
+    assert not budget.try_withdraw()
+    for _ in range(4):
+        budget.deposit()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    # unused tokens don't accumulate beyond max_tokens
+    for _ in range(100):
+        budget.deposit()
+    assert budget.try_withdraw()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+
+@respx.mock
+def test_slow_request_is_hedged_and_first_response_wins() -> None:
+    calls = 0
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+            return httpx.Response(200, json={"attempt": "primary"})
+        return httpx.Response(200, json={"attempt": "hedge"})
+
+    respx.get("https://api.github.com/repos").mock(side_effect=respond)
+    budget = HedgeBudget(ratio=1, max_tokens=1)
+    sender = HedgedRequestSender(_warm_tracker("api.github.com", 0.01), budget, percentile=95)
+
+    response, body = sender.send(
+        httpx.Request("GET", "https://api.github.com/repos"), TIMEOUT, _read_body
+    )
+
+    assert response.status_code == 200
+    assert json.loads(body.content) == {"attempt": "hedge"}
+    assert calls == 2
+
+
+@respx.mock
+def test_no_hedge_without_latency_samples_or_budget() -> None:
+    async def respond(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, json={})
+
+    route = respx.get("https://api.github.com/repos").mock(side_effect=respond)
+    request = httpx.Request("GET", "https://api.github.com/repos")
+
+    # no latencies recorded for the host yet
+    sender = HedgedRequestSender(
+        LatencyTracker(window_size=100, min_samples=10),
+        HedgeBudget(ratio=1, max_tokens=1),
+        percentile=95,
+    )
+    sender.send(request, TIMEOUT, _read_body)
+    assert route.call_count == 1
+
+    # budget used up
+    sender = HedgedRequestSender(
+        _warm_tracker("api.github.com", 0.01), HedgeBudget(ratio=0, max_tokens=1), percentile=95
+    )
+    sender.send(request, TIMEOUT, _read_body)
+    assert route.call_count == 2
+
+
+@respx.mock
+def test_hedged_response_body_is_capped_and_connections_are_reused() -> None:
+    respx.get("https://api.github.com/repos").mock(
+        return_value=httpx.Response(200, content=b"x" * 5000)
+    )
+    sender = HedgedRequestSender(
+        LatencyTracker(window_size=100, min_samples=10),
+        HedgeBudget(ratio=1, max_tokens=1),
+        percentile=95,
+    )
+    request = httpx.Request("GET", "https://api.github.com/repos")
+
+    _, body = sender.send(request, TIMEOUT, _read_body)
+    assert body == ResponseBody(content=b"x" * 1000, truncated=True)
+
+    client = sender._client
+    sender.send(request, TIMEOUT, _read_body)
+    # the same client, and connection pool, for every request
+    assert client is not None and sender._client is client
+
+
+def test_hedge_only_for_get_functions() -> None:
+    protocol_data = {"method": "POST", "path": "/repos", "server_url": "https://api.github.com"}
+    with pytest.raises(ValueError):
+        RestMetadata.model_validate({**protocol_data, "hedge": True})
+    assert not RestMetadata.model_validate(protocol_data).hedge
@@ -0,0 +1,118 @@
+import json
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import httpx
+import pytest
+import respx
+
+from aci.common.processor import parse_response_fields
+from aci.server.function_executors.response_body import parse_truncated_json, read_response_body
+from aci.server.function_executors.rest_no_auth_function_executor import (
+    RestNoAuthFunctionExecutor,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("[1, 2, 3]", [1, 2, 3]),
+        ("[1, 2, 3", [1, 2]),
+        ("[1, 2, 1.5e", [1, 2]),
+        ('{"a": 1, "b": tr', {"a": 1}),
+        ('{"a": "x", "b": "y', {"a": "x"}),
+        (
+            '{"total": 3, "items": [{"id": 1, "name": "a"}, {"id": 2, "na',
+            {"total": 3, "items": [{"id": 1, "name": "a"}]},
+        ),
+        ('{"data": {"items": [[1, 2], [3', {"data": {"items": [[1, 2]]}}),
+    ],
+)
+def test_parse_truncated_json(text: str, expected: object) -> None:
+    assert parse_truncated_json(text) == expected
+
+
+@pytest.mark.parametrize("text", ["<html><body>", '"abc', "12", "[1 2]"])
+def test_parse_truncated_json_invalid(text: str) -> None:
+    with pytest.raises(ValueError):
+        parse_truncated_json(text)
+
+
+def test_read_response_body_stops_at_max_bytes() -> None:
+    chunks_read = 0
+
+    def stream() -> Iterator[bytes]:
+        nonlocal chunks_read
+        for _ in range(100):
+            chunks_read += 1
+            yield b"x" * 10
+
+    response = httpx.Response(200, content=stream())
+    body = read_response_body(response, max_bytes=25)
+    assert body.content == b"x" * 25
+    assert body.truncated
+    assert chunks_read == 3
+
+    body = read_response_body(httpx.Response(200, content=b"x" * 25), max_bytes=25)
+    assert not body.truncated
+
+
+@respx.mock
+def test_rest_function_executor_truncates_large_response() -> None:
+    items = [{"id": i, "name": f"repo-{i}"} for i in range(1000)]
+    respx.get("https://api.github.com/repos").mock(
+        return_value=httpx.Response(200, json={"items": items})
+    )
+    linked_account = MagicMock()
+    linked_account.id = uuid4()
+    function = MagicMock()
+    function.name = "GITHUB__LIST_REPOS"
+    function.app.name = "GITHUB"
+    function.app.max_concurrency = None
+    function.parameters = {"type": "object", "properties": {}, "visible": []}
+    function.protocol_data = {
+        "method": "GET",
+        "path": "/repos",
+        "server_url": "https://api.github.com",
+    }
+
+    with patch("aci.server.config.FUNCTION_RESPONSE_MAX_BYTES", 1000):
+        result = RestNoAuthFunctionExecutor(linked_account).execute(
+            function, {}, MagicMock(), MagicMock()
+        )
+
+    assert result.success
+    assert result.data is not None
+    assert result.data["truncated"]
+    truncated_items = result.data["data"]["items"]
+    assert 0 < len(truncated_items) < len(items)
+    assert truncated_items == items[: len(truncated_items)]
+    assert len(json.dumps(truncated_items)) < 1000
+
+
+@respx.mock
+def test_rest_function_executor_projects_response() -> None:
+    items = [{"id": i, "name": f"repo-{i}", "description": "x" * 100} for i in range(3)]
+    respx.get("https://api.github.com/repos").mock(
+        return_value=httpx.Response(200, json={"total_count": 3, "items": items})
+    )
+    linked_account = MagicMock()
+    linked_account.id = uuid4()
+    function = MagicMock()
+    function.name = "GITHUB__LIST_REPOS"
+    function.app.name = "GITHUB"
+    function.app.max_concurrency = None
+    function.parameters = {"type": "object", "properties": {}, "visible": []}
+    function.protocol_data = {
+        "method": "GET",
+        "path": "/repos",
+        "server_url": "https://api.github.com",
+    }
+
+    result = RestNoAuthFunctionExecutor(linked_account).execute(
+        function, {}, MagicMock(), MagicMock(), parse_response_fields(["items.name"])
+    )
+
+    assert result.success
+    assert result.data == {"items": [{"name": "repo-0"}, {"name": "repo-1"}, {"name": "repo-2"}]}
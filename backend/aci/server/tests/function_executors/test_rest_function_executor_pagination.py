@@ -0,0 +1,183 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import httpx
+import pytest
+import respx
+
+from aci.common.processor import parse_response_fields
+from aci.common.schemas.function import FunctionExecutionResult, RestMetadata
+from aci.server.circuit_breaker import CircuitBreakerRegistry
+from aci.server.function_executors.rest_no_auth_function_executor import (
+    RestNoAuthFunctionExecutor,
+)
+from aci.server.upstream_throttle import UpstreamThrottle
+
+URL = "https://api.example.com/items"
+
+
+@pytest.fixture(autouse=True)
+def isolated_executor_state() -> Iterator[None]:
+    module = "aci.server.function_executors.rest_function_executor"
+    with (
+        patch(f"{module}.circuit_breakers", CircuitBreakerRegistry(3, 30)),
+        patch(f"{module}.upstream_throttle", UpstreamThrottle(max_wait_seconds=1)),
+    ):
+        yield
+
+
+def _execute(
+    pagination: dict, follow_pagination: bool = True, response_fields: list[str] | None = None
+) -> FunctionExecutionResult:
+    function = MagicMock()
+    function.name = "EXAMPLE__LIST_ITEMS"
+    function.app.name = "EXAMPLE"
+    function.app.max_concurrency = None
+    function.parameters = {"type": "object", "properties": {}, "visible": []}
+    function.protocol_data = {
+        "method": "GET",
+        "path": "/items",
+        "server_url": "https://api.example.com",
+        "pagination": pagination,
+    }
+    linked_account = MagicMock()
+    linked_account.id = uuid4()
+    return RestNoAuthFunctionExecutor(linked_account).execute(
+        function,
+        {},
+        MagicMock(),
+        MagicMock(),
+        parse_response_fields(response_fields) if response_fields else None,
+        follow_pagination,
+    )
+
+
+@respx.mock
+def test_link_header_pagination() -> None:
+    route = respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(200, json=[{"id": 1}], headers={"Link": f'<{URL}?page=2>; rel="next"'}),
+            httpx.Response(200, json=[{"id": 2}], headers={"Link": f'<{URL}?page=3>; rel="next"'}),
+            httpx.Response(200, json=[{"id": 3}]),
+        ]
+    )
+
+    result = _execute({"type": "link_header"})
+
+    assert result.success
+    assert result.data == {
+        "items": [{"id": 1}, {"id": 2}, {"id": 3}],
+        "pages": 3,
+        "has_more": False,
+    }
+    assert [call.request.url.params.get("page") for call in route.calls] == [None, "2", "3"]
+
+
+@respx.mock
+def test_link_header_pagination_to_another_host_is_not_followed() -> None:
+    respx.get(URL).mock(
+        return_value=httpx.Response(
+            200,
+            json=[{"id": 1}],
+            headers={"Link": '<https://evil.example.org/items?page=2>; rel="next"'},
+        )
+    )
+    result = _execute({"type": "link_header"})
+    assert result.data == {"items": [{"id": 1}], "pages": 1, "has_more": False}
+
+
+@respx.mock
+def test_cursor_pagination_with_projection() -> None:
+    route = respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(
+                200,
+                json={"data": [{"id": 1, "name": "a"}], "meta": {"next_cursor": "abc"}},
+            ),
+            httpx.Response(
+                200, json={"data": [{"id": 2, "name": "b"}], "meta": {"next_cursor": None}}
+            ),
+        ]
+    )
+
+    result = _execute(
+        {
+            "type": "cursor",
+            "items_field": "data",
+            "cursor_field": "meta.next_cursor",
+            "param": "cursor",
+        },
+        response_fields=["data.name"],
+    )
+
+    assert result.data == {"items": [{"name": "a"}, {"name": "b"}], "pages": 2, "has_more": False}
+    assert route.calls.last.request.url.params["cursor"] == "abc"
+
+
+@respx.mock
+def test_offset_pagination_stops_on_empty_page() -> None:
+    route = respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(200, json={"items": [1, 2]}),
+            httpx.Response(200, json={"items": [3]}),
+            httpx.Response(200, json={"items": []}),
+        ]
+    )
+    result = _execute({"type": "offset", "items_field": "items", "param": "offset"})
+    assert result.data == {"items": [1, 2, 3], "pages": 3, "has_more": False}
+    assert [call.request.url.params.get("offset") for call in route.calls] == [None, "2", "3"]
+
+
+@respx.mock
+def test_page_pagination_caps() -> None:
+    route = respx.get(URL).mock(return_value=httpx.Response(200, json=[1, 2, 3]))
+
+    with patch("aci.server.config.FUNCTION_PAGINATION_MAX_PAGES", 2):
+        result = _execute({"type": "page", "param": "page"})
+    assert result.data == {"items": [1, 2, 3, 1, 2, 3], "pages": 2, "has_more": True}
+    assert route.calls.last.request.url.params["page"] == "2"
+
+    with patch("aci.server.config.FUNCTION_PAGINATION_MAX_ITEMS", 4):
+        result = _execute({"type": "page", "param": "page"})
+    assert result.data == {"items": [1, 2, 3, 1], "pages": 2, "has_more": True}
+
+
+@respx.mock
+def test_error_on_later_page_keeps_fetched_items() -> None:
+    respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(200, json=[1], headers={"Link": f'<{URL}?page=2>; rel="next"'}),
+            httpx.Response(404, json={"message": "Not Found"}),
+        ]
+    )
+    result = _execute({"type": "link_header"})
+    assert result.success
+    assert result.data is not None
+    assert result.data["items"] == [1]
+    assert result.data["has_more"]
+    assert "Not Found" in result.data["error"]
+
+
+@respx.mock
+def test_pagination_not_followed_by_default() -> None:
+    route = respx.get(URL).mock(
+        return_value=httpx.Response(200, json=[1], headers={"Link": f'<{URL}?page=2>; rel="next"'})
+    )
+    result = _execute({"type": "link_header"}, follow_pagination=False)
+    assert result.data == [1]
+    assert route.call_count == 1
+
+
+def test_invalid_pagination_metadata() -> None:
+    protocol_data = {"method": "GET", "path": "/items", "server_url": "https://api.example.com"}
+    with pytest.raises(ValueError):
+        RestMetadata.model_validate(
+            {**protocol_data, "pagination": {"type": "cursor", "param": "c"}}
+        )
+    with pytest.raises(ValueError):
+        RestMetadata.model_validate({**protocol_data, "pagination": {"type": "offset"}})
+    with pytest.raises(ValueError):
+        RestMetadata.model_validate(
+            {**protocol_data, "method": "POST", "pagination": {"type": "link_header"}}
+        )
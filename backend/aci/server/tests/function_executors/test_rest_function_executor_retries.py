@@ -0,0 +1,136 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import httpx
+import pytest
+import respx
+
+from aci.server.circuit_breaker import CircuitBreakerRegistry
+from aci.server.function_executors.rest_no_auth_function_executor import (
+    RestNoAuthFunctionExecutor,
+)
+from aci.server.upstream_throttle import UpstreamThrottle
+
+URL = "https://api.example.com/items"
+
+
+def _function(method: str) -> MagicMock:
+    function = MagicMock()
+    function.name = "EXAMPLE__ITEMS"
+    function.app.name = "EXAMPLE"
+    function.app.max_concurrency = None
+    function.parameters = {"type": "object", "properties": {}, "visible": []}
+    function.protocol_data = {
+        "method": method,
+        "path": "/items",
+        "server_url": "https://api.example.com",
+    }
+    return function
+
+
+def _execute(method: str) -> bool:
+    linked_account = MagicMock()
+    linked_account.id = uuid4()
+    executor = RestNoAuthFunctionExecutor(linked_account)
+    return executor.execute(_function(method), {}, MagicMock(), MagicMock()).success
+
+
+@pytest.fixture(autouse=True)
+def mock_sleep() -> Iterator[MagicMock]:
+    """Isolate the circuit breakers and upstream throttle, and skip the backoff sleeps"""
+    module = "aci.server.function_executors.rest_function_executor"
+    with (
+        patch(f"{module}.circuit_breakers", CircuitBreakerRegistry(3, 30)),
+        patch(f"{module}.upstream_throttle", UpstreamThrottle(max_wait_seconds=1)),
+        patch(f"{module}.time.sleep") as mock_sleep,
+    ):
+        yield mock_sleep
+
+
+@respx.mock
+def test_idempotent_request_is_retried_on_503(mock_sleep: MagicMock) -> None:
+    route = respx.get(URL).mock(
+        side_effect=[httpx.Response(503), httpx.Response(503), httpx.Response(200, json={})]
+    )
+    assert _execute("GET")
+    assert route.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+@respx.mock
+def test_non_idempotent_request_is_not_retried_on_503() -> None:
+    route = respx.post(URL).mock(return_value=httpx.Response(503))
+    assert not _execute("POST")
+    assert route.call_count == 1
+
+
+@respx.mock
+def test_connect_error_is_retried_for_any_method() -> None:
+    route = respx.post(URL).mock(
+        side_effect=[httpx.ConnectError("connection refused"), httpx.Response(200, json={})]
+    )
+    assert _execute("POST")
+    assert route.call_count == 2
+
+
+@respx.mock
+def test_retry_after_is_honoured(mock_sleep: MagicMock) -> None:
+    respx.get(URL).mock(
+        side_effect=[httpx.Response(429, headers={"Retry-After": "2"}), httpx.Response(200)]
+    )
+    assert _execute("GET")
+    mock_sleep.assert_called_once_with(2.0)
+
+
+@respx.mock
+def test_long_retry_after_is_not_retried() -> None:
+    route = respx.get(URL).mock(return_value=httpx.Response(429, headers={"Retry-After": "120"}))
+    assert not _execute("GET")
+    assert route.call_count == 1
+
+
+@respx.mock
+def test_circuit_breaker_fails_fast_while_open() -> None:
+    route = respx.get(URL).mock(return_value=httpx.Response(502))
+    # 1 call + 2 retries open the breaker after the threshold of 3 failures
+    assert not _execute("GET")
+    assert route.call_count == 3
+
+    assert not _execute("GET")
+    assert route.call_count == 3
+
+
+@respx.mock
+def test_unexpected_error_ends_half_open_trial() -> None:
+    route = respx.get(URL).mock(return_value=httpx.Response(502))
+    assert not _execute("GET")
+
+    with patch("aci.server.circuit_breaker.time.monotonic", return_value=1e12):
+        route.mock(side_effect=RuntimeError("unexpected"))
+        # the trial request fails with an error that is not a transport error
+        assert not _execute("GET")
+        # and the breaker is open again, instead of waiting for the trial forever
+        route.mock(return_value=httpx.Response(200, json={}))
+        assert not _execute("GET")
+    with patch("aci.server.circuit_breaker.time.monotonic", return_value=1e12 + 31):
+        assert _execute("GET")
+
+
+@respx.mock
+def test_hedged_request_is_retried_on_503(mock_sleep: MagicMock) -> None:
+    route = respx.get(URL).mock(
+        side_effect=[httpx.Response(503), httpx.Response(200, json={"id": 1})]
+    )
+    function = _function("GET")
+    function.protocol_data["hedge"] = True
+    linked_account = MagicMock()
+    linked_account.id = uuid4()
+
+    result = RestNoAuthFunctionExecutor(linked_account).execute(
+        function, {}, MagicMock(), MagicMock()
+    )
+
+    assert result.success
+    assert result.data == {"id": 1}
+    assert route.call_count == 2
@@ -0,0 +1,144 @@
+import threading
+import time
+from email.utils import formatdate
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import httpx
+import pytest
+import respx
+
+from aci.server.function_executors.rest_no_auth_function_executor import (
+    RestNoAuthFunctionExecutor,
+)
+from aci.server.upstream_throttle import UpstreamThrottle, UpstreamThrottled
+
+
+def test_calls_are_not_throttled_without_rate_limit_headers() -> None:
+    throttle = UpstreamThrottle(max_wait_seconds=1)
+    linked_account_id = uuid4()
+    throttle.record_response("GITHUB", linked_account_id, 200, {})
+    with throttle.acquire("GITHUB", linked_account_id, None):
+        pass
+
+
+def test_exhausted_budget_fails_fast_until_reset() -> None:
+    throttle = UpstreamThrottle(max_wait_seconds=1)
+    linked_account_id = uuid4()
+    # github style epoch reset
+    throttle.record_response(
+        "GITHUB",
+        linked_account_id,
+        200,
+        {"x-ratelimit-remaining": "0", "x-ratelimit-reset": str(int(time.time()) + 60)},
+    )
+
+    with pytest.raises(UpstreamThrottled) as exc_info:
+        with throttle.acquire("GITHUB", linked_account_id, None):
+            pass
+    assert 58 < exc_info.value.retry_after <= 60
+
+    # other linked accounts and apps have their own budget
+    with throttle.acquire("GITHUB", uuid4(), None):
+        pass
+    with throttle.acquire("SLACK", linked_account_id, None):
+        pass
+
+
+def test_short_retry_after_delays_the_call() -> None:
+    throttle = UpstreamThrottle(max_wait_seconds=1)
+    linked_account_id = uuid4()
+    throttle.record_response("SLACK", linked_account_id, 429, {"retry-after": "0.2"})
+
+    start = time.monotonic()
+    with throttle.acquire("SLACK", linked_account_id, None):
+        pass
+    assert time.monotonic() - start >= 0.2
+
+
+def test_retry_after_http_date() -> None:
+    throttle = UpstreamThrottle(max_wait_seconds=1)
+    linked_account_id = uuid4()
+    throttle.record_response(
+        "SLACK", linked_account_id, 503, {"retry-after": formatdate(time.time() + 30, usegmt=True)}
+    )
+    with pytest.raises(UpstreamThrottled):
+        with throttle.acquire("SLACK", linked_account_id, None):
+            pass
+
+
+def test_remaining_budget_is_reserved_by_calls() -> None:
+    throttle = UpstreamThrottle(max_wait_seconds=1)
+    linked_account_id = uuid4()
+    # draft standard style delta reset
+    throttle.record_response(
+        "GITHUB", linked_account_id, 200, {"ratelimit-remaining": "2", "ratelimit-reset": "60"}
+    )
+    for _ in range(2):
+        with throttle.acquire("GITHUB", linked_account_id, None):
+            pass
+    with pytest.raises(UpstreamThrottled):
+        with throttle.acquire("GITHUB", linked_account_id, None):
+            pass
+
+
+def test_max_concurrency() -> None:
+    throttle = UpstreamThrottle(max_wait_seconds=0.1)
+    in_flight = threading.Event()
+    release = threading.Event()
+
+    def hold_slot() -> None:
+        with throttle.acquire("GITHUB", uuid4(), 1):
+            in_flight.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold_slot)
+    thread.start()
+    in_flight.wait()
+    try:
+        with pytest.raises(UpstreamThrottled):
+            with throttle.acquire("GITHUB", uuid4(), 1):
+                pass
+        # no cap for other apps
+        with throttle.acquire("SLACK", uuid4(), None):
+            pass
+    finally:
+        release.set()
+        thread.join()
+
+    with throttle.acquire("GITHUB", uuid4(), 1):
+        pass
+
+
+@respx.mock
+def test_rest_function_executor_skips_upstream_while_throttled() -> None:
+    linked_account = MagicMock()
+    linked_account.id = uuid4()
+    function = MagicMock()
+    function.name = "GITHUB__LIST_REPOS"
+    function.app.name = "GITHUB"
+    function.app.max_concurrency = None
+    function.parameters = {"type": "object", "properties": {}, "visible": []}
+    function.protocol_data = {
+        "method": "GET",
+        "path": "/repos",
+        "server_url": "https://api.github.com",
+    }
+    route = respx.get("https://api.github.com/repos").mock(
+        return_value=httpx.Response(
+            429, json={"message": "slow down"}, headers={"Retry-After": "60"}
+        )
+    )
+
+    with patch(
+        "aci.server.function_executors.rest_function_executor.upstream_throttle",
+        UpstreamThrottle(max_wait_seconds=1),
+    ):
+        executor = RestNoAuthFunctionExecutor(linked_account)
+        result = executor.execute(function, {}, MagicMock(), MagicMock())
+        assert not result.success
+        result = executor.execute(function, {}, MagicMock(), MagicMock())
+        assert not result.success
+        assert result.error is not None and "upstream rate limit reached" in result.error
+
+    assert route.call_count == 1
@@ -0,0 +1,105 @@
+from collections.abc import AsyncIterator
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from limits import RateLimitItemPerDay, RateLimitItemPerSecond
+
+from aci.server.context import request_id_ctx_var
+from aci.server.middleware.interceptor import InterceptorMiddleware
+from aci.server.middleware.ratelimit import RateLimitMiddleware
+from aci.server.middleware.session import PathScopedSessionMiddleware
+
+
+def _create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/request-id")
+    async def get_request_id() -> dict:
+        return {"request_id": request_id_ctx_var.get()}
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks() -> AsyncIterator[str]:
+            for i in range(3):
+                yield f"chunk-{i}\n"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/error")
+    async def error() -> None:
+        raise RuntimeError("boom")
+
+    @app.get("/oauth2/session")
+    async def oauth2_session(request: Request) -> dict:
+        request.session["visited"] = True
+        return {}
+
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(
+        PathScopedSessionMiddleware, path_prefixes=["/oauth2"], secret_key="test-secret"
+    )
+    app.add_middleware(InterceptorMiddleware)
+    return app
+
+
+def test_request_id_is_set_in_context_and_response_header() -> None:
+    client = TestClient(_create_app())
+
+    response = client.get("/request-id")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["X-Request-ID"] == response.json()["request_id"]
+    assert "X-RateLimit-Limit-ip-per-second" in response.headers
+
+
+def test_streaming_response_is_passed_through() -> None:
+    client = TestClient(_create_app())
+
+    with client.stream("GET", "/stream") as response:
+        chunks = list(response.iter_lines())
+
+    assert response.status_code == status.HTTP_200_OK
+    assert chunks == ["chunk-0", "chunk-1", "chunk-2"]
+    assert "X-Request-ID" in response.headers
+    assert "X-RateLimit-Remaining-ip-per-second" in response.headers
+
+
+def test_unhandled_exception_returns_500() -> None:
+    client = TestClient(_create_app(), raise_server_exceptions=False)
+
+    response = client.get("/error")
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert response.json() == {"error": "Internal server error"}
+    assert "X-Request-ID" in response.headers
+
+
+def test_rate_limit_exceeded() -> None:
+    app = _create_app()
+    client = TestClient(app)
+    # build the middleware stack and find the rate limit middleware instance
+    client.get("/request-id")
+    layer = app.middleware_stack
+    while not isinstance(layer, RateLimitMiddleware):
+        layer = layer.app  # type: ignore
+    layer.rate_limits = {
+        "ip-per-second": RateLimitItemPerSecond(9999),
+        "ip-per-day": RateLimitItemPerDay(1),
+    }
+
+    assert client.get("/request-id").status_code == status.HTTP_200_OK
+    response = client.get("/request-id")
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["x-ratelimit-remaining-ip-per-day"] == "0"
+
+
+def test_session_cookie_only_on_scoped_paths() -> None:
+    client = TestClient(_create_app())
+
+    assert "session" not in client.get("/request-id").cookies
+
+    response = client.get("/oauth2/session")
+    assert response.status_code == status.HTTP_200_OK
+    assert "session" in response.cookies
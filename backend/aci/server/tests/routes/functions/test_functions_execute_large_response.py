@@ -0,0 +1,65 @@
+from unittest.mock import patch
+from uuid import uuid4
+
+import httpx
+import respx
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from aci.common.db.sql_models import Agent, Function, LinkedAccount
+from aci.common.schemas.function import FunctionExecute, FunctionExecutionResult
+from aci.server import config
+
+LARGE_BODY = b"x" * 2000
+
+
+@respx.mock
+def test_execute_function_large_response_as_blob(
+    db_session: Session,
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_function_aci_test__hello_world_no_args: Function,
+    dummy_linked_account_api_key_aci_test_project_1: LinkedAccount,
+) -> None:
+    function = dummy_function_aci_test__hello_world_no_args
+    function.protocol_data = {**function.protocol_data, "large_response_as_blob": True}
+    db_session.commit()
+    respx.get("https://api.mock.aci.com/v1/hello_world_no_args").mock(
+        return_value=httpx.Response(200, content=LARGE_BODY, headers={"content-type": "text/plain"})
+    )
+
+    function_execute = FunctionExecute(
+        linked_account_owner_id=dummy_linked_account_api_key_aci_test_project_1.linked_account_owner_id,
+    )
+    api_key = dummy_agent_1_with_all_apps_allowed.api_keys[0].key
+    with patch("aci.server.config.FUNCTION_RESPONSE_MAX_BYTES", 1000):
+        response = test_client.post(
+            f"{config.ROUTER_PREFIX_FUNCTIONS}/{function.name}/execute",
+            json=function_execute.model_dump(mode="json"),
+            headers={"x-api-key": api_key},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    function_execution_response = FunctionExecutionResult.model_validate(response.json())
+    assert function_execution_response.success
+    assert function_execution_response.data is not None
+    response_blob = function_execution_response.data["response_blob"]
+    assert response_blob["size_bytes"] == len(LARGE_BODY)
+    assert not response_blob["truncated"]
+
+    response = test_client.get(response_blob["url"], headers={"x-api-key": api_key})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == LARGE_BODY
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_get_function_response_blob_not_found(
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+) -> None:
+    response = test_client.get(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/response-blobs/{uuid4()}",
+        headers={"x-api-key": dummy_agent_1_with_all_apps_allowed.api_keys[0].key},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
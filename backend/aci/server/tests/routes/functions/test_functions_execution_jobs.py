@@ -0,0 +1,89 @@
+from uuid import uuid4
+
+import httpx
+import respx
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from aci.common.db.sql_models import Agent, Function, LinkedAccount
+from aci.common.enums import FunctionExecutionJobStatus
+from aci.common.schemas.function import FunctionExecute, FunctionExecutionJobPublic
+from aci.server import config
+
+
+@respx.mock
+def test_submit_function_execution_job_and_poll_result(
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_function_aci_test__hello_world_no_args: Function,
+    dummy_linked_account_api_key_aci_test_project_1: LinkedAccount,
+) -> None:
+    response_data = {"message": "Hello, test_mock_execute_function_with_no_args!"}
+    mock_request = respx.get("https://api.mock.aci.com/v1/hello_world_no_args").mock(
+        return_value=httpx.Response(200, json=response_data)
+    )
+
+    function_execute = FunctionExecute(
+        linked_account_owner_id=dummy_linked_account_api_key_aci_test_project_1.linked_account_owner_id,
+    )
+    api_key = dummy_agent_1_with_all_apps_allowed.api_keys[0].key
+    response = test_client.post(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/{dummy_function_aci_test__hello_world_no_args.name}/execution-jobs",
+        json=function_execute.model_dump(mode="json"),
+        headers={"x-api-key": api_key},
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = FunctionExecutionJobPublic.model_validate(response.json())
+    assert job.status == FunctionExecutionJobStatus.PENDING
+    assert job.result is None
+
+    # long poll until the background runner has executed the job
+    response = test_client.get(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/execution-jobs/{job.id}",
+        params={"wait_seconds": 10},
+        headers={"x-api-key": api_key},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    job = FunctionExecutionJobPublic.model_validate(response.json())
+    assert job.status == FunctionExecutionJobStatus.SUCCEEDED
+    assert job.result is not None
+    assert job.result.success
+    assert job.result.data == response_data
+    assert mock_request.called
+
+
+def test_submit_function_execution_job_function_not_found(
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+) -> None:
+    api_key = dummy_agent_1_with_all_apps_allowed.api_keys[0].key
+    response = test_client.post(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/ACI_TEST__NON_EXISTENT/execution-jobs",
+        json=FunctionExecute(linked_account_owner_id="owner").model_dump(mode="json"),
+        headers={"x-api-key": api_key},
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job_id = response.json()["id"]
+
+    response = test_client.get(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/execution-jobs/{job_id}",
+        params={"wait_seconds": 10},
+        headers={"x-api-key": api_key},
+    )
+    job = FunctionExecutionJobPublic.model_validate(response.json())
+    assert job.status == FunctionExecutionJobStatus.FAILED
+    assert job.result is not None
+    assert not job.result.success
+    assert job.result.error is not None
+    assert "not found" in job.result.error
+
+
+def test_get_function_execution_job_not_found(
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+) -> None:
+    response = test_client.get(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/execution-jobs/{uuid4()}",
+        headers={"x-api-key": dummy_agent_1_with_all_apps_allowed.api_keys[0].key},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
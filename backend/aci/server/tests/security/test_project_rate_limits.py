@@ -0,0 +1,108 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi import Response
+from limits import RateLimitItemPerMinute
+
+from aci.common.exceptions import RateLimitExceeded
+from aci.common.schemas.plans import PlanFeatures, PlanRateLimits
+from aci.server import config, rate_limiting
+from aci.server.rate_limit_storage import MemoryRateLimitStorage
+from aci.server.rate_limiting import ProjectRateLimits
+
+
+def _plan(rate_limits: PlanRateLimits) -> MagicMock:
+    plan = MagicMock()
+    plan.features = PlanFeatures(
+        linked_accounts=1,
+        api_calls_monthly=1,
+        agent_credentials=1,
+        developer_seats=1,
+        custom_oauth=False,
+        log_retention_days=1,
+        rate_limits=rate_limits,
+    ).model_dump()
+    return plan
+
+
+def test_get_project_rate_limits_fills_in_server_defaults() -> None:
+    org_id = uuid4()
+    plan = _plan(PlanRateLimits(api_key_per_minute=5))
+    with patch.object(rate_limiting.crud.plans, "get_by_org_id", return_value=plan) as get_plan:
+        rate_limits = rate_limiting.get_project_rate_limits(MagicMock(), org_id)
+        # cached
+        assert rate_limiting.get_project_rate_limits(MagicMock(), org_id) is rate_limits
+        assert get_plan.call_count == 1
+
+    assert rate_limits == ProjectRateLimits(
+        api_key_per_minute=5,
+        project_per_minute=config.RATE_LIMIT_PROJECT_PER_MINUTE,
+        project_app_per_minute=config.RATE_LIMIT_PROJECT_APP_PER_MINUTE,
+    )
+
+
+def test_get_project_rate_limits_falls_back_to_free_plan() -> None:
+    free_plan = _plan(PlanRateLimits(project_per_minute=7))
+    with (
+        patch.object(rate_limiting.crud.plans, "get_by_org_id", return_value=None),
+        patch.object(
+            rate_limiting.crud.plans, "get_by_name", return_value=free_plan
+        ) as get_by_name,
+    ):
+        rate_limits = rate_limiting.get_project_rate_limits(MagicMock(), uuid4())
+
+    assert get_by_name.call_args.args[1] == rate_limiting.FREE_PLAN_NAME
+    assert rate_limits.project_per_minute == 7
+    assert rate_limits.api_key_per_minute == config.RATE_LIMIT_API_KEY_PER_MINUTE
+
+
+def test_plan_features_without_rate_limits_are_valid() -> None:
+    # plans created before rate limits were configurable
+    features = _plan(PlanRateLimits()).features
+    del features["rate_limits"]
+    assert PlanFeatures.model_validate(features).rate_limits == PlanRateLimits()
+
+
+def test_enforce_rate_limits_sets_headers_of_most_restrictive_limit() -> None:
+    async def run() -> None:
+        response = Response()
+        await rate_limiting.enforce_rate_limits(
+            response,
+            {"api_key:1": RateLimitItemPerMinute(10), "project:1": RateLimitItemPerMinute(3)},
+        )
+        assert response.headers["RateLimit-Limit"] == "3"
+        assert response.headers["RateLimit-Remaining"] == "2"
+        assert 0 < int(response.headers["RateLimit-Reset"]) <= 60
+
+        for _ in range(2):
+            await rate_limiting.enforce_rate_limits(
+                Response(), {"project:1": RateLimitItemPerMinute(3)}
+            )
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            await rate_limiting.enforce_rate_limits(
+                Response(), {"project:1": RateLimitItemPerMinute(3)}
+            )
+        assert exc_info.value.error_code == 429
+        assert exc_info.value.headers is not None
+        assert exc_info.value.headers["RateLimit-Remaining"] == "0"
+        assert 0 < int(exc_info.value.headers["Retry-After"]) <= 20
+
+    with patch.object(
+        rate_limiting, "get_rate_limit_storage", return_value=MemoryRateLimitStorage()
+    ):
+        asyncio.run(run())
+
+
+def test_enforce_rate_limits_fails_open() -> None:
+    storage = MagicMock()
+    storage.hit.side_effect = ConnectionError("storage unavailable")
+
+    async def run() -> None:
+        response = Response()
+        await rate_limiting.enforce_rate_limits(response, {"api_key:1": RateLimitItemPerMinute(1)})
+        assert "RateLimit-Limit" not in response.headers
+
+    with patch.object(rate_limiting, "get_rate_limit_storage", return_value=storage):
+        asyncio.run(run())
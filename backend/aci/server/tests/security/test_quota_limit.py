@@ -21,6 +21,7 @@ def test_validate_project_quota_valid(test_client: TestClient, dummy_api_key_1:
     project.daily_quota_reset_at = datetime.now(UTC)
     project.daily_quota_used = config.PROJECT_DAILY_QUOTA - 1
     project.id = uuid4()
+    project.org_id = uuid4()
     with (
         patch(
             "aci.server.dependencies.crud.projects.get_project_by_api_key_id",
@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import math
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+from limits import RateLimitItem, RateLimitItemPerMinute, RateLimitItemPerSecond
+
+from aci.server.rate_limit_storage import (
+    MemoryRateLimitStorage,
+    PreallocatingRateLimitStorage,
+    RateLimitResult,
+    RateLimitStorage,
+    RedisConnection,
+    RedisRateLimitStorage,
+    gcra_update,
+)
+
+
+def test_gcra_allows_burst_then_one_request_per_emission_interval() -> None:
+    rate_limit = RateLimitItemPerSecond(4)
+    now = 1000.0
+    tat = None
+    for expected_remaining in (3, 2, 1, 0):
+        tat, result = gcra_update(tat, now, rate_limit, 1)
+        assert result.allowed
+        assert result.remaining == expected_remaining
+
+    new_tat, result = gcra_update(tat, now, rate_limit, 1)
+    assert new_tat is None
+    assert not result.allowed
+    assert math.isclose(result.retry_after, 0.25)
+    assert math.isclose(result.reset_after, 1.0)
+
+    # one emission interval later, exactly one more request is allowed
+    tat, result = gcra_update(tat, now + 0.25, rate_limit, 1)
+    assert result.allowed
+    assert result.remaining == 0
+
+
+def test_gcra_cost() -> None:
+    rate_limit = RateLimitItemPerSecond(10)
+    tat, result = gcra_update(None, 0.0, rate_limit, 7)
+    assert result.allowed
+    assert result.remaining == 3
+
+    _, result = gcra_update(tat, 0.0, rate_limit, 4)
+    assert not result.allowed
+    assert result.remaining == 3
+
+
+def test_memory_storage_keys_are_independent() -> None:
+    async def run() -> None:
+        storage = MemoryRateLimitStorage()
+        rate_limit = RateLimitItemPerMinute(1)
+        assert (await storage.hit("ip:1.1.1.1", rate_limit)).allowed
+        assert not (await storage.hit("ip:1.1.1.1", rate_limit)).allowed
+        assert (await storage.hit("ip:2.2.2.2", rate_limit)).allowed
+        # a different limit for the same key has its own state
+        assert (await storage.hit("ip:1.1.1.1", RateLimitItemPerMinute(2))).allowed
+        # can never be allowed
+        assert not (await storage.hit("ip:3.3.3.3", rate_limit, cost=2)).allowed
+
+    asyncio.run(run())
+
+
+@asynccontextmanager
+async def _fake_redis_server() -> AsyncIterator[tuple[int, list[list[str]]]]:
+    """
+    A local stand-in speaking the Redis protocol, implementing EVALSHA/EVAL of the GCRA script
+    with the python implementation. Scripts are unknown until loaded with EVAL, like on a fresh
+    redis server.
+    """
+    tats: dict[str, float] = {}
+    loaded_scripts: set[str] = set()
+    commands: list[list[str]] = []
+
+    async def read_command(reader: asyncio.StreamReader) -> list[str]:
+        num_args = int((await reader.readuntil(b"\r\n"))[1:-2])
+        args = []
+        for _ in range(num_args):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                args = await read_command(reader)
+                commands.append(args)
+                if args[0] == "EVALSHA" and args[1] not in loaded_scripts:
+                    writer.write(b"-NOSCRIPT No matching script.\r\n")
+                else:
+                    if args[0] == "EVAL":
+                        loaded_scripts.add(hashlib.sha1(args[1].encode()).hexdigest())
+                    key, period, emission_interval, cost = args[3:7]
+                    rate_limit = RateLimitItemPerSecond(
+                        round(float(period) / float(emission_interval))
+                    )
+                    now = time.time()
+                    new_tat, result = gcra_update(tats.get(key), now, rate_limit, int(cost))
+                    if new_tat is not None:
+                        tats[key] = new_tat
+                    values = [
+                        int(result.allowed),
+                        result.remaining,
+                        math.ceil(result.reset_after * 1000),
+                        math.ceil(result.retry_after * 1000),
+                    ]
+                    writer.write(b"*4\r\n" + b"".join(b":%d\r\n" % value for value in values))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    async with server:
+        yield server.sockets[0].getsockname()[1], commands
+
+
+def test_redis_storage_against_local_stand_in() -> None:
+    async def run() -> None:
+        async with _fake_redis_server() as (port, commands):
+            storage = RedisRateLimitStorage.from_uri(f"redis://127.0.0.1:{port}", 1)
+            rate_limit = RateLimitItemPerSecond(2)
+
+            results = [await storage.hit("ip:1.1.1.1", rate_limit) for _ in range(3)]
+            await storage.close()
+
+        assert [result.allowed for result in results] == [True, True, False]
+        assert [result.remaining for result in results] == [1, 0, 0]
+        assert 0 < results[2].retry_after <= 0.5
+        # the script is only sent once, after which it is called by its sha
+        assert [command[0] for command in commands] == ["EVALSHA", "EVAL", "EVALSHA", "EVALSHA"]
+        assert commands[1][3] == "aci:ratelimit:" + rate_limit.key_for("ip:1.1.1.1")
+
+    asyncio.run(run())
+
+
+def test_redis_connection_reconnects_after_connection_loss() -> None:
+    async def run() -> None:
+        async with _fake_redis_server() as (port, _):
+            connection = RedisConnection("127.0.0.1", port, 0, None, 1)
+            storage = RedisRateLimitStorage(connection)
+            assert (await storage.hit("key", RateLimitItemPerSecond(10))).allowed
+            assert connection._writer is not None
+            connection._writer.close()
+            try:
+                await storage.hit("key", RateLimitItemPerSecond(10))
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+            assert (await storage.hit("key", RateLimitItemPerSecond(10))).allowed
+            await storage.close()
+
+    asyncio.run(run())
+
+
+@asynccontextmanager
+async def _stalled_redis_server() -> AsyncIterator[tuple[int, asyncio.Event]]:
+    """A server that reads commands but never replies, the event is set on the first command."""
+    received = asyncio.Event()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await reader.readuntil(b"\r\n")
+        received.set()
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    async with server:
+        yield server.sockets[0].getsockname()[1], received
+
+
+def test_redis_connection_times_out_on_stalled_server() -> None:
+    async def run() -> None:
+        async with _stalled_redis_server() as (port, _):
+            connection = RedisConnection("127.0.0.1", port, 0, None, 0.1)
+            storage = RedisRateLimitStorage(connection)
+            # queued behind the stalled command, also bounded by the timeout
+            results = await asyncio.gather(
+                storage.hit("key", RateLimitItemPerSecond(10)),
+                storage.hit("key", RateLimitItemPerSecond(10)),
+                return_exceptions=True,
+            )
+            assert all(isinstance(result, TimeoutError) for result in results)
+            # the reply of the timed out command must not be read by the next one
+            assert connection._writer is None
+            await storage.close()
+
+    asyncio.run(run())
+
+
+def test_redis_connection_is_dropped_when_cancelled_mid_command() -> None:
+    async def run() -> None:
+        async with _stalled_redis_server() as (port, received):
+            connection = RedisConnection("127.0.0.1", port, 0, None, 10)
+            task = asyncio.create_task(connection.execute("PING"))
+            await received.wait()
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            assert connection._writer is None
+            await connection.close()
+
+    asyncio.run(run())
+
+
+class _CountingStorage(RateLimitStorage):
+    def __init__(self) -> None:
+        self.storage = MemoryRateLimitStorage()
+        self.costs: list[int] = []
+
+    async def hit(self, key: str, rate_limit: RateLimitItem, cost: int = 1) -> RateLimitResult:
+        self.costs.append(cost)
+        # yield like a roundtrip to a shared store would
+        await asyncio.sleep(0)
+        return await self.storage.hit(key, rate_limit, cost)
+
+
+def test_preallocating_storage_takes_tokens_in_batches() -> None:
+    async def run() -> None:
+        shared_storage = _CountingStorage()
+        storage = PreallocatingRateLimitStorage(shared_storage, batch_size=5)
+        rate_limit = RateLimitItemPerMinute(100)
+
+        results = [await storage.hit("key", rate_limit) for _ in range(12)]
+        assert all(result.allowed for result in results)
+        # the key is preallocated once it is hot
+        assert shared_storage.costs == [1, 1, 1, 1, 1, 5, 5]
+        # tokens held locally count as remaining
+        assert results[0].remaining == 99
+        assert results[11].remaining == 88
+
+        # small limits are not preallocated
+        await storage.hit("key", RateLimitItemPerMinute(10))
+        assert shared_storage.costs[-1] == 1
+
+    asyncio.run(run())
+
+
+def test_preallocating_storage_falls_back_to_single_hits_near_the_limit() -> None:
+    async def run() -> None:
+        shared_storage = _CountingStorage()
+        storage = PreallocatingRateLimitStorage(shared_storage, batch_size=5)
+        rate_limit = RateLimitItemPerMinute(50)
+
+        results = [await storage.hit("key", rate_limit) for _ in range(52)]
+        assert [result.allowed for result in results] == [True] * 50 + [False] * 2
+
+    asyncio.run(run())
+
+
+def test_preallocated_tokens_expire() -> None:
+    async def run() -> None:
+        shared_storage = _CountingStorage()
+        storage = PreallocatingRateLimitStorage(shared_storage, batch_size=5, max_age_seconds=1)
+        rate_limit = RateLimitItemPerMinute(100)
+
+        now = time.time()
+        with patch("aci.server.rate_limit_storage.time.time", return_value=now):
+            for _ in range(6):
+                await storage.hit("key", rate_limit)
+        # still hot from the previous window
+        with patch("aci.server.rate_limit_storage.time.time", return_value=now + 1.5):
+            await storage.hit("key", rate_limit)
+        assert shared_storage.costs == [1, 1, 1, 1, 1, 5, 5]
+
+    asyncio.run(run())
+
+
+def test_low_rate_keys_are_not_preallocated() -> None:
+    async def run() -> None:
+        shared_storage = _CountingStorage()
+        storage = PreallocatingRateLimitStorage(shared_storage, batch_size=5, max_age_seconds=1)
+        rate_limit = RateLimitItemPerMinute(100)
+
+        now = time.time()
+        for i in range(20):
+            # 2 requests per second, less than a batch every max_age_seconds
+            with patch("aci.server.rate_limit_storage.time.time", return_value=now + i * 0.5):
+                result = await storage.hit("key", rate_limit)
+            assert result.allowed
+        # only the tokens actually used are charged
+        assert shared_storage.costs == [1] * 20
+
+    asyncio.run(run())
+
+
+def test_concurrent_hits_allocate_a_single_batch() -> None:
+    async def run() -> None:
+        shared_storage = _CountingStorage()
+        storage = PreallocatingRateLimitStorage(shared_storage, batch_size=5)
+        rate_limit = RateLimitItemPerMinute(100)
+
+        for _ in range(5):
+            await storage.hit("key", rate_limit)
+        results = await asyncio.gather(*(storage.hit("key", rate_limit) for _ in range(5)))
+        assert all(result.allowed for result in results)
+        # the other hits don't wait for the batch, they hit the shared storage
+        assert shared_storage.costs[5:] == [5, 1, 1, 1, 1]
+
+    asyncio.run(run())
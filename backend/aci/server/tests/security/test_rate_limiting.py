@@ -10,6 +10,7 @@ from limits import RateLimitItemPerDay, RateLimitItemPerSecond
 from aci.server import config
 from aci.server.main import app as fastapi_app
 from aci.server.middleware.ratelimit import RateLimitMiddleware
+from aci.server.rate_limiting import ProjectRateLimits
 
 logger = logging.getLogger(__name__)
 
@@ -104,3 +105,28 @@ def test_rate_limiting_ip_per_day(test_client: TestClient, dummy_api_key_1: str)
             headers={"x-api-key": dummy_api_key_1},
         )
         assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_rate_limiting_api_key_per_minute(test_client: TestClient, dummy_api_key_1: str) -> None:
+    with patch(
+        "aci.server.dependencies.rate_limiting.get_project_rate_limits",
+        return_value=ProjectRateLimits(
+            api_key_per_minute=1, project_per_minute=9999, project_app_per_minute=9999
+        ),
+    ):
+        response = test_client.get(
+            f"{config.ROUTER_PREFIX_APPS}/search",
+            headers={"x-api-key": dummy_api_key_1},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["RateLimit-Limit"] == "1"
+        assert response.headers["RateLimit-Remaining"] == "0"
+
+        response = test_client.get(
+            f"{config.ROUTER_PREFIX_APPS}/search",
+            headers={"x-api-key": dummy_api_key_1},
+        )
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert str(response.json()["error"]).startswith("Rate limit exceeded")
+        assert 0 < int(response.headers["Retry-After"]) <= 60
+        assert response.headers["RateLimit-Remaining"] == "0"
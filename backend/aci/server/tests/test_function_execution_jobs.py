@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import patch
+from uuid import UUID, uuid4
+
+from aci.server.function_execution_jobs import FunctionExecutionJobRunner
+
+
+def _make_runner(max_workers: int = 2, max_queued: int = 10) -> FunctionExecutionJobRunner:
+    return FunctionExecutionJobRunner(
+        max_workers=max_workers,
+        max_queued=max_queued,
+        sweep_interval_seconds=60,
+        timeout_seconds=600,
+        retention_seconds=3600,
+    )
+
+
+def test_jobs_run_on_bounded_workers() -> None:
+    async def run() -> None:
+        runner = _make_runner(max_workers=2)
+        running = 0
+        max_running = 0
+        ran: list[UUID] = []
+
+        async def run_job(job_id: UUID) -> None:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            ran.append(job_id)
+
+        with patch.object(FunctionExecutionJobRunner, "sweep", return_value=[]):
+            runner.start(run_job)
+            job_ids = [uuid4() for _ in range(6)]
+            for job_id in job_ids:
+                assert runner.submit(job_id)
+            await asyncio.sleep(0.2)
+            await runner.stop()
+
+        assert sorted(ran) == sorted(job_ids)
+        assert max_running == 2
+
+    asyncio.run(run())
+
+
+def test_full_queue_leaves_jobs_to_the_sweep() -> None:
+    async def run() -> None:
+        runner = _make_runner(max_workers=1, max_queued=1)
+        release = asyncio.Event()
+
+        async def run_job(job_id: UUID) -> None:
+            await release.wait()
+
+        # not started
+        assert not runner.submit(uuid4())
+
+        with patch.object(FunctionExecutionJobRunner, "sweep", return_value=[]):
+            runner.start(run_job)
+            assert runner.submit(uuid4())
+            await asyncio.sleep(0)  # picked up by the worker
+            queued_job_id = uuid4()
+            assert runner.submit(queued_job_id)
+            # already queued
+            assert not runner.submit(queued_job_id)
+            # queue full
+            assert not runner.submit(uuid4())
+            release.set()
+            await runner.stop()
+
+    asyncio.run(run())
+
+
+def test_swept_jobs_are_run_and_failing_jobs_dont_stop_workers() -> None:
+    async def run() -> None:
+        runner = _make_runner(max_workers=1)
+        swept_job_id = uuid4()
+        ran: list[UUID] = []
+
+        async def run_job(job_id: UUID) -> None:
+            ran.append(job_id)
+            if job_id == swept_job_id:
+                raise RuntimeError("boom")
+
+        with patch.object(FunctionExecutionJobRunner, "sweep", return_value=[swept_job_id]):
+            runner.start(run_job)
+            await asyncio.sleep(0.01)
+            submitted_job_id = uuid4()
+            assert runner.submit(submitted_job_id)
+            await asyncio.sleep(0.01)
+            await runner.stop()
+
+        assert ran == [swept_job_id, submitted_job_id]
+
+    asyncio.run(run())
@@ -0,0 +1,170 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from aci.common.schemas.function import FunctionExecutionResult, RestMetadata
+from aci.server.function_result_cache import FunctionResultCache, make_cache_key
+
+
+def _counting_execution(
+    result: FunctionExecutionResult, delay_seconds: float = 0
+) -> tuple[list[int], Callable[[], Awaitable[FunctionExecutionResult]]]:
+    calls = [0]
+
+    async def execute() -> FunctionExecutionResult:
+        calls[0] += 1
+        await asyncio.sleep(delay_seconds)
+        return result
+
+    return calls, execute
+
+
+def test_cache_key_is_canonical() -> None:
+    linked_account_id = uuid4()
+    key = make_cache_key(
+        "GITHUB__GET_REPO",
+        linked_account_id,
+        {"path": {"owner": "aipotheosis", "repo": "aci"}},
+        None,
+        False,
+    )
+    assert key == make_cache_key(
+        "GITHUB__GET_REPO",
+        linked_account_id,
+        {"path": {"repo": "aci", "owner": "aipotheosis"}},
+        None,
+        False,
+    )
+    assert key != make_cache_key(
+        "GITHUB__GET_REPO", uuid4(), {"path": {"owner": "aipotheosis", "repo": "aci"}}, None, False
+    )
+    assert key != make_cache_key(
+        "GITHUB__GET_REPO",
+        linked_account_id,
+        {"path": {"owner": "aipotheosis", "repo": "web"}},
+        None,
+        False,
+    )
+    assert key != make_cache_key(
+        "GITHUB__GET_REPO",
+        linked_account_id,
+        {"path": {"owner": "aipotheosis", "repo": "aci"}},
+        {"name": None},
+        False,
+    )
+    assert key != make_cache_key(
+        "GITHUB__GET_REPO",
+        linked_account_id,
+        {"path": {"owner": "aipotheosis", "repo": "aci"}},
+        None,
+        True,
+    )
+
+
+def test_successful_results_are_cached_until_ttl() -> None:
+    cache = FunctionResultCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+    calls, execute = _counting_execution(FunctionExecutionResult(success=True, data={"price": 1}))
+
+    async def run() -> None:
+        result = await cache.get_or_execute("key", 60, execute)
+        assert result.cached is None
+        result = await cache.get_or_execute("key", 60, execute)
+        assert result.cached
+        assert result.data == {"price": 1}
+        assert calls[0] == 1
+
+        with patch("aci.server.function_result_cache.time.monotonic", return_value=1e12):
+            result = await cache.get_or_execute("key", 60, execute)
+        assert result.cached is None
+        assert calls[0] == 2
+
+    asyncio.run(run())
+
+
+def test_failed_results_are_not_cached() -> None:
+    cache = FunctionResultCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+    calls, execute = _counting_execution(FunctionExecutionResult(success=False, error="500"))
+
+    async def run() -> None:
+        await cache.get_or_execute("key", 60, execute)
+        result = await cache.get_or_execute("key", 60, execute)
+        assert result.cached is None
+        assert calls[0] == 2
+
+    asyncio.run(run())
+
+
+def test_concurrent_identical_executions_are_coalesced() -> None:
+    cache = FunctionResultCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+    calls, execute = _counting_execution(
+        FunctionExecutionResult(success=True, data={}), delay_seconds=0.05
+    )
+
+    async def run() -> None:
+        results = await asyncio.gather(
+            *(cache.get_or_execute("key", 60, execute) for _ in range(5))
+        )
+        assert calls[0] == 1
+        assert sum(1 for result in results if result.cached) == 4
+
+    asyncio.run(run())
+
+
+def test_coalesced_executions_share_the_error() -> None:
+    cache = FunctionResultCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+
+    async def execute() -> FunctionExecutionResult:
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    async def run() -> None:
+        results = await asyncio.gather(
+            *(cache.get_or_execute("key", 60, execute) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_results_are_evicted() -> None:
+    result = FunctionExecutionResult(success=True, data="x" * 100)
+    entry_bytes = len(result.model_dump_json())
+    cache = FunctionResultCache(max_bytes=entry_bytes * 2, max_entry_bytes=entry_bytes)
+    calls, execute = _counting_execution(result)
+
+    async def run() -> None:
+        await cache.get_or_execute("a", 60, execute)
+        await cache.get_or_execute("b", 60, execute)
+        # a is now more recently used than b
+        await cache.get_or_execute("a", 60, execute)
+        await cache.get_or_execute("c", 60, execute)
+        assert calls[0] == 3
+
+        assert (await cache.get_or_execute("a", 60, execute)).cached
+        assert (await cache.get_or_execute("c", 60, execute)).cached
+        assert (await cache.get_or_execute("b", 60, execute)).cached is None
+
+    asyncio.run(run())
+
+
+def test_large_results_are_not_cached() -> None:
+    cache = FunctionResultCache(max_bytes=1024 * 1024, max_entry_bytes=10)
+    calls, execute = _counting_execution(FunctionExecutionResult(success=True, data="x" * 100))
+
+    async def run() -> None:
+        await cache.get_or_execute("key", 60, execute)
+        await cache.get_or_execute("key", 60, execute)
+        assert calls[0] == 2
+
+    asyncio.run(run())
+
+
+def test_cache_ttl_only_for_get_functions() -> None:
+    protocol_data = {"method": "POST", "path": "/repos", "server_url": "https://api.github.com"}
+    with pytest.raises(ValueError):
+        RestMetadata.model_validate({**protocol_data, "cache_ttl_seconds": 60})
+    with pytest.raises(ValueError):
+        RestMetadata.model_validate({**protocol_data, "method": "GET", "cache_ttl_seconds": 0})
@@ -0,0 +1,216 @@
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from aci.common.db.sql_models import BackgroundJob
+from aci.common.enums import BackgroundJobStatus
+from aci.server.job_queue import JobWorker, enqueue_job, get_retry_delay_seconds, job_handler
+
+
+class GreetingPayload(BaseModel):
+    name: str
+
+
+@pytest.fixture(autouse=True)
+def isolated_job_handlers() -> Iterator[None]:
+    with patch.dict("aci.server.job_queue._job_handlers", clear=True):
+        yield
+
+
+@pytest.fixture
+def mock_crud() -> Iterator[MagicMock]:
+    with (
+        patch("aci.server.job_queue.utils.get_db_session_factory"),
+        patch("aci.server.job_queue.crud.background_jobs") as mock_background_jobs,
+    ):
+        yield mock_background_jobs
+
+
+def _make_job(payload: dict, attempts: int = 1, max_attempts: int = 3) -> BackgroundJob:
+    job = BackgroundJob(
+        job_type="greet",
+        payload=payload,
+        status=BackgroundJobStatus.RUNNING,
+        attempts=attempts,
+        max_attempts=max_attempts,
+        run_at=datetime.now(),
+        locked_by="worker",
+        last_error=None,
+    )
+    job.id = uuid4()
+    return job
+
+
+def _make_worker() -> JobWorker:
+    return JobWorker(
+        worker_id="worker",
+        concurrency=2,
+        poll_interval_seconds=0.01,
+        visibility_timeout_seconds=1,
+        handler_timeout_seconds=0.5,
+    )
+
+
+def test_enqueue_job(mock_crud: MagicMock) -> None:
+    @job_handler("greet", GreetingPayload, max_attempts=4)
+    async def greet(payload: GreetingPayload, db_session: Session) -> None:
+        pass
+
+    db_session = MagicMock()
+    enqueue_job(db_session, "greet", GreetingPayload(name="aci"), delay_seconds=5)
+    mock_crud.create_background_job.assert_called_once_with(
+        db_session, "greet", {"name": "aci"}, 4, 5
+    )
+
+    class OtherPayload(BaseModel):
+        name: str
+
+    with pytest.raises(ValueError):
+        enqueue_job(db_session, "greet", OtherPayload(name="aci"))
+    with pytest.raises(ValueError):
+        enqueue_job(db_session, "unknown", GreetingPayload(name="aci"))
+    with pytest.raises(ValueError):
+        job_handler("greet", GreetingPayload)(greet)
+
+
+def test_successful_job_is_deleted(mock_crud: MagicMock) -> None:
+    greeted: list[str] = []
+
+    @job_handler("greet", GreetingPayload)
+    async def greet(payload: GreetingPayload, db_session: Session) -> None:
+        greeted.append(payload.name)
+
+    job = _make_job({"name": "aci"})
+    asyncio.run(_make_worker().run_job(job))
+
+    assert greeted == ["aci"]
+    mock_crud.delete_background_job.assert_called_once()
+    assert mock_crud.delete_background_job.call_args.args[1:] == (job.id, 1)
+    mock_crud.fail_background_job.assert_not_called()
+
+
+def test_failed_job_is_retried_then_dead_lettered(mock_crud: MagicMock) -> None:
+    @job_handler("greet", GreetingPayload)
+    async def greet(payload: GreetingPayload, db_session: Session) -> None:
+        raise RuntimeError("upstream down")
+
+    asyncio.run(_make_worker().run_job(_make_job({"name": "aci"}, attempts=1)))
+    _, job_id, attempts, error, retry_delay_seconds = mock_crud.fail_background_job.call_args.args
+    assert attempts == 1
+    assert error == "RuntimeError: upstream down"
+    assert retry_delay_seconds is not None
+
+    asyncio.run(_make_worker().run_job(_make_job({"name": "aci"}, attempts=3)))
+    assert mock_crud.fail_background_job.call_args.args[4] is None
+
+
+@pytest.mark.parametrize(
+    "payload, attempts",
+    [
+        # invalid payloads are not retried
+        ({"unknown": "field"}, 1),
+        # claimed again after the last attempt timed out
+        ({"name": "aci"}, 4),
+    ],
+)
+def test_job_dead_lettered_without_running(
+    mock_crud: MagicMock, payload: dict, attempts: int
+) -> None:
+    handled = False
+
+    @job_handler("greet", GreetingPayload)
+    async def greet(payload: GreetingPayload, db_session: Session) -> None:
+        nonlocal handled
+        handled = True
+
+    asyncio.run(_make_worker().run_job(_make_job(payload, attempts=attempts)))
+    assert not handled
+    assert mock_crud.fail_background_job.call_args.args[4] is None
+
+
+def test_job_timing_out_is_retried(mock_crud: MagicMock) -> None:
+    @job_handler("greet", GreetingPayload)
+    async def greet(payload: GreetingPayload, db_session: Session) -> None:
+        await asyncio.sleep(10)
+
+    worker = _make_worker()
+    worker.handler_timeout_seconds = 0.01
+    asyncio.run(worker.run_job(_make_job({"name": "aci"})))
+    assert mock_crud.fail_background_job.call_args.args[3] == "job timed out"
+    assert mock_crud.fail_background_job.call_args.args[4] is not None
+
+
+def test_handler_timeout_must_be_less_than_visibility_timeout() -> None:
+    with pytest.raises(ValueError):
+        JobWorker(
+            worker_id="worker",
+            concurrency=2,
+            poll_interval_seconds=0.01,
+            visibility_timeout_seconds=1,
+            handler_timeout_seconds=1,
+        )
+
+
+def test_blocking_handler_runs_in_a_thread(mock_crud: MagicMock) -> None:
+    greeted_in: list[int] = []
+
+    @job_handler("greet", GreetingPayload)
+    def greet(payload: GreetingPayload, db_session: Session) -> None:
+        time.sleep(0.01)
+        greeted_in.append(threading.get_ident())
+
+    async def run() -> None:
+        worker = _make_worker()
+        await asyncio.gather(*(worker.run_job(_make_job({"name": "aci"})) for _ in range(2)))
+
+    asyncio.run(run())
+
+    assert len(greeted_in) == 2
+    assert threading.get_ident() not in greeted_in
+    assert mock_crud.delete_background_job.call_count == 2
+
+
+def test_worker_runs_claimed_jobs_until_stopped(mock_crud: MagicMock) -> None:
+    greeted: list[str] = []
+
+    @job_handler("greet", GreetingPayload)
+    async def greet(payload: GreetingPayload, db_session: Session) -> None:
+        greeted.append(payload.name)
+
+    jobs = [_make_job({"name": name}) for name in ("a", "b", "c")]
+
+    async def run() -> None:
+        worker = _make_worker()
+        claims = iter([jobs[:2], jobs[2:], []])
+        stop = asyncio.Event()
+
+        def claim_jobs(limit: int) -> list[BackgroundJob]:
+            assert limit <= 2
+            claimed = next(claims, [])
+            if not claimed:
+                stop.set()
+            return claimed
+
+        with patch.object(worker, "claim_jobs", side_effect=claim_jobs):
+            await worker.run(stop, shutdown_grace_seconds=1)
+
+    asyncio.run(run())
+    assert sorted(greeted) == ["a", "b", "c"]
+    assert mock_crud.delete_background_job.call_count == 3
+
+
+def test_retry_delay_is_capped() -> None:
+    with (
+        patch("aci.server.config.JOB_QUEUE_RETRY_BACKOFF_BASE_SECONDS", 1.0),
+        patch("aci.server.config.JOB_QUEUE_RETRY_BACKOFF_MAX_SECONDS", 10.0),
+    ):
+        assert all(0 <= get_retry_delay_seconds(1) <= 1 for _ in range(20))
+        assert all(0 <= get_retry_delay_seconds(20) <= 10 for _ in range(20))
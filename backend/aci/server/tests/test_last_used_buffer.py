@@ -0,0 +1,78 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from aci.server.last_used_buffer import LastUsedBuffer
+
+
+def test_record_keeps_latest_timestamp_per_linked_account() -> None:
+    buffer = LastUsedBuffer(flush_interval_seconds=60)
+    linked_account_id_1 = uuid4()
+    linked_account_id_2 = uuid4()
+    now = datetime.now(UTC)
+
+    buffer.record(linked_account_id_1, now)
+    buffer.record(linked_account_id_1, now - timedelta(seconds=5))
+    buffer.record(linked_account_id_1, now + timedelta(seconds=5))
+    buffer.record(linked_account_id_2, now)
+
+    assert buffer.pending_count() == 2
+
+    with (
+        patch(
+            "aci.server.last_used_buffer.utils.get_db_session_factory"
+        ) as mock_get_db_session_factory,
+        patch(
+            "aci.server.last_used_buffer.crud.linked_accounts.bulk_update_linked_accounts_last_used_at"
+        ) as mock_bulk_update,
+    ):
+        mock_db_session = MagicMock()
+        mock_get_db_session_factory.return_value.return_value.__enter__.return_value = (
+            mock_db_session
+        )
+
+        assert buffer.flush() == 2
+
+        mock_bulk_update.assert_called_once_with(
+            mock_db_session,
+            {
+                linked_account_id_1: now + timedelta(seconds=5),
+                linked_account_id_2: now,
+            },
+        )
+        mock_db_session.commit.assert_called_once()
+
+    assert buffer.pending_count() == 0
+
+
+def test_flush_empty_buffer_does_not_touch_db() -> None:
+    buffer = LastUsedBuffer(flush_interval_seconds=60)
+
+    with patch(
+        "aci.server.last_used_buffer.utils.get_db_session_factory"
+    ) as mock_get_db_session_factory:
+        assert buffer.flush() == 0
+        mock_get_db_session_factory.assert_not_called()
+
+
+def test_failed_flush_keeps_timestamps_for_next_flush() -> None:
+    buffer = LastUsedBuffer(flush_interval_seconds=60)
+    linked_account_id = uuid4()
+    now = datetime.now(UTC)
+    buffer.record(linked_account_id, now)
+
+    with (
+        patch("aci.server.last_used_buffer.utils.get_db_session_factory"),
+        patch(
+            "aci.server.last_used_buffer.crud.linked_accounts.bulk_update_linked_accounts_last_used_at",
+            side_effect=Exception("db is down"),
+        ),
+    ):
+        assert buffer.flush() == 0
+
+    # a newer usage recorded while the db was down should win over the re-merged one
+    buffer.record(linked_account_id, now + timedelta(seconds=1))
+    assert buffer.pending_count() == 1
+    assert buffer._last_used_at_by_linked_account_id[linked_account_id] == now + timedelta(
+        seconds=1
+    )
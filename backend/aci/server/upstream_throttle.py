@@ -0,0 +1,228 @@
+"""
+Outbound throttling of function executions, per (app, linked account) and per app.
+
+Upstream APIs report their rate limits in response headers (X-RateLimit-Remaining/Reset,
+RateLimit-Remaining/Reset, Retry-After). The budget left for each (app, linked account) is tracked
+from those headers. Once the upstream says the budget is used up, or asks to retry after some
+time, calls wait until the budget resets if that's within max_wait_seconds, otherwise they fail
+without calling the upstream (instead of wasting a call that would get a 429 anyway).
+
+Apps can also cap the number of concurrent executions with max_concurrency in app.json, extra
+calls queue for a free slot for up to max_wait_seconds.
+
+The state is kept per server process.
+"""
+
+import email.utils
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from uuid import UUID
+
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+# reset header values above this are epoch timestamps (e.g., GitHub), below are delta seconds
+_EPOCH_TIMESTAMP_THRESHOLD = 1_000_000_000
+# how long to back off after a 429 that doesn't say when to retry
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+# budgets are purged once they are stale and there are more than this many of them
+MAX_TRACKED_BUDGETS = 10_000
+
+
+class UpstreamThrottled(Exception):  # noqa: N818
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _UpstreamBudget:
+    # requests left until reset_at as reported by the upstream, None if unknown
+    remaining: int | None = None
+    # epoch seconds
+    reset_at: float = 0.0
+    blocked_until: float = 0.0
+
+    def available_at(self, now: float) -> float:
+        """Epoch seconds from when a call can be sent, now if it can be sent right away"""
+        available_at = max(now, self.blocked_until)
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at > now:
+            available_at = max(available_at, self.reset_at)
+        return available_at
+
+
+class UpstreamThrottle:
+    def __init__(self, max_wait_seconds: float):
+        self.max_wait_seconds = max_wait_seconds
+        self._budgets: dict[tuple[str, UUID], _UpstreamBudget] = {}
+        self._semaphores: dict[str, tuple[int, threading.BoundedSemaphore]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(
+        self, app_name: str, linked_account_id: UUID, max_concurrency: int | None
+    ) -> Iterator[None]:
+        """
+        Wait until a call to the upstream of the app can be sent for the linked account, and hold
+        one of the app's concurrency slots (if capped) while the call is made.
+
+        Raises:
+            UpstreamThrottled: if the call can't be sent within max_wait_seconds.
+        """
+        self._wait_for_budget(app_name, linked_account_id)
+
+        semaphore = self._get_semaphore(app_name, max_concurrency)
+        if semaphore is not None and not semaphore.acquire(timeout=self.max_wait_seconds):
+            raise UpstreamThrottled(
+                f"too many concurrent executions for app={app_name}, "
+                f"max_concurrency={max_concurrency}",
+                retry_after=self.max_wait_seconds,
+            )
+        try:
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    def record_response(
+        self,
+        app_name: str,
+        linked_account_id: UUID,
+        status_code: int,
+        headers: Mapping[str, str],
+    ) -> None:
+        """Update the budget of the (app, linked account) from the upstream's response headers"""
+        now = time.time()
+        remaining = _parse_int(
+            headers.get("x-ratelimit-remaining") or headers.get("ratelimit-remaining")
+        )
+        reset_at = _parse_reset(
+            headers.get("x-ratelimit-reset") or headers.get("ratelimit-reset"), now
+        )
+        retry_after = parse_retry_after(headers.get("retry-after"), now)
+        if retry_after is None and status_code == 429 and reset_at is None:
+            retry_after = DEFAULT_RETRY_AFTER_SECONDS
+
+        if remaining is None and reset_at is None and retry_after is None:
+            return
+
+        with self._lock:
+            budget = self._budgets.setdefault((app_name, linked_account_id), _UpstreamBudget())
+            if remaining is not None:
+                budget.remaining = remaining
+            if reset_at is not None:
+                budget.reset_at = reset_at
+            if retry_after is not None:
+                budget.blocked_until = max(budget.blocked_until, now + retry_after)
+            self._purge_stale_budgets(now)
+
+        if retry_after is not None or remaining == 0:
+            logger.warning(
+                "upstream rate limit reached",
+                extra={
+                    "app_name": app_name,
+                    "linked_account_id": linked_account_id,
+                    "status_code": status_code,
+                    "remaining": remaining,
+                    "reset_at": reset_at,
+                    "retry_after": retry_after,
+                },
+            )
+
+    def _wait_for_budget(self, app_name: str, linked_account_id: UUID) -> None:
+        key = (app_name, linked_account_id)
+        with self._lock:
+            budget = self._budgets.get(key)
+            if budget is None:
+                return
+            now = time.time()
+            wait_seconds = budget.available_at(now) - now
+            if wait_seconds > self.max_wait_seconds:
+                raise UpstreamThrottled(
+                    f"upstream rate limit reached for app={app_name}, "
+                    f"retry after {wait_seconds:.0f} seconds",
+                    retry_after=wait_seconds,
+                )
+            if budget.remaining is not None:
+                if budget.reset_at <= now + wait_seconds:
+                    # the budget has been replenished by the time the call is sent
+                    budget.remaining = None
+                else:
+                    # reserve one request of the budget, so concurrent calls don't all take the
+                    # last one
+                    budget.remaining -= 1
+
+        if wait_seconds > 0:
+            logger.info(
+                "delaying call to upstream until its rate limit resets",
+                extra={
+                    "app_name": app_name,
+                    "linked_account_id": linked_account_id,
+                    "wait_seconds": wait_seconds,
+                },
+            )
+            time.sleep(wait_seconds)
+
+    def _get_semaphore(
+        self, app_name: str, max_concurrency: int | None
+    ) -> threading.BoundedSemaphore | None:
+        if max_concurrency is None:
+            return None
+        with self._lock:
+            existing = self._semaphores.get(app_name)
+            # the cap changed (app.json updated), calls holding the old semaphore release it
+            if existing is None or existing[0] != max_concurrency:
+                existing = (max_concurrency, threading.BoundedSemaphore(max_concurrency))
+                self._semaphores[app_name] = existing
+            return existing[1]
+
+    def _purge_stale_budgets(self, now: float) -> None:
+        if len(self._budgets) <= MAX_TRACKED_BUDGETS:
+            return
+        self._budgets = {
+            key: budget
+            for key, budget in self._budgets.items()
+            if budget.blocked_until > now or budget.reset_at > now
+        }
+
+
+def _parse_int(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def _parse_reset(value: str | None, now: float) -> float | None:
+    """Parse a reset header, either epoch seconds or seconds from now, into epoch seconds"""
+    if value is None:
+        return None
+    try:
+        reset = float(value)
+    except ValueError:
+        return None
+    return reset if reset > _EPOCH_TIMESTAMP_THRESHOLD else now + reset
+
+
+def parse_retry_after(value: str | None, now: float) -> float | None:
+    """Parse a Retry-After header, either seconds or an HTTP date, into seconds from now"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+upstream_throttle = UpstreamThrottle(max_wait_seconds=config.UPSTREAM_THROTTLE_MAX_WAIT_SECONDS)
@@ -0,0 +1,64 @@
+"""
+Worker process of the durable background job queue (see aci/server/job_queue.py), run with
+`python -m aci.server.worker` or `python -m aci.cli worker`. Any number of workers can run
+alongside the server, throughput scales with the number of workers.
+"""
+
+import asyncio
+import os
+import signal
+import socket
+
+import stripe
+from pythonjsonlogger.json import JsonFormatter
+
+from aci.common.logging_setup import get_logger, setup_logging
+from aci.server import config
+from aci.server.job_queue import JobWorker
+from aci.server.routes import billing, webhooks
+from aci.server.sentry import setup_sentry
+
+logger = get_logger(__name__)
+
+# the job handlers are registered when their modules are imported
+JOB_HANDLER_MODULES = [billing, webhooks]
+
+
+async def run_worker() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = JobWorker(
+        worker_id=f"{socket.gethostname()}-{os.getpid()}",
+        concurrency=config.JOB_QUEUE_WORKER_CONCURRENCY,
+        poll_interval_seconds=config.JOB_QUEUE_POLL_INTERVAL_SECONDS,
+        visibility_timeout_seconds=config.JOB_QUEUE_VISIBILITY_TIMEOUT_SECONDS,
+        handler_timeout_seconds=config.JOB_QUEUE_HANDLER_TIMEOUT_SECONDS,
+    )
+    await worker.run(stop, config.JOB_QUEUE_SHUTDOWN_GRACE_SECONDS)
+
+
+def start_worker() -> None:
+    """Run a worker until SIGINT or SIGTERM, logging is set up by the caller."""
+    setup_sentry()
+    stripe.api_key = config.STRIPE_SECRET_KEY
+
+    asyncio.run(run_worker())
+
+
+def main() -> None:
+    setup_logging(
+        formatter=JsonFormatter(
+            "{levelname} {asctime} {name} {message}",
+            style="{",
+            rename_fields={"asctime": "timestamp", "name": "file", "levelname": "level"},
+        ),
+        environment=config.ENVIRONMENT,
+    )
+    start_worker()
+
+
+if __name__ == "__main__":
+    main()
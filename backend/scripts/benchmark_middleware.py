@@ -0,0 +1,167 @@
+"""
+Microbenchmark of the per-request overhead of the server middlewares.
+
+Compares a bare app, the previous BaseHTTPMiddleware based interceptor and rate limit middlewares
+(reimplemented here with the same logic) plus a global SessionMiddleware, and the current pure ASGI
+middlewares. Requests are sent by calling the ASGI app directly, so the numbers only include the
+app and middleware overhead, not the network or the http server. Logging is disabled so the
+numbers don't depend on the log handlers.
+
+Usage (from the backend directory, with the server env vars set):
+    python scripts/benchmark_middleware.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Callable
+
+from limits import RateLimitItemPerDay, RateLimitItemPerSecond
+from limits.aio.storage import MemoryStorage
+from limits.aio.strategies import MovingWindowRateLimiter
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message
+
+from aci.server.context import request_id_ctx_var
+from aci.server.middleware.interceptor import InterceptorMiddleware
+from aci.server.middleware.ratelimit import RateLimitMiddleware
+from aci.server.middleware.session import PathScopedSessionMiddleware
+
+
+class BaseHTTPInterceptorMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        request_id = str(uuid.uuid4())
+        request_id_ctx_var.set(request_id)
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class BaseHTTPRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app: ASGIApp) -> None:
+        super().__init__(app)
+        self.limiter = MovingWindowRateLimiter(MemoryStorage())
+        self.rate_limits = {
+            "ip-per-second": RateLimitItemPerSecond(amount=10**9),
+            "ip-per-day": RateLimitItemPerDay(amount=10**9),
+        }
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        for rate_limit in self.rate_limits.values():
+            await self.limiter.hit(rate_limit, "ip:127.0.0.1")
+        response = await call_next(request)
+        for rate_limit_name, rate_limit in self.rate_limits.items():
+            window_stats = await self.limiter.get_window_stats(rate_limit, "ip:127.0.0.1")
+            response.headers[f"X-RateLimit-Remaining-{rate_limit_name}"] = str(
+                window_stats.remaining
+            )
+        return response
+
+
+class PureASGIRateLimitMiddleware(RateLimitMiddleware):
+    """The current rate limit middleware, with limits that are never hit during the benchmark."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        super().__init__(app)
+        self.rate_limits = {
+            "ip-per-second": RateLimitItemPerSecond(amount=10**9),
+            "ip-per-day": RateLimitItemPerDay(amount=10**9),
+        }
+
+
+async def endpoint(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+
+def _create_app(middleware: list[Middleware]) -> Starlette:
+    return Starlette(routes=[Route("/v1/apps/search", endpoint)], middleware=middleware)
+
+
+def _create_pure_asgi_app() -> Starlette:
+    return _create_app(
+        [
+            Middleware(InterceptorMiddleware),
+            Middleware(
+                PathScopedSessionMiddleware,
+                path_prefixes=["/v1/linked-accounts/oauth2"],
+                secret_key="benchmark",
+            ),
+            Middleware(PureASGIRateLimitMiddleware),
+        ]
+    )
+
+
+async def _send_requests(app: ASGIApp, num_requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/v1/apps/search",
+        "raw_path": b"/v1/apps/search",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"x-api-key", b"benchmark")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("localhost", 8000),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    start = time.perf_counter()
+    for _ in range(num_requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    apps: dict[str, Callable[[], Starlette]] = {
+        "no middleware": lambda: _create_app([]),
+        "BaseHTTPMiddleware + global SessionMiddleware (before)": lambda: _create_app(
+            [
+                Middleware(BaseHTTPInterceptorMiddleware),
+                Middleware(SessionMiddleware, secret_key="benchmark"),
+                Middleware(BaseHTTPRateLimitMiddleware),
+            ]
+        ),
+        "pure ASGI + path scoped SessionMiddleware (after)": _create_pure_asgi_app,
+    }
+
+    async def run() -> None:
+        baseline: float | None = None
+        for name, create_app in apps.items():
+            app = create_app()
+            # warm up, also builds the middleware stack
+            await _send_requests(app, 100)
+            duration = await _send_requests(app, args.requests)
+            per_request_us = duration / args.requests * 1_000_000
+            if baseline is None:
+                baseline = per_request_us
+            print(
+                f"{name:<60} {per_request_us:8.1f} us/request "
+                f"(+{per_request_us - baseline:.1f} us middleware overhead)"
+            )
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
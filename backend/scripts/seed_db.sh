@@ -85,6 +85,12 @@ seed_test_apps() {
 }
 
 seed_all_apps() {
+  if [ "$USE_MOCK" = false ]; then
+    # Seed the database with all Apps and Functions in one go, using each app's .app.secrets.json
+    python -m aci.cli sync-catalog --apps-dir ./apps --skip-dry-run
+    return
+  fi
+
   # Seed the database with Apps
   for app_dir in ./apps/*/; do
     app_file="${app_dir}app.json"